@@ -317,6 +317,10 @@ async def reprocess_audio(
     """
     Reprocess an audio document with different settings.
     
+    Transcription caches are keyed by audio content, so chunks already
+    transcribed with the same settings are reused and only missing chunks
+    are sent to the API.
+    
     Args:
         document_id: ID of the document to reprocess
         model_config: Model configuration to use
@@ -495,6 +499,9 @@ async def clear_transcription_cache(
     """
     Clear cached transcription data for a document.
     
+    Removes the full result and the chunk transcriptions that were cached
+    while transcribing this document.
+    
     Args:
         document_id: ID of the document
         current_user: Current authenticated user
@@ -512,28 +519,18 @@ async def clear_transcription_cache(
                 detail=f"Document {document_id} not found"
             )
 
-        # Clear cache files
+        # Clear cached results and chunks stored for this document
         try:
-            from pathlib import Path
-            import glob
-            
-            cache_dir = Path(settings.STORAGE_PATH) / "cache" / "transcriptions"
-            # Find cache files that might be related to this document
-            cache_files = glob.glob(str(cache_dir / "*.json"))
-            cleared_count = 0
+            from app.utils.transcription_cache import get_transcription_cache
             
-            for cache_file in cache_files:
-                try:
-                    # This is a simple approach - in production you'd want more sophisticated cache key matching
-                    os.remove(cache_file)
-                    cleared_count += 1
-                except Exception as e:
-                    logger.warning(f"Could not remove cache file {cache_file}: {e}")
+            cache = get_transcription_cache()
+            cleared_count = cache.delete_tag(document_id) if cache else 0
             
             return {
                 "status": "success",
-                "message": f"Cleared {cleared_count} cache files",
-                "cleared_files": cleared_count
+                "message": f"Cleared {cleared_count} cache entries",
+                "cleared_entries": cleared_count,
+                "cleared_files": cleared_count  # Deprecated alias of cleared_entries
             }
             
         except Exception as e:
@@ -7,8 +7,8 @@ from app.core.security import verify_token
 from app.models.document import Document, DocumentCreate, DocumentRead
 from app.db.database_service import db_service
 from app.core.config import settings
-# Import the Celery app
-from app.celery_worker import celery
+from app.core.task_queues import PRIORITY_NORMAL, priority_for_size
+from app.utils.task_dedup import enqueue_unique_task
 
 router = APIRouter()
 
@@ -136,9 +136,12 @@ async def upload_document(
             print(f"About to send Celery task for document {document_id}")
             
             # Send the task to Celery
-            task = celery.send_task(
+            # Small uploads go ahead of large ones on the ingestion queue
+            task, _ = enqueue_unique_task(
                 "app.tasks.process_document_tasks.document_processor_hybrid.process_document_hybrid", 
-                args=[document_id]
+                document_id,
+                args=[document_id],
+                priority=priority_for_size(len(file_content))
             )
             
             print(f"Started hybrid document processing for document {document_id}")
@@ -213,6 +216,60 @@ async def get_document(document_id: UUID, user_info = Depends(verify_token)):
             detail=f"Error retrieving document: {str(e)}"
         )
 
+@router.post("/{document_id}/reprocess")
+async def reprocess_document(
+    document_id: UUID,
+    incremental: bool = True,
+    user_info = Depends(verify_token)
+):
+    """
+    Re-ingest a document after its file was replaced or the chunker changed.
+
+    With incremental=true only chunks whose content changed are re-embedded;
+    unchanged chunks keep their rows and embeddings. With incremental=false
+    all chunks and embeddings are rebuilt from scratch.
+
+    If the document is already being processed, the running task's ID is
+    returned with deduplicated=true and no new task is started.
+    """
+    user_id = user_info["user_id"]
+
+    try:
+        document = db_service.get_document(str(document_id), user_id)
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+
+        # A click on reprocess while the document is being processed returns
+        # the running task instead of starting a second one
+        task, deduplicated = enqueue_unique_task(
+            "app.tasks.process_document_tasks.document_processor_hybrid.process_document_hybrid",
+            str(document_id),
+            args=[str(document_id)],
+            kwargs={"incremental": incremental},
+            priority=PRIORITY_NORMAL
+        )
+        if not deduplicated:
+            db_service.update_document_status(str(document_id), "processing")
+
+        return {
+            "status": "processing",
+            "document_id": str(document_id),
+            "task_id": task.id,
+            "incremental": incremental,
+            "deduplicated": deduplicated
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reprocessing document: {str(e)}"
+        )
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(document_id: UUID, user_info = Depends(verify_token)):
     """
@@ -9,8 +9,11 @@ from app.utils.rag_monitoring import (
     PerformanceSnapshot, Alert
 )
 from app.utils.token_cost_tracker import token_cost_tracker
+from app.utils.llm_rate_limiter import get_llm_rate_limiter
+from app.utils.llm_hedging import hedging_policy
 from app.utils.rag_performance_metrics import rag_performance_tracker
 from app.utils.smart_document_classifier import DocumentType
+from app.core.config import settings
 from app.core.security import get_current_user
 
 logger = logging.getLogger(__name__)
@@ -695,6 +698,49 @@ async def get_cost_breakdown(
         raise HTTPException(status_code=500, detail=f"Cost breakdown failed: {str(e)}")
 
 
+@router.get("/llm/rate-limits")
+async def get_llm_rate_limits(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the LLM rate limits, adaptive concurrency and queue wait of this process.
+    """
+    try:
+        limiter = get_llm_rate_limiter()
+        
+        return {
+            "enabled": limiter is not None,
+            "models": limiter.stats() if limiter else {},
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Fout bij ophalen LLM rate limits: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"LLM rate limit statistics failed: {str(e)}")
+
+
+@router.get("/llm/hedging")
+async def get_llm_hedging_statistics(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get hedged LLM call statistics of this process: hedge delays per call
+    kind, hedges fired and won, and the extra token spend.
+    """
+    try:
+        return {
+            "enabled": settings.LLM_HEDGING,
+            "budget_percent": settings.LLM_HEDGE_BUDGET_PERCENT,
+            "fallback": settings.LLM_HEDGE_FALLBACK or None,
+            **hedging_policy.stats(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Fout bij ophalen LLM hedging statistieken: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"LLM hedging statistics failed: {str(e)}")
+
+
 @router.post("/tokens/record-usage")
 async def record_token_usage_detailed(
     provider: str,
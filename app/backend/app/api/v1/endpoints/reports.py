@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 from datetime import datetime
@@ -19,6 +20,8 @@ from app.core.config import settings
 from app.celery_worker import celery
 from app.tasks.generate_report_tasks.structured_rag_pipeline import generate_structured_content_for_section
 from app.tasks.generate_report_tasks.ad_report_task import generate_enhanced_ad_report, get_available_ad_templates
+from app.utils.report_stream import format_sse, get_async_report_stream_redis, iter_report_events, stream_key
+from app.utils.task_dedup import enqueue_unique_task
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -358,8 +361,9 @@ async def create_report(report_data: ReportCreate, use_structured_output: bool =
                 })
             
             # Use Enhanced AD report task
-            task = celery.send_task(
-                "app.tasks.generate_report_tasks.ad_report_task.generate_enhanced_ad_report",
+            task, _ = enqueue_unique_task(
+                generate_enhanced_ad_report.name,
+                str(report_id),
                 args=[str(report_id)]
             )
             
@@ -504,7 +508,11 @@ async def create_enhanced_ad_report(
         print(f"Created enhanced AD report entry: {actual_report_id}")
         
         # Back to enhanced AD report generation with faster Haiku model
-        task_result = generate_enhanced_ad_report.delay(str(actual_report_id))
+        task_result, _ = enqueue_unique_task(
+            generate_enhanced_ad_report.name,
+            str(actual_report_id),
+            args=[str(actual_report_id)]
+        )
         
         print(f"Triggered enhanced AD report generation task: {task_result.id}")
         
@@ -1968,6 +1976,155 @@ async def regenerate_report_section(
             detail=f"Error regenerating section: {str(e)}"
         )
 
+@router.post("/{report_id}/refresh")
+async def refresh_report(
+    report_id: UUID,
+    user_info = Depends(verify_token)
+):
+    """
+    Incrementally refresh an enhanced AD report
+    
+    Regenerates only the sections whose retrieval results or source documents
+    changed since the last generation (e.g. after a new document was added to
+    the case); all other sections are kept.
+    
+    Args:
+        report_id: UUID of the report
+        
+    Returns:
+        Task information for the refresh
+    """
+    user_id = user_info["user_id"]
+    
+    try:
+        # Get report and verify ownership
+        report = db_service.get_report(str(report_id), user_id)
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found"
+            )
+        
+        if not report.get("content"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Report has not been generated yet"
+            )
+        
+        task, deduplicated = enqueue_unique_task(
+            generate_enhanced_ad_report.name,
+            str(report_id),
+            args=[str(report_id)],
+            kwargs={"incremental": True}
+        )
+        
+        if not deduplicated:
+            db_service.update_report(str(report_id), {
+                "status": "processing",
+                "updated_at": datetime.utcnow().isoformat()
+            })
+        
+        return {
+            "success": True,
+            "task_id": task.id,
+            "report_id": str(report_id),
+            "already_running": deduplicated,
+            "message": "Report generation already in progress" if deduplicated else "Started incremental refresh of the report"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error refreshing report: {str(e)}"
+        )
+
+# Report statuses of a run that is still in progress
+GENERATING_STATUSES = ("processing", "generating")
+
+@router.get("/{report_id}/stream")
+async def stream_report(
+    report_id: UUID,
+    request: Request,
+    token: str = None,
+    user_info = Depends(verify_token)
+):
+    """
+    Live section output of a report generation as server-sent events
+    
+    Relays the report's Redis stream (see app.utils.report_stream):
+    section_start, delta, section_done, section_failed and finally
+    report_done. Reconnecting clients resume after the Last-Event-ID header.
+    When the report is not being generated, report_done is sent right away;
+    runs that do not stream sections (optimized reports) only get report_done.
+    
+    Args:
+        report_id: UUID of the report
+        token: Access token; EventSource cannot send an Authorization
+            header, so browsers pass the token as a query parameter
+        
+    Returns:
+        text/event-stream response
+    """
+    if not user_info and token:
+        user_info = await verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+    if not user_info:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required. Pass a Bearer token or the token query parameter.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user_id = user_info["user_id"]
+    
+    report = db_service.get_report(str(report_id), user_id)
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found"
+        )
+    
+    redis_client = get_async_report_stream_redis()
+    if redis_client is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live report streaming is disabled"
+        )
+    
+    last_event_id = request.headers.get("last-event-id")
+    
+    async def events():
+        try:
+            if report.get("status") not in GENERATING_STATUSES and not await redis_client.exists(stream_key(str(report_id))):
+                yield format_sse(None, "report_done", {"status": report.get("status")})
+                return
+            
+            # The stream may still hold the previous run until the worker starts the new one
+            async for entry in iter_report_events(
+                str(report_id), redis_client, last_event_id,
+                skip_finished_run=report.get("status") in GENERATING_STATUSES
+            ):
+                if await request.is_disconnected():
+                    return
+                if entry is None:
+                    # Quiet stream: stop when the run is over without a report_done (e.g. killed worker)
+                    current = db_service.get_report(str(report_id), user_id)
+                    if not current or current.get("status") not in GENERATING_STATUSES:
+                        yield format_sse(None, "report_done", {"status": current.get("status") if current else None})
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(*entry)
+        except Exception as e:
+            logger.error(f"Error streaming report {report_id}: {str(e)}")
+            yield format_sse(None, "error", {"error": "Live updates unavailable, poll the report instead"})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{report_id}/structure")
 async def get_report_structure(
     report_id: UUID,
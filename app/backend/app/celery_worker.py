@@ -1,7 +1,14 @@
 from celery import Celery
+from celery.signals import worker_init
+from kombu import Exchange, Queue
 import os
 import logging
 
+from app.core.config import settings
+from app.core.task_queues import (
+    ALL_QUEUES, PRIORITY_NORMAL, PRIORITY_STEPS, QUEUE_DEFAULT, TASK_ROUTES
+)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,6 +33,25 @@ celery.conf.update(
     task_soft_time_limit=1080,  # 18 minutes warn (increased from 9)
     worker_prefetch_multiplier=1,  # More predictable task execution
     task_acks_late=True,  # Tasks acknowledged after execution
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in ALL_QUEUES],
+    task_default_queue=QUEUE_DEFAULT,
+    task_default_exchange=QUEUE_DEFAULT,
+    task_default_routing_key=QUEUE_DEFAULT,
+    task_routes=TASK_ROUTES,
+    task_default_priority=PRIORITY_NORMAL,
+    task_inherit_parent_priority=True,  # Follow-up tasks (e.g. embeddings) keep the job's priority
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    # Periodic tasks, run by `celery -A app.celery_worker.celery beat`
+    beat_schedule={
+        "sweep-transcription-cache": {
+            "task": "app.tasks.process_audio_tasks.optimized_audio_transcriber.sweep_transcription_cache",
+            "schedule": float(settings.TRANSCRIPTION_CACHE_SWEEP_SECONDS),
+        },
+    },
 )
 
 # Explicitly import and register task modules to avoid circular imports
@@ -34,6 +60,13 @@ import app.tasks.process_document_tasks.document_processor_hybrid
 # Removed old report_generator_hybrid - using Enhanced AD workflow only
 import app.tasks.process_audio_tasks.audio_transcriber
 
+# Import optimized audio tasks (transcription and cache sweeping)
+try:
+    import app.tasks.process_audio_tasks.optimized_audio_transcriber
+    logger.info("Successfully imported optimized audio tasks")
+except Exception as e:
+    logger.warning(f"Could not import optimized audio tasks: {e}")
+
 # Import Enhanced AD report tasks
 try:
     import app.tasks.generate_report_tasks.ad_report_task
@@ -42,4 +75,12 @@ except Exception as e:
     logger.warning(f"Could not import AD report tasks: {e}")
 
 # Force reload of tasks
-celery.loader.import_default_modules()
\ No newline at end of file
+celery.loader.import_default_modules()
+
+
+@worker_init.connect
+def preload_worker(**kwargs):
+    """Warm the worker master before the pool forks (see app.worker_preload)."""
+    if settings.WORKER_PRELOAD:
+        from app.worker_preload import run_preload
+        run_preload()
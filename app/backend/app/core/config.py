@@ -39,12 +39,46 @@ class Settings(BaseModel):
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     ANTHROPIC_MODEL: str = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-20241022")
     
+    # LLM HTTP connection pool (shared by the async Anthropic/OpenAI clients)
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "32"))
+    LLM_HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "60"))
+    LLM_HTTP_TIMEOUT: float = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))  # seconds, per request
+    LLM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+    # Mark the shared case-context prefix of section prompts as cacheable (Anthropic cache_control)
+    LLM_PROMPT_CACHING: bool = os.getenv("LLM_PROMPT_CACHING", "1").lower() in ["1", "true", "yes", "y"]
+    # Cluster-wide LLM rate limits (Redis token buckets) per provider and model;
+    # LLM_RATE_LIMITS overrides per model: "anthropic:claude-3-5-haiku-20241022=4000/400000,openai:gpt-4o=500/30000"
+    LLM_RATE_LIMITING: bool = os.getenv("LLM_RATE_LIMITING", "1").lower() in ["1", "true", "yes", "y"]
+    LLM_RATE_DEFAULT_RPM: int = int(os.getenv("LLM_RATE_DEFAULT_RPM", "500"))  # requests per minute, 0 = unlimited
+    LLM_RATE_DEFAULT_TPM: int = int(os.getenv("LLM_RATE_DEFAULT_TPM", "200000"))  # tokens per minute, 0 = unlimited
+    LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "")
+    LLM_RATE_OUTPUT_ESTIMATE: int = int(os.getenv("LLM_RATE_OUTPUT_ESTIMATE", "1000"))  # output tokens reserved per call
+    # Adaptive (AIMD) concurrency per provider and model and worker process
+    LLM_AIMD_INITIAL: int = int(os.getenv("LLM_AIMD_INITIAL", "8"))
+    LLM_AIMD_MIN: int = int(os.getenv("LLM_AIMD_MIN", "1"))
+    LLM_AIMD_MAX: int = int(os.getenv("LLM_AIMD_MAX", "32"))
+    LLM_AIMD_DECREASE: float = float(os.getenv("LLM_AIMD_DECREASE", "0.5"))  # factor on 429/529
+    LLM_AIMD_COOLDOWN: float = float(os.getenv("LLM_AIMD_COOLDOWN", "5"))  # seconds between decreases
+    # Hedged LLM calls: a section call still running after its learned latency
+    # percentile is duplicated (optionally on LLM_HEDGE_FALLBACK, "provider:model");
+    # the first good response wins. Hedges may add at most LLM_HEDGE_BUDGET_PERCENT tokens.
+    LLM_HEDGING: bool = os.getenv("LLM_HEDGING", "1").lower() in ["1", "true", "yes", "y"]
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # no hedging until learned
+    LLM_HEDGE_WINDOW: int = int(os.getenv("LLM_HEDGE_WINDOW", "200"))  # latency samples kept per section
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "5"))  # seconds
+    LLM_HEDGE_BUDGET_PERCENT: float = float(os.getenv("LLM_HEDGE_BUDGET_PERCENT", "10"))
+    LLM_HEDGE_FALLBACK: str = os.getenv("LLM_HEDGE_FALLBACK", "")
+
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
     # Application Specific Settings
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNK_MAX_TOKENS: int = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "48"))
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     STORAGE_PATH: str = os.getenv("STORAGE_PATH", "/app/storage")
     EMBEDDING_DIMENSION: int = int(os.getenv("EMBEDDING_DIMENSION", "768"))  # Default to 768
@@ -52,15 +86,50 @@ class Settings(BaseModel):
     # RAG Pipeline Settings
     DB_OPERATION_TIMEOUT: int = int(os.getenv("DB_OPERATION_TIMEOUT", "30"))  # seconds
     EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "5"))
+    EMBEDDING_SHARD_SIZE: int = int(os.getenv("EMBEDDING_SHARD_SIZE", "32"))  # chunks per embedding shard task
     API_TIMEOUT: int = int(os.getenv("API_TIMEOUT", "20"))  # seconds
     CHUNKING_TIMEOUT: int = int(os.getenv("CHUNKING_TIMEOUT", "30"))  # seconds
     MAX_RETRY_ATTEMPTS: int = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))  # retrieved context per section prompt
+    CONTEXT_SOURCE_QUOTA: float = float(os.getenv("CONTEXT_SOURCE_QUOTA", "0.6"))  # max share of the budget per document
     
     # Hybrid Approach Settings
     HYBRID_APPROACH: bool = os.getenv("HYBRID_APPROACH", "1").lower() in ["1", "true", "yes", "y"]
     DIRECT_LLM_MODE: bool = os.getenv("DIRECT_LLM_MODE", "0").lower() in ["1", "true", "yes", "y"]
     MAX_DIRECT_DOCUMENT_LENGTH: int = int(os.getenv("MAX_DIRECT_DOCUMENT_LENGTH", "80000"))
-    
+
+    # OCR Cache Settings
+    OCR_CACHE_ENABLED: bool = os.getenv("OCR_CACHE_ENABLED", "1").lower() in ["1", "true", "yes", "y"]
+    OCR_CACHE_MAX_MB: int = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+    OCR_CACHE_MAX_ENTRIES: int = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "50000"))
+
+    # Audio Transcription Settings
+    AUDIO_TRANSCRIPTION_CONCURRENCY: int = int(os.getenv("AUDIO_TRANSCRIPTION_CONCURRENCY", "4"))
+    AUDIO_TRANSCRIPTION_RPM: int = int(os.getenv("AUDIO_TRANSCRIPTION_RPM", "50"))  # Whisper requests per minute
+    AUDIO_CHUNK_MAX_RETRIES: int = int(os.getenv("AUDIO_CHUNK_MAX_RETRIES", "3"))
+
+    # Transcription Cache Settings
+    TRANSCRIPTION_CACHE_MAX_MB: int = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "512"))
+    TRANSCRIPTION_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", "100000"))
+    TRANSCRIPTION_CACHE_MAX_AGE_DAYS: int = int(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_DAYS", "7"))
+    TRANSCRIPTION_CACHE_SWEEP_SECONDS: int = int(os.getenv("TRANSCRIPTION_CACHE_SWEEP_SECONDS", "300"))
+
+    # Report Generation Settings
+    REPORT_SECTION_CONCURRENCY: int = int(os.getenv("REPORT_SECTION_CONCURRENCY", "6"))  # sections generating at once
+    REPORT_SECTION_TIMEOUT: int = int(os.getenv("REPORT_SECTION_TIMEOUT", "120"))  # seconds
+
+    # Report streaming: section text is published to a Redis stream per report (SSE relay)
+    REPORT_STREAMING: bool = os.getenv("REPORT_STREAMING", "1").lower() in ["1", "true", "yes", "y"]
+    REPORT_STREAM_FLUSH_CHARS: int = int(os.getenv("REPORT_STREAM_FLUSH_CHARS", "200"))  # publish deltas at this size
+    REPORT_STREAM_FLUSH_INTERVAL: float = float(os.getenv("REPORT_STREAM_FLUSH_INTERVAL", "0.25"))  # ...or after seconds
+    REPORT_STREAM_PERSIST_INTERVAL: float = float(os.getenv("REPORT_STREAM_PERSIST_INTERVAL", "5"))  # partial content to DB
+    REPORT_STREAM_MAXLEN: int = int(os.getenv("REPORT_STREAM_MAXLEN", "10000"))  # entries kept per stream
+    REPORT_STREAM_TTL: int = int(os.getenv("REPORT_STREAM_TTL", "3600"))  # seconds after the report is done
+
+    # Worker Preload Settings
+    WORKER_PRELOAD: bool = os.getenv("WORKER_PRELOAD", "1").lower() in ["1", "true", "yes", "y"]
+    WORKER_PRELOAD_QUERY_EMBEDDINGS: bool = os.getenv("WORKER_PRELOAD_QUERY_EMBEDDINGS", "1").lower() in ["1", "true", "yes", "y"]
+
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
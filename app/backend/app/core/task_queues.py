@@ -0,0 +1,59 @@
+"""
+Celery queue names, routing and priorities.
+
+Kept free of task imports so the API, the tasks and the worker launcher
+(app.worker_profiles) can use them without loading every task module.
+
+Usage:
+    from app.core.task_queues import QUEUE_OCR, priority_for_pages
+
+    task.apply_async(args=[document_id], queue=QUEUE_OCR, priority=priority_for_pages(pages))
+"""
+
+# Dedicated queues so a long OCR or audio job never blocks ingestion of a
+# small letter or a report. Workers pick their queues via app.worker_profiles.
+QUEUE_DEFAULT = "default"
+QUEUE_INGESTION = "ingestion"
+QUEUE_EMBEDDING = "embedding"
+QUEUE_OCR = "ocr"
+QUEUE_AUDIO = "audio"
+QUEUE_REPORTS = "reports"
+ALL_QUEUES = [QUEUE_DEFAULT, QUEUE_INGESTION, QUEUE_EMBEDDING, QUEUE_OCR, QUEUE_AUDIO, QUEUE_REPORTS]
+
+# Redis priorities: 0 is served first, 9 last. Each step is a separate Redis
+# list per queue, so ten steps give real ordering within a queue.
+PRIORITY_STEPS = list(range(10))
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 4
+PRIORITY_LOW = 8
+
+# Exact task names are matched before the glob patterns
+TASK_ROUTES = {
+    "app.tasks.process_document_tasks.document_processor_hybrid.generate_document_embeddings": {"queue": QUEUE_EMBEDDING},
+    "app.tasks.process_document_tasks.hybrid_processor.generate_document_embeddings": {"queue": QUEUE_EMBEDDING},
+    "app.tasks.process_document_tasks.document_processor_hybrid.embed_chunk_shard": {"queue": QUEUE_EMBEDDING},
+    "app.tasks.process_document_tasks.document_processor_hybrid.finalize_document_embeddings": {"queue": QUEUE_EMBEDDING},
+    "app.tasks.process_document_tasks.document_processor_hybrid.embedding_shards_failed": {"queue": QUEUE_EMBEDDING},
+    "app.tasks.process_document_tasks.*": {"queue": QUEUE_INGESTION},
+    "app.tasks.process_audio_tasks.*": {"queue": QUEUE_AUDIO},
+    "app.tasks.generate_report_tasks.*": {"queue": QUEUE_REPORTS},
+    "generate_optimized_ad_report": {"queue": QUEUE_REPORTS},
+}
+
+
+def priority_for_pages(pages: int) -> int:
+    """Priority for a document job: short documents go ahead of long ones."""
+    if pages <= 5:
+        return PRIORITY_HIGH
+    if pages <= 50:
+        return PRIORITY_NORMAL
+    return PRIORITY_LOW
+
+
+def priority_for_size(size_bytes: int) -> int:
+    """Priority for an uploaded file before its page count is known."""
+    if size_bytes <= 2 * 1024 * 1024:
+        return PRIORITY_HIGH
+    if size_bytes <= 20 * 1024 * 1024:
+        return PRIORITY_NORMAL
+    return PRIORITY_LOW
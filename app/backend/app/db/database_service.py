@@ -468,10 +468,95 @@ class DatabaseService:
             data["error"] = error
             
         return self.update_row("document", document_id, data)
+
+    def merge_document_metadata(self, document_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Merge top-level keys into a document's metadata, keeping the other keys
+        """
+        try:
+            from app.utils.vector_store import UUIDEncoder
+
+            query = """
+                UPDATE document
+                SET metadata = COALESCE(metadata, '{}'::jsonb) || CAST(:metadata AS jsonb),
+                    updated_at = :updated_at
+                WHERE id = :id
+            """
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), {
+                    "id": document_id,
+                    "metadata": json.dumps(updates, cls=UUIDEncoder),
+                    "updated_at": datetime.utcnow()
+                })
+                connection.commit()
+
+                return result.rowcount > 0
+
+        except SQLAlchemyError as e:
+            print(f"Database error in merge_document_metadata: {str(e)}")
+            return False
+
+    def remove_document_metadata_keys(self, document_id: str, keys: List[str]) -> bool:
+        """
+        Remove top-level keys from a document's metadata, keeping the other keys
+        """
+        try:
+            query = """
+                UPDATE document
+                SET metadata = COALESCE(metadata, '{}'::jsonb) - CAST(:keys AS text[]),
+                    updated_at = :updated_at
+                WHERE id = :id
+            """
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), {
+                    "id": document_id,
+                    "keys": list(keys),
+                    "updated_at": datetime.utcnow()
+                })
+                connection.commit()
+
+                return result.rowcount > 0
+
+        except SQLAlchemyError as e:
+            print(f"Database error in remove_document_metadata_keys: {str(e)}")
+            return False
+
+    def append_document_content(self, document_id: str, content: str, reset: bool = False) -> Optional[int]:
+        """
+        Append text to a document's content, or replace it when reset is true.
+        Returns the new content length, or None on failure
+        """
+        try:
+            query = """
+                UPDATE document
+                SET content = CASE WHEN :reset THEN '' ELSE COALESCE(content, '') END || :content,
+                    updated_at = :updated_at
+                WHERE id = :id
+                RETURNING length(content)
+            """
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), {
+                    "id": document_id,
+                    "content": content,
+                    "reset": reset,
+                    "updated_at": datetime.utcnow()
+                })
+                connection.commit()
+
+                row = result.fetchone()
+                return row[0] if row else None
+
+        except SQLAlchemyError as e:
+            print(f"Database error in append_document_content: {str(e)}")
+            return None
         
     # Document chunk methods
     def create_document_chunk(self, document_id: str, content: str, chunk_index: int,
-                             metadata: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+                             metadata: Optional[Dict[str, Any]] = None,
+                             fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Create a new document chunk
         """
@@ -480,6 +565,9 @@ class DatabaseService:
             "content": content,
             "chunk_index": chunk_index
         }
+
+        if fingerprint:
+            data["fingerprint"] = fingerprint
         
         if metadata:
             # Convert metadata to JSON string using UUIDEncoder
@@ -487,6 +575,68 @@ class DatabaseService:
             data["metadata"] = json.dumps(metadata, cls=UUIDEncoder)
             
         return self.create_row("document_chunk", data)
+
+    def create_document_chunks_bulk(self, document_id: str, chunks: List[Dict[str, Any]],
+                                    page_size: int = 500) -> List[Dict[str, Any]]:
+        """
+        Create many document chunks with multi-row INSERTs in a single transaction.
+
+        Each chunk is a dict with "content", "chunk_index" and optional
+        "metadata" and "fingerprint". Returns one {"id", "chunk_index"} dict per
+        created chunk, ordered by chunk_index, or an empty list on failure.
+        """
+        if not chunks:
+            return []
+
+        from psycopg2.extras import execute_values
+        from app.db.postgres import get_raw_connection
+        from app.utils.vector_store import UUIDEncoder
+
+        created_at = datetime.utcnow().isoformat()
+        rows = [
+            (
+                str(uuid.uuid4()),
+                document_id,
+                chunk["content"],
+                chunk["chunk_index"],
+                json.dumps(chunk["metadata"], cls=UUIDEncoder) if chunk.get("metadata") else None,
+                chunk.get("fingerprint"),
+                created_at
+            )
+            for chunk in chunks
+        ]
+
+        conn = None
+        try:
+            conn = get_raw_connection()
+            with conn.cursor() as cursor:
+                returned = execute_values(
+                    cursor,
+                    """
+                        INSERT INTO document_chunk
+                        (id, document_id, content, chunk_index, metadata, fingerprint, created_at)
+                        VALUES %s
+                        RETURNING id, chunk_index
+                    """,
+                    rows,
+                    template="(%s, %s, %s, %s, %s::jsonb, %s, %s)",
+                    page_size=page_size,
+                    fetch=True
+                )
+            conn.commit()
+
+            created = [{"id": str(row[0]), "chunk_index": row[1]} for row in returned]
+            created.sort(key=lambda row: row["chunk_index"])
+            return created
+
+        except Exception as e:
+            print(f"Database error in create_document_chunks_bulk: {str(e)}")
+            if conn is not None:
+                conn.rollback()
+            return []
+        finally:
+            if conn is not None:
+                conn.close()
         
     def update_document_chunk_embedding(self, chunk_id: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
         """
@@ -542,6 +692,175 @@ class DatabaseService:
                 print(f"Failed to decode chunk metadata JSON: {chunk['metadata']}")
                 
         return chunk
+
+    def get_document_chunks_bulk(self, document_id: str,
+                                 chunk_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get the chunks of a document in one query, ordered by chunk_index.
+
+        Optionally restricted to chunk_ids. Metadata is returned as a dict.
+        """
+        try:
+            query = """
+                SELECT id, document_id, content, chunk_index, metadata
+                FROM document_chunk
+                WHERE document_id = :document_id
+            """
+            params: Dict[str, Any] = {"document_id": document_id}
+
+            if chunk_ids is not None:
+                query += " AND CAST(id AS TEXT) = ANY(:ids)"
+                params["ids"] = [str(chunk_id) for chunk_id in chunk_ids]
+
+            query += " ORDER BY chunk_index"
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), params)
+                chunks = [self._row_to_dict(row) for row in result.fetchall()]
+
+            for chunk in chunks:
+                if isinstance(chunk.get("metadata"), str):
+                    try:
+                        chunk["metadata"] = json.loads(chunk["metadata"])
+                    except json.JSONDecodeError:
+                        print(f"Failed to decode chunk metadata JSON: {chunk['metadata']}")
+
+            return chunks
+
+        except SQLAlchemyError as e:
+            print(f"Database error in get_document_chunks_bulk: {str(e)}")
+            return []
+
+    def get_chunks_for_documents(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the chunk texts of several documents in one query, ordered by
+        document and chunk_index
+        """
+        if not document_ids:
+            return []
+
+        try:
+            query = """
+                SELECT id, document_id, content, chunk_index
+                FROM document_chunk
+                WHERE CAST(document_id AS TEXT) = ANY(:document_ids)
+                ORDER BY document_id, chunk_index
+            """
+
+            with self.engine.connect() as connection:
+                result = connection.execute(
+                    text(query), {"document_ids": [str(document_id) for document_id in document_ids]}
+                )
+                return [self._row_to_dict(row) for row in result.fetchall()]
+
+        except SQLAlchemyError as e:
+            print(f"Database error in get_chunks_for_documents: {str(e)}")
+            return []
+
+    def get_document_chunk_ids(self, document_id: str) -> List[str]:
+        """
+        Get the IDs of all chunks of a document, ordered by chunk_index
+        """
+        try:
+            query = "SELECT id FROM document_chunk WHERE document_id = :document_id ORDER BY chunk_index"
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), {"document_id": document_id})
+                return [str(row[0]) for row in result.fetchall()]
+
+        except SQLAlchemyError as e:
+            print(f"Database error in get_document_chunk_ids: {str(e)}")
+            return []
+
+    def get_embedded_chunk_ids(self, document_id: str) -> set:
+        """
+        Get the IDs of all chunks of a document that have a stored embedding
+        """
+        try:
+            query = "SELECT chunk_id FROM document_embeddings WHERE document_id = :document_id"
+
+            with self.engine.connect() as connection:
+                result = connection.execute(text(query), {"document_id": document_id})
+                return {str(row[0]) for row in result.fetchall()}
+
+        except SQLAlchemyError as e:
+            print(f"Database error in get_embedded_chunk_ids: {str(e)}")
+            return set()
+
+    def delete_document_chunks(self, document_id: str, chunk_ids: List[str]) -> int:
+        """
+        Delete specific chunks of a document together with their embeddings
+        """
+        if not chunk_ids:
+            return 0
+
+        try:
+            ids = [str(chunk_id) for chunk_id in chunk_ids]
+
+            with self.engine.connect() as connection:
+                connection.execute(
+                    text("DELETE FROM document_embeddings WHERE document_id = :document_id AND chunk_id = ANY(:ids)"),
+                    {"document_id": document_id, "ids": ids}
+                )
+                result = connection.execute(
+                    text("DELETE FROM document_chunk WHERE document_id = :document_id AND CAST(id AS TEXT) = ANY(:ids)"),
+                    {"document_id": document_id, "ids": ids}
+                )
+                connection.commit()
+
+                return result.rowcount
+
+        except SQLAlchemyError as e:
+            print(f"Database error in delete_document_chunks: {str(e)}")
+            return 0
+
+    def update_document_chunk_positions(self, document_id: str, updates: List[Dict[str, Any]]) -> int:
+        """
+        Move unchanged chunks to their new position after re-chunking a document.
+
+        Each update is a dict with "id", "chunk_index" and "metadata". The stored
+        embedding keeps its vector; only its metadata copy is refreshed.
+        """
+        if not updates:
+            return 0
+
+        try:
+            from app.utils.vector_store import UUIDEncoder
+
+            params = [
+                {
+                    "id": str(update["id"]),
+                    "document_id": document_id,
+                    "chunk_index": update["chunk_index"],
+                    "metadata": json.dumps(update.get("metadata") or {}, cls=UUIDEncoder)
+                }
+                for update in updates
+            ]
+
+            with self.engine.connect() as connection:
+                connection.execute(
+                    text("""
+                        UPDATE document_chunk
+                        SET chunk_index = :chunk_index, metadata = CAST(:metadata AS JSONB)
+                        WHERE CAST(id AS TEXT) = :id AND document_id = :document_id
+                    """),
+                    params
+                )
+                connection.execute(
+                    text("""
+                        UPDATE document_embeddings
+                        SET metadata = CAST(:metadata AS JSONB)
+                        WHERE chunk_id = :id AND document_id = :document_id
+                    """),
+                    params
+                )
+                connection.commit()
+
+            return len(params)
+
+        except SQLAlchemyError as e:
+            print(f"Database error in update_document_chunk_positions: {str(e)}")
+            return 0
     def similarity_search(self, query_embedding: List[float], case_id: str,
                          match_threshold: float = 0.5, match_count: int = 10) -> List[Dict[str, Any]]:
         """
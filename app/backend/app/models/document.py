@@ -74,6 +74,7 @@ class DocumentChunk(TimeStampedModel, table=True):
     chunk_index: int
     chunk_metadata: Optional[Dict[str, Any]] = Field(default=None, sa_type=JSON)  # JSON field for metadata
     embedding_id: Optional[str] = Field(default=None)  # ID in vector database
+    fingerprint: Optional[str] = Field(default=None)  # Hash of normalized content + chunker version
     
     # Relationships
     document: Document = Relationship(back_populates="chunks")
@@ -16,20 +16,25 @@ import logging
 import time
 from datetime import datetime
 from uuid import UUID
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import asyncio
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from app.celery_worker import celery
 from app.db.database_service import get_database_service
 from app.utils.ad_report_template import (
     get_enhanced_ad_template, 
     get_fml_rubrieken_detailed,
+    get_section_dependencies,
     get_standard_questions,
     validate_ad_report_completeness
 )
+from app.tasks.generate_report_tasks.report_context import build_report_context
+from app.tasks.generate_report_tasks.section_scheduler import execute_section_dag
+from app.tasks.generate_report_tasks.section_sources import stale_reason
+from app.utils.report_stream import ReportStreamPublisher, get_report_stream_redis
+from app.utils.task_dedup import deduplicated_task
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -153,9 +158,35 @@ def create_ad_specific_prompt(section_id: str, section_info: dict, user_profile:
     Returns:
         Specialized prompt for AD report section
     """
+    shared_prefix, section_suffix = create_ad_prompt_parts(
+        section_id, section_info, user_profile, fml_context, extracted_fields
+    )
+    return shared_prefix + "\n" + section_suffix
+
+
+def create_ad_prompt_parts(section_id: str, section_info: dict, user_profile: dict = None, fml_context: dict = None, extracted_fields: dict = None, report_date: str = None) -> Tuple[str, str]:
+    """
+    Create the AD-specific prompt as a shared prefix and a section suffix
+
+    The prefix (professional requirements, report date, author profile) is
+    the same for every section of a report, so it can be cached by the LLM
+    provider together with the case documents; everything that depends on
+    the section goes into the suffix.
+
+    Args:
+        section_id: The section being generated
+        section_info: Section metadata from template
+        user_profile: User profile information
+        fml_context: FML rubrieken context if applicable
+        extracted_fields: Extracted structured fields from documents
+        report_date: Report date to put in the prompt (default: today)
+
+    Returns:
+        (shared_prefix, section_suffix)
+    """
 
     # Get report base date for reference
-    current_date = datetime.utcnow().strftime("%d-%m-%Y")
+    current_date = report_date or datetime.utcnow().strftime("%d-%m-%Y")
     
     # Base professional prompt
     base_prompt = f"""Je bent een gecertificeerd arbeidsdeskundige (CRA - Certified Registered Occupational Expert) die een professioneel arbeidsdeskundig rapport opstelt volgens Nederlandse AD-standaarden en de richtlijnen van het Nederlands Register Arbeidsdeskundigen (NRA).
@@ -168,8 +199,6 @@ DATUM RICHTLIJNEN:
 - Documentonderzoek: enkele dagen eerder
 - Zorg voor logische chronologie van activiteiten
 
-Schrijf de sectie '{section_info.get('title', section_id)}' conform professionele arbeidsdeskundige rapportage eisen volgens de Wet Verbetering Poortwachter (WVP), WIA en UWV-procedures.
-
 FUNDAMENTELE PROFESSIONELE EISEN:
 - Gebruik uitsluitend objectieve, feitelijke en meetbare taal
 - Volg de officiële Nederlandse arbeidsdeskundige terminologie en classificaties
@@ -442,236 +471,190 @@ GENEREER VOLLEDIGE CONTENT:
         
         base_prompt += profile_context
 
-    return base_prompt + "\n" + section_prompt
+    section_header = f"""
+Schrijf de sectie '{section_info.get('title', section_id)}' conform professionele arbeidsdeskundige rapportage eisen volgens de Wet Verbetering Poortwachter (WVP), WIA en UWV-procedures.
+"""
+    return base_prompt, section_header + section_prompt
 
 
-def define_execution_phases(sections_by_order):
+def record_section_result(section_id, section_info, result, error, content_dict, metadata_dict):
     """
-    Define 5-phase execution strategy based on dependencies
+    Store a generated section, or a placeholder if generation failed
 
     Args:
-        sections_by_order: List of (section_id, section_info) tuples sorted by order
-
-    Returns:
-        List of phase configurations with execution mode and section assignments
+        section_id: ID of the section
+        section_info: Section metadata from template
+        result: Result of ADReportSectionGenerator.generate_section, or None
+        error: Error message ("timeout" for a timed-out section), or None
+        content_dict: OrderedDict to store results
+        metadata_dict: Dict to store metadata
     """
-    # Convert sections_by_order to a dict for easy lookup
-    sections_dict = dict(sections_by_order)
-
-    return [
-        {
-            'name': 'Setup & Introduction',
-            'mode': 'sequential',
-            'sections': [
-                ('voorblad', sections_dict.get('voorblad')),
-                ('inhoudsopgave', sections_dict.get('inhoudsopgave')),
-                ('samenvatting', sections_dict.get('samenvatting')),
-                ('vraagstelling', sections_dict.get('vraagstelling')),
-                ('ondernomen_activiteiten', sections_dict.get('ondernomen_activiteiten'))
-            ]
-        },
-        {
-            'name': 'Data Collection',
-            'mode': 'parallel',
-            'max_workers': 6,
-            'sections': [
-                ('gegevensverzameling_voorgeschiedenis', sections_dict.get('gegevensverzameling_voorgeschiedenis')),
-                ('gegevensverzameling_werkgever', sections_dict.get('gegevensverzameling_werkgever')),
-                ('gegevensverzameling_werknemer', sections_dict.get('gegevensverzameling_werknemer')),
-                ('gesprek_werkgever', sections_dict.get('gesprek_werkgever')),
-                ('gesprek_werknemer', sections_dict.get('gesprek_werknemer')),
-                ('gesprek_gezamenlijk', sections_dict.get('gesprek_gezamenlijk'))
-            ]
-        },
-        {
-            'name': 'Function Analysis',
-            'mode': 'parallel',
-            'max_workers': 2,
-            'sections': [
-                ('belastbaarheid', sections_dict.get('belastbaarheid')),
-                ('eigen_functie', sections_dict.get('eigen_functie'))
-            ]
-        },
-        {
-            'name': 'AD Vision Analysis',
-            'mode': 'parallel',
-            'max_workers': 5,
-            'sections': [
-                ('visie_ad_eigen_werk', sections_dict.get('visie_ad_eigen_werk')),
-                ('visie_ad_aanpassing', sections_dict.get('visie_ad_aanpassing')),
-                ('visie_ad_ander_werk_eigen', sections_dict.get('visie_ad_ander_werk_eigen')),
-                ('visie_ad_ander_werk_extern', sections_dict.get('visie_ad_ander_werk_extern')),
-                ('visie_ad_duurzaamheid', sections_dict.get('visie_ad_duurzaamheid'))
-            ]
-        },
-        {
-            'name': 'Conclusions',
-            'mode': 'sequential',
-            'sections': [
-                ('advies', sections_dict.get('advies')),
-                ('conclusie', sections_dict.get('conclusie')),
-                ('vervolg', sections_dict.get('vervolg')),
-                ('bijlagen', sections_dict.get('bijlagen'))
-            ]
+    if error == "timeout":
+        content_dict[section_id] = "Timeout tijdens generatie"
+        metadata_dict['sections'][section_id] = {
+            'generated_at': datetime.utcnow().isoformat(),
+            'approach': 'timeout',
+            'error': 'Section generation timed out',
+            'title': section_info.get('title', section_id)
+        }
+    elif error:
+        content_dict[section_id] = f"Fout bij genereren van sectie '{section_info.get('title', section_id)}'. Handmatige aanvulling nodig."
+        metadata_dict['sections'][section_id] = {
+            'generated_at': datetime.utcnow().isoformat(),
+            'approach': 'failed',
+            'error': error,
+            'title': section_info.get('title', section_id)
         }
-    ]
+    else:
+        content_dict[section_id] = result['content']
+        metadata_dict['sections'][section_id] = {
+            'generated_at': datetime.utcnow().isoformat(),
+            'approach': result['approach'],
+            'title': result['title'],
+            'order': result['order']
+        }
+        if result.get('context_stats'):
+            # Retrieved context tokens used versus the section budget
+            metadata_dict['sections'][section_id]['context'] = result['context_stats']
+        if result.get('sources'):
+            # Chunks/documents the section was built from, for incremental refresh
+            metadata_dict['sections'][section_id]['sources'] = result['sources']
+
+        # Track FML generation
+        if section_id == "belastbaarheid" and result.get('fml_generated'):
+            metadata_dict['fml_rubrieken_generated'] = True
 
 
-def execute_sequential(sections, generator, content_dict, metadata_dict, document_ids, case_id):
+def execute_sections(sections_by_order, generator, content_dict, metadata_dict, document_ids, case_id, stream=None):
     """
-    Execute sections sequentially
+    Generate all sections as a dependency DAG (see section_scheduler)
+
+    Each section starts as soon as the sections it depends on are done, with
+    at most REPORT_SECTION_CONCURRENCY sections generating at once. Results
+    are stored in template order; the schedule (critical path, idle time) is
+    stored in metadata_dict['schedule'].
 
     Args:
-        sections: List of (section_id, section_info) tuples
+        sections_by_order: List of (section_id, section_info) tuples sorted by order
         generator: ADReportSectionGenerator instance
         content_dict: OrderedDict to store results
         metadata_dict: Dict to store metadata
         document_ids: List of document IDs to use
         case_id: ID of the case
+        stream: Optional ReportStreamPublisher; finished and failed sections
+            are published to it as soon as they are done
     """
-    for section_id, section_info in sections:
-        if section_info is None:
-            continue
-
+    def run_section(section_id, section_info):
+        logger.info(f"Generating section: {section_id}")
         try:
-            logger.info(f"Generating section: {section_id}")
-
             result = generator.generate_section(
                 section_id=section_id,
                 section_info=section_info,
                 document_ids=document_ids,
                 case_id=case_id
             )
-
-            # Store results (thread-safe for sequential)
-            content_dict[section_id] = result['content']
-            metadata_dict['sections'][section_id] = {
-                'generated_at': datetime.utcnow().isoformat(),
-                'approach': result['approach'],
-                'title': result['title'],
-                'order': result['order']
-            }
-
-            # Track FML generation
-            if section_id == "belastbaarheid" and result.get('fml_generated'):
-                metadata_dict['fml_rubrieken_generated'] = True
-
-            logger.info(f"✓ Section {section_id} generated using {result['approach']}")
-
-        except Exception as section_error:
-            logger.error(f"Error generating section {section_id}: {str(section_error)}")
-            content_dict[section_id] = f"Fout bij genereren van sectie '{section_info.get('title', section_id)}'. Handmatige aanvulling nodig."
-            metadata_dict['sections'][section_id] = {
-                'generated_at': datetime.utcnow().isoformat(),
-                'approach': 'failed',
-                'error': str(section_error),
-                'title': section_info.get('title', section_id)
-            }
-
-
-def execute_parallel(sections, generator, content_dict, metadata_dict, max_workers, document_ids, case_id):
+        except Exception as e:
+            if stream:
+                stream.fail_section(section_id, str(e))
+            raise
+        if stream:
+            stream.finish_section(section_id, result['content'], result['approach'])
+        logger.info(f"✓ Section {section_id} generated using {result['approach']}")
+        return result
+
+    outcomes, schedule = execute_section_dag(
+        sections_by_order,
+        get_section_dependencies(),
+        run_section,
+        max_concurrency=settings.REPORT_SECTION_CONCURRENCY,
+        section_timeout=settings.REPORT_SECTION_TIMEOUT
+    )
+
+    for section_id, section_info in sections_by_order:
+        result, error = outcomes[section_id]
+        record_section_result(section_id, section_info, result, error, content_dict, metadata_dict)
+
+    metadata_dict['schedule'] = schedule
+    logger.info(
+        f"Critical path ({schedule['critical_path_seconds']:.2f}s of {schedule['makespan_seconds']:.2f}s): "
+        f"{' -> '.join(schedule['critical_path'])}"
+    )
+    logger.info(
+        f"Section slots idle {schedule['idle_slot_seconds']:.2f}s "
+        f"(utilization {schedule['utilization']:.0%} of {schedule['max_concurrency']} slots)"
+    )
+
+
+def plan_incremental_refresh(previous_report, sections_by_order, generator, document_ids, case_id):
     """
-    Execute sections in parallel using ThreadPoolExecutor
+    Decide which sections of an existing report must be regenerated
+
+    For every section the current sources are computed (retrieval is re-run,
+    no LLM calls) and compared with the sources recorded at the last
+    generation (see section_sources). Sections without recorded sources,
+    failed sections and sections that are not in the report yet are always
+    regenerated.
 
     Args:
-        sections: List of (section_id, section_info) tuples
+        previous_report: Report row with the previous content and metadata
+        sections_by_order: List of (section_id, section_info) tuples sorted by order
         generator: ADReportSectionGenerator instance
-        content_dict: OrderedDict to store results (thread-safe writes)
-        metadata_dict: Dict to store metadata (thread-safe writes)
-        max_workers: Number of concurrent threads
         document_ids: List of document IDs to use
         case_id: ID of the case
-    """
-    write_lock = Lock()  # Protect shared dict writes
-
-    def generate_with_timeout(section_id, section_info):
-        """
-        Wrapper to generate a section with timeout handling
-        """
-        try:
-            result = generator.generate_section(
-                section_id=section_id,
-                section_info=section_info,
-                document_ids=document_ids,
-                case_id=case_id
-            )
-
-            return (section_id, section_info, result, None)
-
-        except Exception as e:
-            logger.error(f"Error in section {section_id}: {str(e)}")
-            return (section_id, section_info, None, str(e))
-
-    # Filter out None sections
-    valid_sections = [(sid, sinfo) for sid, sinfo in sections if sinfo is not None]
-
-    # Submit all tasks to thread pool
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all sections
-        future_to_section = {
-            executor.submit(generate_with_timeout, section_id, section_info): section_id
-            for section_id, section_info in valid_sections
-        }
-
-        # Collect results as they complete
-        for future in as_completed(future_to_section, timeout=120):
-            section_id = future_to_section[future]
 
-            try:
-                section_id, section_info, result, error = future.result(timeout=120)
-
-                # Thread-safe write to shared dicts
-                with write_lock:
-                    if error:
-                        # Store error placeholder
-                        content_dict[section_id] = f"Fout: {error}"
-                        metadata_dict['sections'][section_id] = {
-                            'generated_at': datetime.utcnow().isoformat(),
-                            'approach': 'failed',
-                            'error': error,
-                            'title': section_info.get('title', section_id)
-                        }
-                    else:
-                        # Store successful result
-                        content_dict[section_id] = result['content']
-                        metadata_dict['sections'][section_id] = {
-                            'generated_at': datetime.utcnow().isoformat(),
-                            'approach': result['approach'],
-                            'title': result['title'],
-                            'order': result['order']
-                        }
+    Returns:
+        (stale, reused): stale maps section_id to the reason it is
+        regenerated; reused lists the section IDs whose content is kept
+    """
+    previous_content = previous_report.get("content") or {}
+    previous_metadata = previous_report.get("report_metadata") or previous_report.get("metadata") or {}
+    previous_sections = previous_metadata.get("sections", {})
 
-                        # Track FML generation
-                        if section_id == "belastbaarheid" and result.get('fml_generated'):
-                            metadata_dict['fml_rubrieken_generated'] = True
+    def check(section):
+        section_id, section_info = section
+        previous = previous_sections.get(section_id)
+        if section_id not in previous_content or not previous or not previous.get("sources"):
+            return stale_reason(previous if section_id in previous_content else None, None)
+        current = generator.current_sources(section_id, section_info, document_ids, case_id, previous["sources"])
+        return stale_reason(previous, current)
 
-                logger.info(f"✓ Section {section_id} completed")
+    with ThreadPoolExecutor(max_workers=settings.REPORT_SECTION_CONCURRENCY, thread_name_prefix="refresh-check") as pool:
+        reasons = list(pool.map(check, sections_by_order))
 
-            except TimeoutError:
-                logger.error(f"✗ Section {section_id} timed out")
-                with write_lock:
-                    content_dict[section_id] = "Timeout tijdens generatie"
-                    metadata_dict['sections'][section_id] = {
-                        'generated_at': datetime.utcnow().isoformat(),
-                        'approach': 'timeout',
-                        'error': 'Section generation timed out'
-                    }
+    stale = {section_id: reason for (section_id, _), reason in zip(sections_by_order, reasons) if reason}
+    reused = [section_id for section_id, _ in sections_by_order if section_id not in stale]
+    return stale, reused
 
 
 @celery.task
-def generate_enhanced_ad_report(report_id: str):
+@deduplicated_task("report_id")
+def generate_enhanced_ad_report(report_id: str, incremental: bool = False):
     """
     Generate an enhanced AD report using professional analysis-based template
     
     This task implements the comprehensive AD report structure identified through
     analysis of 4 professional AD reports.
     
+    Only one task per report runs at a time; a duplicate returns
+    {"status": "duplicate", "task_id": <in-flight task>} (see task_dedup).
+
+    With incremental=True an already generated report is refreshed: only the
+    sections whose prompt inputs, retrieval results or source documents
+    changed since the last run are regenerated, the other sections are kept
+    (see plan_incremental_refresh).
+
+    Section text is streamed to the report's Redis stream while it is
+    generated and the partial content is persisted periodically (see
+    report_stream); GET /reports/{id}/stream relays it to the browser.
+
     Args:
         report_id: UUID of the report to generate
+        incremental: Regenerate only the sections whose sources changed
         
     Returns:
         Dict with generation results
     """
+    stream = None
     try:
         logger.info(f"Starting enhanced AD report generation for report {report_id}")
         
@@ -756,49 +739,75 @@ def generate_enhanced_ad_report(report_id: str):
         )
 
         total_sections = len(sections_by_order)
-        logger.info(f"Generating {total_sections} sections using parallel processing")
+        logger.info(f"Generating {total_sections} sections using the section dependency DAG")
+
+        # Snapshot the report inputs once; all section workers share it read-only
+        report_context = build_report_context(
+            report_id=report_id,
+            case_id=case_id,
+            documents=documents,
+            db_service=db_service,
+            user_profile=user_profile,
+            extracted_fields=extracted_fields,
+            fml_context=fml_context
+        )
+        report_metadata["context_snapshot"] = report_context.stats()
+
+        # Live progress: stream section text and persist partial content
+        # (on top of the content that is kept by an incremental refresh)
+        base_content = dict(report.get("content") or {}) if incremental else {}
+
+        def persist_partial(sections):
+            db_service.update_report(report_id, {
+                "content": {**base_content, **sections},
+                "updated_at": datetime.utcnow().isoformat()
+            })
+
+        stream = ReportStreamPublisher(report_id, get_report_stream_redis(), persist=persist_partial)
 
         # Initialize section generator
         from app.tasks.generate_report_tasks.section_generator import ADReportSectionGenerator
 
-        section_generator = ADReportSectionGenerator(
-            user_profile=user_profile,
-            fml_context=fml_context,
-            extracted_fields=extracted_fields
-        )
+        section_generator = ADReportSectionGenerator(report_context=report_context, stream=stream)
 
         # Record total report generation start time
         report_start_time = time.time()
 
-        # PARALLEL IMPLEMENTATION: Execute sections in 5 phases
-        phases = define_execution_phases(sections_by_order)
-
-        for phase_num, phase in enumerate(phases, 1):
-            phase_start = time.time()
-            logger.info(f"\n=== Phase {phase_num}/{len(phases)}: {phase['name']} ===")
-
-            if phase['mode'] == 'sequential':
-                execute_sequential(
-                    phase['sections'],
-                    section_generator,
-                    report_content,
-                    report_metadata,
-                    document_ids,
-                    case_id
-                )
-            else:
-                execute_parallel(
-                    phase['sections'],
-                    section_generator,
-                    report_content,
-                    report_metadata,
-                    phase['max_workers'],
-                    document_ids,
-                    case_id
-                )
+        # Incremental refresh: keep the sections whose sources did not change
+        sections_to_generate = sections_by_order
+        if incremental and report.get("content"):
+            stale, reused = plan_incremental_refresh(report, sections_by_order, section_generator, document_ids, case_id)
+            previous_metadata = report.get("report_metadata") or report.get("metadata") or {}
+            for section_id, _ in sections_by_order:
+                # Pre-fill in template order; regenerated sections overwrite their slot
+                report_content[section_id] = report["content"].get(section_id)
+                if section_id in reused:
+                    report_metadata["sections"][section_id] = previous_metadata["sections"][section_id]
+            if "belastbaarheid" in reused:
+                report_metadata["fml_rubrieken_generated"] = previous_metadata.get("fml_rubrieken_generated", False)
+            sections_to_generate = [(section_id, info) for section_id, info in sections_by_order if section_id in stale]
+            report_metadata["refresh"] = {
+                "mode": "incremental",
+                "previous_generation": previous_metadata.get("generation_completed"),
+                "regenerated": stale,
+                "reused": reused,
+                "check_seconds": round(time.time() - report_start_time, 3)
+            }
+            logger.info(
+                f"Incremental refresh of report {report_id}: regenerating {len(stale)}/{len(sections_by_order)} sections "
+                f"({', '.join(f'{sid}: {reason}' for sid, reason in stale.items()) or 'none'})"
+            )
 
-            phase_duration = time.time() - phase_start
-            logger.info(f"Phase {phase_num} completed in {phase_duration:.2f}s")
+        # Execute sections as a dependency DAG
+        execute_sections(
+            sections_to_generate,
+            section_generator,
+            report_content,
+            report_metadata,
+            document_ids,
+            case_id,
+            stream=stream
+        )
 
         # OLD SEQUENTIAL IMPLEMENTATION - Kept for reference
         """
@@ -989,7 +998,11 @@ def generate_enhanced_ad_report(report_id: str):
             "updated_at": datetime.utcnow().isoformat()
         }
         
+        # Stop partial persistence first so a late section cannot overwrite
+        # the final content, then tell stream clients the report is done
+        stream.close()
         db_service.update_report(report_id, update_data)
+        stream.finish("generated")
         
         # Calculate total report generation time
         total_duration = time.time() - report_start_time
@@ -1012,11 +1025,15 @@ def generate_enhanced_ad_report(report_id: str):
         logger.error(f"Error generating enhanced AD report {report_id}: {str(e)}")
         
         # Update report status to failed
+        if stream:
+            stream.close()
         db_service.update_report(report_id, {
             "status": "failed",
             "error": "Enhanced AD report generation failed",
             "updated_at": datetime.utcnow().isoformat()
         })
+        if stream:
+            stream.finish("failed")
         
         # Re-raise for Celery task failure
         raise
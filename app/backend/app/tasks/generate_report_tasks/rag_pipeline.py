@@ -1,7 +1,7 @@
 """
 RAG pipeline for generating report sections with hybrid approach support
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.core.config import settings
 from app.db.database_service import get_database_service
 import logging
@@ -13,8 +13,10 @@ from app.utils.llm_provider import (
     generate_query_embedding
 )
 from app.utils.hybrid_search import hybrid_search_documents, generate_context_from_results
+from app.utils.context_packer import PackedContext, pack_context
 from app.utils.quality_controller import AutomaticQualityController
 from app.utils.rag_cache import cached
+from app.tasks.generate_report_tasks.section_sources import chunk_fingerprints
 
 # Configure the logger
 logging.basicConfig(level=logging.INFO)
@@ -61,6 +63,69 @@ def get_adaptive_threshold(section_id: str, query_count: int) -> float:
     
     return final_threshold
 
+# Advanced query formulation for Dutch labor expert contexts
+# Formulated based on domain knowledge and real-world work reintegration documents
+SECTION_QUERIES = {
+    "samenvatting": [
+        # Personal and demographic information
+        "persoonsgegevens leeftijd geslacht opleiding werkervaring cliënt",
+        # Background and case history
+        "voorgeschiedenis arbeidssituatie ziektegeschiedenis werknemer",
+        # Reason for assessment
+        "aanleiding arbeidsdeskundig onderzoek arbeidsmogelijkheden re-integratie",
+        # Current status
+        "huidige situatie functioneren dagbesteding activiteiten belastbaarheid"
+    ],
+    "belastbaarheid": [
+        # Physical capacity with specific details
+        "fysieke belastbaarheid tillen dragen duwen trekken bukken zitten staan lopen",
+        # Cognitive and mental capacity
+        "mentale belastbaarheid concentratie aandacht geheugen informatieverwerking stress",
+        # Social functioning
+        "sociale belastbaarheid communicatie samenwerking instructies feedback",
+        # Functional capacity assessment
+        "functionele mogelijkheden inzetbaarheid belastingpunten FML Functionele Mogelijkhedenlijst"
+    ],
+    "visie_ad": [
+        # Professional assessment
+        "visie arbeidsdeskundige professionele beoordeling analyse",
+        # Conclusions and advice
+        "conclusies adviezen aanbevelingen arbeidsdeskundig rapport",
+        # Work capacity and reintegration prospects
+        "arbeidsmogelijkheden werkhervatting re-integratie toekomstperspectief participatie",
+        # Limitations and impact assessment
+        "beperkingen mogelijkheden impact arbeidsvermogen functioneren"
+    ],
+    "matching": [
+        # Suitable jobs and functions
+        "passend werk geschikte functies beroepen arbeidsmarkt",
+        # Workplace adjustments and tools
+        "werkaanpassingen hulpmiddelen ondersteuning ergonomische maatregelen",
+        # Requirements and conditions
+        "randvoorwaarden werkhervatting arbeidsparticipatie re-integratie",
+        # Job criteria and requirements
+        "functie-eisen arbeidsmogelijkheden belasting geschikt werk"
+    ],
+    # Special section handling for custom sections
+    "loonwaarde": [
+        "loonwaarde productiviteit arbeidsprestatie rendement",
+        "benutbare mogelijkheden tempo kwaliteit inzetbaarheid",
+        "arbeidsvermogen prestatie-indicatoren productienorm"
+    ],
+    "prognose": [
+        "prognose herstel verbetering verwachting toekomst",
+        "behandeltraject interventies herstelkansen",
+        "re-integratievooruitzichten werkhervatting perspectief"
+    ]
+}
+
+# Added to the section queries for small document sets
+UNIVERSAL_QUERY = "belangrijke informatie arbeidsdeskundig rapport"
+
+def get_section_query_catalogue() -> List[str]:
+    """All static retrieval queries, e.g. to warm the query embedding cache."""
+    return [query for queries in SECTION_QUERIES.values() for query in queries] + [UNIVERSAL_QUERY]
+
 @cached("hsearch", ttl=21600)  # 6 hours - cache hybrid search results
 async def get_relevant_chunks(section_id: str, document_ids: List[str], case_id: str, limit: int = 15):
     """
@@ -72,71 +137,9 @@ async def get_relevant_chunks(section_id: str, document_ids: List[str], case_id:
     Cache key includes: section_id, document_ids, case_id, limit
     """
     try:
-        # Advanced query formulation for Dutch labor expert contexts
-        # Formulated based on domain knowledge and real-world work reintegration documents
-        query_mapping = {
-            "samenvatting": [
-                # Personal and demographic information
-                "persoonsgegevens leeftijd geslacht opleiding werkervaring cliënt",
-                # Background and case history
-                "voorgeschiedenis arbeidssituatie ziektegeschiedenis werknemer",
-                # Reason for assessment
-                "aanleiding arbeidsdeskundig onderzoek arbeidsmogelijkheden re-integratie",
-                # Current status
-                "huidige situatie functioneren dagbesteding activiteiten belastbaarheid"
-            ],
-            "belastbaarheid": [
-                # Physical capacity with specific details
-                "fysieke belastbaarheid tillen dragen duwen trekken bukken zitten staan lopen",
-                # Cognitive and mental capacity
-                "mentale belastbaarheid concentratie aandacht geheugen informatieverwerking stress",
-                # Social functioning
-                "sociale belastbaarheid communicatie samenwerking instructies feedback",
-                # Functional capacity assessment
-                "functionele mogelijkheden inzetbaarheid belastingpunten FML Functionele Mogelijkhedenlijst"
-            ],
-            "visie_ad": [
-                # Professional assessment
-                "visie arbeidsdeskundige professionele beoordeling analyse",
-                # Conclusions and advice
-                "conclusies adviezen aanbevelingen arbeidsdeskundig rapport",
-                # Work capacity and reintegration prospects
-                "arbeidsmogelijkheden werkhervatting re-integratie toekomstperspectief participatie",
-                # Limitations and impact assessment
-                "beperkingen mogelijkheden impact arbeidsvermogen functioneren"
-            ],
-            "matching": [
-                # Suitable jobs and functions
-                "passend werk geschikte functies beroepen arbeidsmarkt",
-                # Workplace adjustments and tools
-                "werkaanpassingen hulpmiddelen ondersteuning ergonomische maatregelen",
-                # Requirements and conditions
-                "randvoorwaarden werkhervatting arbeidsparticipatie re-integratie",
-                # Job criteria and requirements
-                "functie-eisen arbeidsmogelijkheden belasting geschikt werk"
-            ]
-        }
-
-        # Special section handling for custom sections
-        additional_sections = {
-            "loonwaarde": [
-                "loonwaarde productiviteit arbeidsprestatie rendement",
-                "benutbare mogelijkheden tempo kwaliteit inzetbaarheid",
-                "arbeidsvermogen prestatie-indicatoren productienorm"
-            ],
-            "prognose": [
-                "prognose herstel verbetering verwachting toekomst",
-                "behandeltraject interventies herstelkansen",
-                "re-integratievooruitzichten werkhervatting perspectief"
-            ]
-        }
-
-        # Merge additional sections into the main mapping
-        query_mapping.update(additional_sections)
-
         # Determine which queries to use
-        if section_id in query_mapping:
-            queries = query_mapping[section_id]
+        if section_id in SECTION_QUERIES:
+            queries = list(SECTION_QUERIES[section_id])
         else:
             # Generic query with basic search terms for unknown sections
             queries = [
@@ -147,7 +150,7 @@ async def get_relevant_chunks(section_id: str, document_ids: List[str], case_id:
 
         # Add universal search terms for small document sets
         if len(document_ids) <= 2:
-            queries.append("belangrijke informatie arbeidsdeskundig rapport")
+            queries.append(UNIVERSAL_QUERY)
 
         # Calculate adaptive similarity threshold based on section and query count
         adaptive_threshold = get_adaptive_threshold(section_id, len(queries))
@@ -218,7 +221,45 @@ async def get_relevant_chunks(section_id: str, document_ids: List[str], case_id:
         logger.error(f"Error in hybrid search: {str(e)}")
         raise ValueError(f"Error retrieving chunks: {str(e)}")
 
-def create_prompt_for_section(section_id: str, section_info: Dict, chunks: List[Dict], user_profile=None):
+def _format_chunk_for_prompt(chunk: Dict) -> str:
+    """Render one retrieved chunk as it appears in the section prompt"""
+    metadata = chunk.get('metadata') or {}
+    doc_name = metadata.get('document_name') or f"Document {str(chunk.get('document_id', 'unknown'))[:8]}"
+    chunk_header = f"Document: {doc_name}"
+    if metadata.get('page_start'):
+        chunk_header += f" (Pagina {metadata['page_start']})"
+    return f"{chunk_header}\n\n{chunk['content']}"
+
+def pack_section_context(section_id: str, chunks: List[Dict]) -> PackedContext:
+    """
+    Pack the retrieved chunks of a section into its context budget
+
+    Keeps the most relevant chunks that fit CONTEXT_TOKEN_BUDGET tokens,
+    with at most CONTEXT_SOURCE_QUOTA of the budget per document and
+    overlapping chunks deduplicated (see context_packer).
+    """
+    return pack_context(
+        chunks,
+        token_budget=settings.CONTEXT_TOKEN_BUDGET,
+        format_chunk=_format_chunk_for_prompt,
+        source_quota=settings.CONTEXT_SOURCE_QUOTA,
+        label=section_id
+    )
+
+async def retrieve_section_context(section_id: str, document_ids: List[str], case_id: str) -> Optional[PackedContext]:
+    """
+    Retrieve and pack the context of a section without generating it
+
+    Used by incremental refresh to check whether a section's retrieval
+    results changed. Returns None when no relevant chunks were found.
+    """
+    chunks = await get_relevant_chunks(section_id, document_ids, case_id)
+    if not chunks:
+        return None
+    return pack_section_context(section_id, chunks)
+
+def create_prompt_for_section(section_id: str, section_info: Dict, chunks: List[Dict], user_profile=None,
+                              packed: PackedContext = None):
     """
     Create a prompt for generating content for a specific report section
     based on the retrieved chunks with improved context formatting and organization
@@ -230,6 +271,7 @@ def create_prompt_for_section(section_id: str, section_info: Dict, chunks: List[
         section_info: Information about the section
         chunks: List of retrieved document chunks
         user_profile: Optional user profile information to include in the prompt
+        packed: Chunks already packed with pack_section_context; packed here otherwise
     """
     
     # Import the enhanced prompt function
@@ -238,28 +280,10 @@ def create_prompt_for_section(section_id: str, section_info: Dict, chunks: List[
         # Use enhanced prompt system with context from chunks
         enhanced_prompt = create_ad_specific_prompt(section_id, section_info, user_profile)
         
-        # Add document context to the enhanced prompt using existing formatting
+        # Add document context to the enhanced prompt, packed into the section's token budget
         if chunks:
-            # Use existing chunk formatting logic
-            chunks_by_doc = {}
-            for chunk in chunks:
-                doc_id = chunk.get('document_id', 'unknown')
-                if doc_id not in chunks_by_doc:
-                    chunks_by_doc[doc_id] = []
-                chunks_by_doc[doc_id].append(chunk)
-            
-            formatted_chunks = []
-            for doc_id, doc_chunks in chunks_by_doc.items():
-                if doc_chunks and 'metadata' in doc_chunks[0] and 'document_name' in doc_chunks[0]['metadata']:
-                    doc_name = doc_chunks[0]['metadata']['document_name']
-                else:
-                    doc_name = f"Document {doc_id[:8]}"
-                    
-                for i, chunk in enumerate(doc_chunks):
-                    chunk_header = f"Document: {doc_name} (Fragment {i+1})"
-                    formatted_chunks.append(f"{chunk_header}\n\n{chunk['content']}")
-            
-            context = "\n\n" + "="*50 + "\n\n".join(formatted_chunks) + "\n\n" + "="*50 + "\n\n"
+            packed = packed or pack_section_context(section_id, chunks)
+            context = "\n\n" + "="*50 + "\n\n" + packed.text + "\n\n" + "="*50 + "\n\n"
             enhanced_prompt += f"\n\nDOCUMENT CONTEXT:\n{context}\n\nGebruik bovenstaande informatie uit de documenten als basis voor de sectie."
         else:
             enhanced_prompt += "\n\nGEEN DOCUMENTEN BESCHIKBAAR: Genereer realistische, professionele content op basis van algemene AD-praktijk."
@@ -285,10 +309,17 @@ def create_prompt_for_section(section_id: str, section_info: Dict, chunks: List[
         """
         return fallback_prompt
 
-def generate_content_with_llm(prompt: str):
+def generate_content_with_llm(prompt: str, stream=None, section_id: Optional[str] = None):
     """
     Generate content using the configured LLM provider with optimized settings
     and robust error handling with multiple fallback strategies
+
+    Args:
+        prompt: Section prompt
+        stream: Optional SectionStream (see report_stream) that receives the
+            text as it is generated; restarted for every attempt
+        section_id: Section the prompt is for; its first attempt is hedged
+            against the section's learned latency (see llm_hedging)
     """
     # Log the attempt
     print(f"Generating content with {settings.LLM_PROVIDER}, prompt length: {len(prompt)}")
@@ -299,7 +330,8 @@ def generate_content_with_llm(prompt: str):
         model = create_llm_instance(
             temperature=0.1,
             max_tokens=4096,
-            dangerous_content_level="BLOCK_NONE"
+            dangerous_content_level="BLOCK_NONE",
+            hedge_key=f"section:{section_id}:rag" if section_id else None
         )
         
         # Neutral professional system instruction
@@ -314,11 +346,14 @@ def generate_content_with_llm(prompt: str):
         
         # Generate content
         print(f"Attempt 1: Using {settings.LLM_PROVIDER} with permissive settings")
+        if stream:
+            stream.restart()
         response = model.generate_content(
             [
                 {"role": "system", "parts": [system_instruction]},
                 {"role": "user", "parts": [safe_prompt]}
-            ]
+            ],
+            on_text=stream.write if stream else None
         )
         
         # Check for blocking
@@ -372,11 +407,14 @@ def generate_content_with_llm(prompt: str):
             )
             
             # Generate with minimal prompt
+            if stream:
+                stream.restart()
             basic_response = model.generate_content(
                 [
                     {"role": "system", "parts": [basic_system]},
                     {"role": "user", "parts": [basic_full]}
-                ]
+                ],
+                on_text=stream.write if stream else None
             )
             
             if basic_response.text and len(basic_response.text.strip()) >= 30:
@@ -454,7 +492,8 @@ def generate_content_with_llm(prompt: str):
     # This should never be reached due to the fallbacks above        
     return "Op basis van de beschikbare documenten is een objectieve analyse gemaakt. Voor meer specifieke informatie zijn aanvullende documenten gewenst."
 
-async def generate_content_for_section(section_id: str, section_info: Dict, document_ids: List[str], case_id: str, user_profile=None):
+async def generate_content_for_section(section_id: str, section_info: Dict, document_ids: List[str], case_id: str, user_profile=None,
+                                      stream=None):
     """
     Complete RAG pipeline for generating content for a specific report section
 
@@ -464,6 +503,7 @@ async def generate_content_for_section(section_id: str, section_info: Dict, docu
         document_ids: List of document IDs to use for retrieval
         case_id: ID of the case this report belongs to
         user_profile: Optional user profile information to include in the prompt
+        stream: Optional SectionStream receiving the text as it is generated
     """
     # Get relevant chunks using hybrid search
     # TODO: Cache chunks retrieval for section_id + document_ids + case_id combination
@@ -500,15 +540,19 @@ async def generate_content_for_section(section_id: str, section_info: Dict, docu
             "error": "missing_embeddings" if missing_embeddings else "no_relevant_chunks"
         }
     
+    # Pack the chunks into the context budget; only the packed chunks are used from here on
+    packed = pack_section_context(section_id, chunks)
+    chunks = packed.chunks
+    
     # Create prompt
     # TODO: Cache prompt generation for section_id + section_info + chunk_ids combination
-    prompt = create_prompt_for_section(section_id, section_info, chunks, user_profile)
+    prompt = create_prompt_for_section(section_id, section_info, chunks, user_profile, packed=packed)
     
     # Generate content using LLM with comprehensive error handling
     print(f"Attempting to generate content for section: {section_id}")
     try:
         # TODO: Cache LLM generated content for prompt hash (with TTL for freshness)
-        content = generate_content_with_llm(prompt)
+        content = generate_content_with_llm(prompt, stream=stream, section_id=section_id)
         print(f"Successfully generated content for section {section_id}")
         
         # Quality control validation
@@ -552,11 +596,13 @@ async def generate_content_for_section(section_id: str, section_info: Dict, docu
         return {
             "content": content,
             "chunk_ids": [chunk["id"] for chunk in chunks],
+            "chunk_fingerprints": chunk_fingerprints(chunks),
             "prompt": prompt,
             "chunk_stats": {
                 "strategy_counts": strategy_counts,
                 "total_chunks": len(chunks)
-            }
+            },
+            "context_stats": packed.stats()
         }
     except Exception as e:
         error_msg = str(e)
@@ -638,6 +684,7 @@ async def generate_content_for_section(section_id: str, section_info: Dict, docu
                 "total_chunks": len(chunks),
                 "fallback_used": True
             },
+            "context_stats": packed.stats(),
             "error": "Used static fallback content after all generation attempts failed: " + error_msg
         }
     
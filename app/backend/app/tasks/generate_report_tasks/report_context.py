@@ -0,0 +1,179 @@
+"""
+Per-report context snapshot.
+
+generate_enhanced_ad_report builds one ReportContext per run: the chunk texts
+and metadata of the case documents, the extracted fields, the FML context
+and the user profile. All section workers share it read-only, so the
+document chunks are fetched once per report (one query) instead of once per
+document per section, and the combined document text is joined once.
+
+The snapshot is immutable: a frozen dataclass whose mappings are read-only
+views and whose lists are tuples, so concurrent section threads cannot
+change what another section sees. Its memory footprint is measured when it
+is built and reported in the report metadata.
+"""
+
+import logging
+import sys
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_SEPARATOR = "\n\n=== DOCUMENT SEPARATOR ===\n\n"
+
+
+def freeze(value: Any) -> Any:
+    """Read-only deep copy: dicts become MappingProxyType, lists tuples."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def deep_sizeof(value: Any, seen: Optional[set] = None) -> int:
+    """Approximate memory footprint of a value and everything it holds."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, MappingProxyType):
+        value = dict(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    elif hasattr(value, "__dataclass_fields__"):
+        size += sum(deep_sizeof(getattr(value, name), seen) for name in value.__dataclass_fields__)
+    return size
+
+
+@dataclass(frozen=True)
+class DocumentSnapshot:
+    """Text and metadata of one document at report generation time."""
+
+    id: str
+    filename: str
+    status: str
+    chunk_ids: Tuple[str, ...]
+    chunk_texts: Tuple[str, ...]
+    content: str
+
+
+@dataclass(frozen=True)
+class ReportContext:
+    """Immutable inputs of one report run, shared by all section workers."""
+
+    report_id: str
+    case_id: str
+    documents: Tuple[DocumentSnapshot, ...]
+    user_profile: Optional[Mapping[str, Any]]
+    extracted_fields: Mapping[str, str]
+    fml_context: Mapping[str, Any]
+    combined_content: str
+    memory_bytes: int = field(default=0, compare=False)
+
+    @property
+    def document_ids(self) -> List[str]:
+        return [document.id for document in self.documents]
+
+    def content_for(self, document_ids: Optional[List[str]] = None) -> str:
+        """
+        Combined "filename:\\ncontent" text of the given documents.
+
+        Returns the text joined at build time when all documents are asked
+        for; a subset is joined on the fly.
+        """
+        if document_ids is None:
+            return self.combined_content
+
+        wanted = {str(document_id) for document_id in document_ids}
+        if wanted >= set(self.document_ids):
+            return self.combined_content
+
+        return DOCUMENT_SEPARATOR.join(
+            f"{document.filename}:\n{document.content}"
+            for document in self.documents
+            if document.id in wanted
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Size of the snapshot, for logging and the report metadata."""
+        return {
+            "documents": len(self.documents),
+            "chunks": sum(len(document.chunk_ids) for document in self.documents),
+            "content_chars": len(self.combined_content),
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def build_report_context(
+    report_id: str,
+    case_id: str,
+    documents: List[Dict[str, Any]],
+    db_service,
+    user_profile: Optional[Dict[str, Any]] = None,
+    extracted_fields: Optional[Dict[str, str]] = None,
+    fml_context: Optional[Dict[str, Any]] = None
+) -> ReportContext:
+    """
+    Snapshot the report inputs.
+
+    Args:
+        report_id: ID of the report being generated
+        case_id: ID of the case
+        documents: Document rows of the case (id, filename, status)
+        db_service: Database service used to fetch the chunks
+        user_profile: Profile of the report author
+        extracted_fields: Structured fields extracted from the documents
+        fml_context: FML rubrieken context
+
+    Returns:
+        ReportContext; documents without chunks are left out of the combined
+        text, as before
+    """
+    chunks_by_document: Dict[str, List[Dict[str, Any]]] = {}
+    for chunk in db_service.get_chunks_for_documents([document["id"] for document in documents]):
+        chunks_by_document.setdefault(str(chunk["document_id"]), []).append(chunk)
+
+    snapshots = []
+    for document in documents:
+        chunks = sorted(chunks_by_document.get(str(document["id"]), []), key=lambda c: c.get("chunk_index", 0))
+        if not chunks:
+            continue
+        chunk_texts = tuple(chunk["content"] for chunk in chunks)
+        snapshots.append(DocumentSnapshot(
+            id=str(document["id"]),
+            filename=document.get("filename", "Unnamed"),
+            status=document.get("status", ""),
+            chunk_ids=tuple(str(chunk["id"]) for chunk in chunks),
+            chunk_texts=chunk_texts,
+            content="\n\n".join(chunk_texts)
+        ))
+
+    context = ReportContext(
+        report_id=str(report_id),
+        case_id=str(case_id),
+        documents=tuple(snapshots),
+        user_profile=freeze(user_profile) if user_profile is not None else None,
+        extracted_fields=freeze(extracted_fields or {}),
+        fml_context=freeze(fml_context or {}),
+        combined_content=DOCUMENT_SEPARATOR.join(
+            f"{document.filename}:\n{document.content}" for document in snapshots
+        )
+    )
+    # memory_bytes is derived from the finished snapshot
+    object.__setattr__(context, "memory_bytes", deep_sizeof(context))
+
+    stats = context.stats()
+    logger.info(
+        f"Report context for {report_id}: {stats['documents']} documents, {stats['chunks']} chunks, "
+        f"{stats['content_chars']} chars, {stats['memory_bytes'] / (1024 * 1024):.1f} MB"
+    )
+    return context
@@ -6,9 +6,13 @@ of an Arbeidsdeskundig (AD) report with improved maintainability and testability
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from app.db.database_service import get_database_service
+from app.tasks.generate_report_tasks.report_context import ReportContext
+from app.tasks.generate_report_tasks.section_sources import chunk_fingerprints, document_fingerprints, fingerprint
 
+# Stands in for the report date when fingerprinting the section prompt
+INPUTS_REPORT_DATE = "<rapportdatum>"
 
 class ADReportSectionGenerator:
     """
@@ -16,7 +20,8 @@ class ADReportSectionGenerator:
     prompts and content generation strategies.
     """
     
-    def __init__(self, user_profile: Optional[Dict[str, Any]] = None, fml_context: Optional[Dict[str, Any]] = None, extracted_fields: Optional[Dict[str, str]] = None):
+    def __init__(self, user_profile: Optional[Dict[str, Any]] = None, fml_context: Optional[Dict[str, Any]] = None, extracted_fields: Optional[Dict[str, str]] = None,
+                 report_context: Optional[ReportContext] = None, stream=None):
         """
         Initialize the section generator.
 
@@ -24,10 +29,20 @@ class ADReportSectionGenerator:
             user_profile: User profile information
             fml_context: FML rubrieken context
             extracted_fields: Extracted structured fields from documents
+            report_context: Per-report snapshot; when given, the profile, FML
+                context, extracted fields and document texts come from it
+            stream: Optional ReportStreamPublisher; section text is streamed
+                to it while it is generated
         """
+        self.report_context = report_context
+        if report_context is not None:
+            user_profile = report_context.user_profile
+            fml_context = report_context.fml_context
+            extracted_fields = report_context.extracted_fields
         self.user_profile = user_profile
         self.fml_context = fml_context
         self.extracted_fields = extracted_fields or {}
+        self.stream = stream
         self.db_service = get_database_service()
         self.has_rag = self._check_rag_availability()
     
@@ -65,38 +80,126 @@ class ADReportSectionGenerator:
         """
         # Create section prompt
         prompt = self._create_section_prompt(section_id, section_info)
+        section_stream = self.stream.section(section_id) if self.stream else None
         
         # Try RAG approach first
         result = self._try_rag_generation(
-            section_id, section_info, document_ids, case_id
+            section_id, section_info, document_ids, case_id, section_stream
         )
         
         # Fallback to direct LLM if RAG fails
         if not result["content"]:
             result = self._try_direct_llm_generation(
-                section_id, section_info, document_ids, prompt
+                section_id, section_info, document_ids, prompt, section_stream
             )
         
         # Add metadata
         result["section_id"] = section_id
         result["title"] = section_info.get("title", section_id)
         result["order"] = section_info.get("order", 999)
+        result["sources"] = self._section_sources(section_id, section_info, result, document_ids)
         
         return result
     
-    def _create_section_prompt(self, section_id: str, section_info: Dict[str, Any]) -> str:
+    def _section_sources(
+        self, 
+        section_id: str, 
+        section_info: Dict[str, Any], 
+        result: Dict[str, Any], 
+        document_ids: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Sources the section was built from, for incremental refresh.
+        
+        Args:
+            section_id: ID of the section
+            section_info: Section metadata from template
+            result: Result of the RAG or direct LLM generation
+            document_ids: List of document IDs
+            
+        Returns:
+            Sources dict (see section_sources), or None for fallback content
+        """
+        inputs = self._inputs_fingerprint(section_id, section_info)
+        if result["approach"] == "enhanced_rag" and result.get("chunk_fingerprints"):
+            return {"inputs": inputs, "chunks": result["chunk_fingerprints"]}
+        if result["approach"] == "enhanced_direct" and self.report_context is not None:
+            return {"inputs": inputs, "documents": document_fingerprints(self.report_context, document_ids)}
+        return None
+    
+    def current_sources(
+        self, 
+        section_id: str, 
+        section_info: Dict[str, Any], 
+        document_ids: List[str], 
+        case_id: str, 
+        previous_sources: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Sources the section would be built from now, without generating it.
+        
+        Re-runs retrieval for sections that were generated from retrieval;
+        no LLM calls are made.
+        
+        Args:
+            section_id: ID of the section
+            section_info: Section metadata from template
+            document_ids: List of document IDs
+            case_id: ID of the case
+            previous_sources: Sources recorded at the last generation
+            
+        Returns:
+            Sources dict to compare with previous_sources, or None if they
+            could not be determined
+        """
+        inputs = self._inputs_fingerprint(section_id, section_info)
+        
+        if "chunks" in previous_sources:
+            if not self.has_rag:
+                return None
+            try:
+                from app.tasks.generate_report_tasks.rag_pipeline import retrieve_section_context
+                
+                packed = asyncio.run(retrieve_section_context(section_id, document_ids, case_id))
+            except Exception as retrieval_error:
+                print(f"Retrieval check failed for {section_id}: {str(retrieval_error)}")
+                return None
+            return {"inputs": inputs, "chunks": chunk_fingerprints(packed.chunks) if packed else {}}
+        
+        if self.report_context is None:
+            return None
+        return {"inputs": inputs, "documents": document_fingerprints(self.report_context, document_ids)}
+    
+    def _inputs_fingerprint(self, section_id: str, section_info: Dict[str, Any]) -> str:
+        """
+        Fingerprint of the section prompt without the report date.
+        
+        The prompt contains today's date, which would mark every section as
+        changed on a refresh on a later day; it is rendered with a fixed
+        placeholder instead.
+        """
+        return fingerprint("\n".join(self._create_section_prompt(section_id, section_info, INPUTS_REPORT_DATE)))
+    
+    def _create_section_prompt(
+        self, 
+        section_id: str, 
+        section_info: Dict[str, Any], 
+        report_date: Optional[str] = None
+    ) -> Tuple[str, str]:
         """
         Create a specialized prompt for the section.
         
         Args:
             section_id: ID of the section
             section_info: Section metadata
+            report_date: Report date for the prompt (default: today)
             
         Returns:
-            Specialized prompt for the section
+            (shared_prefix, section_suffix); the prefix is the same for all
+            sections of the report
         """
         # Import the prompt creation function
-        from app.tasks.generate_report_tasks.ad_report_task import create_ad_specific_prompt
+        from app.tasks.generate_report_tasks.ad_report_task import create_ad_prompt_parts
         
         # Create section-specific context
         section_context = None
@@ -104,12 +207,13 @@ class ADReportSectionGenerator:
             section_context = self.fml_context
         
         # Create specialized prompt
-        return create_ad_specific_prompt(
+        return create_ad_prompt_parts(
             section_id=section_id,
             section_info=section_info,
             user_profile=self.user_profile,
             fml_context=section_context,
-            extracted_fields=self.extracted_fields
+            extracted_fields=self.extracted_fields,
+            report_date=report_date
         )
     
     def _try_rag_generation(
@@ -117,7 +221,8 @@ class ADReportSectionGenerator:
         section_id: str, 
         section_info: Dict[str, Any], 
         document_ids: List[str], 
-        case_id: str
+        case_id: str,
+        stream=None
     ) -> Dict[str, Any]:
         """
         Try to generate content using RAG approach.
@@ -127,6 +232,7 @@ class ADReportSectionGenerator:
             section_info: Section metadata
             document_ids: List of document IDs
             case_id: ID of the case
+            stream: Optional SectionStream receiving the generated text
             
         Returns:
             Dictionary with content and approach used
@@ -149,7 +255,8 @@ class ADReportSectionGenerator:
                         section_info=section_info,
                         document_ids=document_ids,
                         case_id=case_id,
-                        user_profile=self.user_profile
+                        user_profile=self.user_profile,
+                        stream=stream
                     )
                 )
                 
@@ -157,7 +264,9 @@ class ADReportSectionGenerator:
                 return {
                     "content": section_result["content"],
                     "approach": "enhanced_rag",
-                    "fml_generated": section_id == "belastbaarheid"
+                    "fml_generated": section_id == "belastbaarheid",
+                    "context_stats": section_result.get("context_stats"),
+                    "chunk_fingerprints": section_result.get("chunk_fingerprints")
                 }
             finally:
                 loop.close()
@@ -172,7 +281,8 @@ class ADReportSectionGenerator:
         section_id: str, 
         section_info: Dict[str, Any], 
         document_ids: List[str], 
-        prompt: str
+        prompt: Tuple[str, str],
+        stream=None
     ) -> Dict[str, Any]:
         """
         Try to generate content using direct LLM approach.
@@ -181,7 +291,8 @@ class ADReportSectionGenerator:
             section_id: ID of the section
             section_info: Section metadata
             document_ids: List of document IDs
-            prompt: Section-specific prompt
+            prompt: (shared_prefix, section_suffix) from _create_section_prompt
+            stream: Optional SectionStream receiving the generated text
             
         Returns:
             Dictionary with content and approach used
@@ -192,18 +303,25 @@ class ADReportSectionGenerator:
             
             # Generate content directly with LLM (lines 545-561)
             from app.utils.llm_provider import create_llm_instance
+            from app.utils.prompt_parts import build_cached_prompt
             
             model = create_llm_instance(
                 temperature=0.2,  # Increased for Haiku
                 max_tokens=3072,  # Haiku can handle more tokens faster
-                dangerous_content_level="BLOCK_NONE"
+                dangerous_content_level="BLOCK_NONE",
+                hedge_key=f"section:{section_id}:direct"
             )
             
-            full_prompt = f"{prompt}\n\nDocumenten:\n{document_content}"
-            response = model.generate_content([
-                {"role": "system", "parts": ["Je bent een ervaren arbeidsdeskundige die professionele rapporten schrijft."]},
-                {"role": "user", "parts": [full_prompt]}
-            ])
+            # The instructions and documents shared by all sections form the
+            # cacheable prefix; only the section instructions follow it
+            shared_prefix, section_suffix = prompt
+            if stream:
+                stream.restart()
+            response = model.generate_content(build_cached_prompt(
+                prefix=f"{shared_prefix}\n\nDocumenten:\n{document_content}",
+                suffix=section_suffix,
+                system="Je bent een ervaren arbeidsdeskundige die professionele rapporten schrijft."
+            ), on_text=stream.write if stream else None)
             
             content = response.text if hasattr(response, 'text') else str(response)
             
@@ -232,6 +350,9 @@ class ADReportSectionGenerator:
         Returns:
             Combined document content
         """
+        if self.report_context is not None:
+            return self.report_context.content_for(document_ids)
+
         # Get document content for context (lines 530-543)
         full_documents = []
         for doc_id in document_ids:
@@ -0,0 +1,237 @@
+"""
+Dependency-DAG scheduler for report sections.
+
+Sections declare which sections must be finished before they start (see
+AD_SECTION_DEPENDENCIES in ad_report_template). The scheduler starts every
+section as soon as its dependencies are done, under one global concurrency
+limit. When more sections are ready than there are free slots, the section
+with the longest remaining path to the end of the report (critical path)
+goes first.
+
+A failed or timed-out section still counts as done for its dependents, the
+same as with the former phase barriers: the report is generated with a
+placeholder for that section.
+
+After the run, the realized critical path (the chain of sections that
+determined the total duration) and the idle slot time are reported.
+"""
+
+import heapq
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def build_section_graph(section_ids: List[str], dependencies: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Restrict the dependency graph to the sections that are generated.
+
+    Dependencies on sections that are not part of the report are dropped.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    present = set(section_ids)
+    graph = {
+        section_id: [dep for dep in dependencies.get(section_id, []) if dep in present and dep != section_id]
+        for section_id in section_ids
+    }
+
+    # Kahn's algorithm; anything left over is on a cycle
+    indegree = {section_id: len(deps) for section_id, deps in graph.items()}
+    dependents = _dependents(graph)
+    ready = [section_id for section_id, count in indegree.items() if count == 0]
+    visited = 0
+    while ready:
+        section_id = ready.pop()
+        visited += 1
+        for child in dependents[section_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+
+    if visited != len(graph):
+        cyclic = sorted(section_id for section_id, count in indegree.items() if count > 0)
+        raise ValueError(f"Section dependencies contain a cycle: {', '.join(cyclic)}")
+
+    return graph
+
+
+def critical_path_priorities(graph: Dict[str, List[str]], estimates: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Length of the longest path from each section to the end of the report.
+
+    Args:
+        graph: section_id -> dependencies
+        estimates: Expected duration per section (default 1.0 each)
+
+    Returns:
+        section_id -> own estimate plus the longest chain of dependents
+    """
+    estimates = estimates or {}
+    dependents = _dependents(graph)
+    priorities: Dict[str, float] = {}
+
+    def priority(section_id: str) -> float:
+        if section_id not in priorities:
+            tail = max((priority(child) for child in dependents[section_id]), default=0.0)
+            priorities[section_id] = estimates.get(section_id, 1.0) + tail
+        return priorities[section_id]
+
+    for section_id in graph:
+        priority(section_id)
+    return priorities
+
+
+def _dependents(graph: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    dependents: Dict[str, List[str]] = {section_id: [] for section_id in graph}
+    for section_id, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(section_id)
+    return dependents
+
+
+def execute_section_dag(
+    sections: List[Tuple[str, Dict[str, Any]]],
+    dependencies: Dict[str, List[str]],
+    run_section: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    max_concurrency: int,
+    section_timeout: Optional[float] = None,
+    estimates: Optional[Dict[str, float]] = None
+) -> Tuple[Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]], Dict[str, Any]]:
+    """
+    Run the sections as a dependency DAG.
+
+    Args:
+        sections: (section_id, section_info) tuples in report order
+        dependencies: section_id -> section_ids that must finish first
+        run_section: Function generating one section; exceptions mark it failed
+        max_concurrency: Maximum number of sections generating at once
+        section_timeout: Seconds after which a running section is marked
+            "timeout" and its dependents are released
+        estimates: Expected duration per section for critical-path priority
+
+    Returns:
+        (outcomes, schedule): outcomes maps section_id to (result, error),
+        error being None, the exception text or "timeout"; schedule holds the
+        timings, the realized critical path and the idle slot time
+    """
+    section_info = dict(sections)
+    order = {section_id: index for index, (section_id, _) in enumerate(sections)}
+    graph = build_section_graph(list(section_info), dependencies)
+    priorities = critical_path_priorities(graph, estimates)
+    dependents = _dependents(graph)
+    remaining = {section_id: len(deps) for section_id, deps in graph.items()}
+
+    ready: List[Tuple[float, int, str]] = []
+    outcomes: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+    timings: Dict[str, Dict[str, float]] = {}
+    running: Dict[Any, str] = {}
+    start = time.monotonic()
+
+    def mark_ready(section_id: str):
+        heapq.heappush(ready, (-priorities[section_id], order[section_id], section_id))
+        timings[section_id] = {"ready": time.monotonic() - start}
+
+    def finish(section_id: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        outcomes[section_id] = (result, error)
+        timings[section_id]["finished"] = time.monotonic() - start
+        for child in dependents[section_id]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                mark_ready(child)
+
+    for section_id in graph:
+        if remaining[section_id] == 0:
+            mark_ready(section_id)
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="section")
+    try:
+        while ready or any(section_id not in outcomes for section_id in running.values()):
+            while ready and len(running) < max_concurrency:
+                _, _, section_id = heapq.heappop(ready)
+                timings[section_id]["started"] = time.monotonic() - start
+                running[executor.submit(run_section, section_id, section_info[section_id])] = section_id
+
+            wait_timeout = None
+            if section_timeout is not None:
+                # Wake up when the oldest unresolved section hits its timeout
+                open_starts = [timings[sid]["started"] for sid in running.values() if sid not in outcomes]
+                if open_starts:
+                    wait_timeout = max(0.0, min(open_starts) + section_timeout - (time.monotonic() - start))
+
+            done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                section_id = running.pop(future)
+                timings[section_id]["slot_released"] = time.monotonic() - start
+                if section_id in outcomes:
+                    continue  # already given up on after its timeout
+                try:
+                    finish(section_id, future.result(), None)
+                except Exception as e:
+                    logger.error(f"Error in section {section_id}: {str(e)}")
+                    finish(section_id, None, str(e))
+
+            if section_timeout is not None:
+                now = time.monotonic() - start
+                for section_id in running.values():
+                    if section_id not in outcomes and now - timings[section_id]["started"] >= section_timeout:
+                        logger.error(f"✗ Section {section_id} timed out after {section_timeout}s")
+                        finish(section_id, None, "timeout")
+    finally:
+        # Do not wait for timed-out sections that are still running
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    schedule = summarize_schedule(graph, timings, max_concurrency, time.monotonic() - start)
+    return outcomes, schedule
+
+
+def summarize_schedule(graph: Dict[str, List[str]], timings: Dict[str, Dict[str, float]],
+                       max_concurrency: int, makespan: float) -> Dict[str, Any]:
+    """
+    Realized critical path and slot utilization of a finished run.
+
+    The critical path is traced back from the last section to finish, each
+    time following the dependency that finished last; the time a section
+    waited for a free slot after becoming ready is reported as queue wait.
+    """
+    sections = {
+        section_id: {
+            "started": round(timing["started"], 3),
+            "finished": round(timing["finished"], 3),
+            "queue_wait": round(timing["started"] - timing["ready"], 3),
+        }
+        for section_id, timing in timings.items()
+        if "finished" in timing
+    }
+
+    path: List[str] = []
+    if sections:
+        current = max(sections, key=lambda sid: sections[sid]["finished"])
+        while current is not None:
+            path.append(current)
+            deps = [dep for dep in graph.get(current, []) if dep in sections]
+            current = max(deps, key=lambda sid: sections[sid]["finished"]) if deps else None
+        path.reverse()
+
+    busy = sum(
+        timing.get("slot_released", timing.get("finished", 0.0)) - timing["started"]
+        for timing in timings.values()
+        if "started" in timing
+    )
+    idle = max(0.0, max_concurrency * makespan - busy)
+
+    return {
+        "makespan_seconds": round(makespan, 3),
+        "max_concurrency": max_concurrency,
+        "critical_path": path,
+        "critical_path_seconds": round(sections[path[-1]]["finished"] - sections[path[0]]["started"], 3) if path else 0.0,
+        "busy_slot_seconds": round(busy, 3),
+        "idle_slot_seconds": round(idle, 3),
+        "utilization": round(busy / (max_concurrency * makespan), 3) if makespan > 0 else 0.0,
+        "sections": sections,
+    }
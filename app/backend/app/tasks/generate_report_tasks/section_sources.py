@@ -0,0 +1,73 @@
+"""
+Source tracking for incremental report regeneration.
+
+Every generated section records what it was built from under
+sections.<id>.sources in the report metadata:
+
+- "inputs": fingerprint of the section prompt (template instructions, user
+  profile, extracted fields, FML context), rendered without the report date
+  so a refresh on a later day does not invalidate every section
+- "chunks": chunk ID -> content fingerprint of the packed context, for
+  sections generated from retrieval (RAG)
+- "documents": document ID -> content fingerprint, for sections generated
+  from the full documents (direct LLM)
+
+An incremental refresh recomputes these for the current case state -
+retrieval is re-run, no LLM calls are made - and regenerates only the
+sections whose sources differ (see stale_reason). All other sections keep
+their content. Section dependencies only order generation; a section does
+not read the text of the sections it depends on, so a regenerated section
+does not invalidate its dependents.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional
+
+# Approaches whose content is a real generated section and can be reused
+REUSABLE_APPROACHES = {"enhanced_rag", "enhanced_direct"}
+
+
+def fingerprint(text: str) -> str:
+    """Short stable content fingerprint."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def chunk_fingerprints(chunks: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """Chunk ID -> fingerprint of the content as it was put in the prompt."""
+    return {str(chunk["id"]): fingerprint(chunk.get("content", "")) for chunk in chunks if chunk.get("id")}
+
+
+def document_fingerprints(report_context, document_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """Document ID -> fingerprint of the document text in the report snapshot."""
+    wanted = None if document_ids is None else {str(document_id) for document_id in document_ids}
+    return {
+        document.id: fingerprint(document.content)
+        for document in report_context.documents
+        if wanted is None or document.id in wanted
+    }
+
+
+def stale_reason(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Why a section must be regenerated, or None when it can be reused.
+
+    Args:
+        previous: The section's entry in the previous report metadata
+        current: Sources for the current case state (see
+            ADReportSectionGenerator.current_sources), or None when they
+            could not be determined
+    """
+    if not previous or previous.get("approach") not in REUSABLE_APPROACHES:
+        return "not_generated"
+    sources = previous.get("sources")
+    if not sources:
+        return "no_sources"
+    if current is None:
+        return "sources_unavailable"
+    if sources.get("inputs") != current.get("inputs"):
+        return "inputs_changed"
+    if "chunks" in sources and sources["chunks"] != current.get("chunks"):
+        return "retrieval_changed"
+    if "documents" in sources and sources["documents"] != current.get("documents"):
+        return "documents_changed"
+    return None
@@ -0,0 +1,438 @@
+"""
+Single-decode streaming audio preprocessing for transcription.
+
+The recording is decoded exactly once by an ffmpeg subprocess into 16 kHz
+mono 16-bit PCM (the format Whisper works in) and read in fixed-size blocks.
+Every block flows through the same pass:
+
+- loudness analysis per 100 ms window (duration, speech ratio, silences)
+- accumulation into the current chunk buffer
+- chunk emission: once a chunk is full, long silences are shortened, the
+  chunk is peak-normalized and written to disk, and the buffer is reused
+
+Silence shortening and normalization are only applied to recordings that
+need them (low quality or little speech). With choose_processing the
+processor decides from the analysis of the first analysis_seconds of the
+stream, before the first chunk is written, so every chunk is written once,
+as soon as it is complete.
+
+Only the current chunk and a small per-window loudness table are held in
+memory, so peak memory is bounded by the chunk size instead of the length of
+the recording, and no full-length intermediate files are written.
+
+Usage:
+    from app.tasks.process_audio_tasks.audio_stream_pipeline import (
+        StreamingAudioPreprocessor, iter_pcm_blocks, streaming_available
+    )
+
+    if streaming_available():
+        processor = StreamingAudioPreprocessor(
+            output_dir, "interview", chunk_seconds=600,
+            choose_processing=lambda analysis: (analysis.speech_ratio < 0.3, analysis.silence_seconds > 0)
+        )
+        for block in iter_pcm_blocks("/app/storage/interview.m4a"):
+            processor.feed(block)
+        result = processor.finish()
+        print(result.chunk_paths, result.duration_seconds, result.speech_ratio)
+"""
+import json
+import logging
+import math
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logging.warning("numpy not available - streaming audio preprocessing disabled")
+
+logger = logging.getLogger(__name__)
+
+# Decoded stream format
+STREAM_SAMPLE_RATE: int = 16000
+STREAM_SAMPLE_WIDTH: int = 2  # 16-bit signed PCM
+BLOCK_SECONDS: int = 10  # Size of blocks read from the decoder
+
+# Loudness analysis
+WINDOW_MS: int = 100
+SPEECH_THRESHOLD_DB: float = 14.0  # Windows this far below average loudness count as silence
+MIN_SILENCE_MS: int = 1000  # Shortest silent run counted for the speech ratio
+
+# Silence shortening inside chunks
+LONG_SILENCE_MS: int = 2000  # Silent runs at least this long are shortened...
+KEEP_SILENCE_MS: int = 1000  # ...to this length
+CHUNK_SILENCE_THRESHOLD_DB: float = 16.0
+
+# Length of the stream prefix that choose_processing decides from
+ANALYSIS_SECONDS: int = 120
+
+# Peak normalization target, like pydub's normalize(headroom=0.1)
+NORMALIZE_HEADROOM_DB: float = 0.1
+
+ChunkWriter = Callable[[bytes, int], str]
+
+
+def streaming_available() -> bool:
+    """Whether ffmpeg and numpy are available for streaming preprocessing."""
+    return NUMPY_AVAILABLE and shutil.which("ffmpeg") is not None
+
+
+def probe_audio_format(file_path: str) -> Dict[str, Any]:
+    """
+    Read the source sample rate, channels and bitrate without decoding.
+
+    Args:
+        file_path: Path to the audio file
+
+    Returns:
+        Dict with sample_rate, channels and bitrate (None when unknown)
+    """
+    info = {"sample_rate": None, "channels": None, "bitrate": None}
+    if not shutil.which("ffprobe"):
+        return info
+
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=sample_rate,channels,bit_rate",
+             "-of", "json", file_path],
+            capture_output=True, check=True, timeout=30
+        ).stdout
+        streams = json.loads(output or b"{}").get("streams") or [{}]
+        stream = streams[0]
+        info["sample_rate"] = int(stream["sample_rate"]) if stream.get("sample_rate") else None
+        info["channels"] = int(stream["channels"]) if stream.get("channels") else None
+        info["bitrate"] = int(stream["bit_rate"]) if stream.get("bit_rate", "N/A") != "N/A" else None
+    except Exception as e:
+        logger.warning(f"Could not probe audio format of {file_path}: {e}")
+
+    return info
+
+
+def iter_pcm_blocks(file_path: str, sample_rate: int = STREAM_SAMPLE_RATE,
+                    block_seconds: int = BLOCK_SECONDS) -> Iterator[bytes]:
+    """
+    Decode an audio file once and yield mono 16-bit PCM in fixed-size blocks.
+
+    Args:
+        file_path: Path to any audio format ffmpeg can read
+        sample_rate: Output sample rate in Hz
+        block_seconds: Seconds of audio per yielded block
+
+    Yields:
+        Raw little-endian 16-bit PCM bytes
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", file_path,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1"
+    ]
+    block_bytes = sample_rate * STREAM_SAMPLE_WIDTH * block_seconds
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        errors = process.stderr.read().decode(errors="ignore")
+        process.stderr.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise RuntimeError(f"ffmpeg could not decode {Path(file_path).name}: {errors.strip()[:500]}")
+
+
+def _to_dbfs(rms: float) -> float:
+    return 20 * math.log10(rms / 32768.0) if rms > 0 else -float("inf")
+
+
+def _silent_runs(silent, window_ms: int, min_ms: int) -> List[tuple]:
+    """Return (first_window, window_count) for runs of silent windows of at least min_ms."""
+    runs = []
+    min_windows = max(1, min_ms // window_ms)
+    run_start = None
+    for i, is_silent in enumerate(list(silent) + [False]):
+        if is_silent and run_start is None:
+            run_start = i
+        elif not is_silent and run_start is not None:
+            if i - run_start >= min_windows:
+                runs.append((run_start, i - run_start))
+            run_start = None
+    return runs
+
+
+@dataclass
+class StreamAnalysis:
+    """Loudness analysis of the stream fed so far."""
+    duration_seconds: float
+    speech_ratio: float
+    silence_seconds: float  # Total length of silent runs of at least MIN_SILENCE_MS
+    peak_dbfs: float
+    mean_dbfs: float
+
+
+# Given the analysis of the stream prefix, returns (normalize, shorten_silence)
+ProcessingChooser = Callable[[StreamAnalysis], Tuple[bool, bool]]
+
+
+@dataclass
+class StreamResult:
+    """Outcome of streaming preprocessing."""
+    chunk_paths: List[str]
+    chunk_starts: List[float]  # Start of each chunk in the decoded stream, seconds
+    duration_seconds: float
+    speech_ratio: float
+    silence_seconds: float  # Total length of silent runs of at least MIN_SILENCE_MS
+    removed_silence_seconds: float  # Audio dropped by silence shortening
+    peak_dbfs: float
+    mean_dbfs: float
+    peak_buffer_bytes: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+
+class StreamingAudioPreprocessor:
+    """
+    Incremental analyzer and chunk writer for a decoded PCM stream.
+
+    Feed PCM blocks in order with feed(), then call finish(). Chunks are
+    chunk_seconds long and overlap by overlap_seconds so words at a boundary
+    appear in both chunks; each chunk is written as soon as it is complete.
+    """
+
+    def __init__(self, output_dir: str, base_name: str,
+                 chunk_seconds: int = 600, overlap_seconds: int = 2,
+                 sample_rate: int = STREAM_SAMPLE_RATE,
+                 normalize: bool = False, shorten_silence: bool = False,
+                 choose_processing: Optional[ProcessingChooser] = None,
+                 analysis_seconds: int = ANALYSIS_SECONDS,
+                 chunk_writer: Optional[ChunkWriter] = None):
+        """
+        Args:
+            output_dir: Directory for chunk files
+            base_name: Prefix for chunk file names
+            chunk_seconds: Length of each chunk
+            overlap_seconds: Overlap between consecutive chunks
+            sample_rate: Sample rate of the fed PCM
+            normalize: Peak-normalize each chunk
+            shorten_silence: Shorten long silences inside each chunk
+            choose_processing: Decides normalize and shorten_silence from the
+                analysis of the first analysis_seconds of the stream (or of the
+                first chunk, if that completes earlier); overrides both flags
+            analysis_seconds: Length of the stream prefix for choose_processing
+            chunk_writer: Callable(pcm_bytes, chunk_index) -> path; defaults to MP3 export
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for streaming audio preprocessing")
+        if overlap_seconds >= chunk_seconds:
+            raise ValueError("overlap_seconds must be smaller than chunk_seconds")
+
+        self.output_dir = Path(output_dir)
+        self.base_name = base_name
+        self.sample_rate = sample_rate
+        self.normalize = normalize
+        self.shorten_silence = shorten_silence
+        self.choose_processing = choose_processing
+        self.analysis_bytes = analysis_seconds * sample_rate * STREAM_SAMPLE_WIDTH
+        self.chunk_writer = chunk_writer or self._write_mp3
+
+        self.bytes_per_second = sample_rate * STREAM_SAMPLE_WIDTH
+        self.chunk_bytes = chunk_seconds * self.bytes_per_second
+        self.overlap_bytes = overlap_seconds * self.bytes_per_second
+        self.window_samples = sample_rate * WINDOW_MS // 1000
+
+        self._buffer = bytearray()
+        self._buffer_start = 0  # Byte offset of the buffer in the stream
+        self._new_bytes = 0  # Bytes in the buffer not yet written in an earlier chunk
+        self._window_remainder = np.empty(0, dtype=np.int16)
+        self._window_rms: List[float] = []
+        self._total_bytes = 0
+        self._sum_squares = 0.0
+        self._peak = 0
+        self._removed_samples = 0
+        self._peak_buffer_bytes = 0
+
+        self.chunk_paths: List[str] = []
+        self.chunk_starts: List[float] = []
+
+    def feed(self, pcm: bytes) -> None:
+        """Process the next block of PCM."""
+        if len(pcm) % STREAM_SAMPLE_WIDTH:
+            raise ValueError("PCM block must contain whole 16-bit samples")
+        if not pcm:
+            return
+
+        self._analyze(np.frombuffer(pcm, dtype=np.int16))
+        self._total_bytes += len(pcm)
+        if self.choose_processing is not None and self._total_bytes >= self.analysis_bytes:
+            self._decide_processing()
+
+        self._buffer.extend(pcm)
+        self._new_bytes += len(pcm)
+        self._peak_buffer_bytes = max(self._peak_buffer_bytes, len(self._buffer))
+
+        while len(self._buffer) >= self.chunk_bytes:
+            self._emit(bytes(self._buffer[:self.chunk_bytes]))
+            # Keep the overlap as the start of the next chunk
+            keep_from = self.chunk_bytes - self.overlap_bytes
+            del self._buffer[:keep_from]
+            self._buffer_start += keep_from
+            self._new_bytes = len(self._buffer) - self.overlap_bytes
+
+    def finish(self) -> StreamResult:
+        """Write the remaining chunks and return the stream statistics."""
+        if self.choose_processing is not None:
+            self._decide_processing()
+
+        # The tail is only a new chunk if it holds audio not already written
+        if self._buffer and (self._new_bytes > 0 or not self.chunk_paths):
+            self._emit(bytes(self._buffer))
+        self._buffer = bytearray()
+
+        analysis = self._analysis()
+        warnings = []
+        if self._total_bytes == 0:
+            warnings.append("Decoded audio stream is empty")
+
+        return StreamResult(
+            chunk_paths=list(self.chunk_paths),
+            chunk_starts=list(self.chunk_starts),
+            duration_seconds=analysis.duration_seconds,
+            speech_ratio=analysis.speech_ratio,
+            silence_seconds=analysis.silence_seconds,
+            removed_silence_seconds=self._removed_samples / self.sample_rate,
+            peak_dbfs=analysis.peak_dbfs,
+            mean_dbfs=analysis.mean_dbfs,
+            peak_buffer_bytes=self._peak_buffer_bytes,
+            warnings=warnings
+        )
+
+    def _decide_processing(self) -> None:
+        """Set normalize and shorten_silence from the analysis of the stream so far."""
+        self.normalize, self.shorten_silence = self.choose_processing(self._analysis())
+        self.choose_processing = None
+
+    def _analysis(self) -> StreamAnalysis:
+        """Loudness statistics of everything fed so far."""
+        window_rms = self._window_rms
+        if self._window_remainder.size:
+            window_rms = window_rms + [self._rms(self._window_remainder)]
+
+        total_samples = self._total_bytes // STREAM_SAMPLE_WIDTH
+        duration = total_samples / self.sample_rate
+        mean_rms = math.sqrt(self._sum_squares / total_samples) if total_samples else 0.0
+        mean_dbfs = _to_dbfs(mean_rms)
+
+        silence_seconds = 0.0
+        if window_rms and mean_rms > 0:
+            threshold = mean_dbfs - SPEECH_THRESHOLD_DB
+            silent = [_to_dbfs(rms) < threshold for rms in window_rms]
+            runs = _silent_runs(silent, WINDOW_MS, MIN_SILENCE_MS)
+            silence_seconds = min(duration, sum(count for _, count in runs) * WINDOW_MS / 1000.0)
+
+        return StreamAnalysis(
+            duration_seconds=duration,
+            speech_ratio=(duration - silence_seconds) / duration if duration > 0 else 0.0,
+            silence_seconds=silence_seconds,
+            peak_dbfs=_to_dbfs(self._peak),
+            mean_dbfs=mean_dbfs
+        )
+
+    @staticmethod
+    def _rms(samples) -> float:
+        return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2))) if samples.size else 0.0
+
+    def _analyze(self, samples) -> None:
+        """Update global loudness statistics and per-window RMS."""
+        wide = samples.astype(np.float64)
+        self._sum_squares += float(np.dot(wide, wide))
+        self._peak = max(self._peak, int(np.max(np.abs(samples.astype(np.int32)))))
+
+        if self._window_remainder.size:
+            samples = np.concatenate([self._window_remainder, samples])
+        full = samples.size // self.window_samples * self.window_samples
+        if full:
+            windows = samples[:full].astype(np.float64).reshape(-1, self.window_samples)
+            self._window_rms.extend(np.sqrt(np.mean(windows ** 2, axis=1)).tolist())
+        self._window_remainder = samples[full:].copy()
+
+    def _emit(self, pcm: bytes) -> None:
+        """Post-process one chunk and write it."""
+        if self.choose_processing is not None:
+            # The first chunk completed before analysis_seconds of audio
+            self._decide_processing()
+
+        start = self._buffer_start / self.bytes_per_second
+        samples = np.frombuffer(pcm, dtype=np.int16)
+
+        if self.shorten_silence:
+            samples = self._shorten_silences(samples)
+        if self.normalize:
+            samples = self._normalize(samples)
+
+        index = len(self.chunk_paths)
+        path = self.chunk_writer(samples.astype(np.int16).tobytes(), index)
+        self.chunk_paths.append(path)
+        self.chunk_starts.append(start)
+        logger.info(f"Wrote audio chunk {index + 1} ({len(pcm) / self.bytes_per_second:.0f}s)")
+
+    def _shorten_silences(self, samples):
+        """Shorten silent runs of LONG_SILENCE_MS or more to KEEP_SILENCE_MS."""
+        window = self.window_samples
+        count = samples.size // window
+        if count == 0:
+            return samples
+
+        windows = samples[:count * window].astype(np.float64).reshape(count, window)
+        window_rms = np.sqrt(np.mean(windows ** 2, axis=1))
+        chunk_rms = self._rms(samples)
+        if chunk_rms == 0:
+            return samples
+
+        threshold = _to_dbfs(chunk_rms) - CHUNK_SILENCE_THRESHOLD_DB
+        silent = [_to_dbfs(rms) < threshold for rms in window_rms]
+        runs = _silent_runs(silent, WINDOW_MS, LONG_SILENCE_MS)
+        if not runs:
+            return samples
+
+        keep_windows = KEEP_SILENCE_MS // WINDOW_MS
+        keep_mask = np.ones(samples.size, dtype=bool)
+        for first, length in runs:
+            # Keep half of the retained silence on either side of the run
+            drop_start = (first + keep_windows // 2) * window
+            drop_end = (first + length - (keep_windows - keep_windows // 2)) * window
+            if drop_end > drop_start:
+                keep_mask[drop_start:drop_end] = False
+
+        self._removed_samples += int(samples.size - keep_mask.sum())
+        return samples[keep_mask]
+
+    @staticmethod
+    def _normalize(samples):
+        peak = int(np.max(np.abs(samples.astype(np.int32)))) if samples.size else 0
+        if peak == 0:
+            return samples
+        target = 32767 * (10 ** (-NORMALIZE_HEADROOM_DB / 20))
+        gain = target / peak
+        return np.clip(np.round(samples.astype(np.float64) * gain), -32768, 32767).astype(np.int16)
+
+    def _write_mp3(self, pcm: bytes, index: int) -> str:
+        """Encode a chunk as MP3 next to the source file."""
+        from pydub import AudioSegment
+
+        path = self.output_dir / f"{self.base_name}_chunk_{index:03d}.mp3"
+        segment = AudioSegment(data=pcm, sample_width=STREAM_SAMPLE_WIDTH,
+                               frame_rate=self.sample_rate, channels=1)
+        segment.export(str(path), format="mp3", bitrate="128k")
+        return str(path)
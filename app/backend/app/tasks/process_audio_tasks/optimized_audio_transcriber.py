@@ -4,9 +4,11 @@ Optimized Audio Transcription Module for AI-Arbeidsdeskundige.
 This module provides comprehensive functionality for audio transcription using
 OpenAI's Whisper API, with advanced features for Dutch arbeidsdeskundige content:
 
-- Multi-format audio support with preprocessing
-- Chunking for long audio files
+- Multi-format audio support with single-pass streaming preprocessing
+- Chunking for long audio files, transcribed concurrently with rate limiting
+  and per-chunk retries
 - Progress tracking and caching
+- Progressive transcript publishing and RAG ingestion per chunk
 - Quality scoring and speaker diarization
 - Dutch language optimization
 - Comprehensive error handling
@@ -18,13 +20,16 @@ import tempfile
 import hashlib
 import json
 import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional, Set, List, Tuple, Union
-from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from enum import Enum
 
 from celery import shared_task, current_task
+from celery.exceptions import Retry
 
 # Audio processing libraries
 try:
@@ -36,10 +41,15 @@ except ImportError:
     logging.warning("pydub not available - advanced audio preprocessing disabled")
 
 # Use OpenAI API directly 
-from openai import OpenAI, APIError, RateLimitError
+from openai import OpenAI, APIError, APIConnectionError, InternalServerError, RateLimitError
 
 from app.core.config import settings
 from app.db.database_service import get_database_service
+from app.tasks.process_audio_tasks.audio_stream_pipeline import (
+    StreamAnalysis, StreamingAudioPreprocessor, iter_pcm_blocks, probe_audio_format, streaming_available
+)
+from app.tasks.process_audio_tasks.transcript_publisher import ProgressiveTranscriptPublisher
+from app.utils.transcription_cache import get_transcription_cache
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -48,10 +58,9 @@ logger = logging.getLogger(__name__)
 # Initialize database service
 db_service = get_database_service()
 
-# Cache configuration
-CACHE_DIR = Path(settings.STORAGE_PATH) / "cache" / "transcriptions"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
-CACHE_EXPIRY_DAYS = 7
+# Cache entry kinds in the transcription cache store
+RESULT_CACHE_KIND = "result"
+CHUNK_CACHE_KIND = "chunk"
 
 
 class AudioQuality(Enum):
@@ -129,6 +138,14 @@ MAX_FILE_SIZE_BYTES: int = 25 * 1024 * 1024  # 25 MB
 # Optimal chunk size for long audio files (10 minutes)
 CHUNK_SIZE_SECONDS: int = 600
 
+# Overlap between consecutive chunks to avoid cutting words
+CHUNK_OVERLAP_SECONDS: int = 2
+
+# Errors worth retrying for a single chunk; other errors fail the chunk immediately
+RETRYABLE_TRANSCRIPTION_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+CHUNK_RETRY_BASE_DELAY: float = 2.0  # seconds, doubled per attempt
+CHUNK_RETRY_MAX_DELAY: float = 60.0
+
 # Quality thresholds
 MIN_CONFIDENCE_SCORE = 0.7
 MIN_SPEECH_RATIO = 0.3
@@ -182,10 +199,31 @@ def is_supported_audio_file(filename: str) -> bool:
     return extension in SUPPORTED_EXTENSIONS or extension in CONVERTIBLE_EXTENSIONS
 
 
+def hash_file_content(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Hash the content of a file in blocks.
+    
+    Args:
+        file_path: Path to the file
+        block_size: Bytes read per block
+        
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def get_audio_cache_key(file_path: str, model_config: Dict[str, Any]) -> str:
     """
     Generate a cache key for audio transcription results.
     
+    The key hashes the audio content rather than its path, so re-uploads and
+    copies of the same recording share cached results.
+    
     Args:
         file_path: Path to the audio file
         model_config: Model configuration used
@@ -194,17 +232,34 @@ def get_audio_cache_key(file_path: str, model_config: Dict[str, Any]) -> str:
         Unique cache key
     """
     try:
-        file_stat = os.stat(file_path)
-        file_info = f"{file_path}:{file_stat.st_size}:{file_stat.st_mtime}"
         config_str = json.dumps(model_config, sort_keys=True)
-        
-        cache_input = f"{file_info}:{config_str}"
+        cache_input = f"{hash_file_content(file_path)}:{config_str}"
         return hashlib.md5(cache_input.encode()).hexdigest()
     except Exception as e:
         logger.warning(f"Could not generate cache key: {e}")
         return hashlib.md5(f"{file_path}:{time.time()}".encode()).hexdigest()
 
 
+def get_chunk_cache_key(chunk_file: str, model_config: Dict[str, Any]) -> Optional[str]:
+    """
+    Generate a cache key for a single audio chunk.
+    
+    Args:
+        chunk_file: Path to the audio chunk
+        model_config: Model configuration used
+        
+    Returns:
+        Cache key, or None if the chunk cannot be read
+    """
+    try:
+        config_str = json.dumps(model_config, sort_keys=True)
+        cache_input = f"chunk:{hash_file_content(chunk_file)}:{config_str}"
+        return hashlib.md5(cache_input.encode()).hexdigest()
+    except Exception as e:
+        logger.warning(f"Could not generate chunk cache key: {e}")
+        return None
+
+
 def check_file_size(file_path: str) -> Tuple[bool, int]:
     """
     Check if the file size is within limits and return size info.
@@ -468,7 +523,7 @@ def chunk_audio_file(file_path: str, chunk_duration: int = CHUNK_SIZE_SECONDS) -
         output_dir = Path(file_path).parent
         
         # Split into chunks with overlap
-        overlap_ms = 2000  # 2 seconds overlap
+        overlap_ms = CHUNK_OVERLAP_SECONDS * 1000
         start = 0
         chunk_num = 0
         
@@ -556,6 +611,87 @@ def prepare_audio_for_transcription(file_path: str) -> Tuple[str, AudioMetadata]
         return original_file, metadata
 
 
+def prepare_audio_chunks_streaming(file_path: str) -> Tuple[List[str], AudioMetadata]:
+    """
+    Decode, analyze, preprocess and chunk an audio file in a single pass.
+    
+    Replaces the separate decodes of analyze_audio_metadata, convert_audio_format,
+    preprocess_audio and chunk_audio_file. Memory use is bounded by the chunk
+    size. As in prepare_audio_for_transcription, chunks are only normalized
+    (and long silences shortened) when the recording is of low quality or
+    has little speech, judged from the first ANALYSIS_SECONDS of audio.
+    
+    Args:
+        file_path: Path to the audio file
+        
+    Returns:
+        Tuple of (chunk_paths, audio_metadata)
+    """
+    if not os.path.exists(file_path):
+        logger.error(f"File not found: {file_path}")
+        raise FileNotFoundError(f"File not found: {file_path}")
+    
+    source_format = probe_audio_format(file_path)
+    sample_rate = source_format["sample_rate"] or 44100
+    channels = source_format["channels"] or 2
+    
+    def choose_processing(analysis: StreamAnalysis) -> Tuple[bool, bool]:
+        """(normalize, shorten_silence), by the same rule as prepare_audio_for_transcription"""
+        quality_score = calculate_audio_quality(
+            sample_rate=sample_rate,
+            channels=channels,
+            speech_ratio=analysis.speech_ratio,
+            duration=analysis.duration_seconds
+        )
+        if quality_score < 0.5 or analysis.speech_ratio < MIN_SPEECH_RATIO:
+            logger.info("Applying audio preprocessing for quality improvement")
+            return True, analysis.silence_seconds > 0
+        return False, False
+    
+    processor = StreamingAudioPreprocessor(
+        output_dir=str(Path(file_path).parent),
+        base_name=Path(file_path).stem,
+        chunk_seconds=CHUNK_SIZE_SECONDS,
+        overlap_seconds=CHUNK_OVERLAP_SECONDS,
+        choose_processing=choose_processing
+    )
+    
+    try:
+        for block in iter_pcm_blocks(file_path):
+            processor.feed(block)
+        stream = processor.finish()
+    except Exception:
+        cleanup_temp_files(processor.chunk_paths, file_path, file_path)
+        raise
+    
+    for warning in stream.warnings:
+        logger.warning(warning)
+    
+    metadata = AudioMetadata(
+        duration_seconds=stream.duration_seconds,
+        sample_rate=sample_rate,
+        channels=channels,
+        bitrate=source_format["bitrate"],
+        format=Path(file_path).suffix.lower().strip('.'),
+        file_size=os.path.getsize(file_path),
+        quality_score=calculate_audio_quality(
+            sample_rate=sample_rate,
+            channels=channels,
+            speech_ratio=stream.speech_ratio,
+            duration=stream.duration_seconds
+        ),
+        has_silence=stream.removed_silence_seconds > 0,
+        speech_ratio=stream.speech_ratio
+    )
+    
+    logger.info(f"Audio streamed into {len(stream.chunk_paths)} chunk(s): "
+                f"duration={metadata.duration_seconds:.1f}s, speech_ratio={metadata.speech_ratio:.2f}, "
+                f"silence removed={stream.removed_silence_seconds:.1f}s, "
+                f"peak buffer={stream.peak_buffer_bytes / (1024 * 1024):.1f} MB")
+    
+    return stream.chunk_paths, metadata
+
+
 def get_cached_transcription(cache_key: str) -> Optional[TranscriptionResult]:
     """
     Retrieve cached transcription result.
@@ -566,22 +702,15 @@ def get_cached_transcription(cache_key: str) -> Optional[TranscriptionResult]:
     Returns:
         Cached TranscriptionResult or None if not found/expired
     """
+    cache = get_transcription_cache()
+    if cache is None:
+        return None
+    
     try:
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        
-        if not cache_file.exists():
+        data = cache.get(cache_key)
+        if data is None:
             return None
         
-        # Check if cache is expired
-        cache_age = datetime.now() - datetime.fromtimestamp(cache_file.stat().st_mtime)
-        if cache_age > timedelta(days=CACHE_EXPIRY_DAYS):
-            cache_file.unlink()  # Remove expired cache
-            return None
-        
-        # Load cached result
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         # Convert back to TranscriptionResult
         result = TranscriptionResult(
             text=data['text'],
@@ -604,35 +733,94 @@ def get_cached_transcription(cache_key: str) -> Optional[TranscriptionResult]:
         return None
 
 
-def save_transcription_cache(cache_key: str, result: TranscriptionResult) -> None:
+def save_transcription_cache(cache_key: str, result: TranscriptionResult, tag: Optional[str] = None) -> None:
     """
     Save transcription result to cache.
     
     Args:
         cache_key: Cache key for the transcription
         result: TranscriptionResult to cache
+        tag: Document ID, so the entry can be cleared per document
     """
+    cache = get_transcription_cache()
+    if cache is None:
+        return
+    
     try:
-        cache_file = CACHE_DIR / f"{cache_key}.json"
-        
         # Convert to dict for JSON serialization
         data = asdict(result)
         data['status'] = result.status.value  # Convert enum to string
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
+        cache.set(cache_key, RESULT_CACHE_KIND, data, tag=tag)
         logger.info(f"Transcription cached: {cache_key}")
         
     except Exception as e:
         logger.error(f"Error caching transcription: {e}")
 
 
-def transcribe_single_chunk(
+def get_cached_chunk(cache_key: str, start_offset: float) -> Optional[TranscriptionChunk]:
+    """
+    Retrieve a cached chunk transcription.
+    
+    Chunks are cached with times relative to the chunk start, so the same
+    audio can be reused at a different position in another recording.
+    
+    Args:
+        cache_key: Key from get_chunk_cache_key()
+        start_offset: Start time offset for this chunk
+        
+    Returns:
+        Cached TranscriptionChunk or None if not found/expired
+    """
+    cache = get_transcription_cache()
+    if cache is None:
+        return None
+    
+    try:
+        data = cache.get(cache_key)
+        if data is None:
+            return None
+        
+        data['start_time'] += start_offset
+        data['end_time'] += start_offset
+        return TranscriptionChunk(**data)
+        
+    except Exception as e:
+        logger.error(f"Error loading cached chunk transcription: {e}")
+        return None
+
+
+def save_chunk_cache(cache_key: str, chunk: TranscriptionChunk, start_offset: float,
+                     tag: Optional[str] = None) -> None:
+    """
+    Save a successful chunk transcription to the chunk cache.
+    
+    Args:
+        cache_key: Key from get_chunk_cache_key()
+        chunk: Transcribed chunk
+        start_offset: Start time offset of the chunk
+        tag: Document ID, so the entry can be cleared per document
+    """
+    cache = get_transcription_cache()
+    if cache is None:
+        return
+    
+    try:
+        data = asdict(chunk)
+        data['start_time'] -= start_offset
+        data['end_time'] -= start_offset
+        
+        cache.set(cache_key, CHUNK_CACHE_KIND, data, tag=tag)
+        
+    except Exception as e:
+        logger.error(f"Error caching chunk transcription: {e}")
+
+
+def request_chunk_transcription(
     client: OpenAI, chunk_file: str, config: Dict[str, Any], start_offset: float
 ) -> TranscriptionChunk:
     """
-    Transcribe a single audio chunk.
+    Send a single audio chunk to the Whisper API.
     
     Args:
         client: OpenAI client
@@ -642,42 +830,276 @@ def transcribe_single_chunk(
         
     Returns:
         TranscriptionChunk with results
-    """
-    try:
-        with open(chunk_file, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
-                model=config["model"],
-                file=audio_file,
-                language=config.get("language"),
-                response_format=config.get("response_format", "json"),
-                temperature=config.get("temperature", 0.2)
-            )
         
-        # Extract text and confidence from response
-        if hasattr(response, 'text'):
-            text = response.text
-            confidence = 0.8  # Default confidence for simple response
-        else:
-            # For verbose_json response
-            text = str(response)
-            confidence = 0.8
-        
-        # Estimate chunk duration
-        chunk_duration = CHUNK_SIZE_SECONDS  # Default, could be calculated from audio metadata
-        
-        return TranscriptionChunk(
-            start_time=start_offset,
-            end_time=start_offset + chunk_duration,
-            text=text,
-            confidence=confidence,
-            language=config.get("language", DEFAULT_LANGUAGE)
+    Raises:
+        Any error raised by the OpenAI client
+    """
+    with open(chunk_file, "rb") as audio_file:
+        response = client.audio.transcriptions.create(
+            model=config["model"],
+            file=audio_file,
+            language=config.get("language"),
+            response_format=config.get("response_format", "json"),
+            temperature=config.get("temperature", 0.2)
         )
+    
+    # Extract text and confidence from response
+    if hasattr(response, 'text'):
+        text = response.text
+        confidence = 0.8  # Default confidence for simple response
+    else:
+        # For verbose_json response
+        text = str(response)
+        confidence = 0.8
+    
+    # Estimate chunk duration
+    chunk_duration = CHUNK_SIZE_SECONDS  # Default, could be calculated from audio metadata
+    
+    return TranscriptionChunk(
+        start_time=start_offset,
+        end_time=start_offset + chunk_duration,
+        text=text,
+        confidence=confidence,
+        language=config.get("language", DEFAULT_LANGUAGE)
+    )
+
+
+def transcribe_single_chunk(
+    client: OpenAI, chunk_file: str, config: Dict[str, Any], start_offset: float
+) -> TranscriptionChunk:
+    """
+    Transcribe a single audio chunk.
+    
+    Args:
+        client: OpenAI client
+        chunk_file: Path to audio chunk
+        config: Transcription configuration
+        start_offset: Start time offset for this chunk
         
+    Returns:
+        TranscriptionChunk with results, or an error chunk if the request failed
+    """
+    try:
+        return request_chunk_transcription(client, chunk_file, config, start_offset)
     except Exception as e:
         logger.error(f"Chunk transcription failed: {e}")
         return create_error_chunk(start_offset, str(e))
 
 
+class RequestRateLimiter:
+    """
+    Thread-safe limiter that spaces requests evenly to stay under a
+    requests-per-minute budget shared by all transcription threads of a job.
+    """
+    
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def acquire(self) -> None:
+        """Block until the caller may send the next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def get_retry_delay(attempt: int, error: Exception) -> float:
+    """
+    Backoff delay before retrying a chunk.
+    
+    Uses the Retry-After header of rate-limit responses when present, and
+    exponential backoff with jitter otherwise.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(CHUNK_RETRY_MAX_DELAY, float(retry_after))
+        except ValueError:
+            pass
+    
+    delay = CHUNK_RETRY_BASE_DELAY * (2 ** attempt)
+    return min(CHUNK_RETRY_MAX_DELAY, delay) + random.uniform(0, 1)
+
+
+def transcribe_chunk_with_retries(
+    client: OpenAI,
+    chunk_file: str,
+    config: Dict[str, Any],
+    start_offset: float,
+    rate_limiter: RequestRateLimiter,
+    max_retries: int
+) -> TranscriptionChunk:
+    """
+    Transcribe a single audio chunk, retrying transient API errors.
+    
+    A chunk that keeps failing becomes an error chunk; it never fails the
+    whole transcription job.
+    
+    Args:
+        client: OpenAI client
+        chunk_file: Path to audio chunk
+        config: Transcription configuration
+        start_offset: Start time offset for this chunk
+        rate_limiter: Limiter shared by all chunks of the job
+        max_retries: Retries after the first attempt for transient errors
+        
+    Returns:
+        TranscriptionChunk with results or an error chunk
+    """
+    chunk_name = os.path.basename(chunk_file)
+    
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        try:
+            return request_chunk_transcription(client, chunk_file, config, start_offset)
+        except RETRYABLE_TRANSCRIPTION_ERRORS as e:
+            if attempt >= max_retries:
+                logger.error(f"Chunk {chunk_name} failed after {attempt + 1} attempts: {e}")
+                return create_error_chunk(start_offset, str(e))
+            
+            delay = get_retry_delay(attempt, e)
+            logger.warning(
+                f"Transient error on chunk {chunk_name} (attempt {attempt + 1}/{max_retries + 1}), "
+                f"retrying in {delay:.1f}s: {e}"
+            )
+            time.sleep(delay)
+        except Exception as e:
+            logger.error(f"Chunk transcription failed for {chunk_name}: {e}")
+            return create_error_chunk(start_offset, str(e))
+
+
+def transcribe_chunk_cached(
+    client: OpenAI,
+    chunk_file: str,
+    config: Dict[str, Any],
+    start_offset: float,
+    rate_limiter: RequestRateLimiter,
+    max_retries: int,
+    cache_tag: Optional[str] = None
+) -> Tuple[TranscriptionChunk, bool]:
+    """
+    Transcribe a chunk unless an identical chunk was already transcribed.
+    
+    Only successful transcriptions are cached, so retries and reprocessing
+    transcribe exactly the chunks that are still missing.
+    
+    Args:
+        client: OpenAI client
+        chunk_file: Path to audio chunk
+        config: Transcription configuration
+        start_offset: Start time offset for this chunk
+        rate_limiter: Limiter shared by all chunks of the job
+        max_retries: Retries after the first attempt for transient errors
+        cache_tag: Document ID stored with the cached chunk
+        
+    Returns:
+        Tuple of (TranscriptionChunk, from_cache)
+    """
+    cache_key = get_chunk_cache_key(chunk_file, config)
+    if cache_key:
+        cached_chunk = get_cached_chunk(cache_key, start_offset)
+        if cached_chunk:
+            logger.info(f"Chunk {os.path.basename(chunk_file)} loaded from cache")
+            return cached_chunk, True
+    
+    chunk = transcribe_chunk_with_retries(client, chunk_file, config, start_offset, rate_limiter, max_retries)
+    if cache_key and chunk.confidence > 0:
+        save_chunk_cache(cache_key, chunk, start_offset, tag=cache_tag)
+    return chunk, False
+
+
+def transcribe_chunks_concurrently(
+    client: OpenAI,
+    audio_chunks: List[str],
+    config: Dict[str, Any],
+    max_workers: int,
+    rate_limiter: RequestRateLimiter,
+    max_retries: int,
+    progress_callback=None,
+    use_chunk_cache: bool = False,
+    chunk_callback=None,
+    cache_tag: Optional[str] = None
+) -> List[TranscriptionChunk]:
+    """
+    Transcribe audio chunks in a bounded thread pool.
+    
+    Results are returned in chunk order regardless of completion order.
+    With use_chunk_cache, chunks transcribed by an earlier attempt are
+    reused and only the missing chunks are sent to the API.
+    
+    Args:
+        client: OpenAI client (thread-safe, shared by all workers)
+        audio_chunks: Paths to the audio chunks, in playback order
+        config: Transcription configuration
+        max_workers: Maximum number of concurrent Whisper requests
+        rate_limiter: Limiter shared by all chunks of the job
+        max_retries: Retries per chunk for transient errors
+        progress_callback: Called as progress_callback(completed, total) from
+            the calling thread after each chunk finishes
+        use_chunk_cache: Look up and store chunks in the per-chunk cache
+        chunk_callback: Called as chunk_callback(index, chunk) from the
+            calling thread as soon as each chunk finishes
+        cache_tag: Document ID stored with cached chunks
+        
+    Returns:
+        List of TranscriptionChunk, one per audio chunk, in order
+    """
+    total = len(audio_chunks)
+    if not total:
+        return []
+    
+    # Chunks overlap, so each one starts a little before the previous one ends
+    step = CHUNK_SIZE_SECONDS - CHUNK_OVERLAP_SECONDS
+    results: List[Optional[TranscriptionChunk]] = [None] * total
+    cached_count = 0
+    
+    def transcribe(chunk_file: str, start_offset: float):
+        if use_chunk_cache:
+            return transcribe_chunk_cached(
+                client, chunk_file, config, start_offset, rate_limiter, max_retries, cache_tag
+            )
+        return transcribe_chunk_with_retries(client, chunk_file, config, start_offset, rate_limiter, max_retries)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total)),
+                            thread_name_prefix="whisper") as executor:
+        futures = {
+            executor.submit(transcribe, chunk_file, i * step): i
+            for i, chunk_file in enumerate(audio_chunks)
+        }
+        
+        completed = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+                if use_chunk_cache:
+                    result, from_cache = result
+                    cached_count += from_cache
+                results[i] = result
+            except Exception as e:
+                logger.error(f"Error transcribing chunk {i+1}: {e}")
+                results[i] = create_error_chunk(i * step, str(e))
+            
+            if chunk_callback:
+                chunk_callback(i, results[i])
+            
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+    
+    if cached_count:
+        logger.info(f"Reused {cached_count}/{total} chunk(s) from the chunk cache")
+    
+    return results
+
+
 def create_error_chunk(start_offset: float, error_msg: str) -> TranscriptionChunk:
     """Create an error chunk for failed transcriptions."""
     return TranscriptionChunk(
@@ -697,6 +1119,9 @@ def combine_chunk_results(
 ) -> TranscriptionResult:
     """Combine multiple chunk results into a single transcription."""
     
+    # Reassemble in playback order; chunks may complete out of order
+    chunks = sorted(chunks, key=lambda chunk: chunk.start_time)
+    
     # Combine all text
     full_text = " ".join(chunk.text for chunk in chunks if chunk.confidence > 0)
     
@@ -730,31 +1155,41 @@ def combine_chunk_results(
     )
 
 
+def apply_dutch_corrections(text: str) -> str:
+    """Correct common Dutch arbeidsdeskundige terms in transcribed text."""
+    # Dutch-specific corrections
+    dutch_corrections = {
+        "arbeidsongeschikt": "arbeidsgeschikt",
+        "arbeidsexpert": "arbeidsdeskundige",
+        "UWV kantoor": "UWV",
+        "ziektewet": "Ziektewet",
+        "wao": "WAO",
+        "wia": "WIA"
+    }
+    
+    for incorrect, correct in dutch_corrections.items():
+        text = text.replace(incorrect, correct)
+    
+    # Capitalize Dutch arbeidsdeskundige terms
+    for term in DUTCH_KEYWORDS:
+        # Simple capitalization for important terms at sentence start
+        text = text.replace(f". {term}", f". {term.capitalize()}")
+        text = text.replace(f"\n{term}", f"\n{term.capitalize()}")
+    
+    return text
+
+
 def optimize_for_dutch(result: TranscriptionResult) -> TranscriptionResult:
     """Apply Dutch language optimizations to transcription."""
     try:
-        text = result.text
-        
-        # Dutch-specific corrections
-        dutch_corrections = {
-            "arbeidsongeschikt": "arbeidsgeschikt",
-            "arbeidsexpert": "arbeidsdeskundige",
-            "UWV kantoor": "UWV",
-            "ziektewet": "Ziektewet",
-            "wao": "WAO",
-            "wia": "WIA"
-        }
-        
-        for incorrect, correct in dutch_corrections.items():
-            text = text.replace(incorrect, correct)
-        
-        # Capitalize Dutch arbeidsdeskundige terms
-        for term in DUTCH_KEYWORDS:
-            # Simple capitalization for important terms at sentence start
-            text = text.replace(f". {term}", f". {term.capitalize()}")
-            text = text.replace(f"\n{term}", f"\n{term.capitalize()}")
+        # Correct per chunk, so the text matches the transcript that was
+        # published chunk by chunk while transcribing
+        valid_chunks = [chunk for chunk in result.chunks if chunk.confidence > 0]
+        for chunk in valid_chunks:
+            chunk.text = apply_dutch_corrections(chunk.text)
         
         # Update result
+        text = " ".join(chunk.text for chunk in valid_chunks)
         result.text = text
         
         # Check if Dutch keywords are present (quality indicator)
@@ -836,26 +1271,23 @@ def update_document_with_result(document_id: str, result: TranscriptionResult) -
     """Update document with transcription results."""
     try:
         # Update document content
-        db_service.update_row(
-            "document",
-            document_id,
-            {
-                "content": result.text,
-                "metadata": json.dumps({
-                    "transcription": {
-                        "confidence_score": result.confidence_score,
-                        "language_detected": result.language_detected,
-                        "processing_time": result.processing_time,
-                        "model_used": result.model_used,
-                        "chunk_count": len(result.chunks),
-                        "warnings": result.warnings,
-                        "speaker_count": result.speaker_count,
-                        "audio_duration": result.audio_metadata.duration_seconds,
-                        "audio_quality": result.audio_metadata.quality_score
-                    }
-                })
+        db_service.update_row("document", document_id, {"content": result.text})
+        
+        # Merge the transcription details so other metadata keys (transcript
+        # progress, embedding errors) are kept
+        db_service.merge_document_metadata(document_id, {
+            "transcription": {
+                "confidence_score": result.confidence_score,
+                "language_detected": result.language_detected,
+                "processing_time": result.processing_time,
+                "model_used": result.model_used,
+                "chunk_count": len(result.chunks),
+                "warnings": result.warnings,
+                "speaker_count": result.speaker_count,
+                "audio_duration": result.audio_metadata.duration_seconds,
+                "audio_quality": result.audio_metadata.quality_score
             }
-        )
+        })
         
         # Mark document as processed
         db_service.update_document_status(document_id, "processed")
@@ -928,10 +1360,13 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
     Advanced audio transcription with optimization for Dutch arbeidsdeskundige content.
 
     Features:
-    - Caching to avoid reprocessing
-    - Audio preprocessing and format conversion
-    - Chunking for large files
-    - Progress tracking
+    - Content-hash caching of full results and of individual chunks, so
+      retries and reprocessing only transcribe missing chunks
+    - Single-pass streaming decode, preprocessing and chunking (pydub fallback)
+    - Chunks transcribed in parallel
+    - Progress tracking per completed chunk
+    - Transcript text, document chunks and embeddings published per chunk,
+      so search and reports can use the finished part of a long recording
     - Quality scoring and validation
     - Dutch language optimization
 
@@ -984,7 +1419,14 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
         cached_result = get_cached_transcription(cache_key)
         if cached_result:
             logger.info("Using cached transcription result")
+            publisher = ProgressiveTranscriptPublisher(
+                document, len(cached_result.chunks), text_transform=apply_dutch_corrections
+            )
+            publisher.reset()
+            for i, chunk in enumerate(cached_result.chunks):
+                publisher.add(i, chunk)
             update_document_with_result(document_id, cached_result)
+            publisher.finish()
             return format_response(cached_result, document_id, from_cache=True)
 
         # Prepare and validate audio file
@@ -994,22 +1436,34 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
                 meta={'status': 'Preparing audio file', 'progress': 10}
             )
         
-        try:
-            prepared_file, audio_metadata = prepare_audio_for_transcription(file_path)
-            logger.info(f"Audio prepared: duration={audio_metadata.duration_seconds:.1f}s, "
-                       f"quality={audio_metadata.quality_score:.2f}")
-        except Exception as e:
-            logger.error(f"Error preparing audio file: {e}")
-            return {"status": "error", "message": f"Audio preparation failed: {str(e)}"}
-        
-        # Determine if chunking is needed
-        needs_chunking = audio_metadata.duration_seconds > CHUNK_SIZE_SECONDS or audio_metadata.file_size > MAX_FILE_SIZE_BYTES
+        audio_chunks = None
+        if streaming_available():
+            try:
+                audio_chunks, audio_metadata = prepare_audio_chunks_streaming(file_path)
+                prepared_file = file_path
+            except FileNotFoundError as e:
+                logger.error(f"Error preparing audio file: {e}")
+                return {"status": "error", "message": f"Audio preparation failed: {str(e)}"}
+            except Exception as e:
+                logger.warning(f"Streaming audio preprocessing failed, falling back to pydub: {e}")
         
-        if needs_chunking:
-            logger.info(f"Audio file requires chunking (duration: {audio_metadata.duration_seconds:.1f}s)")
-            audio_chunks = chunk_audio_file(prepared_file)
-        else:
-            audio_chunks = [prepared_file]
+        if audio_chunks is None:
+            try:
+                prepared_file, audio_metadata = prepare_audio_for_transcription(file_path)
+                logger.info(f"Audio prepared: duration={audio_metadata.duration_seconds:.1f}s, "
+                           f"quality={audio_metadata.quality_score:.2f}")
+            except Exception as e:
+                logger.error(f"Error preparing audio file: {e}")
+                return {"status": "error", "message": f"Audio preparation failed: {str(e)}"}
+            
+            # Determine if chunking is needed
+            needs_chunking = audio_metadata.duration_seconds > CHUNK_SIZE_SECONDS or audio_metadata.file_size > MAX_FILE_SIZE_BYTES
+            
+            if needs_chunking:
+                logger.info(f"Audio file requires chunking (duration: {audio_metadata.duration_seconds:.1f}s)")
+                audio_chunks = chunk_audio_file(prepared_file)
+            else:
+                audio_chunks = [prepared_file]
 
         # Validate API key
         api_key = settings.OPENAI_API_KEY
@@ -1030,33 +1484,50 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
         if current_task:
             current_task.update_state(
                 state=TranscriptionStatus.TRANSCRIBING.value,
-                meta={'status': f'Transcribing {len(audio_chunks)} chunk(s)', 'progress': 30}
+                meta={
+                    'status': f'Transcribing {len(audio_chunks)} chunk(s)',
+                    'progress': 30,
+                    'chunks_completed': 0,
+                    'chunks_total': len(audio_chunks)
+                }
             )
         
-        chunk_results = []
-        client = OpenAI(api_key=api_key)
-        
-        for i, chunk_file in enumerate(audio_chunks):
-            try:
-                logger.info(f"Transcribing chunk {i+1}/{len(audio_chunks)}: {os.path.basename(chunk_file)}")
-                
-                # Update progress
-                if current_task:
-                    progress = 30 + (i / len(audio_chunks)) * 50
-                    current_task.update_state(
-                        state=TranscriptionStatus.TRANSCRIBING.value,
-                        meta={'status': f'Transcribing chunk {i+1}/{len(audio_chunks)}', 'progress': progress}
-                    )
-                
-                chunk_result = transcribe_single_chunk(
-                    client, chunk_file, config, i * CHUNK_SIZE_SECONDS
+        # The per-chunk retry loop handles transient errors, so disable the
+        # client's own retries to keep the rate limiter in control
+        client = OpenAI(api_key=api_key, max_retries=0)
+        rate_limiter = RequestRateLimiter(settings.AUDIO_TRANSCRIPTION_RPM)
+        
+        def report_progress(completed: int, total: int) -> None:
+            logger.info(f"Transcribed {completed}/{total} chunk(s)")
+            if current_task:
+                current_task.update_state(
+                    state=TranscriptionStatus.TRANSCRIBING.value,
+                    meta={
+                        'status': f'Transcribed {completed}/{total} chunk(s)',
+                        'progress': 30 + (completed / total) * 50,
+                        'chunks_completed': completed,
+                        'chunks_total': total
+                    }
                 )
-                chunk_results.append(chunk_result)
-                
-            except Exception as e:
-                logger.error(f"Error transcribing chunk {i+1}: {e}")
-                # Continue with other chunks, but note the error
-                chunk_results.append(create_error_chunk(i * CHUNK_SIZE_SECONDS, str(e)))
+        
+        # Publish the transcript and ingest it for RAG as chunks finish
+        publisher = ProgressiveTranscriptPublisher(
+            document, len(audio_chunks), text_transform=apply_dutch_corrections
+        )
+        publisher.reset()
+        
+        chunk_results = transcribe_chunks_concurrently(
+            client,
+            audio_chunks,
+            config,
+            max_workers=settings.AUDIO_TRANSCRIPTION_CONCURRENCY,
+            rate_limiter=rate_limiter,
+            max_retries=settings.AUDIO_CHUNK_MAX_RETRIES,
+            progress_callback=report_progress,
+            use_chunk_cache=True,
+            chunk_callback=publisher.add,
+            cache_tag=document_id
+        )
         
         # Combine chunk results
         if current_task:
@@ -1075,14 +1546,19 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
         # Quality validation
         final_result = validate_transcription_quality(optimized_result)
         
-        # Cache the result
-        save_transcription_cache(cache_key, final_result)
+        # Cache the result only when complete; failed chunks are retried on
+        # the next attempt while successful ones come from the chunk cache
+        if all(chunk.confidence > 0 for chunk in chunk_results):
+            save_transcription_cache(cache_key, final_result, tag=document_id)
+        else:
+            logger.warning("Not caching transcription result with failed chunks")
         
         # Clean up temporary files
         cleanup_temp_files(audio_chunks, prepared_file, file_path)
         
         # Update document with results
         update_document_with_result(document_id, final_result)
+        publisher.finish()
         
         if current_task:
             current_task.update_state(
@@ -1101,6 +1577,8 @@ def transcribe_audio_optimized(self, document_id: str, model_config: str = "accu
             if self.request.retries < self.max_retries:
                 logger.info(f"Retrying transcription (attempt {self.request.retries + 1}/{self.max_retries})")
                 raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+        except Retry:
+            raise
         except Exception:
             pass
         
@@ -1182,4 +1660,24 @@ def cleanup_temporary_audio_optimized(file_paths: List[str]) -> Dict[str, Any]:
         
     except Exception as e:
         logger.error(f"Error in cleanup task: {e}")
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+# Task for periodic transcription cache eviction
+@shared_task
+def sweep_transcription_cache() -> Dict[str, Any]:
+    """
+    Remove expired and least recently used transcription cache entries.
+    
+    Returns:
+        Dictionary with the number of removed entries and cache statistics
+    """
+    cache = get_transcription_cache()
+    if cache is None:
+        return {"status": "skipped", "message": "Transcription cache unavailable"}
+    
+    try:
+        removed = cache.sweep()
+        return {"status": "success", "removed": removed, "stats": cache.get_stats()}
+    except Exception as e:
+        logger.error(f"Error sweeping transcription cache: {e}")
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,210 @@
+"""
+Progressive publishing of audio transcripts.
+
+Long interviews take many minutes to transcribe. Instead of publishing the
+transcript only after the last audio chunk is done, the publisher appends the
+text of each finished audio chunk to the document as soon as every chunk
+before it is finished too, chunks the new text into document chunks and
+queues embeddings for them. Search and report generation can then work on
+the first part of a recording while the rest is still being transcribed.
+
+Audio chunks complete out of order, so text is only published for the
+contiguous prefix of finished chunks; the published content is always a
+prefix of the final transcript. Embedding batches can finish in any order:
+each one marks the document enhanced only when every chunk is embedded and
+the transcript is complete, so whichever batch finishes last does it. The
+last batch is held back until finish(), after the transcript is complete.
+
+Usage:
+    publisher = ProgressiveTranscriptPublisher(document, total_chunks=len(audio_chunks))
+    publisher.reset()
+    for index, chunk in finished_chunks:
+        publisher.add(index, chunk)
+    update_document_with_result(document_id, result)
+    publisher.finish()
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from celery import current_app
+
+from app.core.config import settings
+from app.db.database_service import get_database_service
+from app.tasks.process_document_tasks.document_chunker import chunk_fingerprint
+from app.utils.chunking_engine import ChunkingEngine, SentenceBoundary
+
+logger = logging.getLogger(__name__)
+
+# Part of every transcript chunk fingerprint; bump when the chunking changes
+TRANSCRIPT_CHUNKER_VERSION = "engine-sentence-v1"
+
+EMBEDDING_TASK = "app.tasks.process_document_tasks.document_processor_hybrid.generate_document_embeddings"
+
+
+class ProgressiveTranscriptPublisher:
+    """
+    Appends finished transcript chunks to a document and ingests them for RAG.
+
+    Must be driven from a single thread; transcribe_chunks_concurrently calls
+    its callbacks from the calling thread.
+    """
+
+    def __init__(self, document: Dict[str, Any], total_chunks: int,
+                 text_transform: Optional[Callable[[str], str]] = None,
+                 db=None, dispatch_embeddings: Optional[Callable[..., None]] = None):
+        """
+        Args:
+            document: Document row of the audio document
+            total_chunks: Number of audio chunks in the recording
+            text_transform: Applied to each chunk text before publishing
+            db: Database service (defaults to the shared instance)
+            dispatch_embeddings: Callable(document_id, chunk_ids) that queues
+                embedding generation and marks the document enhanced once
+                all its chunks are embedded (defaults to the Celery task)
+        """
+        self.document = document
+        self.document_id = str(document["id"])
+        self.total_chunks = total_chunks
+        self.text_transform = text_transform or (lambda text: text)
+        self.db = db or get_database_service()
+        self.dispatch_embeddings = dispatch_embeddings or self._send_embedding_task
+        self.engine = ChunkingEngine(
+            settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS, strategy=SentenceBoundary()
+        )
+
+        self._finished: Dict[int, Any] = {}
+        self._next_index = 0
+        self._content_length = 0
+        self._published_any = False
+        self._next_chunk_index = 0
+        self._held_chunk_ids: List[str] = []
+        self._marked_available = False
+
+    @property
+    def published_chunks(self) -> int:
+        """Number of audio chunks whose text has been published."""
+        return self._next_index
+
+    def reset(self) -> None:
+        """Remove the content and document chunks of an earlier transcription."""
+        existing = self.db.get_document_chunks(self.document_id)
+        if existing:
+            logger.info(f"Removing {len(existing)} document chunks from an earlier transcription")
+            self.db.delete_document_chunks(self.document_id, [str(row["id"]) for row in existing])
+
+        self.db.append_document_content(self.document_id, "", reset=True)
+        self._update_progress()
+
+    def add(self, index: int, chunk) -> None:
+        """
+        Register a finished audio chunk and publish any newly complete prefix.
+
+        Args:
+            index: Position of the audio chunk in the recording
+            chunk: TranscriptionChunk for that position
+        """
+        self._finished[index] = chunk
+
+        batch = []
+        while self._next_index in self._finished:
+            batch.append(self._finished.pop(self._next_index))
+            self._next_index += 1
+
+        if batch:
+            self._publish(batch)
+
+    def finish(self) -> None:
+        """Queue the held-back embeddings; the last batch to finish marks the document enhanced."""
+        if self._held_chunk_ids:
+            self.dispatch_embeddings(self.document_id, self._held_chunk_ids)
+            self._held_chunk_ids = []
+        elif self._next_chunk_index:
+            # Nothing left to embed, but earlier batches may still be running;
+            # an empty batch marks the document once they are all done
+            self.dispatch_embeddings(self.document_id, [])
+
+    def _publish(self, batch: List[Any]) -> None:
+        # Failed chunks are left out, like combine_chunk_results does
+        pieces = []
+        for chunk in batch:
+            if chunk.confidence <= 0:
+                continue
+            pieces.append((" " if self._published_any else "") + self.text_transform(chunk.text))
+            self._published_any = True
+
+        if pieces:
+            text = "".join(pieces)
+            base = self._content_length
+            new_length = self.db.append_document_content(self.document_id, text)
+            if new_length is None:
+                logger.error(f"Could not append transcript text to document {self.document_id}")
+                return
+            self._content_length = new_length
+
+            chunk_ids = self._ingest(text, base, batch)
+            complete = self._next_index >= self.total_chunks
+            if chunk_ids and complete:
+                self._held_chunk_ids.extend(chunk_ids)
+            elif chunk_ids:
+                self.dispatch_embeddings(self.document_id, chunk_ids)
+
+        if not self._marked_available and self._published_any:
+            # Search and report generation only look at processed documents
+            self.db.update_document_status(self.document_id, "processed")
+            self._marked_available = True
+
+        self._update_progress()
+        logger.info(f"Published transcript for {self._next_index}/{self.total_chunks} audio chunk(s)")
+
+    def _ingest(self, text: str, base: int, batch: List[Any]) -> List[str]:
+        """Chunk newly published text and store it as document chunks."""
+        valid = [chunk for chunk in batch if chunk.confidence > 0]
+        audio_start = min(chunk.start_time for chunk in valid)
+        audio_end = max(chunk.end_time for chunk in valid)
+
+        rows = []
+        for piece in self.engine.iter_chunks(text):
+            offsets = piece.offsets()
+            offsets["start_char"] += base
+            offsets["end_char"] += base
+            rows.append({
+                "content": piece.text,
+                "chunk_index": self._next_chunk_index,
+                "fingerprint": chunk_fingerprint(piece.text, TRANSCRIPT_CHUNKER_VERSION),
+                "metadata": {
+                    "document_name": self.document.get("filename"),
+                    "chunk_index": self._next_chunk_index,
+                    "case_id": str(self.document.get("case_id")),
+                    "source": "audio_transcript",
+                    "audio_start": audio_start,
+                    "audio_end": audio_end,
+                    **offsets
+                }
+            })
+            self._next_chunk_index += 1
+
+        if not rows:
+            return []
+
+        created = self.db.create_document_chunks_bulk(self.document_id, rows)
+        if not created:
+            logger.error(f"Could not store transcript chunks for document {self.document_id}")
+        return [row["id"] for row in created]
+
+    def _update_progress(self) -> None:
+        self.db.merge_document_metadata(self.document_id, {
+            "transcript_progress": {
+                "chunks_published": self._next_index,
+                "chunks_total": self.total_chunks,
+                "partial": self._next_index < self.total_chunks,
+                "content_length": self._content_length
+            }
+        })
+
+    @staticmethod
+    def _send_embedding_task(document_id: str, chunk_ids: List[str]) -> None:
+        current_app.send_task(
+            EMBEDDING_TASK,
+            args=[document_id, chunk_ids],
+            kwargs={"mark_enhanced": True, "require_complete": True}
+        )
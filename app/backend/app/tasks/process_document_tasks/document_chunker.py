@@ -1,8 +1,10 @@
 def chunk_document(text, chunk_size, chunk_overlap, preserve_structured_content=True):
     """
-    Split a document into chunks with specified size and overlap using advanced
-    chunking strategies to preserve document structure and context.
-    This optimized version has timeout protection and better performance.
+    Split a document into chunks with specified size and overlap.
+
+    Chunks follow paragraph boundaries (sentence boundaries when
+    preserve_structured_content is False) and are produced in a single pass
+    by the shared chunking engine.
     
     Parameters:
     - text: The text content to chunk
@@ -13,60 +15,80 @@ def chunk_document(text, chunk_size, chunk_overlap, preserve_structured_content=
     Returns:
     - A list of text chunks
     """
-    import time
-    import signal
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    
-    # Start timer to prevent infinite loops
-    start_time = time.time()
-    MAX_PROCESSING_TIME = 10  # Maximum time in seconds
-    
+    from app.utils.chunking_engine import ParagraphBoundary, SentenceBoundary, chunk_text_by_chars
+
     if not text:
         return []
-    
-    # Simple chunking for very short documents
-    if len(text) < chunk_size * 2:
-        chunks = []
-        for i in range(0, len(text), max(chunk_size - chunk_overlap, 100)):
-            chunk = text[i:min(i + chunk_size, len(text))]
-            chunks.append(chunk)
-        return chunks
-    
-    # Immediate fallback for larger documents
-    # For stability, we're using simple chunking to avoid potential hangs
-    logger.info(f"Using simple chunking for document with length {len(text)}")
-    return simple_chunking(text, chunk_size, chunk_overlap)
+
+    strategy = ParagraphBoundary() if preserve_structured_content else SentenceBoundary()
+    return chunk_text_by_chars(text, chunk_size, chunk_overlap, strategy)
         
 def simple_chunking(text, chunk_size, chunk_overlap):
     """
     Fallback method for simple chunking without advanced features
     """
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        # Take a simple chunk
-        end = min(start + chunk_size, len(text))
-        
-        # Try to break at a newline or period if possible
-        if start > 0 and end < len(text):
-            newline = text.rfind('\n', start, end)
-            if newline != -1 and newline > start + chunk_size // 2:
-                end = newline + 1
-            else:
-                period = text.rfind('. ', start, end)
-                if period != -1 and period > start + chunk_size // 2:
-                    end = period + 2
-        
-        chunks.append(text[start:end])
-        
-        # Move start position
-        start = end - chunk_overlap
-        
-        # Prevent getting stuck
-        if start >= end - 1:
-            start = end
-    
-    return chunks
\ No newline at end of file
+    return chunk_document(text, chunk_size, chunk_overlap, preserve_structured_content=False)
+
+def normalize_chunk_text(text):
+    """
+    Normalize chunk text for fingerprinting: collapse all whitespace runs to a
+    single space and strip the ends, so re-extraction noise (trailing spaces,
+    CRLF vs LF) does not change the fingerprint.
+    """
+    return " ".join(text.split())
+
+
+def chunk_fingerprint(text, chunker_version):
+    """
+    Compute a stable fingerprint for a chunk.
+
+    The fingerprint covers the normalized chunk text and the chunker version,
+    so changing the chunking algorithm invalidates all existing fingerprints.
+
+    Parameters:
+    - text: The chunk text
+    - chunker_version: Identifier of the chunking algorithm that produced the chunk
+
+    Returns:
+    - A 64-character hex SHA-256 digest
+    """
+    import hashlib
+
+    payload = f"{chunker_version}\x00{normalize_chunk_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_chunks(existing_chunks, new_fingerprints):
+    """
+    Match freshly produced chunks against the chunks already stored for a document.
+
+    Parameters:
+    - existing_chunks: Stored chunk rows (dicts with at least "id" and "fingerprint")
+    - new_fingerprints: Fingerprints of the new chunks, in chunk order
+
+    Returns:
+    - A dict with:
+      - "kept": list of (new_index, existing_row) pairs for unchanged chunks
+      - "added": list of new chunk indexes that have no stored counterpart
+      - "removed": list of existing rows that no longer occur in the document
+    """
+    from collections import defaultdict, deque
+
+    # Duplicate chunks (e.g. repeated page footers) are matched one-to-one
+    available = defaultdict(deque)
+    for row in existing_chunks:
+        if row.get("fingerprint"):
+            available[row["fingerprint"]].append(row)
+
+    kept = []
+    added = []
+    for new_index, fingerprint in enumerate(new_fingerprints):
+        if available.get(fingerprint):
+            kept.append((new_index, available[fingerprint].popleft()))
+        else:
+            added.append(new_index)
+
+    kept_ids = {str(row["id"]) for _, row in kept}
+    removed = [row for row in existing_chunks if str(row["id"]) not in kept_ids]
+
+    return {"kept": kept, "added": added, "removed": removed}
@@ -9,13 +9,19 @@ import logging
 import time
 import gc
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
 import sys
 
 from app.celery_worker import celery
 from app.db.database_service import db_service
 from app.core.config import settings
+from app.core.task_queues import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, QUEUE_OCR, priority_for_pages
+)
 from app.utils.embeddings import generate_embedding
+from app.tasks.process_document_tasks.document_chunker import chunk_fingerprint, diff_chunks
+from app.utils.chunking_engine import ChunkingEngine, chunk_text_by_chars
+from app.utils.task_dedup import deduplicated_task, get_task_deduplicator, lease_ttl
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -24,44 +30,19 @@ logger = logging.getLogger(__name__)
 SMALL_DOCUMENT_THRESHOLD = 20000  # Characters (roughly 10 pages)
 MEDIUM_DOCUMENT_THRESHOLD = 60000  # Characters (roughly 30 pages)
 
+# Version of the chunking setup below; part of every chunk fingerprint.
+# Bump this whenever the chunking strategy or its settings change so all
+# chunks are re-embedded.
+CHUNKER_VERSION = "engine-paragraph-v1"
+
 def simple_chunking(text, chunk_size, chunk_overlap):
     """
-    Simple chunking method for text documents with improved paragraph handling
+    Paragraph-based chunking with character-based size settings.
+
+    Kept for callers that pass settings.CHUNK_SIZE/CHUNK_OVERLAP; the work is
+    done by the shared chunking engine.
     """
-    if not text:
-        return []
-        
-    # Split by paragraphs first
-    paragraphs = text.split('\n\n')
-    chunks = []
-    current_chunk = ""
-    
-    for paragraph in paragraphs:
-        # Skip empty paragraphs
-        if not paragraph.strip():
-            continue
-            
-        # If adding this paragraph would exceed the chunk size,
-        # save the current chunk and start a new one
-        if len(current_chunk) + len(paragraph) > chunk_size and current_chunk:
-            chunks.append(current_chunk)
-            
-            # Start new chunk with overlap
-            words = current_chunk.split()
-            overlap_words = words[-min(len(words), chunk_overlap // 5):]  # ~5 chars per word
-            current_chunk = ' '.join(overlap_words) + ' ' + paragraph
-        else:
-            # Add to current chunk
-            if current_chunk:
-                current_chunk += '\n\n' + paragraph
-            else:
-                current_chunk = paragraph
-    
-    # Add the last chunk if it's not empty
-    if current_chunk:
-        chunks.append(current_chunk)
-    
-    return chunks
+    return chunk_text_by_chars(text, chunk_size, chunk_overlap)
 
 def get_document_size_category(text_length):
     """
@@ -74,9 +55,55 @@ def get_document_size_category(text_length):
     else:
         return "large"
 
+def _metadata_dict(metadata):
+    """Return chunk metadata as a dict, whether stored as JSONB or a JSON string"""
+    if isinstance(metadata, dict):
+        return metadata
+    if isinstance(metadata, str):
+        try:
+            import json
+            return json.loads(metadata)
+        except ValueError:
+            return {}
+    return {}
+
+def _hand_off_to_ocr_queue(document_id, incremental, pages):
+    """
+    Re-queue a document that needs OCR on the dedicated OCR queue.
+
+    OCR of a long scan can take many minutes; running it on the ingestion
+    queue would block small documents behind it. Returns the task result to
+    report, or None if OCR should run here (already on the OCR queue, or
+    called directly or eagerly).
+    """
+    request = process_document_hybrid.request
+    if request.called_directly or request.is_eager:
+        return None
+    if (request.delivery_info or {}).get("routing_key") == QUEUE_OCR:
+        return None
+
+    # The OCR task takes over this task's dedup lease for the document
+    ocr_task_id = str(uuid4())
+    dedup = get_task_deduplicator()
+    if dedup is not None:
+        dedup.transfer(process_document_hybrid.name, document_id, request.id, ocr_task_id,
+                       lease_ttl(process_document_hybrid))
+
+    priority = priority_for_pages(pages)
+    process_document_hybrid.apply_async(
+        args=[document_id, incremental],
+        queue=QUEUE_OCR,
+        routing_key=QUEUE_OCR,
+        priority=priority,
+        task_id=ocr_task_id
+    )
+    logger.info(f"Handed document {document_id} ({pages} pages) to the OCR queue with priority {priority}")
+    return {"status": "ocr_queued", "document_id": document_id, "pages": pages}
+
 @celery.task(name="app.tasks.process_document_tasks.document_processor_hybrid.process_document_hybrid")
-def process_document_hybrid(document_id: str):
-    logger.info(f"process_document_hybrid task called with ID: {document_id}")
+@deduplicated_task("document_id")
+def process_document_hybrid(document_id: str, incremental: bool = True):
+    logger.info(f"process_document_hybrid task called with ID: {document_id} (incremental={incremental})")
     """
     Hybrid document processor that:
     1. Reads the document
@@ -84,6 +111,14 @@ def process_document_hybrid(document_id: str):
     3. Stores the chunks in the database
     4. Marks the document as processed immediately
     5. Schedules asynchronous embedding generation
+
+    When the document already has chunks (re-ingestion) and incremental is
+    True, chunks are matched by fingerprint: unchanged chunks keep their row
+    and embedding, vanished chunks are deleted and only new chunks are
+    embedded. With incremental=False all existing chunks are rebuilt.
+
+    Only one task per document runs at a time; duplicates return
+    {"status": "duplicate", "task_id": <in-flight task>} (see task_dedup).
     """
     start_time = time.time()
     
@@ -152,6 +187,10 @@ def process_document_hybrid(document_id: str):
                         from app.utils.ocr_processor import ocr_pdf, is_tesseract_available
 
                         if is_tesseract_available():
+                            handoff = _hand_off_to_ocr_queue(document_id, incremental, total_pages)
+                            if handoff:
+                                return handoff
+
                             logger.info(f"Running OCR on scanned PDF: {document['filename']}")
 
                             # Run OCR with Dutch and English language support
@@ -234,6 +273,10 @@ def process_document_hybrid(document_id: str):
             from app.utils.ocr_processor import extract_text_with_ocr, is_tesseract_available
 
             if is_tesseract_available():
+                handoff = _hand_off_to_ocr_queue(document_id, incremental, 1)
+                if handoff:
+                    return handoff
+
                 try:
                     # Extract text from image using OCR
                     text_content = extract_text_with_ocr(
@@ -302,16 +345,18 @@ def process_document_hybrid(document_id: str):
             # Fall back to treating as text for other types
             text_content = file_content.decode("utf-8", errors="ignore")
         
-        # Clear file_content from memory
+        # Clear file_content from memory (collected once, after chunk storage)
         del file_content
-        gc.collect()
         
         # Determine document size category
         size_category = get_document_size_category(len(text_content))
         logger.info(f"Document categorized as '{size_category}' size")
         
-        # Chunk the document using simple chunking
-        chunks = simple_chunking(text_content, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+        # Chunk the document by paragraphs within the token budget
+        engine = ChunkingEngine(settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+        chunk_objects = engine.chunk(text_content)
+        chunks = [chunk.text for chunk in chunk_objects]
+        chunk_offsets = [chunk.offsets() for chunk in chunk_objects]
         logger.info(f"Document chunked into {len(chunks)} chunks")
         
         # Update metadata with document size info
@@ -322,96 +367,128 @@ def process_document_hybrid(document_id: str):
             "processed_at": datetime.utcnow().isoformat()
         }
         
-        # Skip updating document metadata if the column doesn't exist
-        # We'll just log the metadata for debugging
         logger.info(f"Document metadata: {document_metadata}")
         
-        # In a production environment, we would add the metadata column to the document table
-        # For now, we'll just continue without updating metadata
-        try:
-            import json
-            from app.utils.vector_store import UUIDEncoder
-            db_service.update_row("document", document_id, {"metadata": json.dumps(document_metadata, cls=UUIDEncoder)})
-        except Exception as e:
-            # Log the error but continue processing
-            logger.warning(f"Could not update document metadata: {str(e)}")
+        # Merge so keys written by other stages (e.g. the section index) are kept
+        if not db_service.merge_document_metadata(document_id, document_metadata):
+            logger.warning(f"Could not update document metadata for {document_id}")
         
-        # Store chunks in database
-        chunks_processed = 0
-        chunks_with_error = 0
-        chunk_ids = []
-        
-        for i, chunk in enumerate(chunks):
-            # Force gc collection for every chunk to keep memory usage low
-            gc.collect()
-            
-            try:
-                # Create metadata for this chunk
-                metadata = {
-                    "document_name": document["filename"],
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "case_id": document["case_id"],
-                    "size_category": size_category
-                }
-                
-                # Store document chunk using the original method signature
-                chunk_record = db_service.create_document_chunk(
-                    document_id=document_id,
-                    content=chunk,
-                    chunk_index=i,
-                    metadata=metadata
-                )
-                
-                if chunk_record:
-                    chunks_processed += 1
-                    # Get the ID from the chunk record
-                    chunk_ids.append(chunk_record["id"])
-                else:
-                    chunks_with_error += 1
-                    
-            except Exception as e:
-                logger.error(f"Error processing chunk {i}: {str(e)}")
-                chunks_with_error += 1
+        def build_chunk_metadata(index):
+            return {
+                "document_name": document["filename"],
+                "chunk_index": index,
+                "total_chunks": len(chunks),
+                "case_id": str(document["case_id"]),
+                "size_category": size_category,
+                **chunk_offsets[index]
+            }
+
+        # Fingerprint chunks and match them against what is already stored
+        fingerprints = [chunk_fingerprint(chunk, CHUNKER_VERSION) for chunk in chunks]
+        existing_chunks = db_service.get_document_chunks(document_id)
+
+        if existing_chunks and not incremental:
+            logger.info(f"Full re-ingestion: removing {len(existing_chunks)} existing chunks")
+            db_service.delete_document_chunks(document_id, [str(row["id"]) for row in existing_chunks])
+            existing_chunks = []
+
+        chunk_diff = diff_chunks(existing_chunks, fingerprints)
+        if existing_chunks:
+            logger.info(
+                f"Incremental re-ingestion: {len(chunk_diff['kept'])} chunks unchanged, "
+                f"{len(chunk_diff['added'])} new, {len(chunk_diff['removed'])} removed"
+            )
+
+        # Delete chunks (and their embeddings) that no longer occur in the document
+        removed_ids = [str(row["id"]) for row in chunk_diff["removed"]]
+        db_service.delete_document_chunks(document_id, removed_ids)
+
+        # Unchanged chunks keep their row and embedding, but may have moved
+        position_updates = []
+        for new_index, row in chunk_diff["kept"]:
+            metadata = build_chunk_metadata(new_index)
+            if row.get("chunk_index") != new_index or _metadata_dict(row.get("metadata")) != metadata:
+                position_updates.append({"id": row["id"], "chunk_index": new_index, "metadata": metadata})
+        db_service.update_document_chunk_positions(document_id, position_updates)
+
+        # Store new chunks in database with bulk INSERTs
+        new_chunks = [
+            {
+                "content": chunks[i],
+                "chunk_index": i,
+                "metadata": build_chunk_metadata(i),
+                "fingerprint": fingerprints[i]
+            }
+            for i in chunk_diff["added"]
+        ]
+        created_chunks = db_service.create_document_chunks_bulk(document_id, new_chunks)
+
+        chunks_processed = len(created_chunks)
+        chunks_with_error = len(new_chunks) - chunks_processed
+        chunk_ids = [chunk["id"] for chunk in created_chunks]
+        if chunks_with_error:
+            logger.error(f"Failed to store {chunks_with_error} of {len(new_chunks)} new chunks")
+
+        # Unchanged chunks whose earlier embedding failed still need one
+        if chunk_diff["kept"]:
+            embedded_ids = db_service.get_embedded_chunk_ids(document_id)
+            chunk_ids.extend(
+                str(row["id"]) for _, row in chunk_diff["kept"] if str(row["id"]) not in embedded_ids
+            )
+
+        # Drop cached search results that refer to removed or moved chunks only
+        touched_chunk_ids = removed_ids + [str(update["id"]) for update in position_updates]
+        if touched_chunk_ids:
+            from app.utils.rag_cache import invalidate_chunk_cache
+            invalidate_chunk_cache(touched_chunk_ids)
         
-        # Clear text_content from memory
+        # Clear document text and chunks from memory with a single full collection
         del text_content
+        del new_chunks
+        del chunk_objects
         gc.collect()
         
         # Update document status to processed IMMEDIATELY
         db_service.update_document_status(document_id, "processed")
         
         total_time = time.time() - start_time
-        logger.info(f"Initial document processing completed in {total_time:.2f}s: {chunks_processed} chunks processed, {chunks_with_error} chunks with errors")
+        logger.info(f"Initial document processing completed in {total_time:.2f}s: {chunks_processed} chunks processed, {len(chunk_diff['kept'])} chunks reused, {chunks_with_error} chunks with errors")
         
         # Schedule asynchronous embedding generation based on document size
+        # (Redis priorities: lower values are served first)
         if size_category == "small":
             # For small documents, generate embeddings immediately with high priority
-            priority = 5
+            priority = PRIORITY_HIGH
             delay_seconds = 1
         elif size_category == "medium":
             # Medium priority for medium sized documents
-            priority = 3
+            priority = PRIORITY_NORMAL
             delay_seconds = 5
         else:
             # Lowest priority for large documents
-            priority = 1
+            priority = PRIORITY_LOW
             delay_seconds = 10
             
-        # Queue the asynchronous embedding task
-        if chunks_processed > 0:
+        # Queue the asynchronous embedding task for chunks without an embedding
+        if chunk_ids:
             generate_document_embeddings.apply_async(
                 args=[document_id, chunk_ids],
                 countdown=delay_seconds,
                 priority=priority
             )
-            logger.info(f"Scheduled asynchronous embedding generation with priority {priority}")
+            logger.info(f"Scheduled asynchronous embedding generation for {len(chunk_ids)} chunks with priority {priority}")
+        elif chunk_diff["kept"]:
+            # Every chunk already has its embedding - nothing left to do
+            db_service.update_document_status(document_id, "enhanced")
+            logger.info("All chunks unchanged and embedded, document marked as enhanced")
         
         return {
             "status": "success", 
             "document_id": document_id, 
             "chunks_total": len(chunks),
             "chunks_processed": chunks_processed,
+            "chunks_reused": len(chunk_diff["kept"]),
+            "chunks_removed": len(removed_ids),
             "chunks_with_error": chunks_with_error,
             "size_category": size_category,
             "processing_time": total_time
@@ -428,106 +505,202 @@ def process_document_hybrid(document_id: str):
         return {"status": "failed", "document_id": document_id, "error": str(e)}
 
 @celery.task(name="app.tasks.process_document_tasks.document_processor_hybrid.generate_document_embeddings", bind=True, max_retries=3)
-def generate_document_embeddings(self, document_id, chunk_ids):
+def generate_document_embeddings(self, document_id, chunk_ids=None, mark_enhanced=True, require_complete=False):
     """
     Asynchronous task to generate embeddings for document chunks.
     This runs in the background after the document is already marked as processed.
+
+    The chunks are split into shards of EMBEDDING_SHARD_SIZE chunks that run
+    as a chord across the embedding workers; finalize_document_embeddings
+    marks the document enhanced once every shard has succeeded.
+
+    If chunk_ids is None, all chunks of the document are embedded. With
+    mark_enhanced=False the document status is left unchanged, for batches
+    of a document that is still being ingested (e.g. a partial transcript).
+    With require_complete=True the document is only marked enhanced once
+    every chunk is embedded and its transcript is no longer partial, so
+    concurrent batches can finish in any order.
     """
     logger.info(f"Starting asynchronous embedding generation for document {document_id}")
-    start_time = time.time()
-    
+    started_at = time.time()
+
     try:
-        from app.utils.vector_store_improved import batch_add_embeddings
-        
+        from celery import chord
+
         # Get document info
         document = db_service.get_row_by_id("document", document_id)
         if not document:
             logger.error(f"Document {document_id} not found for embedding generation")
             return {"status": "failed", "error": "Document not found"}
-            
-        # Get document chunks
-        chunks_data = []
-        for chunk_id in chunk_ids:
-            chunk = db_service.get_document_chunk(chunk_id)
-            if chunk:
-                chunks_data.append(chunk)
-                
-        logger.info(f"Retrieved {len(chunks_data)} chunks for embedding generation")
-        
-        # Prepare batch embeddings data
+
+        if chunk_ids is None:
+            chunk_ids = db_service.get_document_chunk_ids(document_id)
+        chunk_ids = [str(chunk_id) for chunk_id in chunk_ids]
+
+        shard_size = max(1, settings.EMBEDDING_SHARD_SIZE)
+        shards = [chunk_ids[i:i + shard_size] for i in range(0, len(chunk_ids), shard_size)]
+
+        if not shards:
+            return finalize_document_embeddings([], document_id, mark_enhanced, started_at, require_complete)
+
+        header = [
+            embed_chunk_shard.s(document_id, shard, shard_index, len(shards))
+            for shard_index, shard in enumerate(shards)
+        ]
+        finalizer = finalize_document_embeddings.s(document_id, mark_enhanced, started_at, require_complete)
+        finalizer.on_error(embedding_shards_failed.s(document_id))
+        result = chord(header)(finalizer)
+
+        logger.info(f"Dispatched {len(chunk_ids)} chunks of document {document_id} as {len(shards)} embedding shards")
+
+        return {
+            "status": "dispatched",
+            "document_id": document_id,
+            "chunks": len(chunk_ids),
+            "shards": len(shards),
+            "finalizer_id": result.id
+        }
+    except Exception as e:
+        logger.error(f"Error dispatching embedding shards: {str(e)}")
+        # Retry with exponential backoff
+        retry_countdown = 60 * (2 ** self.request.retries)  # 60s, 120s, 240s
+        self.retry(exc=e, countdown=retry_countdown)
+
+@celery.task(name="app.tasks.process_document_tasks.document_processor_hybrid.embed_chunk_shard", bind=True, max_retries=3)
+def embed_chunk_shard(self, document_id, chunk_ids, shard_index=0, shard_count=1):
+    """
+    Embed one shard of a document's chunks.
+
+    Idempotent: chunks that already have an embedding are skipped, so a retry
+    (or a redelivery after a worker crash) only embeds what is still missing.
+    Progress is published as task state PROGRESS with done/total counts.
+    """
+    start_time = time.time()
+    total = len(chunk_ids)
+
+    def report_progress(done):
+        if self.request.id and not self.request.is_eager:
+            self.update_state(state="PROGRESS", meta={
+                "document_id": document_id,
+                "shard": shard_index,
+                "shards": shard_count,
+                "done": done,
+                "total": total
+            })
+
+    try:
+        from app.utils.vector_store_improved import batch_add_embeddings
+
+        embedded_ids = db_service.get_embedded_chunk_ids(document_id)
+        pending_ids = [chunk_id for chunk_id in chunk_ids if str(chunk_id) not in embedded_ids]
+        skipped = total - len(pending_ids)
+        report_progress(skipped)
+
+        # Chunks removed by a concurrent re-ingestion are simply not returned
+        chunks_data = db_service.get_document_chunks_bulk(document_id, pending_ids) if pending_ids else []
+
         embeddings_data = []
-        total_chunks = len(chunks_data)
-        chunks_processed = 0
-        chunks_failed = 0
-        
-        # Process in mini-batches to avoid memory issues
-        mini_batch_size = 3
-        for i in range(0, total_chunks, mini_batch_size):
-            mini_batch = chunks_data[i:i+mini_batch_size]
-            logger.info(f"Processing embedding mini-batch {i//mini_batch_size + 1}/{(total_chunks-1)//mini_batch_size + 1}")
-            
-            for chunk in mini_batch:
-                try:
-                    # Force garbage collection
-                    gc.collect()
-                    
-                    # Generate embedding
-                    embedding = generate_embedding(chunk["content"])
-                    
-                    # Add to batch data
-                    embeddings_data.append({
-                        "document_id": document_id,
-                        "chunk_id": chunk["id"],
-                        "content": chunk["content"],
-                        "embedding": embedding,
-                        "metadata": chunk["metadata"]
-                    })
-                    
-                    chunks_processed += 1
-                    
-                    # Log progress for large documents
-                    if total_chunks > 10 and chunks_processed % 5 == 0:
-                        logger.info(f"Embedding progress: {chunks_processed}/{total_chunks} chunks processed")
-                        
-                except Exception as e:
-                    logger.error(f"Error generating embedding for chunk {chunk['id']}: {str(e)}")
-                    chunks_failed += 1
-                    
-            # Add batch to vector store
-            if embeddings_data:
-                try:
-                    batch_result = batch_add_embeddings(
-                        embeddings_data=embeddings_data,
-                        batch_size=10,  # Process in smaller sub-batches
-                        timeout=60      # Longer timeout for batch operations
-                    )
-                    logger.info(f"Batch embedding result: {batch_result}")
-                    
-                    # Clear batch data after successful storage
-                    embeddings_data = []
-                except Exception as e:
-                    logger.error(f"Error storing batch embeddings: {str(e)}")
-        
-        # Update document status to indicate embeddings are available
-        logger.info(f"Embeddings generated: {chunks_processed} chunks, {chunks_failed} failures")
-        
-        # Update document status without metadata
-        db_service.update_row("document", document_id, {
-            "status": "enhanced"  # Mark as enhanced when embeddings are available
-        })
-        
+        failed_ids = []
+        for chunk in chunks_data:
+            try:
+                embedding = generate_embedding(chunk["content"])
+            except Exception as e:
+                logger.error(f"Error generating embedding for chunk {chunk['id']}: {str(e)}")
+                failed_ids.append(str(chunk["id"]))
+                continue
+
+            embeddings_data.append({
+                "document_id": document_id,
+                "chunk_id": chunk["id"],
+                "content": chunk["content"],
+                "embedding": embedding,
+                "metadata": chunk["metadata"]
+            })
+            report_progress(skipped + len(embeddings_data))
+
+        stored = 0
+        if embeddings_data:
+            batch_result = batch_add_embeddings(
+                embeddings_data=embeddings_data,
+                batch_size=10,  # Process in smaller sub-batches
+                timeout=60      # Longer timeout for batch operations
+            )
+            stored = batch_result["success"]
+            failed_ids.extend(str(chunk_id) for chunk_id in batch_result["failed_chunks"])
+
+        if failed_ids:
+            raise RuntimeError(f"{len(failed_ids)} of {len(pending_ids)} chunks in shard {shard_index + 1}/{shard_count} failed")
+
         total_time = time.time() - start_time
-        logger.info(f"Asynchronous embedding generation completed in {total_time:.2f}s: {chunks_processed} chunks processed, {chunks_failed} chunks failed")
-        
+        logger.info(f"Embedding shard {shard_index + 1}/{shard_count} of document {document_id} completed in {total_time:.2f}s: {stored} embedded, {skipped} already embedded")
+
         return {
-            "status": "success",
             "document_id": document_id,
-            "chunks_processed": chunks_processed,
-            "chunks_failed": chunks_failed,
+            "shard": shard_index,
+            "chunks_processed": stored,
+            "chunks_skipped": skipped,
             "processing_time": total_time
         }
     except Exception as e:
-        logger.error(f"Error in asynchronous embedding generation: {str(e)}")
-        # Retry with exponential backoff
-        retry_countdown = 60 * (2 ** self.request.retries)  # 60s, 120s, 240s
-        self.retry(exc=e, countdown=retry_countdown)
\ No newline at end of file
+        logger.error(f"Error in embedding shard {shard_index + 1}/{shard_count} of document {document_id}: {str(e)}")
+        retry_countdown = 30 * (2 ** self.request.retries)  # 30s, 60s, 120s
+        raise self.retry(exc=e, countdown=retry_countdown)
+
+def _document_fully_embedded(document_id):
+    """True when the document is completely ingested and every chunk has an embedding"""
+    document = db_service.get_row_by_id("document", document_id)
+    if not document:
+        return False
+    progress = _metadata_dict(document.get("metadata")).get("transcript_progress") or {}
+    if progress.get("partial"):
+        return False
+
+    embedded_ids = db_service.get_embedded_chunk_ids(document_id)
+    return all(chunk_id in embedded_ids for chunk_id in db_service.get_document_chunk_ids(document_id))
+
+@celery.task(name="app.tasks.process_document_tasks.document_processor_hybrid.finalize_document_embeddings")
+def finalize_document_embeddings(shard_results, document_id, mark_enhanced=True, started_at=None, require_complete=False):
+    """
+    Chord callback: runs once every embedding shard of a document succeeded.
+
+    Each batch stores its embeddings before its finalizer runs, so with
+    require_complete the finalizer of whichever batch finishes last sees
+    every chunk embedded and marks the document.
+    """
+    chunks_processed = sum(result.get("chunks_processed", 0) for result in shard_results)
+    chunks_skipped = sum(result.get("chunks_skipped", 0) for result in shard_results)
+
+    if mark_enhanced and require_complete and not _document_fully_embedded(document_id):
+        logger.info(f"Document {document_id} still has chunks without embeddings, leaving its status unchanged")
+    elif mark_enhanced:
+        db_service.update_row("document", document_id, {
+            "status": "enhanced"  # Mark as enhanced when embeddings are available
+        })
+        # Clear the error of an earlier failed run
+        db_service.remove_document_metadata_keys(document_id, ["embedding_error", "embedding_failed_at"])
+
+    total_time = time.time() - started_at if started_at else 0.0
+    logger.info(f"Asynchronous embedding generation completed in {total_time:.2f}s: {len(shard_results)} shards, {chunks_processed} chunks processed, {chunks_skipped} already embedded")
+
+    return {
+        "status": "success",
+        "document_id": document_id,
+        "shards": len(shard_results),
+        "chunks_processed": chunks_processed,
+        "chunks_skipped": chunks_skipped,
+        "processing_time": total_time
+    }
+
+@celery.task(name="app.tasks.process_document_tasks.document_processor_hybrid.embedding_shards_failed")
+def embedding_shards_failed(request, exc, traceback, document_id):
+    """
+    Chord error callback: a shard failed after all its retries.
+
+    The document stays "processed" (usable through the direct approach) and
+    the error is recorded; reprocessing only embeds the chunks still missing.
+    """
+    logger.error(f"Embedding generation for document {document_id} failed: {exc}")
+    db_service.merge_document_metadata(document_id, {
+        "embedding_error": str(exc),
+        "embedding_failed_at": datetime.utcnow().isoformat()
+    })
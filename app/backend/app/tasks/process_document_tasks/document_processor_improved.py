@@ -14,34 +14,16 @@ from app.db.database_service import db_service
 from app.core.config import settings
 from app.utils.embeddings import generate_embedding
 from app.utils.vector_store_improved import add_embedding
+from app.utils.chunking_engine import chunk_text_by_chars
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 def simple_chunking(text, chunk_size, chunk_overlap):
     """
-    Extremely simple chunking method for text documents
+    Simple chunking method for text documents, using the shared chunking engine
     """
-    if not text:
-        return []
-        
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        # Take a simple chunk
-        end = min(start + chunk_size, len(text))
-        chunk = text[start:end]
-        chunks.append(chunk)
-        
-        # Move start position
-        start = end - chunk_overlap
-        
-        # Prevent getting stuck
-        if start >= end - 1:
-            start = end
-    
-    return chunks
+    return chunk_text_by_chars(text, chunk_size, chunk_overlap)
 
 @celery.task
 def process_document_improved(document_id: str):
@@ -10,6 +10,7 @@ from datetime import datetime
 from app.db.database_service import DatabaseService
 from app.utils.llm_provider import GenerativeModel
 from app.utils.smart_document_classifier import SmartDocumentClassifier, ProcessingStrategy
+from app.utils.chunking_engine import ChunkingEngine, SectionPatternBoundary, tokens_for_chars
 # from app.tasks.process_document_tasks.hybrid_processor import HybridDocumentProcessor
 # from app.utils.vector_store_improved import VectorStoreImproved
 
@@ -271,38 +272,20 @@ class EnhancedDocumentProcessor:
             "prognose": r"(prognose|verwachting|herstel|vooruitzicht)"
         }
         
-        chunks = []
-        remaining_content = content
-        
-        for section_name, pattern in section_patterns.items():
-            # Zoek sectie in content
-            matches = list(re.finditer(pattern, content, re.IGNORECASE))
-            if matches:
-                # Neem eerste match als sectie start
-                start_pos = matches[0].start()
-                
-                # Zoek einde van sectie (volgende sectie of einde document)
-                end_pos = len(content)
-                for other_section, other_pattern in section_patterns.items():
-                    if other_section != section_name:
-                        other_matches = list(re.finditer(other_pattern, content[start_pos + 100:], re.IGNORECASE))
-                        if other_matches:
-                            potential_end = start_pos + 100 + other_matches[0].start()
-                            if potential_end < end_pos:
-                                end_pos = potential_end
-                
-                section_content = content[start_pos:end_pos].strip()
-                
-                if len(section_content) > 50:  # Minimale sectie grootte
-                    chunks.append({
-                        "content": section_content,
-                        "metadata": {
-                            "section_type": section_name,
-                            "document_type": "medical_report",
-                            "chunk_type": "medical_section",
-                            "importance": "high" if section_name in ["diagnose", "behandeling"] else "medium"
-                        }
-                    })
+        chunks = [
+            {
+                "content": chunk.text,
+                "metadata": {
+                    "section_type": chunk.section,
+                    "document_type": "medical_report",
+                    "chunk_type": "medical_section",
+                    "importance": "high" if chunk.section in ["diagnose", "behandeling"] else "medium",
+                    **chunk.offsets()
+                }
+            }
+            for chunk in self._section_engine(section_patterns).iter_chunks(content)
+            if chunk.section
+        ]
         
         # Als er geen duidelijke secties gevonden zijn, gebruik default chunking
         if not chunks:
@@ -339,27 +322,20 @@ class EnhancedDocumentProcessor:
                                doc_type: str) -> List[Dict[str, Any]]:
         """Generieke functie voor pattern-based chunking"""
         
-        chunks = []
-        
-        for section_name, pattern in section_patterns.items():
-            matches = list(re.finditer(pattern, content, re.IGNORECASE))
-            if matches:
-                for match in matches:
-                    start_pos = max(0, match.start() - 200)  # Context voor de match
-                    end_pos = min(len(content), match.end() + 1000)  # 1000 chars na match
-                    
-                    section_content = content[start_pos:end_pos].strip()
-                    
-                    if len(section_content) > 100:
-                        chunks.append({
-                            "content": section_content,
-                            "metadata": {
-                                "section_type": section_name,
-                                "document_type": doc_type,
-                                "chunk_type": "pattern_section",
-                                "importance": "high"
-                            }
-                        })
+        chunks = [
+            {
+                "content": chunk.text,
+                "metadata": {
+                    "section_type": chunk.section,
+                    "document_type": doc_type,
+                    "chunk_type": "pattern_section",
+                    "importance": "high",
+                    **chunk.offsets()
+                }
+            }
+            for chunk in self._section_engine(section_patterns).iter_chunks(content)
+            if chunk.section
+        ]
         
         # Fallback naar default als geen patterns gevonden
         if not chunks:
@@ -370,53 +346,28 @@ class EnhancedDocumentProcessor:
     async def _default_smart_chunking(self, content: str, classification: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Default slimme chunking strategie"""
         
-        # Intelligent paragraph-based chunking
-        paragraphs = content.split('\n\n')
-        chunks = []
-        current_chunk = ""
-        current_size = 0
+        # Paragraph-based chunking, max ~1500 characters per chunk
+        engine = ChunkingEngine(max_tokens=tokens_for_chars(1500))
         
-        target_chunk_size = 800  # Characters
-        max_chunk_size = 1500
-        
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
-            
-            # Als toevoegen van deze paragraph de chunk te groot maakt
-            if current_size + len(paragraph) > max_chunk_size and current_chunk:
-                # Sla huidige chunk op
-                chunks.append({
-                    "content": current_chunk.strip(),
-                    "metadata": {
-                        "document_type": classification.get("type", "unknown"),
-                        "chunk_type": "paragraph_group",
-                        "importance": "medium"
-                    }
-                })
-                current_chunk = paragraph
-                current_size = len(paragraph)
-            else:
-                # Voeg paragraph toe aan huidige chunk
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
-                current_size += len(paragraph)
-        
-        # Voeg laatste chunk toe
-        if current_chunk.strip():
-            chunks.append({
-                "content": current_chunk.strip(),
+        return [
+            {
+                "content": chunk.text,
                 "metadata": {
                     "document_type": classification.get("type", "unknown"),
                     "chunk_type": "paragraph_group",
-                    "importance": "medium"
+                    "importance": "medium",
+                    **chunk.offsets()
                 }
-            })
-        
-        return chunks
+            }
+            for chunk in engine.iter_chunks(content)
+        ]
+    
+    def _section_engine(self, section_patterns: Dict[str, str]) -> ChunkingEngine:
+        """Chunking engine die chunks laat beginnen bij sectiekoppen"""
+        return ChunkingEngine(
+            max_tokens=tokens_for_chars(1500),
+            strategy=SectionPatternBoundary(section_patterns)
+        )
     
     def _create_extraction_prompt(self, content: str, doc_type: str, 
                                 classification: Dict[str, Any]) -> str:
@@ -563,7 +514,3 @@ Geef een gestructureerd overzicht in JSON formaat.
     def get_processing_stats(self) -> Dict[str, Any]:
         """Krijg huidige processing statistieken"""
         return self.processing_stats.copy()
-
-
-# Import fix
-import re
\ No newline at end of file
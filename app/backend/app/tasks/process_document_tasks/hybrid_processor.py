@@ -18,6 +18,7 @@ from app.tasks.process_document_tasks.document_classifier import (
 )
 from app.utils.vector_store_improved import get_hybrid_vector_store
 from app.utils.embeddings import generate_embedding
+from app.utils.chunking_engine import chunk_text_by_chars
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -158,39 +159,7 @@ def create_simple_chunks(text: str, chunk_size: int = 1000, chunk_overlap: int =
     Returns:
         List of text chunks
     """
-    if not text:
-        return []
-        
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        # Take a chunk of text
-        end = min(start + chunk_size, len(text))
-        
-        # If we're not at the end, try to break at a paragraph or sentence
-        if end < len(text):
-            # Look for paragraph break
-            paragraph_break = text.rfind("\n\n", start, end)
-            if paragraph_break != -1 and paragraph_break > start + chunk_size / 2:
-                end = paragraph_break + 2
-            else:
-                # Look for sentence break (period followed by space)
-                sentence_break = text.rfind(". ", start, end)
-                if sentence_break != -1 and sentence_break > start + chunk_size / 2:
-                    end = sentence_break + 2
-        
-        chunk = text[start:end]
-        chunks.append(chunk)
-        
-        # Move start position with overlap
-        start = end - chunk_overlap
-        
-        # Prevent getting stuck
-        if start >= end - 1:
-            start = end
-    
-    return chunks
+    return chunk_text_by_chars(text, chunk_size, chunk_overlap)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -2,11 +2,13 @@
 AD Content Generator - Uses LLM to generate content for AD report sections
 Based on the standardized AD report structure
 """
+import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Dict, Any, List, Optional
 from datetime import datetime
 
+from app.core.config import settings
 from app.utils.llm_provider import create_llm_instance
 from app.models.ad_report_structure import (
     ADReport,
@@ -31,17 +33,66 @@ from app.models.ad_report_structure import (
 
 logger = logging.getLogger(__name__)
 
+
+async def gather_bounded(coroutines: List[Awaitable], limit: int) -> List[Any]:
+    """
+    Run coroutines concurrently, at most `limit` at a time
+
+    Exceptions are returned in place of the result instead of being raised,
+    so one failing coroutine does not cancel the others.
+
+    Returns:
+        Results (or exceptions) in the order of the coroutines
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(bounded(c) for c in coroutines), return_exceptions=True)
+
+
 class ADContentGenerator:
     """Generates content for AD report sections using LLM"""
+
+    # Section generators per stage, with the report fields each one fills.
+    # Generators within a stage are independent and run concurrently; a
+    # stage starts once the previous one is merged (conclusions fall back on
+    # samenvatting_conclusie from the summary).
+    SECTION_STAGES = [
+        [
+            ("_generate_basic_data", ("opdrachtgever", "werknemer", "adviseur", "onderzoek")),
+            ("_generate_summary", ("samenvatting_vraagstelling", "samenvatting_conclusie")),
+            ("_generate_questions", ("vraagstelling",)),
+            ("_generate_activities", ("ondernomen_activiteiten",)),
+            ("_generate_history", ("voorgeschiedenis", "verzuimhistorie")),
+            ("_generate_employee_data", ("opleidingen", "arbeidsverleden_lijst", "bekwaamheden")),
+            ("_generate_belastbaarheid", ("belastbaarheid",)),
+            ("_generate_job_analysis", ("eigen_functie", "functiebelasting")),
+            ("_generate_conversations", ("gesprek_werkgever", "gesprek_werknemer", "gesprek_gezamenlijk")),
+            ("_generate_suitability_analysis", ("geschiktheid_eigen_werk", "conclusie_eigen_werk")),
+            ("_generate_adjustments", ("aanpassing_eigen_werk",)),
+            ("_generate_alternatives", ("geschiktheid_ander_werk_intern", "geschiktheid_ander_werk_extern")),
+            ("_generate_trajectory_plan", ("trajectplan",)),
+            ("_generate_follow_up", ("vervolg",)),
+        ],
+        [
+            ("_generate_conclusions", ("conclusies",)),
+        ],
+    ]
     
-    def __init__(self, llm_provider: str = None):
+    def __init__(self, llm_provider: str = None, max_concurrency: Optional[int] = None):
         """
         Initialize content generator
         
         Args:
             llm_provider: Optional LLM provider override
+            max_concurrency: Maximum number of sections generating at once
+                (default REPORT_SECTION_CONCURRENCY)
         """
         self.llm_provider = llm_provider
+        self.max_concurrency = max_concurrency or settings.REPORT_SECTION_CONCURRENCY
         
     async def generate_complete_report(
         self, 
@@ -70,38 +121,35 @@ class ADContentGenerator:
             if 'company_name' in case_data:
                 report.opdrachtgever.naam_bedrijf = case_data['company_name']
         
-        # Generate each section
-        try:
-            # Basic data sections
-            report = await self._generate_basic_data(report, context)
-            
-            # Summary sections
-            report = await self._generate_summary(report, context)
-            
-            # Main content sections
-            report = await self._generate_questions(report, context)
-            report = await self._generate_activities(report, context)
-            report = await self._generate_history(report, context)
-            report = await self._generate_employee_data(report, context)
-            report = await self._generate_belastbaarheid(report, context)
-            report = await self._generate_job_analysis(report, context)
-            report = await self._generate_conversations(report, context)
-            
-            # Analysis sections
-            report = await self._generate_suitability_analysis(report, context)
-            report = await self._generate_adjustments(report, context)
-            report = await self._generate_alternatives(report, context)
-            
-            # Planning sections
-            report = await self._generate_trajectory_plan(report, context)
-            report = await self._generate_conclusions(report, context)
-            report = await self._generate_follow_up(report, context)
-            
-        except Exception as e:
-            logger.error(f"Error generating report: {str(e)}")
-            # Return partially filled report
+        # Generate the sections stage by stage
+        for stage in self.SECTION_STAGES:
+            await self._generate_stage(report, context, stage)
             
         return report
+
+    async def _generate_stage(self, report: ADReport, context: str, stage: List[tuple]):
+        """
+        Run the section generators of one stage concurrently
+
+        Each generator works on its own copy of the report; afterwards the
+        fields it owns are merged into the report in stage order. A failing
+        generator leaves its fields as they were.
+        """
+        async def run(method_name: str, fields: tuple) -> Dict[str, Any]:
+            section_report = await getattr(self, method_name)(report.model_copy(deep=True), context)
+            return {field: getattr(section_report, field) for field in fields}
+
+        results = await gather_bounded(
+            [run(method_name, fields) for method_name, fields in stage],
+            self.max_concurrency
+        )
+
+        for (method_name, _), result in zip(stage, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error in {method_name}: {str(result)}")
+                continue
+            for field, value in result.items():
+                setattr(report, field, value)
     
     async def _generate_basic_data(self, report: ADReport, context: str) -> ADReport:
         """Generate basic data sections (contact info, company info)"""
@@ -353,7 +401,7 @@ class ADContentGenerator:
                 max_tokens=4000
             )
             
-            response = llm.generate_content([
+            response = await llm.generate_content_async([
                 {
                     "role": "system",
                     "parts": ["Je bent een arbeidsdeskundige die gestructureerde JSON data genereert voor rapporten. Geef ALLEEN geldige JSON output, geen andere tekst."]
@@ -654,8 +702,10 @@ class ADContentGenerator:
         """
         
         try:
-            report.geschiktheid_ander_werk_intern = await self._generate_text(prompt_intern)
-            report.geschiktheid_ander_werk_extern = await self._generate_text(prompt_extern)
+            report.geschiktheid_ander_werk_intern, report.geschiktheid_ander_werk_extern = await asyncio.gather(
+                self._generate_text(prompt_intern),
+                self._generate_text(prompt_extern)
+            )
         except:
             report.geschiktheid_ander_werk_intern = "Geen passende alternatieven gevonden"
             report.geschiktheid_ander_werk_extern = "Re-integratietraject tweede spoor adviseren"
@@ -769,7 +819,7 @@ class ADContentGenerator:
                 max_tokens=2000
             )
             
-            response = llm.generate_content([
+            response = await llm.generate_content_async([
                 {
                     "role": "system",
                     "parts": ["Je bent een ervaren arbeidsdeskundige die professionele rapporten schrijft."]
@@ -28,7 +28,7 @@ from app.models.ad_report_structure import (
     ConclusieItem,
     TrajectplanItem
 )
-from app.utils.ad_content_generator import ADContentGenerator
+from app.utils.ad_content_generator import ADContentGenerator, gather_bounded
 from app.utils.ad_report_renderer import ADReportRenderer
 from app.models.report import Report, ReportRead
 
@@ -109,7 +109,15 @@ class ADPipelineAdapter:
         sections: Dict[str, str], 
         context: str
     ):
-        """Process legacy sections and map to new structure"""
+        """
+        Process legacy sections and map to new structure
+
+        Sections that are copied or parsed are mapped directly; sections that
+        need an LLM extraction are extracted concurrently afterwards (each
+        writes its own part of the report). A failing section is logged and
+        skipped.
+        """
+        extractions = []
         
         for section_id, content in sections.items():
             if not content or content.strip() == "":
@@ -122,19 +130,19 @@ class ADPipelineAdapter:
                     
                 elif section_id == "gegevensverzameling_werkgever":
                     # Try to extract structured data from text
-                    await self._extract_werkgever_data(report, content)
+                    extractions.append((section_id, self._extract_werkgever_data(report, content)))
                     
                 elif section_id == "gegevensverzameling_werknemer":
                     # Try to extract employee data
-                    await self._extract_werknemer_data(report, content)
+                    extractions.append((section_id, self._extract_werknemer_data(report, content)))
                     
                 elif section_id == "belastbaarheid":
                     # Try to extract FML data
-                    await self._extract_belastbaarheid_data(report, content)
+                    extractions.append((section_id, self._extract_belastbaarheid_data(report, content)))
                     
                 elif section_id == "eigen_functie":
                     # Extract function data
-                    await self._extract_functie_data(report, content)
+                    extractions.append((section_id, self._extract_functie_data(report, content)))
                     
                 elif section_id in ["gesprek_werkgever", "gesprek_werknemer", "gesprek_gezamenlijk"]:
                     # Store conversation data
@@ -183,6 +191,14 @@ class ADPipelineAdapter:
             except Exception as e:
                 logger.error(f"Error processing section {section_id}: {str(e)}")
                 continue
+
+        results = await gather_bounded(
+            [extraction for _, extraction in extractions],
+            self.content_generator.max_concurrency
+        )
+        for (section_id, _), result in zip(extractions, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing section {section_id}: {str(result)}")
     
     async def _extract_werkgever_data(self, report: ADReport, content: str):
         """Extract employer data from legacy content"""
@@ -426,6 +426,34 @@ ENHANCED_AD_TEMPLATE = {
     ]
 }
 
+# Section dependency graph: a section is generated once the sections it
+# builds on are done. Sections without an entry only need the documents and
+# can start right away.
+AD_SECTION_DEPENDENCIES: Dict[str, List[str]] = {
+    "belastbaarheid": ["gegevensverzameling_voorgeschiedenis", "gegevensverzameling_werknemer"],
+    "eigen_functie": ["gegevensverzameling_werkgever", "gesprek_werkgever"],
+    "visie_ad_eigen_werk": ["belastbaarheid", "eigen_functie"],
+    "visie_ad_aanpassing": ["belastbaarheid", "eigen_functie"],
+    "visie_ad_ander_werk_eigen": ["belastbaarheid", "gesprek_werkgever"],
+    "visie_ad_ander_werk_extern": ["belastbaarheid", "gesprek_werknemer"],
+    "visie_ad_duurzaamheid": ["belastbaarheid", "eigen_functie"],
+    "advies": [
+        "visie_ad_eigen_werk",
+        "visie_ad_aanpassing",
+        "visie_ad_ander_werk_eigen",
+        "visie_ad_ander_werk_extern",
+        "visie_ad_duurzaamheid"
+    ],
+    "conclusie": [
+        "visie_ad_eigen_werk",
+        "visie_ad_aanpassing",
+        "visie_ad_ander_werk_eigen",
+        "visie_ad_ander_werk_extern",
+        "visie_ad_duurzaamheid"
+    ],
+    "vervolg": ["advies"]
+}
+
 def get_enhanced_ad_template() -> Dict[str, Any]:
     """
     Get the enhanced AD report template based on professional analysis
@@ -453,6 +481,15 @@ def get_standard_questions() -> List[Dict[str, str]]:
     """
     return ENHANCED_AD_TEMPLATE["sections"]["vraagstelling"]["standard_questions"]
 
+def get_section_dependencies() -> Dict[str, List[str]]:
+    """
+    Get the section dependency graph used by the report scheduler
+
+    Returns:
+        Dict mapping section ID to the section IDs it depends on
+    """
+    return AD_SECTION_DEPENDENCIES
+
 # Backward compatibility alias for existing imports
 AD_REPORT_TEMPLATE = ENHANCED_AD_TEMPLATE
 
@@ -0,0 +1,560 @@
+"""
+Single-pass, token-aware chunking engine.
+
+All document chunkers in the ingestion and RAG code paths go through this
+module, so chunk sizes mean the same thing everywhere: a number of tokens as
+counted by the embedding/LLM tokenizer, not a number of characters.
+
+The engine walks the text once. A boundary strategy yields segments
+(paragraphs, sentences or sections) in document order, every segment is
+tokenized exactly once, and segments are packed greedily into chunks up to
+the token budget. Each chunk records its character span in the original text
+and the pages it covers, based on the "--- Pagina N van M ---" markers that
+the PDF and OCR extractors insert.
+
+Boundary strategies:
+    ParagraphBoundary       - blank-line separated paragraphs (default)
+    SentenceBoundary        - sentence ends and line breaks
+    SectionPatternBoundary  - section headings matched by regex patterns,
+                              combined with an inner strategy inside sections
+
+SectionMatcher compiles a set of named section patterns into one alternation
+that finds every heading in a single scan, and builds a section index
+(section name -> character spans). The optimized RAG pipeline stores that
+index in the document metadata; section_at() looks a position up in it.
+
+Usage:
+    from app.utils.chunking_engine import ChunkingEngine, SectionPatternBoundary
+
+    engine = ChunkingEngine(max_tokens=256, overlap_tokens=48)
+    for chunk in engine.chunk(text):
+        print(chunk.index, chunk.token_count, chunk.start_char, chunk.page_start)
+
+    engine = ChunkingEngine(
+        max_tokens=375,
+        strategy=SectionPatternBoundary({"diagnose": r"diagnose|conclusie"})
+    )
+"""
+
+import bisect
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logger.warning("tiktoken not available - falling back to approximate token counting")
+
+# Rough characters-per-token ratio for Dutch text with cl100k_base, used to
+# translate the legacy character-based chunk settings into token budgets.
+CHARS_PER_TOKEN = 4
+
+# Page markers written by the PDF and OCR text extractors
+PAGE_MARKER_PATTERN = re.compile(r"^--- Pagina (\d+) van \d+(?: \(OCR\))? ---$", re.MULTILINE)
+
+_PARAGRAPH_SEPARATOR = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+_SENTENCE_SEPARATOR = re.compile(r"(?<=[.!?])\s+|\n+")
+_APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class _TiktokenCounter:
+    """Token counter backed by a tiktoken BPE encoding."""
+
+    def __init__(self, encoding_name: str):
+        self.name = encoding_name
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class _ApproximateCounter:
+    """Token counter that counts words and punctuation marks."""
+
+    name = "approximate"
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in _APPROX_TOKEN_PATTERN.finditer(text))
+
+
+_token_counter = None
+
+
+def get_token_counter(encoding_name: str = "cl100k_base"):
+    """
+    Get the shared token counter.
+
+    Uses tiktoken when it is installed and its encoding can be loaded, and an
+    approximate word/punctuation counter otherwise.
+
+    Returns:
+        Object with a count(text) -> int method and a name attribute
+    """
+    global _token_counter
+    if _token_counter is None:
+        if TIKTOKEN_AVAILABLE:
+            try:
+                _token_counter = _TiktokenCounter(encoding_name)
+            except Exception as e:
+                logger.warning(f"Could not load tiktoken encoding {encoding_name}: {e}")
+        if _token_counter is None:
+            _token_counter = _ApproximateCounter()
+    return _token_counter
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the shared token counter."""
+    return get_token_counter().count(text)
+
+
+def tokens_for_chars(chars: int) -> int:
+    """Translate a character-based chunk setting into a token budget."""
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A span of the source text that the engine will not split unless it is too large."""
+    start: int
+    end: int
+    section: Optional[str] = None
+    hard_break: bool = False  # A new chunk must start at this segment
+
+
+@dataclass
+class Chunk:
+    """A chunk of the source text with its position and size."""
+    index: int
+    text: str
+    start_char: int
+    end_char: int
+    token_count: int
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    section: Optional[str] = None
+
+    def offsets(self) -> Dict[str, Any]:
+        """Position fields for storing in chunk metadata."""
+        return {
+            "start_char": self.start_char,
+            "end_char": self.end_char,
+            "token_count": self.token_count,
+            "page_start": self.page_start,
+            "page_end": self.page_end
+        }
+
+
+def _split_spans(text: str, separator: re.Pattern, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yield the non-blank, whitespace-trimmed spans of text[start:end] between separator matches."""
+    position = start
+    for match in separator.finditer(text, start, end):
+        span = _trim(text, position, match.start())
+        if span:
+            yield span
+        position = match.end()
+    span = _trim(text, position, end)
+    if span:
+        yield span
+
+
+def _trim(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Narrow a span to exclude surrounding whitespace; None if it is blank."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+class BoundaryStrategy:
+    """Base class for strategies that split text into segments in document order."""
+
+    name = "base"
+
+    def segments(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Segment]:
+        raise NotImplementedError
+
+
+class ParagraphBoundary(BoundaryStrategy):
+    """Segments are paragraphs separated by one or more blank lines."""
+
+    name = "paragraph"
+
+    def segments(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Segment]:
+        end = len(text) if end is None else end
+        for span_start, span_end in _split_spans(text, _PARAGRAPH_SEPARATOR, start, end):
+            yield Segment(span_start, span_end)
+
+
+class SentenceBoundary(BoundaryStrategy):
+    """Segments are sentences, split after . ! ? and at line breaks."""
+
+    name = "sentence"
+
+    def segments(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Segment]:
+        end = len(text) if end is None else end
+        for span_start, span_end in _split_spans(text, _SENTENCE_SEPARATOR, start, end):
+            yield Segment(span_start, span_end)
+
+
+@dataclass(frozen=True)
+class SectionHeader:
+    """A section heading found in the text."""
+    start: int
+    end: int
+    name: str
+
+
+class SectionMatcher:
+    """
+    Finds section headings for a set of named regex patterns in one scan.
+
+    The patterns are compiled once into a single alternation with one named
+    group per section, so finding every heading costs one pass over the text
+    regardless of the number of sections. Where patterns overlap at the same
+    position, the pattern listed first wins. Headings only match at the start
+    of a word, which also lets the regex engine skip most positions quickly.
+    """
+
+    def __init__(self, section_patterns: Dict[str, str], line_start: bool = False,
+                 word_start: bool = True, min_distance: int = 0, flags: int = re.IGNORECASE):
+        """
+        Args:
+            section_patterns: Mapping of section name to heading regex
+            line_start: Only match headings at the start of a line
+            word_start: Only match headings at the start of a word
+            min_distance: Skip headings closer than this to the previous heading
+            flags: Regex flags applied to all patterns
+        """
+        self.section_names = list(section_patterns)
+        self.min_distance = min_distance
+        self._group_names = {}
+        alternatives = []
+        for i, (section_name, pattern) in enumerate(section_patterns.items()):
+            group = f"s{i}"
+            self._group_names[group] = section_name
+            alternatives.append(f"(?P<{group}>{pattern})")
+
+        combined = "(?:" + "|".join(alternatives) + ")"
+        if line_start:
+            prefix = r"^[ \t]*"
+            flags |= re.MULTILINE
+        elif word_start:
+            prefix = r"(?<!\w)"
+        else:
+            prefix = ""
+        self.pattern = re.compile(prefix + combined, flags)
+        # Zero-width variant that stops at every position where any heading
+        # starts, including positions inside another heading
+        self._any_pattern = re.compile(prefix + "(?=" + combined + ")", flags)
+        self._section_patterns = {
+            section_name: re.compile(pattern, flags)
+            for section_name, pattern in section_patterns.items()
+        }
+
+    def scan(self, text: str, start: int = 0, end: Optional[int] = None) -> List[SectionHeader]:
+        """Return the headings in text[start:end] in document order."""
+        end = len(text) if end is None else end
+        headers = []
+        last_start = None
+        for match in self.pattern.finditer(text, start, end):
+            if last_start is not None and match.start() - last_start < self.min_distance:
+                continue
+            headers.append(SectionHeader(match.start(), match.end(), self._group_names[match.lastgroup]))
+            last_start = match.start()
+        return headers
+
+    def find_all(self, text: str) -> Dict[str, List[SectionHeader]]:
+        """
+        Return every match of every section pattern, per section.
+
+        The result is the same as running finditer for each pattern on its
+        own, but the text is scanned once: the combined pattern stops where
+        any heading starts and only there are the section patterns tried.
+        Callers that need their own priority rules between sections (instead
+        of "first listed wins") use this rather than scan().
+        """
+        matches: Dict[str, List[SectionHeader]] = {name: [] for name in self.section_names}
+        # Like finditer, a pattern's next match starts after its previous one
+        next_start = dict.fromkeys(self.section_names, 0)
+        for hit in self._any_pattern.finditer(text):
+            position = hit.end()
+            for section_name, pattern in self._section_patterns.items():
+                if position < next_start[section_name]:
+                    continue
+                match = pattern.match(text, position)
+                if match:
+                    matches[section_name].append(SectionHeader(match.start(), match.end(), section_name))
+                    next_start[section_name] = match.end()
+        return matches
+
+    def build_index(self, text: str, headers: Optional[List[SectionHeader]] = None) -> Dict[str, List[List[int]]]:
+        """
+        Build a section index for a document.
+
+        Each section runs from its heading to the next heading (of any
+        section) or the end of the text.
+
+        Args:
+            text: The document text
+            headers: Result of scan(text), if already available
+
+        Returns:
+            Mapping of section name to a list of [start, end] character spans,
+            in document order; sections without headings are omitted
+        """
+        headers = self.scan(text) if headers is None else headers
+        index: Dict[str, List[List[int]]] = {}
+        for header, following in zip(headers, headers[1:] + [None]):
+            span_end = following.start if following else len(text)
+            index.setdefault(header.name, []).append([header.start, span_end])
+        return index
+
+
+def section_at(section_index: Dict[str, List[List[int]]], position: int) -> Optional[str]:
+    """Return the name of the section whose span in a section index contains position."""
+    for section_name, spans in section_index.items():
+        for start, end in spans:
+            if start <= position < end:
+                return section_name
+    return None
+
+
+class SectionPatternBoundary(BoundaryStrategy):
+    """
+    Segments follow section headings matched by regex patterns.
+
+    Headings are found at line starts with a SectionMatcher. A chunk never
+    spans two sections; inside a section the inner strategy (paragraphs by
+    default) decides the segments.
+    """
+
+    name = "section_pattern"
+
+    def __init__(self, section_patterns: Dict[str, str],
+                 inner: Optional[BoundaryStrategy] = None, flags: int = re.IGNORECASE):
+        """
+        Args:
+            section_patterns: Mapping of section name to heading regex
+            inner: Strategy used for the text inside each section
+            flags: Regex flags applied to all patterns
+        """
+        self.inner = inner or ParagraphBoundary()
+        self.matcher = SectionMatcher(section_patterns, line_start=True, flags=flags)
+
+    def segments(self, text: str, start: int = 0, end: Optional[int] = None) -> Iterator[Segment]:
+        end = len(text) if end is None else end
+        headings = [(header.start, header.name) for header in self.matcher.scan(text, start, end)]
+
+        boundaries = [(start, None)] + headings + [(end, None)]
+        for (section_start, section), (section_end, _) in zip(boundaries, boundaries[1:]):
+            first = True
+            for segment in self.inner.segments(text, section_start, section_end):
+                yield Segment(segment.start, segment.end, section, hard_break=first and section is not None)
+                first = False
+
+
+class ChunkingEngine:
+    """
+    Greedy token-budget chunker over a boundary strategy.
+
+    Segments are packed into a chunk until the next one would exceed
+    max_tokens. The next chunk then starts with trailing segments of the
+    previous chunk totalling at most overlap_tokens. Segments that are larger
+    than max_tokens on their own are split at sentence ends, and failing
+    that at word boundaries.
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 0,
+                 strategy: Optional[BoundaryStrategy] = None, token_counter=None):
+        """
+        Args:
+            max_tokens: Maximum tokens per chunk
+            overlap_tokens: Maximum tokens repeated from the end of the previous chunk
+            strategy: Boundary strategy (ParagraphBoundary by default)
+            token_counter: Object with count(text); defaults to get_token_counter()
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.strategy = strategy or ParagraphBoundary()
+        self.token_counter = token_counter or get_token_counter()
+        self._sentences = SentenceBoundary()
+
+    def chunk(self, text: str) -> List[Chunk]:
+        """Chunk text and return all chunks."""
+        return list(self.iter_chunks(text))
+
+    def iter_chunks(self, text: str) -> Iterator[Chunk]:
+        """
+        Chunk text in a single pass, yielding chunks in document order.
+
+        Args:
+            text: The document text
+
+        Yields:
+            Chunk objects with character and page offsets
+        """
+        if not text:
+            return
+
+        page_positions, page_numbers = self._page_index(text)
+        count = self.token_counter.count
+
+        current: List[Tuple[int, int, int]] = []  # (start, end, tokens)
+        current_tokens = 0
+        current_section = None
+        index = 0
+
+        for segment in self.strategy.segments(text):
+            pieces = self._pieces(text, segment, count)
+
+            for piece_number, (start, end, tokens) in enumerate(pieces):
+                hard_break = segment.hard_break and piece_number == 0
+                section_changed = current and segment.section != current_section
+
+                if current and (hard_break or section_changed or
+                                current_tokens + tokens + 1 > self.max_tokens):
+                    yield self._make_chunk(text, index, current, current_section,
+                                           page_positions, page_numbers)
+                    index += 1
+
+                    if hard_break or section_changed:
+                        current = []
+                    else:
+                        current = self._overlap_tail(current, tokens)
+                    current_tokens = sum(piece[2] for piece in current) + max(0, len(current) - 1)
+
+                if not current:
+                    current_section = segment.section
+                current_tokens += tokens + (1 if current else 0)
+                current.append((start, end, tokens))
+
+        if current:
+            yield self._make_chunk(text, index, current, current_section,
+                                   page_positions, page_numbers)
+
+    def _pieces(self, text: str, segment: Segment, count) -> List[Tuple[int, int, int]]:
+        """Tokenize a segment, splitting it further if it exceeds the budget."""
+        tokens = count(text[segment.start:segment.end])
+        if tokens <= self.max_tokens:
+            return [(segment.start, segment.end, tokens)]
+
+        pieces = []
+        for sentence in self._sentences.segments(text, segment.start, segment.end):
+            sentence_tokens = count(text[sentence.start:sentence.end])
+            if sentence_tokens <= self.max_tokens:
+                pieces.append((sentence.start, sentence.end, sentence_tokens))
+            else:
+                pieces.extend(self._split_words(text, sentence.start, sentence.end,
+                                                sentence_tokens, count))
+        return pieces
+
+    def _split_words(self, text: str, start: int, end: int, tokens: int,
+                     count) -> List[Tuple[int, int, int]]:
+        """Split an oversized span at whitespace into pieces within the budget."""
+        chars_per_token = (end - start) / tokens
+        window = max(1, int(self.max_tokens * chars_per_token * 0.9))
+
+        pieces = []
+        position = start
+        while position < end:
+            cut = min(end, position + window)
+            if cut < end:
+                space = text.rfind(" ", position + window // 2, cut)
+                if space != -1:
+                    cut = space
+            piece_start = position
+            while piece_start < cut and text[piece_start].isspace():
+                piece_start += 1
+            if piece_start < cut:
+                pieces.append((piece_start, cut, count(text[piece_start:cut])))
+            position = cut
+        return pieces
+
+    def _overlap_tail(self, pieces: List[Tuple[int, int, int]],
+                      incoming_tokens: int) -> List[Tuple[int, int, int]]:
+        """Trailing pieces of the previous chunk to repeat at the start of the next one."""
+        budget = min(self.overlap_tokens, self.max_tokens - incoming_tokens - 1)
+        tail = []
+        used = 0
+        # Never carry over the whole chunk, so every chunk makes progress
+        for piece in reversed(pieces[1:]):
+            if used + piece[2] + 1 > budget:
+                break
+            tail.append(piece)
+            used += piece[2] + 1
+        tail.reverse()
+        return tail
+
+    @staticmethod
+    def _page_index(text: str) -> Tuple[List[int], List[int]]:
+        """Positions and numbers of page markers in the text."""
+        positions, numbers = [], []
+        for match in PAGE_MARKER_PATTERN.finditer(text):
+            positions.append(match.start())
+            numbers.append(int(match.group(1)))
+        return positions, numbers
+
+    @staticmethod
+    def _page_at(position: int, page_positions: List[int], page_numbers: List[int]) -> Optional[int]:
+        if not page_positions:
+            return None
+        i = bisect.bisect_right(page_positions, position) - 1
+        return page_numbers[i] if i >= 0 else page_numbers[0]
+
+    def _make_chunk(self, text: str, index: int, pieces: List[Tuple[int, int, int]],
+                    section: Optional[str], page_positions: List[int],
+                    page_numbers: List[int]) -> Chunk:
+        start = pieces[0][0]
+        end = pieces[-1][1]
+        return Chunk(
+            index=index,
+            text=text[start:end],
+            start_char=start,
+            end_char=end,
+            token_count=sum(piece[2] for piece in pieces) + len(pieces) - 1,
+            page_start=self._page_at(start, page_positions, page_numbers),
+            page_end=self._page_at(end - 1, page_positions, page_numbers),
+            section=section
+        )
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0,
+               strategy: Optional[BoundaryStrategy] = None) -> List[Chunk]:
+    """
+    Chunk text with a one-off engine.
+
+    Args:
+        text: The document text
+        max_tokens: Maximum tokens per chunk
+        overlap_tokens: Maximum tokens repeated from the previous chunk
+        strategy: Boundary strategy (paragraphs by default)
+
+    Returns:
+        List of Chunk objects
+    """
+    return ChunkingEngine(max_tokens, overlap_tokens, strategy).chunk(text)
+
+
+def chunk_text_by_chars(text: str, chunk_size: int, chunk_overlap: int = 0,
+                        strategy: Optional[BoundaryStrategy] = None) -> List[str]:
+    """
+    Chunk text using character-based size settings.
+
+    Kept for callers configured in characters (settings.CHUNK_SIZE and the
+    document-type chunk configs); sizes are converted with CHARS_PER_TOKEN.
+
+    Returns:
+        List of chunk texts
+    """
+    chunks = chunk_text(text, tokens_for_chars(chunk_size),
+                        tokens_for_chars(chunk_overlap) if chunk_overlap else 0, strategy)
+    return [chunk.text for chunk in chunks]
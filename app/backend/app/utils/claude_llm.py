@@ -6,28 +6,49 @@ import os
 import time
 import logging
 import random
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
-from anthropic import Anthropic
 from app.core.config import settings
+from app.utils.llm_async import get_async_anthropic_client, run_sync
+from app.utils.llm_rate_limiter import rate_limited
+from app.utils.prompt_parts import split_cached_part
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Anthropic client
+# Configure Anthropic API key; the pooled AsyncAnthropic clients are created
+# per event loop on first use (see llm_async)
 API_INITIALIZED = False
+_api_key = None
 if settings.ANTHROPIC_API_KEY:
-    try:
-        client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        API_INITIALIZED = True
-        logger.info("Anthropic Claude client initialized with provided API key")
-    except Exception as e:
-        logger.error(f"Failed to initialize Anthropic client: {str(e)}")
-        API_INITIALIZED = False
+    _api_key = settings.ANTHROPIC_API_KEY
+    API_INITIALIZED = True
+    logger.info("Anthropic Claude client initialized with provided API key")
 else:
     logger.warning("No Anthropic API key provided, Claude functionality will be limited")
 
+
+class ClaudeResponse:
+    """Response object mimicking Google's API"""
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.prompt_feedback = None
+        # Token counts of the call, including prompt cache writes and reads
+        self.usage = usage
+
+
+class FallbackResponse:
+    """Placeholder response returned when the Claude call fails"""
+    def __init__(self, error_message):
+        self.text = f"Op basis van de beschikbare documenten is een objectieve analyse gemaakt. Voor meer specifieke informatie zijn aanvullende documenten gewenst."
+        self.prompt_feedback = None
+        class BlockReason:
+            def __init__(self):
+                self.block_reason = None
+        self.prompt_feedback = BlockReason()
+
+
 # Create a class mimicking the structure of Google's GenerativeModel
 class ClaudeModel:
     """
@@ -68,26 +89,68 @@ class ClaudeModel:
         if not API_INITIALIZED:
             raise ValueError("Anthropic API client is not initialized. Make sure ANTHROPIC_API_KEY is set.")
             
-    def generate_content(self, prompt_parts):
+    def generate_content(self, prompt_parts, on_text: Optional[Callable[[str], None]] = None):
         """
         Generate content using Claude, mimicking the interface of Google's generate_content.
         
+        Sync shim for Celery code: runs generate_content_async on the shared
+        LLM I/O loop, so concurrent callers share one connection pool.
+        
+        Args:
+            prompt_parts: A list of messages in Google's format, each with 'role' and 'parts'
+            on_text: Optional callback receiving the text as it is streamed
+            
+        Returns:
+            A response object with a 'text' attribute containing the generated content
+        """
+        return run_sync(self.generate_content_async(prompt_parts, on_text=on_text))
+
+    async def generate_content_async(self, prompt_parts, on_text: Optional[Callable[[str], None]] = None):
+        """
+        Generate content using the pooled AsyncAnthropic client.
+        
         Args:
             prompt_parts: A list of messages in Google's format, each with 'role' and 'parts'
+            on_text: Optional callback receiving the text as it is streamed;
+                it runs on the event loop and must not block
             
         Returns:
             A response object with a 'text' attribute containing the generated content
         """
+        params = self._build_params(prompt_parts)
+                
+        try:
+            # Call the Claude API within the shared rate limits
+            client = get_async_anthropic_client(_api_key)
+            async with rate_limited("anthropic", self.model_name, params) as permit:
+                if on_text is None:
+                    response = await client.messages.create(**params)
+                else:
+                    # Stream the text deltas; the final message carries the usage
+                    async with client.messages.stream(**params) as stream:
+                        async for text in stream.text_stream:
+                            on_text(text)
+                        response = await stream.get_final_message()
+                usage = self._record_usage(response)
+                permit.record(usage)
+            return self._to_response(response, usage)
+                
+        except Exception as e:
+            return self._handle_error(e)
+
+    def _build_params(self, prompt_parts) -> Dict[str, Any]:
+        """Convert Google-style prompt parts to Claude message parameters."""
         # Extract system message if present
         system_message = ""
         user_message = ""
+        cached_prefix = None
         
         # Process prompt parts to convert to Claude's format
         for part in prompt_parts:
             if part["role"] == "system" and "parts" in part and len(part["parts"]) > 0:
                 system_message = part["parts"][0]
             elif part["role"] == "user" and "parts" in part and len(part["parts"]) > 0:
-                user_message = part["parts"][0]
+                cached_prefix, user_message = split_cached_part(part)
                 
         # Make sure we have a user message at minimum
         if not user_message:
@@ -100,75 +163,93 @@ class ClaudeModel:
             else:
                 raise ValueError("No valid user message found in prompt")
                 
+        # Map generation config to Claude's parameters
+        params = {
+            "model": self.model_name,
+            "max_tokens": self.generation_config.get("max_tokens", 4096),
+            "temperature": self.generation_config.get("temperature", 0.1),
+            "top_p": self.generation_config.get("top_p", 0.95),
+            "messages": [{"role": "user", "content": user_message}]
+        }
+
+        # Shared case context: send it as its own block and mark the end of
+        # it as a cache breakpoint, so the system message plus prefix are
+        # cached and reused by the other calls of the report
+        if cached_prefix:
+            prefix_block = {"type": "text", "text": cached_prefix}
+            if settings.LLM_PROMPT_CACHING:
+                prefix_block["cache_control"] = {"type": "ephemeral"}
+            params["messages"][0]["content"] = [prefix_block, {"type": "text", "text": user_message}]
+        
+        # Add system message if provided
+        if system_message:
+            params["system"] = system_message
+
+        return params
+
+    @staticmethod
+    def _to_response(response, usage=None) -> ClaudeResponse:
+        """Extract text from Claude's response"""
+        if response and hasattr(response, "content") and len(response.content) > 0:
+            content_text = "".join([block.text for block in response.content if hasattr(block, "text")])
+            return ClaudeResponse(content_text, usage)
+        return ClaudeResponse("", usage)
+
+    def _record_usage(self, response) -> Optional[Dict[str, int]]:
+        """Report the token usage of a call, including cache hits, to the cost tracker"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+
+        counts = {
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "cache_read_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        }
         try:
-            # Map generation config to Claude's parameters
-            params = {
-                "model": self.model_name,
-                "max_tokens": self.generation_config.get("max_tokens", 4096),
-                "temperature": self.generation_config.get("temperature", 0.1),
-                "top_p": self.generation_config.get("top_p", 0.95),
-                "messages": [{"role": "user", "content": user_message}]
-            }
-            
-            # Add system message if provided
-            if system_message:
-                params["system"] = system_message
-                
-            # Call the Claude API
-            response = client.messages.create(**params)
-            
-            # Create a response object mimicking Google's API
-            class ClaudeResponse:
-                def __init__(self, text):
-                    self.text = text
-                    self.prompt_feedback = None
-                    
-            # Extract text from Claude's response
-            if response and hasattr(response, "content") and len(response.content) > 0:
-                content_text = "".join([block.text for block in response.content if hasattr(block, "text")])
-                return ClaudeResponse(content_text)
-            else:
-                return ClaudeResponse("")
-                
+            # Imported here: the monitoring modules import the LLM provider
+            from app.utils.rag_monitoring import ComponentType
+            from app.utils.token_cost_tracker import token_cost_tracker
+
+            token_cost_tracker.record_token_usage(
+                provider="anthropic",
+                model_name=self.model_name,
+                component=ComponentType.LLM_PROVIDER,
+                request_id=getattr(response, "id", "") or "",
+                **counts
+            )
         except Exception as e:
-            logger.error(f"Error generating content with Claude: {str(e)}")
-            
-            # Check if this is an overloaded error (529) or other API error
-            error_message = str(e)
-            is_overloaded = "529" in error_message or "overloaded" in error_message.lower()
-            
-            if is_overloaded:
-                logger.warning("Claude API is currently overloaded, raising exception for retry")
-                # Raise the exception so it can be caught and handled appropriately
-                raise e
+            logger.warning(f"Could not record Claude token usage: {str(e)}")
+        return counts
+
+    @staticmethod
+    def _handle_error(e: Exception) -> FallbackResponse:
+        """Re-raise overloaded errors for retry, return a fallback response otherwise"""
+        logger.error(f"Error generating content with Claude: {str(e)}")
+        
+        # Check if this is an overloaded error (529) or other API error
+        error_message = str(e)
+        is_overloaded = "529" in error_message or "overloaded" in error_message.lower()
+        
+        if is_overloaded:
+            logger.warning("Claude API is currently overloaded, raising exception for retry")
+            # Raise the exception so it can be caught and handled appropriately
+            raise e
             
-            # Create a fallback response for other errors
-            class FallbackResponse:
-                def __init__(self, error_message):
-                    self.text = f"Op basis van de beschikbare documenten is een objectieve analyse gemaakt. Voor meer specifieke informatie zijn aanvullende documenten gewenst."
-                    self.prompt_feedback = None
-                    class BlockReason:
-                        def __init__(self):
-                            self.block_reason = None
-                    self.prompt_feedback = BlockReason()
-                    
-            return FallbackResponse(str(e))
+        return FallbackResponse(str(e))
             
 # Function to configure the module (similar to genai.configure)
 def configure(api_key=None):
     """
     Configure the Claude client with the provided API key.
     """
-    global API_INITIALIZED, client
+    global API_INITIALIZED, _api_key
     
     if api_key:
-        try:
-            client = Anthropic(api_key=api_key)
-            API_INITIALIZED = True
-            logger.info("Anthropic Claude client configured with provided API key")
-        except Exception as e:
-            logger.error(f"Failed to configure Anthropic client: {str(e)}")
-            API_INITIALIZED = False
+        _api_key = api_key
+        API_INITIALIZED = True
+        logger.info("Anthropic Claude client configured with provided API key")
     else:
         logger.warning("No API key provided to configure Claude client")
         
@@ -9,6 +9,7 @@ from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 
+from app.utils.context_packer import chunk_score, pack_context
 from app.utils.smart_document_classifier import DocumentType
 
 
@@ -59,21 +60,38 @@ class ContextAwarePromptGenerator:
     """
     Generator voor context-aware prompts per rapport sectie
     """
+
+    # Token budget van de kritieke/belangrijke fragmenten in de volledige context
+    FULL_CONTEXT_TOKENS = 1500
+    IMPORTANCE_WEIGHTS = {"critical": 2.0, "high": 1.0}
+
+    # Static tables, built once per process and shared read-only by all
+    # instances (and, when built in the worker master, by all forked children)
+    _static_tables: Optional[Dict[str, Any]] = None
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+
+        tables = ContextAwarePromptGenerator._static_tables
+        if tables is None:
+            tables = ContextAwarePromptGenerator._static_tables = {
+                "section_templates": self._load_section_templates(),
+                "document_guidelines": self._load_document_guidelines(),
+                "terminology": self._load_professional_terminology(),
+                "quality_criteria": self._load_quality_criteria()
+            }
         
         # Section-specific prompt templates
-        self.section_templates = self._load_section_templates()
+        self.section_templates = tables["section_templates"]
         
         # Document type specific guidelines
-        self.document_guidelines = self._load_document_guidelines()
+        self.document_guidelines = tables["document_guidelines"]
         
         # Dutch professional terminology
-        self.terminology = self._load_professional_terminology()
+        self.terminology = tables["terminology"]
         
         # Quality criteria per section
-        self.quality_criteria = self._load_quality_criteria()
+        self.quality_criteria = tables["quality_criteria"]
     
     def generate_section_prompt(
         self, 
@@ -691,23 +709,27 @@ SPECIFIEKE AANDACHTSPUNTEN VOOR {doc_type.upper()}:
         
         context_summary = f"Totaal {len(chunks)} documenten beschikbaar voor analyse.\n\n"
         
-        # Group by importance
-        critical_chunks = [c for c in chunks if c.get("metadata", {}).get("importance") == "critical"]
-        high_chunks = [c for c in chunks if c.get("metadata", {}).get("importance") == "high"]
-        
-        if critical_chunks:
-            context_summary += f"Kritieke informatie ({len(critical_chunks)} chunks):\n"
-            for chunk in critical_chunks[:3]:  # Max 3 examples
-                content_preview = chunk.get("content", "")[:150]
-                section_type = chunk.get("metadata", {}).get("section_type", "algemeen")
-                context_summary += f"- {section_type}: {content_preview}...\n"
-        
-        if high_chunks:
-            context_summary += f"\nBelangrijke informatie ({len(high_chunks)} chunks):\n"
-            for chunk in high_chunks[:2]:  # Max 2 examples
-                content_preview = chunk.get("content", "")[:100]
-                section_type = chunk.get("metadata", {}).get("section_type", "algemeen")
-                context_summary += f"- {section_type}: {content_preview}...\n"
+        # Kritieke en belangrijke fragmenten, gewogen naar belang en relevantie
+        # binnen het token budget gepakt (kritiek eerst)
+        def importance(chunk):
+            return chunk.get("metadata", {}).get("importance")
+        
+        def format_excerpt(chunk):
+            label = "Kritiek" if importance(chunk) == "critical" else "Belangrijk"
+            section_type = chunk.get("metadata", {}).get("section_type", "algemeen")
+            return f"- [{label}] {section_type}: {chunk.get('content', '').strip()}"
+        
+        packed = pack_context(
+            [c for c in chunks if importance(c) in self.IMPORTANCE_WEIGHTS],
+            token_budget=self.FULL_CONTEXT_TOKENS,
+            format_chunk=format_excerpt,
+            separator="\n",
+            score=lambda c: self.IMPORTANCE_WEIGHTS[importance(c)] + chunk_score(c),
+            source=importance
+        )
+        
+        if packed.chunks:
+            context_summary += f"Kritieke en belangrijke informatie ({len(packed.chunks)} fragmenten):\n{packed.text}\n"
         
         return context_summary
     
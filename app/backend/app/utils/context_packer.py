@@ -0,0 +1,297 @@
+"""
+Token-accurate, score-weighted packing of retrieved chunks into a prompt context.
+
+All code that turns retrieved chunks into LLM context goes through
+pack_context(), so context budgets mean the same thing everywhere: tokens as
+counted by the shared local tokenizer (see chunking_engine.get_token_counter),
+not characters.
+
+Packing works in three steps:
+
+1. Deduplication. Chunks with the same ID or the same text are kept once.
+   Chunks of the same document whose character spans (start_char/end_char
+   in the chunk metadata) overlap are reduced to the part that is not
+   already covered by a higher-scoring chunk; a chunk that is mostly covered
+   is dropped.
+2. Per-source quotas. A source (by default the document) may take at most
+   its quota of the budget; when its chunks do not fit, the most relevant
+   subset within the quota is kept.
+3. Selection. The chunks that maximize the total relevance score within the
+   token budget are selected (0/1 knapsack over the formatted chunk sizes),
+   instead of appending chunks greedily until the budget is hit.
+
+The result reports the tokens used against the budget, so callers can store
+per-section context usage.
+
+Usage:
+    packed = pack_context(chunks, token_budget=6000, format_chunk=format_fn,
+                          source_quota=0.5)
+    prompt += packed.text
+    metadata["context"] = packed.stats()
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.chunking_engine import get_token_counter
+
+logger = logging.getLogger(__name__)
+
+# Share of a chunk that must be new (not covered by an already packed span)
+# for the chunk to be kept
+MIN_NEW_SPAN_SHARE = 0.5
+
+# Maximum number of capacity cells of the knapsack table; larger budgets are
+# counted in coarser token units
+MAX_KNAPSACK_CELLS = 2000
+
+
+@dataclass
+class PackedContext:
+    """Chunks selected for a prompt, their formatted text and token usage."""
+
+    text: str
+    chunks: List[Dict[str, Any]]
+    tokens_used: int
+    token_budget: int
+    candidates: int
+    duplicates: int
+    tokens_by_source: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def dropped(self) -> int:
+        """Unique chunks that did not fit the budget or their source quota."""
+        return self.candidates - self.duplicates - len(self.chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        """Token usage for logging and the report metadata."""
+        return {
+            "tokens_used": self.tokens_used,
+            "token_budget": self.token_budget,
+            "utilization": round(self.tokens_used / self.token_budget, 3) if self.token_budget else 0.0,
+            "chunks_packed": len(self.chunks),
+            "chunks_dropped": self.dropped,
+            "duplicates_removed": self.duplicates,
+            "tokens_by_source": dict(self.tokens_by_source),
+        }
+
+
+def chunk_score(chunk: Dict[str, Any]) -> float:
+    """Relevance of a chunk: the re-ranked final_score when present, else the similarity."""
+    return float(chunk.get("final_score", chunk.get("similarity", 0.0)) or 0.0)
+
+
+def chunk_source(chunk: Dict[str, Any]) -> str:
+    """Source of a chunk for quotas: its document."""
+    return str(chunk.get("document_id", "unknown"))
+
+
+def _content(chunk: Dict[str, Any]) -> str:
+    return chunk.get("content", "") or ""
+
+
+def _span(chunk: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    metadata = chunk.get("metadata") or {}
+    start, end = metadata.get("start_char"), metadata.get("end_char")
+    if isinstance(start, int) and isinstance(end, int) and end > start:
+        return start, end
+    return None
+
+
+def _position(chunk: Dict[str, Any], fallback: int) -> int:
+    span = _span(chunk)
+    return span[0] if span is not None else chunk.get("chunk_index", fallback)
+
+
+def _uncovered(span: Tuple[int, int], covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Parts of span not covered by any of the covered spans."""
+    parts = [span]
+    for cov_start, cov_end in covered:
+        next_parts = []
+        for start, end in parts:
+            if cov_end <= start or cov_start >= end:
+                next_parts.append((start, end))
+                continue
+            if start < cov_start:
+                next_parts.append((start, cov_start))
+            if cov_end < end:
+                next_parts.append((cov_end, end))
+        parts = next_parts
+    return parts
+
+
+def deduplicate_chunks(chunks: List[Dict[str, Any]], score: Callable[[Dict[str, Any]], float] = chunk_score,
+                       source: Callable[[Dict[str, Any]], str] = chunk_source) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Remove duplicate and overlapping chunks, best-scoring first.
+
+    A chunk that overlaps already kept chunks of the same source at one end
+    is trimmed to its new part when its text maps one-to-one onto its span;
+    otherwise it is kept whole if at least MIN_NEW_SPAN_SHARE of it is new.
+
+    Returns:
+        (kept chunks in score order, number of chunks removed)
+    """
+    kept: List[Dict[str, Any]] = []
+    seen_ids = set()
+    seen_texts = set()
+    covered: Dict[str, List[Tuple[int, int]]] = {}
+    removed = 0
+
+    for chunk in sorted(chunks, key=score, reverse=True):
+        chunk_id = chunk.get("id") or chunk.get("chunk_id")
+        text_key = hashlib.sha1(" ".join(_content(chunk).split()).encode("utf-8")).hexdigest()
+        if (chunk_id and chunk_id in seen_ids) or text_key in seen_texts or not _content(chunk).strip():
+            removed += 1
+            continue
+
+        span = _span(chunk)
+        if span is not None:
+            source_spans = covered.setdefault(source(chunk), [])
+            new_parts = _uncovered(span, source_spans)
+            new_chars = sum(end - start for start, end in new_parts)
+            if new_chars < (span[1] - span[0]) * MIN_NEW_SPAN_SHARE:
+                removed += 1
+                continue
+            if new_chars < span[1] - span[0] and len(new_parts) == 1 and len(_content(chunk)) == span[1] - span[0]:
+                # Overlap at one end: keep only the new text
+                start, end = new_parts[0]
+                offset = span[0]
+                chunk = {**chunk, "content": _content(chunk)[start - offset:end - offset],
+                         "metadata": {**chunk.get("metadata", {}), "start_char": start, "end_char": end}}
+            source_spans.append(span)
+
+        if chunk_id:
+            seen_ids.add(chunk_id)
+        seen_texts.add(text_key)
+        kept.append(chunk)
+
+    return kept, removed
+
+
+def select_by_relevance(items: List[Tuple[int, float]], budget: int) -> List[int]:
+    """
+    Indexes of the items with the highest total value within the budget.
+
+    Args:
+        items: (tokens, value) per item
+        budget: Token budget
+
+    Returns:
+        Selected indexes in input order
+    """
+    if budget <= 0 or not items:
+        return []
+    if sum(tokens for tokens, _ in items) <= budget:
+        return list(range(len(items)))
+
+    # Round weights up so a selection that fits the table fits the budget
+    unit = max(1, -(-budget // MAX_KNAPSACK_CELLS))
+    capacity = budget // unit
+    weights = [-(-tokens // unit) for tokens, _ in items]
+
+    best = [0.0] * (capacity + 1)
+    taken = []
+    for weight, (_, value) in zip(weights, items):
+        row = bytearray(capacity + 1)
+        # A small floor keeps unscored chunks worth packing into spare budget
+        value = max(value, 0.0) + 1e-6
+        for cap in range(capacity, weight - 1, -1):
+            candidate = best[cap - weight] + value
+            if candidate > best[cap]:
+                best[cap] = candidate
+                row[cap] = 1
+        taken.append(row)
+
+    selected = []
+    cap = capacity
+    for index in range(len(items) - 1, -1, -1):
+        if taken[index][cap]:
+            selected.append(index)
+            cap -= weights[index]
+    return sorted(selected)
+
+
+def pack_context(
+    chunks: List[Dict[str, Any]],
+    token_budget: int,
+    format_chunk: Callable[[Dict[str, Any]], str] = _content,
+    separator: str = "\n\n",
+    header: str = "",
+    source_quota: Optional[float] = None,
+    score: Callable[[Dict[str, Any]], float] = chunk_score,
+    source: Callable[[Dict[str, Any]], str] = chunk_source,
+    label: str = ""
+) -> PackedContext:
+    """
+    Pack the most relevant chunks into a token budget.
+
+    Args:
+        chunks: Retrieved chunks (content, metadata, document_id, similarity
+            or final_score)
+        token_budget: Maximum tokens of the packed text, header included
+        format_chunk: Renders one chunk as it appears in the prompt; its
+            output is what is counted
+        separator: Text between chunks
+        header: Text in front of the chunks, counted against the budget
+        source_quota: Maximum share of the budget per source (0-1), or None
+        score: Relevance of a chunk
+        source: Source of a chunk for the quota
+        label: Name for the log line (e.g. the section ID)
+
+    Returns:
+        PackedContext with the selected chunks ordered by source (most
+        relevant source first) and position within the source
+    """
+    counter = get_token_counter()
+    unique, duplicates = deduplicate_chunks(chunks, score, source)
+
+    available = token_budget - (counter.count(header) if header else 0)
+    separator_tokens = counter.count(separator) if separator else 0
+    blocks = [format_chunk(chunk) for chunk in unique]
+    sizes = [counter.count(block) + separator_tokens for block in blocks]
+
+    # Per-source quota: keep the most relevant subset of each source within its share
+    eligible = list(range(len(unique)))
+    if source_quota is not None:
+        quota = int(available * source_quota)
+        by_source: Dict[str, List[int]] = {}
+        for index in eligible:
+            by_source.setdefault(source(unique[index]), []).append(index)
+        eligible = []
+        for indexes in by_source.values():
+            picked = select_by_relevance([(sizes[i], score(unique[i])) for i in indexes], quota)
+            eligible.extend(indexes[i] for i in picked)
+        eligible.sort()
+
+    picked = select_by_relevance([(sizes[i], score(unique[i])) for i in eligible], available)
+    selected = [eligible[i] for i in picked]
+
+    # Group by source, most relevant source first, then by position in the source
+    source_rank: Dict[str, int] = {}
+    for index in selected:
+        source_rank.setdefault(source(unique[index]), len(source_rank))
+    selected.sort(key=lambda i: (source_rank[source(unique[i])], _position(unique[i], i)))
+
+    text = header + separator.join(blocks[i] for i in selected)
+    tokens_by_source: Dict[str, int] = {}
+    for index in selected:
+        key = source(unique[index])
+        tokens_by_source[key] = tokens_by_source.get(key, 0) + sizes[index]
+
+    packed = PackedContext(
+        text=text,
+        chunks=[unique[i] for i in selected],
+        tokens_used=counter.count(text),
+        token_budget=token_budget,
+        candidates=len(chunks),
+        duplicates=duplicates,
+        tokens_by_source=tokens_by_source
+    )
+    logger.info(
+        f"Packed context{' for ' + label if label else ''}: {len(selected)}/{len(chunks)} chunks, "
+        f"{packed.tokens_used}/{token_budget} tokens, {duplicates} duplicates removed"
+    )
+    return packed
@@ -8,6 +8,7 @@ import logging
 import time
 from typing import List, Dict, Any, Optional
 
+from app.utils.context_packer import pack_context
 from app.utils.vector_store_improved import get_hybrid_vector_store
 from app.utils.embeddings import generate_query_embedding
 from app.db.database_service import get_database_service
@@ -209,6 +210,7 @@ def format_search_results(
             "similarity": round(result.get("similarity", 0), 4),
             "document_id": document_id,
             "chunk_id": result.get("chunk_id", ""),
+            "metadata": result.get("metadata", {}),
             "strategy": result.get("metadata", {}).get("strategy", "unknown"),
             "document_info": document_info
         }
@@ -218,13 +220,52 @@ def format_search_results(
     return formatted
 
 
-def generate_context_from_results(search_results: Dict[str, Any], max_tokens: int = 4000) -> str:
+def _format_result_for_context(result: Dict[str, Any]) -> str:
+    """Render one search result as it appears in the LLM context."""
+    # Document info section
+    doc_info = result.get("document_info", {})
+    document_section = "DOCUMENT: "
+    if doc_info:
+        document_section += f"{doc_info.get('filename', 'Onbekend')}"
+    else:
+        document_section += f"ID: {result.get('document_id', 'Onbekend')}"
+    
+    # Add similarity score
+    document_section += f" (relevantie: {result.get('similarity', 0):.2f})"
+    
+    # Add processing strategy
+    strategy = result.get("strategy", "unknown")
+    if strategy == "direct_llm":
+        strategy_text = "directe verwerking"
+    elif strategy == "hybrid":
+        strategy_text = "hybride verwerking" 
+    elif strategy == "full_rag":
+        strategy_text = "volledige RAG verwerking"
+    else:
+        strategy_text = "onbekende verwerkingsstrategie"
+    document_section += f" - {strategy_text}\n"
+    
+    # Add content
+    content = result.get("content", "").strip()
+    if content:
+        return f"{document_section}---\n{content}\n---\n"
+    return f"{document_section}[Geen inhoud beschikbaar]\n"
+
+
+def generate_context_from_results(search_results: Dict[str, Any], max_tokens: int = 4000,
+                                  source_quota: Optional[float] = None) -> str:
     """
     Generate a context string from search results for LLM consumption.
     
+    The results are packed with the shared context packer: tokens are
+    counted with the local tokenizer, duplicate and overlapping chunks are
+    removed, and the most relevant set of results that fits max_tokens is
+    kept.
+    
     Args:
         search_results: Formatted search results from format_search_results
-        max_tokens: Maximum approximate tokens to include
+        max_tokens: Maximum tokens to include
+        source_quota: Optional maximum share of max_tokens per document
         
     Returns:
         String with formatted context for the LLM
@@ -232,48 +273,21 @@ def generate_context_from_results(search_results: Dict[str, Any], max_tokens: in
     if not search_results.get("success"):
         return f"ERROR: {search_results.get('error', 'Unknown search error')}"
     
-    # Start building context
-    context_parts = [
-        f"Context voor de zoekvraag: \"{search_results.get('query')}\"\n",
+    header = (
+        f"Context voor de zoekvraag: \"{search_results.get('query')}\"\n"
         f"Totaal aantal resultaten: {search_results.get('total_results')}\n\n"
-    ]
-    
-    # Add each result with its metadata
-    for i, result in enumerate(search_results.get("results", []), 1):
-        # Estimate current context length (rough approximation)
-        current_length = sum(len(part) for part in context_parts)
-        if current_length > max_tokens * 4:  # Approximate 4 chars per token
-            context_parts.append(f"\n[Afgekapt vanwege maximale contextgrootte. {len(search_results['results']) - i + 1} resultaten weggelaten.]")
-            break
-        
-        # Document info section
-        doc_info = result.get("document_info", {})
-        document_section = f"DOCUMENT {i}: "
-        if doc_info:
-            document_section += f"{doc_info.get('filename', 'Onbekend')}"
-        else:
-            document_section += f"ID: {result.get('document_id', 'Onbekend')}"
-        
-        # Add similarity score
-        document_section += f" (relevantie: {result.get('similarity', 0):.2f})"
-        
-        # Add processing strategy
-        strategy = result.get("strategy", "unknown")
-        if strategy == "direct_llm":
-            strategy_text = "directe verwerking"
-        elif strategy == "hybrid":
-            strategy_text = "hybride verwerking" 
-        elif strategy == "full_rag":
-            strategy_text = "volledige RAG verwerking"
-        else:
-            strategy_text = "onbekende verwerkingsstrategie"
-        document_section += f" - {strategy_text}\n"
-        
-        # Add content
-        content = result.get("content", "").strip()
-        if content:
-            context_parts.append(f"{document_section}---\n{content}\n---\n\n")
-        else:
-            context_parts.append(f"{document_section}[Geen inhoud beschikbaar]\n\n")
+    )
+    packed = pack_context(
+        search_results.get("results", []),
+        token_budget=max_tokens,
+        format_chunk=_format_result_for_context,
+        separator="\n",
+        header=header,
+        source_quota=source_quota,
+        label=search_results.get("query", "")[:50]
+    )
     
-    return "".join(context_parts)
\ No newline at end of file
+    context = packed.text
+    if packed.dropped:
+        context += f"\n[Afgekapt vanwege maximale contextgrootte. {packed.dropped} resultaten weggelaten.]"
+    return context
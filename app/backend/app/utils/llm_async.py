@@ -0,0 +1,155 @@
+"""
+Pooled async LLM clients and the sync bridge used by Celery code.
+
+Async clients (AsyncAnthropic, AsyncOpenAI) share one tuned httpx connection
+pool per provider and event loop: connections are kept alive between calls
+and many requests can be in flight over the same pool. httpx connections are
+bound to the loop that opened them, so each event loop gets its own clients;
+they are dropped together with the loop.
+
+Sync callers (Celery tasks, section threads) go through run_sync(), which
+runs the coroutine on one background "LLM I/O" event loop per process. All
+sync LLM calls of a worker process therefore share one pool, and a single
+thread can have many calls in flight.
+
+Usage:
+    client = get_async_anthropic_client(api_key)
+    response = await client.messages.create(...)
+
+    result = run_sync(model.generate_content_async(prompt_parts))
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# event loop -> {provider: client}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+_io_loop: Optional[asyncio.AbstractEventLoop] = None
+_io_thread: Optional[threading.Thread] = None
+_io_pid: Optional[int] = None
+_io_lock = threading.Lock()
+
+
+def http_limits(http=httpx):
+    """Connection pool limits for the LLM HTTP clients."""
+    return http.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS
+    )
+
+
+def http_timeout(http=httpx):
+    """Timeouts for the LLM HTTP clients: long reads, quick connects."""
+    return http.Timeout(settings.LLM_HTTP_TIMEOUT, connect=settings.LLM_HTTP_CONNECT_TIMEOUT)
+
+
+def create_async_http_client(sdk) -> Any:
+    """
+    A pooled keep-alive async HTTP client for one provider on one event loop.
+
+    Uses the SDK's DefaultAsyncHttpxClient (the SDK's own defaults plus our
+    limits) when it has one. Limits and timeouts are built with the httpx
+    package that client class derives from, since newer SDKs ship their own.
+    """
+    client_cls = getattr(sdk, "DefaultAsyncHttpxClient", httpx.AsyncClient)
+    base = next(cls for cls in client_cls.__mro__ if cls.__name__ == "AsyncClient")
+    http = importlib.import_module(base.__module__.split(".")[0])
+    return client_cls(limits=http_limits(http), timeout=http_timeout(http))
+
+
+def _get_async_client(provider: str, factory) -> Any:
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if provider not in clients:
+            clients[provider] = factory()
+            logger.info(f"Created pooled async {provider} client for event loop {id(loop):#x}")
+        return clients[provider]
+
+
+def get_async_anthropic_client(api_key: Optional[str] = None):
+    """
+    AsyncAnthropic client of the running event loop.
+
+    Must be called from inside a coroutine.
+    """
+    import anthropic
+
+    return _get_async_client("anthropic", lambda: anthropic.AsyncAnthropic(
+        api_key=api_key or settings.ANTHROPIC_API_KEY,
+        http_client=create_async_http_client(anthropic)
+    ))
+
+
+def get_async_openai_client(api_key: Optional[str] = None):
+    """
+    AsyncOpenAI client of the running event loop.
+
+    Must be called from inside a coroutine.
+    """
+    import openai
+
+    return _get_async_client("openai", lambda: openai.AsyncOpenAI(
+        api_key=api_key or settings.OPENAI_API_KEY,
+        http_client=create_async_http_client(openai)
+    ))
+
+
+def _get_io_loop() -> asyncio.AbstractEventLoop:
+    """The process's background LLM I/O loop, started on first use (also after fork)."""
+    global _io_loop, _io_thread, _io_pid
+
+    with _io_lock:
+        if _io_loop is None or _io_pid != os.getpid() or not _io_thread.is_alive():
+            _io_loop = asyncio.new_event_loop()
+            _io_thread = threading.Thread(target=_io_loop.run_forever, name="llm-io", daemon=True)
+            _io_thread.start()
+            _io_pid = os.getpid()
+        return _io_loop
+
+
+def run_sync(coroutine: Awaitable, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the LLM I/O loop and wait for its result.
+
+    Safe to call from any number of threads at once; their calls share the
+    loop's connection pools.
+
+    Args:
+        coroutine: Coroutine to run
+        timeout: Seconds to wait; on timeout the coroutine is cancelled
+
+    Raises:
+        RuntimeError: When called from the LLM I/O loop itself
+        TimeoutError: When the timeout expires
+    """
+    loop = _get_io_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run_sync() cannot be called from the LLM I/O loop; await the coroutine instead")
+
+    future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"LLM call did not finish within {timeout}s")
@@ -0,0 +1,258 @@
+"""
+Hedged LLM calls against tail latency.
+
+Most section calls finish in seconds, but a few hang for minutes and hold up
+the report. A HedgedModel wraps an LLM instance for one kind of call (a
+"hedge key", e.g. "section:samenvatting:rag") and learns the latency of
+those calls. When a call is still running after the learned percentile
+(LLM_HEDGE_PERCENTILE of the last LLM_HEDGE_WINDOW calls, at least
+LLM_HEDGE_MIN_DELAY seconds), a duplicate request is sent - to the same
+model, or to LLM_HEDGE_FALLBACK ("provider:model") for provider failover.
+The first good response wins (not an error, not the wrappers'
+FallbackResponse, not empty) and the other call is cancelled.
+
+No hedging happens for a key until LLM_HEDGE_MIN_SAMPLES calls have been
+measured. Hedges are paid from a budget: the estimated tokens of all hedges
+stay within LLM_HEDGE_BUDGET_PERCENT of the tokens of the primary calls;
+beyond that the primary call is simply awaited.
+
+Only the primary call streams to on_text. When a hedge wins, the caller's
+final text (e.g. the section_done event of a report stream) replaces what
+was streamed.
+
+Latencies and the budget are tracked per worker process.
+
+Usage:
+    model = create_llm_instance(temperature=0.1, hedge_key=f"section:{section_id}:rag")
+    response = model.generate_content(prompt_parts)
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.utils.llm_async import run_sync
+from app.utils.llm_rate_limiter import estimate_request_tokens, usage_tokens
+from app.utils.prompt_parts import join_prompt_part
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_token_estimate(prompt_parts: List[Any], max_tokens: int) -> int:
+    """Estimated tokens of a call from its Google-style prompt parts."""
+    messages = [
+        {"content": join_prompt_part(part) if isinstance(part, dict) else str(part)}
+        for part in prompt_parts
+        if not isinstance(part, dict) or part.get("parts")
+    ]
+    return estimate_request_tokens({"messages": messages, "max_tokens": max_tokens})
+
+
+def is_good_response(response: Any) -> bool:
+    """A real answer: not a wrapper FallbackResponse and not empty."""
+    if type(response).__name__ == "FallbackResponse":
+        return False
+    return bool((getattr(response, "text", None) or "").strip())
+
+
+class HedgingPolicy:
+    """Learned latency percentiles per hedge key and the hedging budget."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self.primary_tokens = 0
+        self.hedge_tokens = 0
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record_latency(self, key: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None or samples.maxlen != settings.LLM_HEDGE_WINDOW:
+                samples = deque(samples or (), maxlen=settings.LLM_HEDGE_WINDOW)
+                self._samples[key] = samples
+            samples.append(seconds)
+
+    def percentile(self, key: str) -> Optional[float]:
+        """Latency percentile of a key (nearest rank), or None while still learning."""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples or len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        rank = math.ceil(settings.LLM_HEDGE_PERCENTILE / 100.0 * len(samples))
+        return samples[min(len(samples), max(1, rank)) - 1]
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Seconds after which a call is hedged, or None to never hedge it."""
+        if not settings.LLM_HEDGING:
+            return None
+        latency = self.percentile(key)
+        return None if latency is None else max(latency, settings.LLM_HEDGE_MIN_DELAY)
+
+    def record_primary(self, tokens: int) -> None:
+        with self._lock:
+            self.primary_tokens += tokens
+
+    def try_hedge(self, tokens: int) -> bool:
+        """Reserve budget for a hedge of `tokens`; False when it would exceed the cap."""
+        with self._lock:
+            allowed = settings.LLM_HEDGE_BUDGET_PERCENT / 100.0 * self.primary_tokens
+            if self.hedge_tokens + tokens > allowed:
+                self.counts["skipped_budget"] += 1
+                return False
+            self.hedge_tokens += tokens
+            self.counts["hedges"] += 1
+            return True
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = list(self._samples)
+            sample_counts = {key: len(samples) for key, samples in self._samples.items()}
+            totals = {
+                "primary_tokens": self.primary_tokens,
+                "hedge_tokens": self.hedge_tokens,
+                "extra_spend_percent": 100.0 * self.hedge_tokens / self.primary_tokens if self.primary_tokens else 0.0,
+                **self.counts,
+            }
+        return {
+            **totals,
+            "keys": {
+                key: {"samples": sample_counts[key], "hedge_after": self.hedge_delay(key)}
+                for key in keys
+            },
+        }
+
+
+# Global hedging policy
+hedging_policy = HedgingPolicy()
+
+
+def create_fallback_model(primary) -> Optional[Any]:
+    """
+    The LLM_HEDGE_FALLBACK model with the primary's generation settings.
+
+    Returns:
+        Model instance, or None to hedge on the primary model (no fallback
+        configured, unknown provider or no API key)
+    """
+    spec = settings.LLM_HEDGE_FALLBACK.strip()
+    if not spec:
+        return None
+    provider, _, model_name = spec.partition(":")
+    try:
+        if provider == "openai":
+            from app.utils.openai_llm import OpenAIModel as model_class
+            model_name = model_name or settings.OPENAI_MODEL
+        elif provider == "anthropic":
+            from app.utils.claude_llm import ClaudeModel as model_class
+            model_name = model_name or settings.ANTHROPIC_MODEL
+        else:
+            logger.warning(f"Unknown LLM_HEDGE_FALLBACK provider '{provider}', hedging on the primary model")
+            return None
+        return model_class(model_name=model_name, generation_config=dict(primary.generation_config))
+    except Exception as e:
+        logger.warning(f"Hedge fallback {spec} unavailable, hedging on the primary model: {e}")
+        return None
+
+
+class HedgedModel:
+    """
+    Drop-in wrapper around an LLM instance that hedges slow calls.
+    """
+
+    def __init__(self, llm, hedge_key: str, fallback=None, policy: Optional[HedgingPolicy] = None):
+        """
+        Args:
+            llm: Primary LLM instance (ClaudeModel / OpenAIModel)
+            hedge_key: Kind of call; latencies are learned per key and model
+            fallback: Model for the hedge request, or None for the primary
+            policy: Policy to use instead of the global one
+        """
+        self.llm = llm
+        self.hedge_key = hedge_key
+        self.fallback = fallback
+        self.policy = policy or hedging_policy
+        self.model_name = llm.model_name
+        self.generation_config = llm.generation_config
+
+    def generate_content(self, prompt_parts, on_text=None):
+        """Sync shim, see ClaudeModel.generate_content."""
+        return run_sync(self.generate_content_async(prompt_parts, on_text=on_text))
+
+    async def generate_content_async(self, prompt_parts, on_text=None):
+        """
+        Generate content, hedging the call if it runs past the learned latency.
+
+        Returns:
+            The first good response; if neither call produced one, the
+            primary's response (or its exception)
+        """
+        latency_key = f"{self.hedge_key}:{self.model_name}"
+        delay = self.policy.hedge_delay(latency_key)
+        estimate = prompt_token_estimate(prompt_parts, self.generation_config.get("max_tokens", 0))
+
+        started = time.monotonic()
+        primary = asyncio.create_task(self.llm.generate_content_async(prompt_parts, on_text=on_text))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self.policy.try_hedge(estimate):
+                response = await primary
+                self._finish_primary(latency_key, started, response, estimate)
+                return response
+
+            hedge_llm = self.fallback or self.llm
+            logger.info(f"Hedging {latency_key} after {delay:.1f}s on {hedge_llm.model_name}")
+            tasks.append(asyncio.create_task(hedge_llm.generate_content_async(prompt_parts)))
+            winner = await self._first_good(tasks)
+        finally:
+            # The loser (or everything, when the caller is cancelled)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    task.add_done_callback(_consume_result)
+
+        if winner is primary:
+            self._finish_primary(latency_key, started, primary.result(), estimate)
+            return primary.result()
+
+        # The primary was cancelled or failed: its latency is at least this long
+        self.policy.record_latency(latency_key, time.monotonic() - started)
+        self.policy.record_primary(estimate)
+        if winner is None:
+            self.policy.count("both_failed")
+            return primary.result()
+        self.policy.count("hedge_wins")
+        return winner.result()
+
+    def _finish_primary(self, latency_key: str, started: float, response: Any, estimate: int) -> None:
+        self.policy.record_primary(usage_tokens(getattr(response, "usage", None)) or estimate)
+        if is_good_response(response):
+            self.policy.record_latency(latency_key, time.monotonic() - started)
+
+    @staticmethod
+    async def _first_good(tasks: List[asyncio.Task]) -> Optional[asyncio.Task]:
+        """Wait until one task returns a good response; None if none does."""
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both finish together
+            for task in sorted(done, key=tasks.index):
+                if not task.cancelled() and task.exception() is None and is_good_response(task.result()):
+                    return task
+        return None
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    """Retrieve a cancelled loser's outcome so its errors are not logged as unhandled."""
+    if not task.cancelled():
+        task.exception()
@@ -1,9 +1,33 @@
 """
 Dynamic LLM provider switching based on configuration.
 This module provides a consistent interface regardless of which underlying LLM provider is used.
+
+LLM instances expose generate_content_async() for async code, backed by the
+pooled AsyncAnthropic/AsyncOpenAI clients (see llm_async), and
+generate_content() as a sync shim for Celery code. generate_content_many()
+runs several prompts concurrently from sync code. Both accept an on_text
+callback that receives the generated text as it is streamed.
+
+Every call passes the cluster-wide rate limiter first (see llm_rate_limiter):
+shared requests/tokens-per-minute buckets per provider and model, and an
+adaptive concurrency limit that backs off when the provider returns 429/529.
+Instances created with a hedge_key hedge calls that run past their learned
+latency percentile (see llm_hedging).
+
+Prompts may be built with build_cached_prompt() (see prompt_parts): the user
+message carries a shared context as a stable prefix part and the per-call
+instructions as a suffix part. ClaudeModel marks the prefix for Anthropic
+prompt caching; OpenAI caches identical prompt prefixes automatically. Only
+the direct section path of the report generator builds its prompts this way;
+the RAG paths send plain prompts and are not cached.
 """
+import asyncio
 import logging
+from typing import Any, Dict, List
+
 from app.core.config import settings
+from app.utils.llm_async import run_sync
+from app.utils.llm_hedging import HedgedModel, create_fallback_model
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -86,7 +110,7 @@ def get_llm_model_name():
     else:
         return "gemini-1.5-pro"  # Default fallback
 
-def create_llm_instance(temperature=0.1, max_tokens=4096, dangerous_content_level="BLOCK_NONE"):
+def create_llm_instance(temperature=0.1, max_tokens=4096, dangerous_content_level="BLOCK_NONE", hedge_key=None):
     """
     Create a standardized LLM instance with the configured provider.
     
@@ -94,16 +118,45 @@ def create_llm_instance(temperature=0.1, max_tokens=4096, dangerous_content_leve
         temperature: Temperature parameter for generation
         max_tokens: Maximum number of tokens to generate
         dangerous_content_level: Level for dangerous content filtering
+        hedge_key: Kind of call (e.g. "section:samenvatting:rag") whose slow
+            calls are hedged; None for no hedging
         
     Returns:
-        LLM instance ready to use
+        LLM instance ready to use, with generate_content (sync) and
+        generate_content_async
     """
     safety_settings = get_safety_settings(dangerous_content_level)
     generation_config = get_generation_config(temperature, max_tokens)
     model_name = get_llm_model_name()
     
-    return GenerativeModel(
+    llm = GenerativeModel(
         model_name=model_name,
         safety_settings=safety_settings,
         generation_config=generation_config
-    )
\ No newline at end of file
+    )
+    if hedge_key and settings.LLM_HEDGING:
+        return HedgedModel(llm, hedge_key, fallback=create_fallback_model(llm))
+    return llm
+
+
+def generate_content_many(llm, prompts: List[List[Dict[str, Any]]]) -> List[Any]:
+    """
+    Run several generate_content calls concurrently from sync code.
+
+    All calls are in flight at once on the shared LLM I/O loop; the calling
+    thread only waits for the results.
+
+    Args:
+        llm: Instance from create_llm_instance
+        prompts: One list of prompt parts per call
+
+    Returns:
+        Responses in prompt order; a failed call yields its exception
+    """
+    async def generate_all():
+        return await asyncio.gather(
+            *(llm.generate_content_async(prompt_parts) for prompt_parts in prompts),
+            return_exceptions=True
+        )
+
+    return run_sync(generate_all())
@@ -0,0 +1,466 @@
+"""
+Cluster-wide LLM rate limiting with adaptive concurrency.
+
+Every LLM call passes two gates before it is sent:
+
+1. An AIMD concurrency controller per provider and model, in each worker
+   process. It allows LLM_AIMD_INITIAL calls in flight, grows the limit by
+   one slot per window of successful calls (additive increase) and
+   multiplies it by LLM_AIMD_DECREASE when the provider answers 429 (rate
+   limited) or 529 (overloaded) (multiplicative decrease, at most once per
+   LLM_AIMD_COOLDOWN seconds). Calls over the limit queue in FIFO order.
+2. Two Redis token buckets per provider and model, shared by all API and
+   Celery processes: requests per minute and tokens per minute. A call
+   debits one request and its estimated tokens (prompt plus the expected
+   output); once the response is in, the token bucket is corrected with
+   the actual usage. Prompt cache reads are not counted.
+
+The time a call spends in both gates is recorded as the queue_wait metric
+of the LLM provider component, tagged with provider and model.
+
+Limits come from LLM_RATE_DEFAULT_RPM / _TPM, with per-model overrides in
+LLM_RATE_LIMITS ("anthropic:claude-3-5-haiku-20241022=4000/400000,...");
+0 disables a bucket. If Redis is unreachable the buckets fail open for
+REDIS_RETRY_SECONDS; the concurrency controller keeps working.
+
+The limiter does not retry calls; errors propagate to the caller as before.
+
+Usage:
+    async with rate_limited("anthropic", model_name, params) as permit:
+        response = await client.messages.create(**params)
+        permit.record(usage)
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmrate"
+
+# Idle buckets are full again after a minute; let their keys expire
+BUCKET_TTL = 120
+
+# Seconds the buckets stay open after a Redis error
+REDIS_RETRY_SECONDS = 30
+
+# Longest single sleep while waiting for a bucket; waits are re-checked
+MAX_POLL_SECONDS = 5.0
+
+# Refill every bucket to now (Redis server time) and, if all of them hold
+# enough tokens, debit them. KEYS are the buckets, ARGV holds a capacity
+# (per minute) and a cost per bucket. Returns "0" after debiting, or the
+# seconds until the emptiest bucket can pay.
+_ACQUIRE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local cost = math.min(tonumber(ARGV[2 * i]), capacity)
+    local rate = capacity / 60
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local cost = math.min(tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i - 1]))
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('EXPIRE', key, ARGV[#ARGV])
+end
+return '0'
+"""
+
+# Refill a bucket to now and add ARGV[2] tokens (negative to debit more);
+# the level may drop below zero, which delays the next calls
+_ADJUST_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * capacity / 60 + tonumber(ARGV[2]))
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return tostring(tokens)
+"""
+
+
+def bucket_key(provider: str, model: str, kind: str) -> str:
+    """Bucket key; the hash tag keeps both buckets of a model in one cluster slot."""
+    return f"{KEY_PREFIX}:{{{provider}:{model}}}:{kind}"
+
+
+def parse_rate_limits(spec: str) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Parse "provider:model=rpm/tpm,..." into (provider, model) -> (rpm, tpm)."""
+    limits = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            name, values = entry.rsplit("=", 1)
+            provider, model = name.strip().split(":", 1)
+            rpm, tpm = values.split("/", 1)
+            limits[(provider.strip(), model.strip())] = (int(rpm), int(tpm))
+        except ValueError:
+            logger.warning(f"Ignoring malformed LLM_RATE_LIMITS entry: {entry!r}")
+    return limits
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Whether the provider asked us to slow down (429 rate limit, 529 overloaded)."""
+    if getattr(error, "status_code", None) in (429, 529):
+        return True
+    message = str(error).lower()
+    return "429" in message or "529" in message or "overloaded" in message or "rate_limit" in message
+
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """
+    Tokens a chat request is expected to use: its prompt plus the expected
+    output (max_tokens, capped at LLM_RATE_OUTPUT_ESTIMATE).
+    """
+    texts = [params.get("system") or ""]
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        elif isinstance(content, list):
+            texts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    text = "\n".join(text for text in texts if isinstance(text, str))
+    try:
+        from app.utils.chunking_engine import get_token_counter
+
+        prompt_tokens = get_token_counter().count(text)
+    except Exception:
+        prompt_tokens = len(text) // 4
+    return prompt_tokens + min(int(params.get("max_tokens") or 0), settings.LLM_RATE_OUTPUT_ESTIMATE)
+
+
+def usage_tokens(usage: Optional[Dict[str, int]]) -> Optional[int]:
+    """Tokens of a call that count toward the provider's limits."""
+    if not usage:
+        return None
+    return sum(usage.get(name, 0) or 0 for name in ("input_tokens", "output_tokens", "cache_creation_tokens"))
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Thread-safe and usable from several event loops: waiters are woken on
+    their own loop.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease: float, cooldown: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.overloads = 0
+
+        self._lock = threading.Lock()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._last_decrease = float("-inf")
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Wait for a slot; FIFO once calls are queued."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True
+            if granted:
+                # The slot was handed over before the cancellation arrived
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            grants = self._take_grants()
+        self._wake(grants)
+
+    def on_success(self) -> None:
+        """Additive increase: one extra slot per `limit` successful calls."""
+        with self._lock:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            grants = self._take_grants()
+        self._wake(grants)
+
+    def on_overload(self) -> None:
+        """Multiplicative decrease, once per cooldown (one burst of 429s is one signal)."""
+        with self._lock:
+            self.overloads += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(float(self.minimum), self.limit * self.decrease)
+        logger.warning(f"LLM provider overloaded, concurrency limit lowered to {int(self.limit)}")
+
+    def _take_grants(self):
+        grants = []
+        while self._waiters and self.in_flight < int(self.limit):
+            grants.append(self._waiters.popleft())
+            self.in_flight += 1
+        return grants
+
+    def _wake(self, grants) -> None:
+        for loop, future in grants:
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:
+                # The waiter's loop is closed; nobody will use the slot
+                with self._lock:
+                    self.in_flight -= 1
+
+    @staticmethod
+    def _grant(future: asyncio.Future) -> None:
+        # A cancelled waiter releases the slot itself (see acquire)
+        if not future.done():
+            future.set_result(None)
+
+
+class RatePermit:
+    """Handed to the call inside the limiter; reports the actual usage."""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+    def record(self, usage: Optional[Dict[str, int]]) -> None:
+        """Record the usage counts of the response (see the LLM wrappers' _record_usage)."""
+        self.actual_tokens = usage_tokens(usage)
+
+
+class LLMRateLimiter:
+    """Token buckets in Redis plus an AIMD controller per provider and model."""
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None):
+        self.redis = redis_client
+        self.overrides = parse_rate_limits(settings.LLM_RATE_LIMITS)
+        self._controllers: Dict[Tuple[str, str], AIMDController] = {}
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._redis_retry_at = 0.0
+        if redis_client is not None:
+            self._acquire_script = redis_client.register_script(_ACQUIRE_SCRIPT)
+            self._adjust_script = redis_client.register_script(_ADJUST_SCRIPT)
+
+    def limits_for(self, provider: str, model: str) -> Tuple[int, int]:
+        """(requests per minute, tokens per minute); 0 means unlimited."""
+        return self.overrides.get(
+            (provider, model), (settings.LLM_RATE_DEFAULT_RPM, settings.LLM_RATE_DEFAULT_TPM)
+        )
+
+    def controller(self, provider: str, model: str) -> AIMDController:
+        with self._lock:
+            controller = self._controllers.get((provider, model))
+            if controller is None:
+                controller = AIMDController(
+                    settings.LLM_AIMD_INITIAL,
+                    settings.LLM_AIMD_MIN,
+                    settings.LLM_AIMD_MAX,
+                    settings.LLM_AIMD_DECREASE,
+                    settings.LLM_AIMD_COOLDOWN
+                )
+                self._controllers[(provider, model)] = controller
+            return controller
+
+    @asynccontextmanager
+    async def limit(self, provider: str, model: str, estimated_tokens: int) -> AsyncIterator[RatePermit]:
+        """
+        Hold a concurrency slot and bucket capacity for one call.
+
+        Overload errors (429/529) raised inside the block lower the
+        concurrency limit; a clean exit raises it.
+        """
+        controller = self.controller(provider, model)
+        started = time.monotonic()
+        await controller.acquire()
+        try:
+            await self._take(provider, model, estimated_tokens)
+            self._record_wait(provider, model, time.monotonic() - started)
+
+            permit = RatePermit(estimated_tokens)
+            try:
+                yield permit
+            except Exception as e:
+                if is_overload_error(e):
+                    controller.on_overload()
+                raise
+            controller.on_success()
+            if permit.actual_tokens is not None and permit.actual_tokens != estimated_tokens:
+                await self._adjust(provider, model, estimated_tokens - permit.actual_tokens)
+        finally:
+            controller.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Limits, concurrency and queue wait per provider and model."""
+        with self._lock:
+            controllers = dict(self._controllers)
+            waits = {key: dict(value) for key, value in self._stats.items()}
+        result = {}
+        for (provider, model), controller in controllers.items():
+            rpm, tpm = self.limits_for(provider, model)
+            wait = waits.get((provider, model), {"calls": 0, "total_wait": 0.0, "max_wait": 0.0})
+            result[f"{provider}:{model}"] = {
+                "requests_per_minute": rpm,
+                "tokens_per_minute": tpm,
+                "concurrency_limit": int(controller.limit),
+                "in_flight": controller.in_flight,
+                "waiting": controller.waiting,
+                "overloads": controller.overloads,
+                "calls": int(wait["calls"]),
+                "avg_queue_wait": wait["total_wait"] / wait["calls"] if wait["calls"] else 0.0,
+                "max_queue_wait": wait["max_wait"],
+            }
+        return result
+
+    async def _take(self, provider: str, model: str, tokens: int) -> None:
+        """Wait until the buckets can pay for the call, then debit them."""
+        keys, args = [], []
+        for kind, capacity, cost in zip(("rpm", "tpm"), self.limits_for(provider, model), (1, tokens)):
+            if capacity > 0:
+                keys.append(bucket_key(provider, model, kind))
+                args.extend([capacity, cost])
+        if not keys:
+            return
+        args.append(BUCKET_TTL)
+
+        while self._redis_available():
+            try:
+                wait = float(await asyncio.to_thread(self._acquire_script, keys=keys, args=args))
+            except Exception as e:
+                self._redis_failed(e)
+                return
+            if wait <= 0:
+                return
+            # Jitter spreads out the processes waiting for the same bucket
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS) + random.uniform(0, 0.05))
+
+    async def _adjust(self, provider: str, model: str, delta: int) -> None:
+        """Return over-estimated tokens to the token bucket (or debit the shortfall)."""
+        capacity = self.limits_for(provider, model)[1]
+        if capacity <= 0 or not self._redis_available():
+            return
+        try:
+            await asyncio.to_thread(
+                self._adjust_script,
+                keys=[bucket_key(provider, model, "tpm")],
+                args=[capacity, delta, BUCKET_TTL]
+            )
+        except Exception as e:
+            self._redis_failed(e)
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"LLM rate limit buckets unavailable for {REDIS_RETRY_SECONDS}s, continuing without them: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def _record_wait(self, provider: str, model: str, wait: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault((provider, model), {"calls": 0, "total_wait": 0.0, "max_wait": 0.0})
+            stats["calls"] += 1
+            stats["total_wait"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+        try:
+            # Imported here: the monitoring modules import the LLM provider
+            from app.utils.rag_monitoring import ComponentType, MetricType, metrics_collector
+
+            metrics_collector.record_metric(
+                ComponentType.LLM_PROVIDER,
+                MetricType.QUEUE_WAIT,
+                wait,
+                tags={"provider": provider, "model": model}
+            )
+        except Exception as e:
+            logger.warning(f"Could not record LLM queue wait: {e}")
+
+
+# Global rate limiter
+_llm_rate_limiter: Optional[LLMRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_llm_rate_limiter() -> Optional[LLMRateLimiter]:
+    """
+    Get or create the global LLM rate limiter.
+
+    The Redis connection is opened on first use; while Redis is unreachable
+    the buckets fail open and only the concurrency controller applies.
+
+    Returns:
+        LLMRateLimiter instance, or None if rate limiting is disabled
+    """
+    global _llm_rate_limiter
+    if not settings.LLM_RATE_LIMITING:
+        return None
+    with _limiter_lock:
+        if _llm_rate_limiter is None:
+            redis_client = None
+            try:
+                redis_client = redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=5,
+                    socket_timeout=5
+                )
+            except Exception as e:
+                logger.warning(f"LLM rate limit buckets unavailable, limiting concurrency only: {e}")
+            _llm_rate_limiter = LLMRateLimiter(redis_client)
+
+    return _llm_rate_limiter
+
+
+@asynccontextmanager
+async def rate_limited(provider: str, model: str, params: Dict[str, Any]) -> AsyncIterator[RatePermit]:
+    """Run one chat request (given by its API parameters) through the global limiter."""
+    limiter = get_llm_rate_limiter()
+    estimated_tokens = estimate_request_tokens(params)
+    if limiter is None:
+        yield RatePermit(estimated_tokens)
+        return
+    async with limiter.limit(provider, model, estimated_tokens) as permit:
+        yield permit
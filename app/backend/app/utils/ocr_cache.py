@@ -0,0 +1,270 @@
+"""
+Disk-backed OCR result cache for rasterized pages.
+
+Scanned referral letters and UWV forms recur across cases, so the same page
+image is often run through Tesseract many times. This module caches the OCR
+text per page, keyed by a content hash of the rasterized pixels plus the
+Tesseract language and config string.
+
+Storage layout:
+    STORAGE_PATH/cache/ocr/<key[:2]>/<key>.txt
+
+Eviction is size-bounded LRU: a cache hit refreshes the file mtime, and when
+the total size or entry count exceeds its limit the least recently used
+files are removed first.
+
+Usage:
+    from app.utils.ocr_cache import get_ocr_cache
+
+    cache = get_ocr_cache()
+    key = cache.make_key(image, language="nld+eng", config="--psm 1")
+    text = cache.get(key)
+    if text is None:
+        text = pytesseract.image_to_string(image, lang="nld+eng", config="--psm 1")
+        cache.set(key, text)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCache:
+    """
+    Size-bounded LRU cache of OCR text on local disk.
+
+    The cache is shared by all worker processes on the same host through the
+    filesystem. Size accounting is kept per process and re-synchronised from
+    disk whenever an eviction pass runs.
+
+    Example:
+        cache = OCRCache("/app/storage/cache/ocr", max_bytes=256 * 1024 * 1024)
+        key = cache.make_key(page_image, "nld+eng", "--psm 1")
+        cache.set(key, "Geachte heer/mevrouw, ...")
+        assert cache.get(key) == "Geachte heer/mevrouw, ..."
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_entries: int = 50000):
+        """
+        Initialize the OCR cache.
+
+        Args:
+            cache_dir: Directory in which cached OCR text is stored
+            max_bytes: Maximum total size of cached text on disk
+            max_entries: Maximum number of cached pages
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self._entry_count: Optional[int] = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def make_key(image: Image.Image, language: str, config: str) -> str:
+        """
+        Build a cache key from the rasterized page and the OCR settings.
+
+        The key hashes the raw pixel data together with the image mode and
+        dimensions, so identical pages produce the same key regardless of the
+        file or case they came from.
+
+        Args:
+            image: Rasterized page as a PIL Image
+            language: Tesseract language codes (e.g. "nld+eng")
+            config: Tesseract config string (e.g. "--psm 1")
+
+        Returns:
+            Hex digest identifying the page and OCR settings
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+        digest.update(image.tobytes())
+        digest.update(f":{language}:{config}".encode())
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up cached OCR text.
+
+        Args:
+            key: Key produced by make_key()
+
+        Returns:
+            Cached text, or None on a cache miss
+        """
+        path = self._path_for(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.warning(f"OCR cache read failed for {key}: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        # Refresh mtime so LRU eviction keeps frequently used pages
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.stats["hits"] += 1
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """
+        Store OCR text for a page and evict old entries if over the limits.
+
+        Args:
+            key: Key produced by make_key()
+            text: OCR text for the page
+        """
+        path = self._path_for(key)
+        data = text.encode("utf-8")
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+
+            # Write atomically so concurrent workers never read partial files
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            self.stats["writes"] += 1
+        except Exception as e:
+            logger.warning(f"OCR cache write failed for {key}: {e}")
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._rescan()
+            elif not existed:
+                self._total_bytes += len(data)
+                self._entry_count += 1
+
+            if self._total_bytes > self.max_bytes or self._entry_count > self.max_entries:
+                self._evict()
+
+    def _rescan(self) -> list:
+        """Recompute size accounting from disk and return (mtime, size, path) entries."""
+        entries = []
+        for path in self.cache_dir.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        self._total_bytes = sum(size for _, size, _ in entries)
+        self._entry_count = len(entries)
+        return entries
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under 90% of both limits."""
+        entries = self._rescan()
+        entries.sort(key=lambda entry: entry[0])
+
+        target_bytes = int(self.max_bytes * 0.9)
+        target_entries = int(self.max_entries * 0.9)
+        evicted = 0
+
+        for _, size, path in entries:
+            if self._total_bytes <= target_bytes and self._entry_count <= target_entries:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= size
+            self._entry_count -= 1
+            evicted += 1
+
+        self.stats["evictions"] += evicted
+        if evicted:
+            logger.info(
+                f"OCR cache evicted {evicted} entries "
+                f"({self._entry_count} entries, {self._total_bytes / (1024 * 1024):.1f} MB remaining)"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics for this process.
+
+        Returns:
+            Dictionary with hits, misses, writes, evictions, lookups and hit_rate
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "hit_rate": round(hit_rate, 3)
+        }
+
+    def clear(self) -> None:
+        """Remove all cached OCR results."""
+        with self._lock:
+            for path in self.cache_dir.glob("*/*.txt"):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = 0
+            self._entry_count = 0
+
+        logger.info("Cleared OCR cache")
+
+
+# Global cache instance
+_ocr_cache: Optional[OCRCache] = None
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """
+    Get or create the global OCR cache instance.
+
+    Returns:
+        OCRCache instance, or None if caching is disabled or the cache
+        directory cannot be created
+    """
+    global _ocr_cache
+    if _ocr_cache is None:
+        from app.core.config import settings
+
+        if not settings.OCR_CACHE_ENABLED:
+            return None
+
+        try:
+            _ocr_cache = OCRCache(
+                cache_dir=os.path.join(settings.STORAGE_PATH, "cache", "ocr"),
+                max_bytes=settings.OCR_CACHE_MAX_MB * 1024 * 1024,
+                max_entries=settings.OCR_CACHE_MAX_ENTRIES
+            )
+        except Exception as e:
+            logger.warning(f"OCR cache unavailable, running without cache: {e}")
+            return None
+
+    return _ocr_cache
@@ -7,6 +7,9 @@ This module provides functions to:
 - Extract text from scanned PDF files
 - Check Tesseract availability
 
+OCR results are cached per page image (see app.utils.ocr_cache), so pages
+that recur across cases are only run through Tesseract once.
+
 Requirements:
 - System: tesseract-ocr must be installed
 - Python: pytesseract, pillow, pdf2image
@@ -42,9 +45,53 @@ import logging
 from typing import Optional, Tuple
 import time
 
+from app.utils.ocr_cache import get_ocr_cache
+
 logger = logging.getLogger(__name__)
 
 
+def _image_to_string_cached(image: Image.Image, language: str, config: str) -> Tuple[str, bool]:
+    """
+    Run Tesseract on an image, consulting the OCR page cache first.
+
+    Args:
+        image: Page image to OCR
+        language: Tesseract language codes
+        config: Tesseract config string
+
+    Returns:
+        Tuple of (extracted_text, from_cache)
+    """
+    cache = get_ocr_cache()
+    cache_key = None
+
+    if cache is not None:
+        cache_key = cache.make_key(image, language, config)
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text, True
+
+    text = pytesseract.image_to_string(
+        image,
+        lang=language,
+        config=config
+    )
+
+    if cache is not None and cache_key is not None:
+        cache.set(cache_key, text)
+
+    return text, False
+
+
+def _cache_stats_suffix() -> str:
+    """Format the process-wide OCR cache hit ratio for log lines."""
+    cache = get_ocr_cache()
+    if cache is None:
+        return "cache disabled"
+    stats = cache.get_stats()
+    return f"cache hit ratio {stats['hit_rate'] * 100:.1f}% ({stats['hits']}/{stats['lookups']})"
+
+
 def extract_text_with_ocr(
     file_content: bytes,
     language: str = "nld+eng",
@@ -92,18 +139,18 @@ def extract_text_with_ocr(
         # Enhance image quality if needed
         # Note: Could add preprocessing here (deskew, denoise, etc.)
 
-        # Extract text with Tesseract
-        text = pytesseract.image_to_string(
-            image,
-            lang=language,
-            config=config
-        )
+        # Extract text with Tesseract (or reuse the cached result for this image)
+        text, from_cache = _image_to_string_cached(image, language, config)
 
         # Calculate processing time
         elapsed = time.time() - start_time
+        source = "from cache" if from_cache else "with Tesseract"
 
         if text.strip():
-            logger.info(f"OCR extracted {len(text)} characters in {elapsed:.2f}s")
+            logger.info(
+                f"OCR extracted {len(text)} characters {source} in {elapsed:.2f}s "
+                f"({_cache_stats_suffix()})"
+            )
         else:
             logger.warning(f"OCR completed but no text extracted (elapsed: {elapsed:.2f}s)")
 
@@ -174,17 +221,16 @@ def ocr_pdf(
         # OCR each page
         text_pages = []
         total_chars = 0
+        cache_hits = 0
 
         for page_num, image in enumerate(images, 1):
             page_start = time.time()
             logger.debug(f"OCR processing page {page_num}/{len(images)}")
 
-            # Run OCR on page image
-            text = pytesseract.image_to_string(
-                image,
-                lang=language,
-                config="--psm 1"  # Automatic page segmentation with OSD
-            )
+            # Run OCR on page image (psm 1 = automatic page segmentation with OSD)
+            text, from_cache = _image_to_string_cached(image, language, "--psm 1")
+            if from_cache:
+                cache_hits += 1
 
             page_elapsed = time.time() - page_start
 
@@ -195,6 +241,7 @@ def ocr_pdf(
                 total_chars += len(text)
                 logger.debug(
                     f"Page {page_num}: extracted {len(text)} chars in {page_elapsed:.2f}s"
+                    f"{' (cached)' if from_cache else ''}"
                 )
             else:
                 logger.warning(f"Page {page_num}: no text extracted (possibly blank page)")
@@ -208,7 +255,8 @@ def ocr_pdf(
 
         logger.info(
             f"OCR complete: {total_chars} total characters from {len(images)} pages "
-            f"in {elapsed:.2f}s (avg {elapsed/len(images):.2f}s/page)"
+            f"in {elapsed:.2f}s (avg {elapsed/len(images):.2f}s/page), "
+            f"{cache_hits}/{len(images)} pages from cache, {_cache_stats_suffix()}"
         )
 
         return result
@@ -6,28 +6,49 @@ import os
 import time
 import logging
 import random
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
-from openai import OpenAI
 from app.core.config import settings
+from app.utils.llm_async import get_async_openai_client, run_sync
+from app.utils.llm_rate_limiter import rate_limited
+from app.utils.prompt_parts import join_prompt_part
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure OpenAI client
+# Configure OpenAI API key; the pooled AsyncOpenAI clients are created per
+# event loop on first use (see llm_async)
 API_INITIALIZED = False
+_api_key = None
 if settings.OPENAI_API_KEY:
-    try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        API_INITIALIZED = True
-        logger.info("OpenAI client initialized with provided API key")
-    except Exception as e:
-        logger.error(f"Failed to initialize OpenAI client: {str(e)}")
-        API_INITIALIZED = False
+    _api_key = settings.OPENAI_API_KEY
+    API_INITIALIZED = True
+    logger.info("OpenAI client initialized with provided API key")
 else:
     logger.warning("No OpenAI API key provided, API functionality will be limited")
 
+
+class OpenAIResponse:
+    """Response object mimicking Google's API"""
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.prompt_feedback = None
+        # Token counts of the call, including automatically cached prompt tokens
+        self.usage = usage
+
+
+class FallbackResponse:
+    """Placeholder response returned when the OpenAI call fails"""
+    def __init__(self, error_message):
+        self.text = f"Op basis van de beschikbare documenten is een objectieve analyse gemaakt. Voor meer specifieke informatie zijn aanvullende documenten gewenst."
+        self.prompt_feedback = None
+        class BlockReason:
+            def __init__(self):
+                self.block_reason = None
+        self.prompt_feedback = BlockReason()
+
+
 # Create a class mimicking the structure of Google's GenerativeModel
 class OpenAIModel:
     """
@@ -67,16 +88,107 @@ class OpenAIModel:
         if not API_INITIALIZED:
             raise ValueError("OpenAI API client is not initialized. Make sure OPENAI_API_KEY is set.")
             
-    def generate_content(self, prompt_parts):
+    def generate_content(self, prompt_parts, on_text: Optional[Callable[[str], None]] = None):
         """
         Generate content using OpenAI, mimicking the interface of Google's generate_content.
         
+        Sync shim for Celery code: runs generate_content_async on the shared
+        LLM I/O loop, so concurrent callers share one connection pool.
+        
         Args:
             prompt_parts: A list of messages in Google's format, each with 'role' and 'parts'
+            on_text: Optional callback receiving the text as it is streamed
             
         Returns:
             A response object with a 'text' attribute containing the generated content
         """
+        return run_sync(self.generate_content_async(prompt_parts, on_text=on_text))
+
+    async def generate_content_async(self, prompt_parts, on_text: Optional[Callable[[str], None]] = None):
+        """
+        Generate content using the pooled AsyncOpenAI client.
+        
+        Args:
+            prompt_parts: A list of messages in Google's format, each with 'role' and 'parts'
+            on_text: Optional callback receiving the text as it is streamed;
+                it runs on the event loop and must not block
+            
+        Returns:
+            A response object with a 'text' attribute containing the generated content
+        """
+        params = self._build_params(prompt_parts)
+            
+        try:
+            # Call the OpenAI API within the shared rate limits
+            async with rate_limited("openai", self.model_name, params) as permit:
+                if on_text is not None:
+                    response = await self._stream_content(params, on_text)
+                    permit.record(response.usage)
+                    return response
+                
+                response = await get_async_openai_client(_api_key).chat.completions.create(**params)
+                
+                usage = self._record_usage(response)
+                permit.record(usage)
+            
+            # Extract text from OpenAI's response
+            if response and response.choices and len(response.choices) > 0:
+                return OpenAIResponse(response.choices[0].message.content, usage)
+            return OpenAIResponse("", usage)
+                
+        except Exception as e:
+            logger.error(f"Error generating content with OpenAI: {str(e)}")
+            return FallbackResponse(str(e))
+
+    async def _stream_content(self, params: Dict[str, Any], on_text: Callable[[str], None]) -> OpenAIResponse:
+        """Stream a chat completion to on_text; the last chunk carries the usage."""
+        stream = await get_async_openai_client(_api_key).chat.completions.create(
+            **params, stream=True, stream_options={"include_usage": True}
+        )
+        pieces = []
+        usage_chunk = None
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                pieces.append(chunk.choices[0].delta.content)
+                on_text(chunk.choices[0].delta.content)
+            if getattr(chunk, "usage", None):
+                usage_chunk = chunk
+        usage = self._record_usage(usage_chunk) if usage_chunk else None
+        return OpenAIResponse("".join(pieces), usage)
+
+    def _record_usage(self, response) -> Optional[Dict[str, int]]:
+        """Report the token usage of a call, including cached prompt tokens, to the cost tracker"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        counts = {
+            # prompt_tokens includes the cached tokens; the tracker bills them separately
+            "input_tokens": (getattr(usage, "prompt_tokens", 0) or 0) - cached,
+            "output_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "cache_creation_tokens": 0,
+            "cache_read_tokens": cached,
+        }
+        try:
+            # Imported here: the monitoring modules import the LLM provider
+            from app.utils.rag_monitoring import ComponentType
+            from app.utils.token_cost_tracker import token_cost_tracker
+
+            token_cost_tracker.record_token_usage(
+                provider="openai",
+                model_name=self.model_name,
+                component=ComponentType.LLM_PROVIDER,
+                request_id=getattr(response, "id", "") or "",
+                **counts
+            )
+        except Exception as e:
+            logger.warning(f"Could not record OpenAI token usage: {str(e)}")
+        return counts
+
+    def _build_params(self, prompt_parts) -> Dict[str, Any]:
+        """Convert Google-style prompt parts to OpenAI chat parameters."""
         # Convert Google's prompt format to OpenAI's
         messages = []
         
@@ -92,10 +204,11 @@ class OpenAIModel:
                 else:
                     openai_role = "assistant"  # Default
                 
-                # Add message
+                # Add message; a cached prefix stays in front, where OpenAI's
+                # automatic prefix caching picks it up
                 messages.append({
                     "role": openai_role,
-                    "content": part["parts"][0]
+                    "content": join_prompt_part(part)
                 })
                 
         # Handle case where prompt_parts is just a string
@@ -109,62 +222,26 @@ class OpenAIModel:
         if not messages:
             raise ValueError("No valid messages found in prompt")
             
-        try:
-            # Map generation config to OpenAI's parameters
-            params = {
-                "model": self.model_name,
-                "messages": messages,
-                "max_tokens": self.generation_config.get("max_tokens", 4096),
-                "temperature": self.generation_config.get("temperature", 0.1),
-                "top_p": self.generation_config.get("top_p", 0.95),
-            }
-            
-            # Call the OpenAI API
-            response = client.chat.completions.create(**params)
-            
-            # Create a response object mimicking Google's API
-            class OpenAIResponse:
-                def __init__(self, text):
-                    self.text = text
-                    self.prompt_feedback = None
-                    
-            # Extract text from OpenAI's response
-            if response and response.choices and len(response.choices) > 0:
-                content_text = response.choices[0].message.content
-                return OpenAIResponse(content_text)
-            else:
-                return OpenAIResponse("")
-                
-        except Exception as e:
-            logger.error(f"Error generating content with OpenAI: {str(e)}")
-            
-            # Create a fallback response
-            class FallbackResponse:
-                def __init__(self, error_message):
-                    self.text = f"Op basis van de beschikbare documenten is een objectieve analyse gemaakt. Voor meer specifieke informatie zijn aanvullende documenten gewenst."
-                    self.prompt_feedback = None
-                    class BlockReason:
-                        def __init__(self):
-                            self.block_reason = None
-                    self.prompt_feedback = BlockReason()
-                    
-            return FallbackResponse(str(e))
+        # Map generation config to OpenAI's parameters
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": self.generation_config.get("max_tokens", 4096),
+            "temperature": self.generation_config.get("temperature", 0.1),
+            "top_p": self.generation_config.get("top_p", 0.95),
+        }
             
 # Function to configure the module (similar to genai.configure)
 def configure(api_key=None):
     """
     Configure the OpenAI client with the provided API key.
     """
-    global API_INITIALIZED, client
+    global API_INITIALIZED, _api_key
     
     if api_key:
-        try:
-            client = OpenAI(api_key=api_key)
-            API_INITIALIZED = True
-            logger.info("OpenAI client configured with provided API key")
-        except Exception as e:
-            logger.error(f"Failed to configure OpenAI client: {str(e)}")
-            API_INITIALIZED = False
+        _api_key = api_key
+        API_INITIALIZED = True
+        logger.info("OpenAI client configured with provided API key")
     else:
         logger.warning("No API key provided to configure OpenAI client")
         
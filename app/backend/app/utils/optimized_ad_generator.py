@@ -4,10 +4,13 @@ Reduces from 18 calls to approximately 5-6 strategic calls
 """
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.utils.llm_provider import create_llm_instance
 from app.models.ad_report_structure import (
     ADReport, Bedrijfsgegevens, Contactgegevens, OnderzoekGegevens,
@@ -20,19 +23,33 @@ logger = logging.getLogger(__name__)
 
 class OptimizedADGenerator:
     """Generates complete AD reports with optimized LLM calls"""
+
+    # (generate method, update method) per batch; the batches only read the
+    # context and case data, so they are generated concurrently and merged
+    # into the report in this order
+    BATCHES = [
+        ("_generate_metadata_sections", "_update_report_metadata"),
+        ("_generate_introduction_sections", "_update_report_introduction"),
+        ("_generate_data_sections", "_update_report_data"),
+        ("_generate_analysis_sections", "_update_report_analysis"),
+        ("_generate_conclusion_sections", "_update_report_conclusions"),
+    ]
     
-    def __init__(self, temperature: float = 0.2, max_tokens: int = 8000):
+    def __init__(self, temperature: float = 0.2, max_tokens: int = 8000, max_concurrency: Optional[int] = None):
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.max_concurrency = max_concurrency or settings.REPORT_SECTION_CONCURRENCY
         self.llm = None
+        self._llm_lock = Lock()
         
     def _get_llm(self):
-        """Get or create LLM instance"""
-        if not self.llm:
-            self.llm = create_llm_instance(
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+        """Get or create LLM instance (shared by the batch threads)"""
+        with self._llm_lock:
+            if not self.llm:
+                self.llm = create_llm_instance(
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
         return self.llm
         
     def generate_complete_report(self, context: str, case_data: Dict[str, Any]) -> ADReport:
@@ -51,26 +68,19 @@ class OptimizedADGenerator:
         # Initialize report structure
         report = self._initialize_report(case_data)
         
-        # Generate sections in batches for efficiency
-        # Batch 1: Metadata and basic info (gegevens sections)
-        metadata_sections = self._generate_metadata_sections(context, case_data)
-        self._update_report_metadata(report, metadata_sections)
-        
-        # Batch 2: Introduction sections (samenvatting, vraagstelling, activiteiten)
-        intro_sections = self._generate_introduction_sections(context, case_data)
-        self._update_report_introduction(report, intro_sections)
-        
-        # Batch 3: Data collection (voorgeschiedenis, werknemer info, belastbaarheid)
-        data_sections = self._generate_data_sections(context, case_data)
-        self._update_report_data(report, data_sections)
-        
-        # Batch 4: Analysis (geschiktheid, visie arbeidsdeskundige)
-        analysis_sections = self._generate_analysis_sections(context, case_data)
-        self._update_report_analysis(report, analysis_sections)
-        
-        # Batch 5: Conclusions and follow-up (conclusie, trajectplan, vervolg)
-        conclusion_sections = self._generate_conclusion_sections(context, case_data)
-        self._update_report_conclusions(report, conclusion_sections)
+        # Generate the batches concurrently, then merge them in order
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(self.BATCHES))) as executor:
+            futures = [
+                executor.submit(getattr(self, generate), context, case_data)
+                for generate, _ in self.BATCHES
+            ]
+
+        for (generate, update), future in zip(self.BATCHES, futures):
+            try:
+                getattr(self, update)(report, future.result())
+            except Exception as e:
+                # Keep the other batches; this part of the report stays at its defaults
+                logger.error(f"Error in {generate}: {e}")
         
         logger.info("Completed optimized AD report generation")
         return report
@@ -3,6 +3,7 @@ Optimized RAG Pipeline voor Arbeidsdeskundige AI
 Enhanced retrieval met document type awareness en slimme chunking
 """
 
+import bisect
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
@@ -13,6 +14,7 @@ from enum import Enum
 
 from anthropic import Anthropic
 from app.utils.smart_document_classifier import DocumentType, ProcessingStrategy
+from app.utils.chunking_engine import ChunkingEngine, SectionHeader, SectionMatcher, section_at, tokens_for_chars
 from app.utils.vector_store_improved import HybridVectorStore
 from app.db.database_service import DatabaseService
 
@@ -45,6 +47,114 @@ class RetrievalConfig:
     metadata_filters: Dict[str, Any]
 
 
+# Section heading patterns per document type. Dict order is the priority
+# when patterns match at (nearly) the same position.
+MEDICAL_SECTION_PATTERNS = {
+    "patient_info": {
+        "pattern": r"(pati[eë]nt|naam|geboortedatum|bsn)",
+        "importance": "medium"
+    },
+    "anamnese": {
+        "pattern": r"(anamnese|voorgeschiedenis|hetero.anamnese|klachten)",
+        "importance": "high"
+    },
+    "onderzoek": {
+        "pattern": r"(lichamelijk onderzoek|bevindingen|inspectie|palpatie)",
+        "importance": "high"
+    },
+    "diagnose": {
+        "pattern": r"(diagnose|conclusie|bevindingen|differential)",
+        "importance": "critical"
+    },
+    "behandeling": {
+        "pattern": r"(behandeling|therapie|medicatie|behandelplan)",
+        "importance": "high"
+    },
+    "prognose": {
+        "pattern": r"(prognose|verwachting|herstel|vooruitzicht)",
+        "importance": "high"
+    },
+    "beperkingen": {
+        "pattern": r"(beperkingen|limitaties|contra.indicaties)",
+        "importance": "critical"
+    }
+}
+
+ASSESSMENT_SECTION_PATTERNS = {
+    "persoonsgegevens": {
+        "pattern": r"(naam|bsn|geboortedatum|adres)",
+        "importance": "low"
+    },
+    "belastbaarheid": {
+        "pattern": r"(belastbaarheid|belastbaar|capaciteit|fysiek|mentaal)",
+        "importance": "critical"
+    },
+    "beperkingen": {
+        "pattern": r"(beperkingen|limitaties|problemen|niet.*?mogelijk)",
+        "importance": "critical"
+    },
+    "mogelijkheden": {
+        "pattern": r"(mogelijkheden|kansen|wel.*?mogelijk|geschikt)",
+        "importance": "high"
+    },
+    "werkhervatting": {
+        "pattern": r"(werkhervatting|re.integratie|terugkeer|hervat)",
+        "importance": "high"
+    },
+    "advies": {
+        "pattern": r"(advies|aanbeveling|voorstel|suggestie)",
+        "importance": "critical"
+    },
+    "conclusie": {
+        "pattern": r"(conclusie|samenvatting|eindoordeel)",
+        "importance": "critical"
+    }
+}
+
+LEGAL_SECTION_PATTERNS = {
+    "partijen": {
+        "pattern": r"(tussen|eiser|verweerder|partijen)",
+        "importance": "medium"
+    },
+    "feiten": {
+        "pattern": r"(feiten|feitelijke.*?omstandigheden|gebeurde)",
+        "importance": "high"
+    },
+    "overwegingen": {
+        "pattern": r"(overwegingen|beoordeling|analyse|rechtbank.*?overweegt)",
+        "importance": "critical"
+    },
+    "conclusie": {
+        "pattern": r"(conclusie|uitspraak|beslissing|vonnis)",
+        "importance": "critical"
+    },
+    "rechtsgevolgen": {
+        "pattern": r"(rechtsgevolgen|gevolgen|consequenties|veroordeelt)",
+        "importance": "high"
+    },
+    "artikelen": {
+        "pattern": r"(artikel.*?\d+|wet|wetboek|bw|sr)",
+        "importance": "high"
+    }
+}
+
+SECTION_PATTERNS = {
+    "medical_report": MEDICAL_SECTION_PATTERNS,
+    "assessment_report": ASSESSMENT_SECTION_PATTERNS,
+    "legal_document": LEGAL_SECTION_PATTERNS,
+}
+
+# Compiled once; each matcher finds the headings of all its sections in one
+# scan. Priority between sections (a heading like "bevindingen" that matches
+# several sections goes to the first one listed) is applied by the pipeline.
+SECTION_MATCHERS = {
+    doc_type: SectionMatcher(
+        {name: info["pattern"] for name, info in section_patterns.items()}, word_start=False
+    )
+    for doc_type, section_patterns in SECTION_PATTERNS.items()
+}
+
+
 class OptimizedRAGPipeline:
     """
     Geoptimaliseerde RAG pipeline met document type awareness
@@ -179,6 +289,7 @@ class OptimizedRAGPipeline:
                 DocumentType.LEGAL_DOCUMENT.value
             ]:
                 chunks = await self._create_section_aware_chunks(content, doc_type, config)
+                self._store_section_index(document_id, content, doc_type, chunks)
             else:
                 chunks = await self._create_semantic_chunks(content, doc_type, config)
             
@@ -238,210 +349,98 @@ class OptimizedRAGPipeline:
     async def _chunk_medical_sections(self, content: str, config: ChunkConfig) -> List[Dict[str, Any]]:
         """Chunk medische rapporten op basis van medische secties"""
         
-        import re
-        
-        # Enhanced medical section patterns
-        section_patterns = {
-            "patient_info": {
-                "pattern": r"(pati[eë]nt|naam|geboortedatum|bsn)",
-                "importance": "medium"
-            },
-            "anamnese": {
-                "pattern": r"(anamnese|voorgeschiedenis|hetero.anamnese|klachten)",
-                "importance": "high"
-            },
-            "onderzoek": {
-                "pattern": r"(lichamelijk onderzoek|bevindingen|inspectie|palpatie)",
-                "importance": "high"
-            },
-            "diagnose": {
-                "pattern": r"(diagnose|conclusie|bevindingen|differential)",
-                "importance": "critical"
-            },
-            "behandeling": {
-                "pattern": r"(behandeling|therapie|medicatie|behandelplan)",
-                "importance": "high"
-            },
-            "prognose": {
-                "pattern": r"(prognose|verwachting|herstel|vooruitzicht)",
-                "importance": "high"
-            },
-            "beperkingen": {
-                "pattern": r"(beperkingen|limitaties|contra.indicaties)",
-                "importance": "critical"
-            }
-        }
-        
-        chunks = []
-        processed_positions = set()
-        
-        for section_name, section_info in section_patterns.items():
-            pattern = section_info["pattern"]
-            importance = section_info["importance"]
-            
-            # Find all matches for this section
-            matches = list(re.finditer(pattern, content, re.IGNORECASE))
-            
-            for match in matches:
-                start_pos = match.start()
-                
-                # Skip if this position was already processed
-                if any(abs(start_pos - pos) < 100 for pos in processed_positions):
-                    continue
-                
-                # Extract section content
-                section_content = self._extract_section_content(
-                    content, start_pos, config.target_size, config.max_size
-                )
-                
-                if len(section_content.strip()) > 50:  # Minimum content length
-                    importance_boost = config.importance_boost
-                    if importance == "critical":
-                        importance_boost *= 1.5
-                    elif importance == "high":
-                        importance_boost *= 1.2
-                    
-                    chunks.append({
-                        "content": section_content,
-                        "metadata": {
-                            "section_type": section_name,
-                            "document_type": "medical_report",
-                            "chunk_type": "medical_section",
-                            "importance": importance,
-                            "importance_boost": importance_boost,
-                            "section_start": start_pos
-                        }
-                    })
-                    
-                    processed_positions.add(start_pos)
-        
-        return chunks
+        return await self._extract_sections_by_patterns(
+            content, "medical_report", config, min_distance=100,
+            min_length=50, boosts=(1.5, 1.2), chunk_type="medical_section"
+        )
     
     async def _chunk_assessment_sections(self, content: str, config: ChunkConfig) -> List[Dict[str, Any]]:
         """Chunk arbeidsdeskundige rapporten op basis van assessment secties"""
         
-        import re
-        
-        section_patterns = {
-            "persoonsgegevens": {
-                "pattern": r"(naam|bsn|geboortedatum|adres)",
-                "importance": "low"
-            },
-            "belastbaarheid": {
-                "pattern": r"(belastbaarheid|belastbaar|capaciteit|fysiek|mentaal)",
-                "importance": "critical"
-            },
-            "beperkingen": {
-                "pattern": r"(beperkingen|limitaties|problemen|niet.*mogelijk)",
-                "importance": "critical"
-            },
-            "mogelijkheden": {
-                "pattern": r"(mogelijkheden|kansen|wel.*mogelijk|geschikt)",
-                "importance": "high"
-            },
-            "werkhervatting": {
-                "pattern": r"(werkhervatting|re.integratie|terugkeer|hervat)",
-                "importance": "high"
-            },
-            "advies": {
-                "pattern": r"(advies|aanbeveling|voorstel|suggestie)",
-                "importance": "critical"
-            },
-            "conclusie": {
-                "pattern": r"(conclusie|samenvatting|eindoordeel)",
-                "importance": "critical"
-            }
-        }
-        
         return await self._extract_sections_by_patterns(
-            content, section_patterns, config, "assessment_report"
+            content, "assessment_report", config
         )
     
     async def _chunk_legal_sections(self, content: str, config: ChunkConfig) -> List[Dict[str, Any]]:
         """Chunk juridische documenten op basis van juridische structuur"""
         
-        import re
-        
-        section_patterns = {
-            "partijen": {
-                "pattern": r"(tussen|eiser|verweerder|partijen)",
-                "importance": "medium"
-            },
-            "feiten": {
-                "pattern": r"(feiten|feitelijke.*omstandigheden|gebeurde)",
-                "importance": "high"
-            },
-            "overwegingen": {
-                "pattern": r"(overwegingen|beoordeling|analyse|rechtbank.*overweegt)",
-                "importance": "critical"
-            },
-            "conclusie": {
-                "pattern": r"(conclusie|uitspraak|beslissing|vonnis)",
-                "importance": "critical"
-            },
-            "rechtsgevolgen": {
-                "pattern": r"(rechtsgevolgen|gevolgen|consequenties|veroordeelt)",
-                "importance": "high"
-            },
-            "artikelen": {
-                "pattern": r"(artikel.*\d+|wet|wetboek|bw|sr)",
-                "importance": "high"
-            }
-        }
-        
         return await self._extract_sections_by_patterns(
-            content, section_patterns, config, "legal_document"
+            content, "legal_document", config
         )
     
-    async def _extract_sections_by_patterns(self, content: str, section_patterns: Dict[str, Dict],
-                                          config: ChunkConfig, doc_type: str) -> List[Dict[str, Any]]:
+    async def _extract_sections_by_patterns(self, content: str, doc_type: str, config: ChunkConfig,
+                                          min_distance: int = 200,
+                                          min_length: int = 100,
+                                          boosts: Tuple[float, float] = (1.8, 1.4),
+                                          chunk_type: str = "pattern_section") -> List[Dict[str, Any]]:
         """Generic method voor pattern-based section extraction"""
         
-        import re
-        
+        critical_boost, high_boost = boosts
         chunks = []
-        processed_positions = set()
+        # Sorted start positions of the sections taken so far
+        processed_positions: List[int] = []
         
-        for section_name, section_info in section_patterns.items():
-            pattern = section_info["pattern"]
+        # One scan for all headings, then sections in priority order
+        headers = SECTION_MATCHERS[doc_type].find_all(content)
+        for section_name, section_info in SECTION_PATTERNS[doc_type].items():
             importance = section_info["importance"]
-            
-            matches = list(re.finditer(pattern, content, re.IGNORECASE))
-            
-            for match in matches:
-                start_pos = match.start()
+            for header in headers[section_name]:
+                start_pos = header.start
                 
-                # Skip overlapping sections
-                if any(abs(start_pos - pos) < 200 for pos in processed_positions):
+                # Skip overlapping sections: only the nearest taken positions can be too close
+                i = bisect.bisect_left(processed_positions, start_pos)
+                if (i < len(processed_positions) and processed_positions[i] - start_pos < min_distance) or \
+                        (i > 0 and start_pos - processed_positions[i - 1] < min_distance):
                     continue
                 
                 section_content = self._extract_section_content(
                     content, start_pos, config.target_size, config.max_size
                 )
                 
-                if len(section_content.strip()) > 100:
+                if len(section_content.strip()) > min_length:
                     importance_boost = config.importance_boost
                     if importance == "critical":
-                        importance_boost *= 1.8
+                        importance_boost *= critical_boost
                     elif importance == "high":
-                        importance_boost *= 1.4
+                        importance_boost *= high_boost
                     
                     chunks.append({
                         "content": section_content,
                         "metadata": {
                             "section_type": section_name,
                             "document_type": doc_type,
-                            "chunk_type": "pattern_section",
+                            "chunk_type": chunk_type,
                             "importance": importance,
                             "importance_boost": importance_boost,
                             "section_start": start_pos
                         }
                     })
                     
-                    processed_positions.add(start_pos)
+                    bisect.insort(processed_positions, start_pos)
         
         return chunks
     
+    def _store_section_index(self, document_id: str, content: str, doc_type: str,
+                             chunks: List[Dict[str, Any]]) -> None:
+        """Store the section index (name -> character spans) in the document metadata"""
+        if not self.db_service:
+            return
+        
+        headers = sorted(
+            (
+                SectionHeader(chunk["metadata"]["section_start"], chunk["metadata"]["section_start"],
+                              chunk["metadata"]["section_type"])
+                for chunk in chunks if "section_start" in chunk.get("metadata", {})
+            ),
+            key=lambda header: header.start
+        )
+        if headers:
+            section_index = SECTION_MATCHERS[doc_type].build_index(content, headers)
+            self.db_service.merge_document_metadata(document_id, {"section_index": section_index})
+        else:
+            # No sections found; drop an index left by an earlier chunking run
+            self.db_service.remove_document_metadata_keys(document_id, ["section_index"])
+    
     def _extract_section_content(self, content: str, start_pos: int, 
                                 target_size: int, max_size: int) -> str:
         """Extract section content with intelligent boundaries"""
@@ -475,77 +474,26 @@ class OptimizedRAGPipeline:
                                      config: ChunkConfig) -> List[Dict[str, Any]]:
         """Fallback semantic chunking voor ongestructureerde content"""
         
-        # Intelligent paragraph-based chunking
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-        chunks = []
-        
-        current_chunk = ""
-        current_size = 0
-        chunk_index = 0
+        # Paragraph-based chunking binnen het token budget van deze config
+        engine = ChunkingEngine(
+            max_tokens=tokens_for_chars(config.max_size),
+            overlap_tokens=tokens_for_chars(config.overlap)
+        )
         
-        for paragraph in paragraphs:
-            # Check if adding this paragraph would exceed max size
-            if current_size + len(paragraph) > config.max_size and current_chunk:
-                # Save current chunk
-                chunks.append({
-                    "content": current_chunk.strip(),
-                    "metadata": {
-                        "document_type": doc_type,
-                        "chunk_type": "semantic_paragraph",
-                        "importance": "medium",
-                        "importance_boost": config.importance_boost,
-                        "chunk_index": chunk_index
-                    }
-                })
-                
-                # Start new chunk with overlap
-                overlap_text = self._get_overlap_text(current_chunk, config.overlap)
-                current_chunk = overlap_text + "\n\n" + paragraph
-                current_size = len(current_chunk)
-                chunk_index += 1
-            else:
-                # Add paragraph to current chunk
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
-                else:
-                    current_chunk = paragraph
-                current_size += len(paragraph)
-        
-        # Add final chunk
-        if current_chunk.strip():
-            chunks.append({
-                "content": current_chunk.strip(),
+        return [
+            {
+                "content": chunk.text,
                 "metadata": {
                     "document_type": doc_type,
                     "chunk_type": "semantic_paragraph",
                     "importance": "medium",
                     "importance_boost": config.importance_boost,
-                    "chunk_index": chunk_index
+                    "chunk_index": chunk.index,
+                    **chunk.offsets()
                 }
-            })
-        
-        return chunks
-    
-    def _get_overlap_text(self, text: str, overlap_size: int) -> str:
-        """Get overlap text from end of chunk for context continuity"""
-        if len(text) <= overlap_size:
-            return text
-        
-        # Try to find sentence boundary for natural overlap
-        overlap_text = text[-overlap_size:]
-        
-        # Find last sentence end
-        sentence_ends = ['.', '!', '?', '\n']
-        last_sentence_end = -1
-        
-        for i, char in enumerate(overlap_text):
-            if char in sentence_ends:
-                last_sentence_end = i
-        
-        if last_sentence_end > overlap_size // 2:  # If we found a good break point
-            return overlap_text[last_sentence_end + 1:].strip()
-        
-        return overlap_text
+            }
+            for chunk in engine.iter_chunks(content)
+        ]
     
     async def enhanced_retrieval(self, query: str, case_id: str, 
                                document_types: Optional[List[str]] = None,
@@ -647,15 +595,17 @@ class OptimizedRAGPipeline:
         metadata_filters = {"case_id": case_id}
         if document_types:
             metadata_filters["document_type"] = document_types
-        if section_hints:
-            metadata_filters["section_type"] = section_hints
         
-        # Perform enhanced search with section boosting
+        # Perform enhanced search with section boosting; section hints boost
+        # rather than filter, so chunks that were not cut along sections can
+        # still match through the stored section index
         results = await self.vector_store.similarity_search_with_metadata(
             query=query,
             k=max_results * 2,  # Get more results for filtering
             metadata_filter=metadata_filters
         )
+        if section_hints:
+            results = self._resolve_sections(results)
         
         # Boost results from relevant sections
         boosted_results = []
@@ -796,6 +746,32 @@ class OptimizedRAGPipeline:
         
         return results
     
+    def _resolve_sections(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in the section of chunks without section_type from the document's section index"""
+        if not self.db_service:
+            return results
+        
+        section_indexes: Dict[str, Dict[str, List[List[int]]]] = {}
+        resolved = []
+        for result in results:
+            metadata = result.get("metadata", {})
+            document_id = result.get("document_id") or metadata.get("document_id")
+            start_char = metadata.get("start_char")
+            if metadata.get("section_type") or not document_id or start_char is None:
+                resolved.append(result)
+                continue
+            
+            if document_id not in section_indexes:
+                document = self.db_service.get_row_by_id("document", document_id) or {}
+                section_indexes[document_id] = (document.get("metadata") or {}).get("section_index") or {}
+            
+            section = section_at(section_indexes[document_id], start_char)
+            if section:
+                result = {**result, "metadata": {**metadata, "section_type": section}}
+            resolved.append(result)
+        
+        return resolved
+    
     def _extract_section_hints(self, query: str) -> List[str]:
         """Extract section hints from query"""
         query_lower = query.lower()
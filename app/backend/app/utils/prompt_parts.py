@@ -0,0 +1,49 @@
+"""
+Google-style prompt parts with a cacheable shared prefix.
+
+Report sections are generated with 20+ LLM calls that all embed the same
+case context (documents, profile, standing instructions) and differ only in
+the section instructions. build_cached_prompt() puts that shared context in
+a stable prefix part of the user message, followed by the per-section
+suffix part:
+
+    {"role": "user", "parts": [prefix, suffix], "cache_prefix": True}
+
+ClaudeModel sends the prefix as its own content block with an Anthropic
+cache_control marker, so only the first call of a report pays full input
+cost and latency for it. Providers without explicit markers get the parts
+joined, prefix first, which is what OpenAI's automatic prefix caching needs.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def build_cached_prompt(prefix: str, suffix: str, system: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Prompt parts with a cacheable shared prefix.
+
+    Args:
+        prefix: Context that is identical across calls; must not contain
+            per-call text (dates, section titles), or nothing is reused
+        suffix: Per-call instructions, sent after the prefix
+        system: Optional system instruction
+
+    Returns:
+        Prompt parts for generate_content / generate_content_async
+    """
+    parts = [{"role": "system", "parts": [system]}] if system else []
+    parts.append({"role": "user", "parts": [prefix, suffix], "cache_prefix": True})
+    return parts
+
+
+def split_cached_part(part: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """(prefix, suffix) of a prompt part; prefix is None for a plain part."""
+    if part.get("cache_prefix") and len(part["parts"]) > 1:
+        return part["parts"][0], part["parts"][1]
+    return None, part["parts"][0]
+
+
+def join_prompt_part(part: Dict[str, Any]) -> str:
+    """Text of a prompt part, with a cached prefix joined before its suffix."""
+    prefix, suffix = split_cached_part(part)
+    return f"{prefix}\n\n{suffix}" if prefix else suffix
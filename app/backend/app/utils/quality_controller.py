@@ -11,7 +11,8 @@ from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 
-from anthropic import Anthropic
+from app.utils.llm_async import get_async_anthropic_client
+from app.utils.llm_rate_limiter import rate_limited
 from app.utils.context_aware_prompts import ReportSection, ComplexityLevel
 
 
@@ -80,8 +81,6 @@ class AutomaticQualityController:
     """Automatische kwaliteitscontrole voor arbeidsdeskundige content"""
     
     def __init__(self):
-        from app.core.config import settings
-        self.client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.logger = logging.getLogger(__name__)
         
         # Nederlandse arbeidsdeskundige terminologie database
@@ -768,16 +767,18 @@ Wees specifiek en constructief in je feedback.
 """
         
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1024,
-                messages=[
+            params = {
+                "model": "claude-sonnet-4-20250514",
+                "max_tokens": 1024,
+                "messages": [
                     {
                         "role": "user", 
                         "content": prompt
                     }
                 ]
-            )
+            }
+            async with rate_limited("anthropic", params["model"], params):
+                response = await get_async_anthropic_client().messages.create(**params)
             response_text = response.content[0].text
             
             # Parse JSON response
@@ -1332,16 +1333,18 @@ Wees specifiek en constructief in je feedback.
             )
             
             try:
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=1500,  # Verhoogd voor betere output
-                    messages=[
+                params = {
+                    "model": "claude-sonnet-4-20250514",
+                    "max_tokens": 1500,  # Verhoogd voor betere output
+                    "messages": [
                         {
                             "role": "user", 
                             "content": improvement_prompt
                         }
                     ]
-                )
+                }
+                async with rate_limited("anthropic", params["model"], params):
+                    response = await get_async_anthropic_client().messages.create(**params)
                 improved_text = response.content[0].text.strip()
                 
                 # Valideer de verbetering
@@ -273,6 +273,58 @@ class RAGCacheManager:
         except Exception as e:
             logger.error(f"Pattern invalidation failed for {pattern}: {e}")
 
+    def register_chunk_refs(self, cache_key: str, chunk_ids: List[str], ttl: int = 86400):
+        """
+        Record which document chunks a cached value refers to.
+
+        Keeps a Redis set per chunk ("chunkref:<chunk_id>") listing the cache
+        keys whose values contain that chunk, so invalidate_chunks() can drop
+        exactly those entries when a chunk changes or disappears.
+
+        Args:
+            cache_key: Key of the cached value
+            chunk_ids: Chunk IDs contained in the cached value
+            ttl: Lifetime of the reference sets (matches the cached value)
+        """
+        if not chunk_ids:
+            return
+
+        try:
+            pipe = self.redis.pipeline()
+            for chunk_id in set(chunk_ids):
+                ref_key = f"chunkref:{chunk_id}"
+                pipe.sadd(ref_key, cache_key)
+                pipe.expire(ref_key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to register chunk references for {cache_key}: {e}")
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        Invalidate all cached values that refer to any of the given chunks.
+
+        Args:
+            chunk_ids: Chunk IDs that were changed or removed
+
+        Returns:
+            Number of cache keys invalidated
+        """
+        invalidated = 0
+
+        for chunk_id in set(chunk_ids):
+            ref_key = f"chunkref:{chunk_id}"
+            try:
+                members = self.redis.smembers(ref_key)
+                for member in members:
+                    key = member.decode() if isinstance(member, bytes) else member
+                    self.invalidate_key(key)
+                    invalidated += 1
+                self.redis.delete(ref_key)
+            except Exception as e:
+                logger.error(f"Chunk invalidation failed for {chunk_id}: {e}")
+
+        return invalidated
+
     def _matches_pattern(self, key: str, pattern: str) -> bool:
         """
         Check if key matches Redis-style pattern.
@@ -336,7 +388,7 @@ class RAGCacheManager:
         """
         self.l1_cache.clear()
         # Clear all keys with our prefixes
-        for pattern in ["embed:*", "vsearch:*", "hsearch:*", "chunks:*"]:
+        for pattern in ["embed:*", "vsearch:*", "hsearch:*", "chunks:*", "chunkref:*"]:
             try:
                 keys = list(self.redis.scan_iter(match=pattern, count=1000))
                 if keys:
@@ -459,6 +511,7 @@ def cached(
             # Cache result
             try:
                 cache.set(cache_key, result, ttl=ttl)
+                cache.register_chunk_refs(cache_key, _extract_chunk_ids(result), ttl=ttl)
             except Exception as e:
                 logger.warning(f"Failed to cache result: {e}")
 
@@ -500,6 +553,7 @@ def cached(
             # Cache result
             try:
                 cache.set(cache_key, result, ttl=ttl)
+                cache.register_chunk_refs(cache_key, _extract_chunk_ids(result), ttl=ttl)
             except Exception as e:
                 logger.warning(f"Failed to cache result: {e}")
 
@@ -515,6 +569,52 @@ def cached(
     return decorator
 
 
+def _extract_chunk_ids(value: Any, depth: int = 0) -> List[str]:
+    """
+    Collect "chunk_id" values from a cached search result.
+
+    Walks nested lists and dicts (up to three levels deep) as returned by the
+    vector and hybrid search functions.
+    """
+    if depth > 3:
+        return []
+
+    chunk_ids = []
+    if isinstance(value, dict):
+        if value.get("chunk_id"):
+            chunk_ids.append(str(value["chunk_id"]))
+        for nested in value.values():
+            if isinstance(nested, (list, dict)):
+                chunk_ids.extend(_extract_chunk_ids(nested, depth + 1))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, (list, dict)):
+                chunk_ids.extend(_extract_chunk_ids(item, depth + 1))
+
+    return chunk_ids
+
+
+def invalidate_chunk_cache(chunk_ids: List[str]):
+    """
+    Invalidate only the cache entries that refer to specific chunks.
+
+    Call this after incremental re-ingestion, where most chunks of a document
+    are unchanged and their embeddings and cached searches remain valid.
+
+    Args:
+        chunk_ids: IDs of chunks that were removed or changed
+    """
+    if not chunk_ids:
+        return
+
+    try:
+        cache = get_cache_manager()
+        invalidated = cache.invalidate_chunks([str(chunk_id) for chunk_id in chunk_ids])
+        logger.info(f"Invalidated {invalidated} cache entries for {len(chunk_ids)} chunks")
+    except Exception as e:
+        logger.error(f"Failed to invalidate cache for {len(chunk_ids)} chunks: {e}")
+
+
 def invalidate_document_cache(document_id: str):
     """
     Invalidate all cache entries related to a document.
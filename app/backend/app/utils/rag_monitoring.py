@@ -29,6 +29,7 @@ class MetricType(Enum):
     TOKEN_USAGE = "token_usage"
     USER_SATISFACTION = "user_satisfaction"
     CACHE_HIT_RATE = "cache_hit_rate"
+    QUEUE_WAIT = "queue_wait"
 
 
 class ComponentType(Enum):
@@ -650,7 +651,8 @@ class MetricsCollector:
             MetricType.MEMORY_USAGE: "Memory usage in MB",
             MetricType.TOKEN_USAGE: "Number of tokens consumed",
             MetricType.USER_SATISFACTION: "User satisfaction rating (0-1)",
-            MetricType.CACHE_HIT_RATE: "Cache hit rate percentage (0-1)"
+            MetricType.CACHE_HIT_RATE: "Cache hit rate percentage (0-1)",
+            MetricType.QUEUE_WAIT: "Time LLM calls waited for the rate limiter in seconds"
         }
         return help_texts.get(metric_type, "System metric")
     
@@ -661,7 +663,8 @@ class MetricsCollector:
             MetricType.QUALITY_SCORE,
             MetricType.MEMORY_USAGE,
             MetricType.USER_SATISFACTION,
-            MetricType.CACHE_HIT_RATE
+            MetricType.CACHE_HIT_RATE,
+            MetricType.QUEUE_WAIT
         }
         return "gauge" if metric_type in gauge_metrics else "counter"
     
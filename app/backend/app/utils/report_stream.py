@@ -0,0 +1,361 @@
+"""
+Live report progress over Redis streams.
+
+While a report is generated, every section's text is streamed from the LLM
+and published to the Redis stream "reportstream:<report id>". Each entry has
+an event type, the section ID and a JSON payload:
+
+- section_start: a generation attempt for the section starts; clients clear
+  any text they have for the section (sent again when an attempt is retried)
+- delta: the next piece of text of the section
+- section_done: the section is finished; "content" is its final text
+  (after quality control), which replaces the streamed text
+- section_failed: the section could not be generated
+- report_done: the run is over; "status" is generated or failed
+
+Text arrives on the shared LLM I/O loop, so writing it only buffers; a
+flusher thread publishes the buffered deltas every REPORT_STREAM_FLUSH_INTERVAL
+seconds, or sooner once a section has REPORT_STREAM_FLUSH_CHARS pending, so a
+stream gets a few entries per second per section, not one per token. The
+publisher also writes the partial report content to the database every
+REPORT_STREAM_PERSIST_INTERVAL seconds, so the report row shows progress to
+clients that do not use the stream. close() stops both before the final
+report is saved.
+
+A new run of the same report (an incremental refresh, a task retry) deletes
+the stream of the previous run when its publisher is created, before the
+first section_start. Until the worker gets there, the stream still ends with
+the previous run's report_done; readers of a report that is being generated
+again start after it (see iter_report_events).
+
+The API relays the stream as server-sent events (format_sse); the entry ID
+is the SSE event ID, so a reconnecting client resumes with Last-Event-ID.
+
+If Redis is unreachable the layer fails open: the report is generated and
+persisted as before, without live events.
+
+Usage:
+    publisher = ReportStreamPublisher(report_id, get_report_stream_redis(), persist=save_partial)
+    section = publisher.section("samenvatting")
+    section.restart()
+    response = model.generate_content(prompt_parts, on_text=section.write)
+    publisher.finish_section("samenvatting", response.text, "enhanced_rag")
+    publisher.close()
+    save_final_report()
+    publisher.finish("generated")
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "reportstream"
+
+# Event that ends a stream
+DONE_EVENT = "report_done"
+
+
+def stream_key(report_id: str) -> str:
+    return f"{KEY_PREFIX}:{report_id}"
+
+
+def format_sse(entry_id: Optional[str], event: str, data: Dict[str, Any]) -> str:
+    """One server-sent event; events without an ID do not move Last-Event-ID."""
+    event_id = f"id: {entry_id}\n" if entry_id else ""
+    return f"{event_id}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class SectionStream:
+    """Text sink of one section, handed to the LLM call as on_text."""
+
+    def __init__(self, publisher: "ReportStreamPublisher", section_id: str):
+        self.publisher = publisher
+        self.section_id = section_id
+
+    def restart(self) -> None:
+        """Start a (new) generation attempt; drops the text streamed so far."""
+        self.publisher.start_section(self.section_id)
+
+    def write(self, text: str) -> None:
+        self.publisher.write(self.section_id, text)
+
+
+class ReportStreamPublisher:
+    """
+    Publishes the progress of one report run and persists partial content.
+
+    Thread-safe: sections are generated in worker threads and their text
+    arrives on the LLM I/O loop. write() runs on that loop, so it only
+    buffers; a flusher thread publishes the deltas and persists the partial
+    report. Section events are published from the section threads.
+    """
+
+    def __init__(self, report_id: str, redis_client: Optional[redis.Redis] = None,
+                 persist: Optional[Callable[[Dict[str, str]], None]] = None):
+        """
+        Args:
+            report_id: ID of the report being generated
+            redis_client: Client for the stream, or None to only persist
+            persist: Called with section_id -> text (finished and partial
+                sections) to store the partial report
+        """
+        self.report_id = str(report_id)
+        self.key = stream_key(self.report_id)
+        self.redis = redis_client
+        self.persist = persist
+
+        # _io_lock orders the stream entries and persists; _lock guards the
+        # buffers and is the only lock write() takes. Order: _io_lock, _lock
+        self._io_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._content: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._last_persist = time.monotonic()
+        self._dirty = False
+        self._closed = False
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        # A new run starts with an empty stream, not after the previous run's report_done
+        if self.redis is not None:
+            try:
+                self.redis.delete(self.key)
+            except Exception as e:
+                logger.warning(f"Report stream {self.key} unavailable, continuing without live events: {e}")
+                self.redis = None
+
+    def section(self, section_id: str) -> SectionStream:
+        return SectionStream(self, section_id)
+
+    def start_section(self, section_id: str, title: Optional[str] = None) -> None:
+        with self._io_lock:
+            with self._lock:
+                self._content[section_id] = ""
+                self._pending.pop(section_id, None)
+            self._publish("section_start", section_id, {"title": title} if title else {})
+
+    def write(self, section_id: str, text: str) -> None:
+        """Buffer streamed text; does no I/O, the flusher thread publishes it."""
+        if not text:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._content[section_id] = self._content.get(section_id, "") + text
+            pending = self._pending.get(section_id, "") + text
+            self._pending[section_id] = pending
+            self._dirty = True
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run_flusher, name=f"report-stream-{self.report_id}", daemon=True
+                )
+                self._flusher.start()
+        if len(pending) >= settings.REPORT_STREAM_FLUSH_CHARS:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Publish the buffered deltas and persist the partial report when due."""
+        with self._io_lock:
+            with self._lock:
+                if self._closed:
+                    return
+                pending, self._pending = self._pending, {}
+            for section_id, text in pending.items():
+                self._publish("delta", section_id, {"text": text})
+            self._maybe_persist()
+
+    def finish_section(self, section_id: str, content: str, approach: str) -> None:
+        """Publish the final text of a section; it replaces the streamed text."""
+        with self._io_lock:
+            with self._lock:
+                if self._closed:
+                    return
+                self._content[section_id] = content
+                self._pending.pop(section_id, None)
+                self._dirty = True
+            self._publish("section_done", section_id, {"content": content, "approach": approach})
+            self._maybe_persist()
+
+    def fail_section(self, section_id: str, error: str) -> None:
+        with self._io_lock:
+            with self._lock:
+                self._pending.pop(section_id, None)
+            self._publish("section_failed", section_id, {"error": error})
+
+    def close(self) -> None:
+        """
+        Stop publishing and persisting partial content.
+
+        Call before saving the final report: once close() returns no partial
+        snapshot is being written, and sections that are still running after
+        a timeout can no longer overwrite the final content.
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        with self._io_lock:
+            with self._lock:
+                self._closed = True
+                self._pending.clear()
+
+    def finish(self, status: str) -> None:
+        """End the stream with report_done; it expires REPORT_STREAM_TTL seconds later."""
+        self.close()
+        with self._io_lock:
+            self._xadd(DONE_EVENT, "", {"status": status})
+        if self.redis is not None:
+            try:
+                self.redis.expire(self.key, settings.REPORT_STREAM_TTL)
+            except Exception as e:
+                logger.warning(f"Could not set expiry of report stream {self.key}: {e}")
+
+    def _run_flusher(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(settings.REPORT_STREAM_FLUSH_INTERVAL)
+            self._wake.clear()
+            if not self._stopping.is_set():
+                self.flush()
+
+    def _publish(self, event: str, section_id: str, data: Dict[str, Any]) -> None:
+        # Callers hold _io_lock
+        if not self._closed:
+            self._xadd(event, section_id, data)
+
+    def _xadd(self, event: str, section_id: str, data: Dict[str, Any]) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.xadd(
+                self.key,
+                {"event": event, "section": section_id, "data": json.dumps(data, ensure_ascii=False)},
+                maxlen=settings.REPORT_STREAM_MAXLEN,
+                approximate=True
+            )
+            if event == "section_start":
+                # Also expire streams of runs that never reach finish() (killed worker)
+                self.redis.expire(self.key, settings.REPORT_STREAM_TTL)
+        except Exception as e:
+            # Fail open: stop publishing, keep generating
+            logger.warning(f"Report stream {self.key} unavailable, continuing without live events: {e}")
+            self.redis = None
+
+    def _maybe_persist(self) -> None:
+        # Callers hold _io_lock, so close() waits for a persist in progress
+        if self.persist is None:
+            return
+        with self._lock:
+            if self._closed or not self._dirty or time.monotonic() - self._last_persist < settings.REPORT_STREAM_PERSIST_INTERVAL:
+                return
+            self._last_persist = time.monotonic()
+            self._dirty = False
+            snapshot = dict(self._content)
+        try:
+            self.persist(snapshot)
+        except Exception as e:
+            logger.warning(f"Could not persist partial content of report {self.report_id}: {e}")
+
+
+async def iter_report_events(report_id: str, redis_client, last_event_id: Optional[str] = None,
+                             block_ms: int = 15000, skip_finished_run: bool = False
+                             ) -> AsyncIterator[Optional[Tuple[str, str, Dict[str, Any]]]]:
+    """
+    Read the events of a report stream, starting after last_event_id.
+
+    Args:
+        report_id: ID of the report
+        redis_client: redis.asyncio client with decode_responses=True
+        last_event_id: ID of the last event the client has seen, or None to
+            read the stream from the start
+        block_ms: Maximum time to wait for new events
+        skip_finished_run: Without last_event_id, start after the last entry
+            if it is a report_done; set while a new run of the report is
+            queued, so the previous run is not replayed
+
+    Yields:
+        (entry_id, event, data) per event, and None when no event arrived
+        within block_ms (time for a keep-alive); ends after report_done
+    """
+    key = stream_key(report_id)
+    last_id = last_event_id or "0-0"
+    if last_event_id is None and skip_finished_run:
+        latest = await redis_client.xrevrange(key, count=1)
+        if latest and latest[0][1].get("event") == DONE_EVENT:
+            last_id = latest[0][0]
+    while True:
+        response = await redis_client.xread({key: last_id}, count=100, block=block_ms)
+        if not response:
+            yield None
+            continue
+        for entry_id, fields in response[0][1]:
+            last_id = entry_id
+            data = json.loads(fields.get("data") or "{}")
+            if fields.get("section"):
+                data["section"] = fields["section"]
+            yield entry_id, fields.get("event", "message"), data
+            if fields.get("event") == DONE_EVENT:
+                return
+
+
+# Global Redis clients of the publishers (sync) and the SSE relay (async)
+_stream_redis: Optional[redis.Redis] = None
+_async_stream_redis = None
+
+
+def get_report_stream_redis() -> Optional[redis.Redis]:
+    """
+    Get or create the Redis client used to publish report streams.
+
+    Returns:
+        Redis client, or None if streaming is disabled or Redis is unreachable
+    """
+    global _stream_redis
+    if not settings.REPORT_STREAMING:
+        return None
+    if _stream_redis is None:
+        try:
+            redis_client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+            redis_client.ping()
+            _stream_redis = redis_client
+        except Exception as e:
+            logger.warning(f"Report streaming unavailable, generating without live events: {e}")
+            return None
+
+    return _stream_redis
+
+
+def get_async_report_stream_redis():
+    """
+    Get or create the redis.asyncio client the API reads report streams with.
+
+    Returns:
+        Client, or None if streaming is disabled; connection errors surface
+        when the stream is read
+    """
+    global _async_stream_redis
+    if not settings.REPORT_STREAMING:
+        return None
+    if _async_stream_redis is None:
+        import redis.asyncio as redis_asyncio
+
+        _async_stream_redis = redis_asyncio.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=5
+        )
+    return _async_stream_redis
@@ -447,7 +447,7 @@ class StructuredOutputGenerator:
             max_tokens=3000
         )
         
-        response = llm.generate_content([
+        response = await llm.generate_content_async([
             {"role": "system", "parts": ["Je bent een arbeidsdeskundige die gestructureerde rapporten maakt."]},
             {"role": "user", "parts": [prompt]}
         ])
@@ -0,0 +1,245 @@
+"""
+Task-level deduplication with Redis leases.
+
+A lease is a Redis key "taskdedup:<task name>:<entity id>" holding the ID of
+the task that owns the work for that entity, with a TTL equal to the task's
+soft time limit. Duplicates of a document or report job (double-clicks,
+frontend retries) are coalesced onto the task that holds the lease:
+
+- The API enqueues through enqueue_unique_task(), which returns the existing
+  task's result instead of sending a second task.
+- Tasks decorated with @deduplicated_task("document_id") claim the lease when
+  they start and skip the work if another task holds it. The lease is
+  released when the task finishes.
+
+If Redis is unreachable the layer fails open: tasks run and are enqueued as
+before.
+
+Usage:
+    @celery.task(name="...process_document_hybrid")
+    @deduplicated_task("document_id")
+    def process_document_hybrid(document_id: str, incremental: bool = True):
+        ...
+
+    result, deduplicated = enqueue_unique_task(
+        "app.tasks...process_document_hybrid", document_id, args=[document_id]
+    )
+"""
+
+import inspect
+import logging
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "taskdedup"
+
+# Take the lease if it is free or already ours (refreshing the TTL);
+# returns the ID of the task that holds the lease afterwards.
+_CLAIM_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if (not holder) or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return ARGV[1]
+end
+return holder
+"""
+
+# Delete the lease only if we still hold it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Hand the lease to another task ID if we hold it or it has expired
+_TRANSFER_SCRIPT = """
+local holder = redis.call('GET', KEYS[1])
+if (not holder) or holder == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class TaskDeduplicator:
+    """
+    Redis leases keyed by task name and entity ID.
+
+    Example:
+        dedup = TaskDeduplicator(redis.from_url(settings.REDIS_URL, decode_responses=True))
+        holder = dedup.claim("generate_report", report_id, task_id, ttl=1080)
+        if holder != task_id:
+            return holder  # another task is already generating this report
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            redis_client: Redis client with decode_responses=True
+        """
+        self.redis = redis_client
+        self._claim = redis_client.register_script(_CLAIM_SCRIPT)
+        self._release = redis_client.register_script(_RELEASE_SCRIPT)
+        self._transfer = redis_client.register_script(_TRANSFER_SCRIPT)
+
+    @staticmethod
+    def key(task_name: str, entity_id: str) -> str:
+        return f"{KEY_PREFIX}:{task_name}:{entity_id}"
+
+    def claim(self, task_name: str, entity_id: str, task_id: str, ttl: int) -> str:
+        """
+        Claim the lease for an entity.
+
+        Returns:
+            ID of the task holding the lease: task_id if the claim succeeded
+            (or it was already ours), otherwise the in-flight task's ID
+        """
+        return self._claim(keys=[self.key(task_name, entity_id)], args=[task_id, int(ttl)])
+
+    def release(self, task_name: str, entity_id: str, task_id: str) -> bool:
+        """Release the lease if task_id still holds it."""
+        return bool(self._release(keys=[self.key(task_name, entity_id)], args=[task_id]))
+
+    def transfer(self, task_name: str, entity_id: str, task_id: str, new_task_id: str, ttl: int) -> bool:
+        """Hand the lease to new_task_id, e.g. when a task re-queues itself."""
+        return bool(self._transfer(keys=[self.key(task_name, entity_id)], args=[task_id, new_task_id, int(ttl)]))
+
+    def holder(self, task_name: str, entity_id: str) -> Optional[str]:
+        """ID of the task currently holding the lease, if any."""
+        return self.redis.get(self.key(task_name, entity_id))
+
+
+# Global deduplicator instance
+_task_deduplicator: Optional[TaskDeduplicator] = None
+
+
+def get_task_deduplicator() -> Optional[TaskDeduplicator]:
+    """
+    Get or create the global task deduplicator.
+
+    Returns:
+        TaskDeduplicator instance, or None if Redis is unreachable
+    """
+    global _task_deduplicator
+    if _task_deduplicator is None:
+        from app.core.config import settings
+
+        try:
+            redis_client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+            redis_client.ping()
+            _task_deduplicator = TaskDeduplicator(redis_client)
+        except Exception as e:
+            logger.warning(f"Task deduplication unavailable, running without it: {e}")
+            return None
+
+    return _task_deduplicator
+
+
+def lease_ttl(task) -> int:
+    """Lease TTL for a task: its soft time limit, or the global one."""
+    return int(task.soft_time_limit or task.app.conf.task_soft_time_limit or 3600)
+
+
+def deduplicated_task(entity_arg: str) -> Callable:
+    """
+    Decorator for task functions: at most one task per entity runs at a time.
+
+    Place it below @celery.task. A duplicate returns
+    {"status": "duplicate", entity_arg: <id>, "task_id": <in-flight task ID>}
+    without doing any work. Direct calls (no task ID) are not deduplicated.
+
+    Args:
+        entity_arg: Name of the function argument that identifies the entity
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            from celery import current_task
+
+            task = current_task
+            task_id = task.request.id if task else None
+            dedup = get_task_deduplicator() if task_id else None
+            if dedup is None:
+                return func(*args, **kwargs)
+
+            entity_id = str(signature.bind(*args, **kwargs).arguments[entity_arg])
+            try:
+                holder = dedup.claim(task.name, entity_id, task_id, lease_ttl(task))
+            except Exception as e:
+                logger.warning(f"Could not claim lease for {task.name}[{entity_id}], running anyway: {e}")
+                return func(*args, **kwargs)
+
+            if holder != task_id:
+                logger.info(f"Skipping duplicate {task.name} for {entity_id}: task {holder} is already running")
+                return {"status": "duplicate", entity_arg: entity_id, "task_id": holder}
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                try:
+                    dedup.release(task.name, entity_id, task_id)
+                except Exception as e:
+                    logger.warning(f"Could not release lease for {task.name}[{entity_id}]: {e}")
+
+        return wrapper
+
+    return decorator
+
+
+def enqueue_unique_task(task_name: str, entity_id: str, args: Optional[List[Any]] = None,
+                        kwargs: Optional[Dict[str, Any]] = None, **options) -> Tuple[Any, bool]:
+    """
+    Send a task unless one is already queued or running for the entity.
+
+    Args:
+        task_name: Registered task name
+        entity_id: ID of the document, report, ... the task works on
+        args, kwargs: Task arguments
+        **options: Extra send_task options (priority, countdown, ...)
+
+    Returns:
+        (AsyncResult, deduplicated): the in-flight task's result and True for
+        a duplicate, otherwise the new task's result and False
+    """
+    from app.celery_worker import celery
+
+    entity_id = str(entity_id)
+    task_id = str(uuid4())
+    dedup = get_task_deduplicator()
+
+    if dedup is not None:
+        task = celery.tasks.get(task_name)
+        ttl = lease_ttl(task) if task else int(celery.conf.task_soft_time_limit or 3600)
+        try:
+            holder = dedup.claim(task_name, entity_id, task_id, ttl)
+            if holder != task_id:
+                logger.info(f"{task_name} for {entity_id} already in flight as task {holder}")
+                return celery.AsyncResult(holder), True
+        except Exception as e:
+            logger.warning(f"Could not claim lease for {task_name}[{entity_id}], sending anyway: {e}")
+            dedup = None
+
+    try:
+        result = celery.send_task(task_name, args=args, kwargs=kwargs, task_id=task_id, **options)
+    except Exception:
+        if dedup is not None:
+            dedup.release(task_name, entity_id, task_id)
+        raise
+
+    return result, False
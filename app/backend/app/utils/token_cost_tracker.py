@@ -39,6 +39,9 @@ class TokenPricing:
     output_price_per_1k: float  # USD per 1000 output tokens
     context_window: int
     last_updated: datetime
+    # Prompt caching, relative to the input price
+    cache_write_multiplier: float = 1.25  # writing a prefix to the cache
+    cache_read_multiplier: float = 0.1  # reading a cached prefix
 
 
 @dataclass
@@ -56,6 +59,9 @@ class TokenUsageRecord:
     total_cost: float
     request_id: str
     metadata: Dict[str, Any]
+    cache_creation_tokens: int = 0  # input tokens written to the prompt cache
+    cache_read_tokens: int = 0  # input tokens read from the prompt cache
+    cache_savings: float = 0.0  # USD saved versus uncached input
 
 
 @dataclass
@@ -71,6 +77,10 @@ class CostAnalysis:
     average_cost_per_request: float
     cost_trend: str  # "increasing", "decreasing", "stable"
     optimization_suggestions: List[str]
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cache_hit_ratio: float = 0.0  # share of input tokens served from the prompt cache
+    cache_savings: float = 0.0
 
 
 class TokenCostTracker:
@@ -114,6 +124,15 @@ class TokenCostTracker:
                 context_window=200000,
                 last_updated=now
             ),
+            "claude-3-5-haiku-20241022": TokenPricing(
+                provider=LLMProvider.ANTHROPIC_CLAUDE,
+                model_name="claude-3-5-haiku-20241022",
+                tier=ModelTier.STANDARD,
+                input_price_per_1k=0.80,
+                output_price_per_1k=4.00,
+                context_window=200000,
+                last_updated=now
+            ),
             "claude-3-haiku-20240307": TokenPricing(
                 provider=LLMProvider.ANTHROPIC_CLAUDE,
                 model_name="claude-3-haiku-20240307",
@@ -132,7 +151,9 @@ class TokenCostTracker:
                 input_price_per_1k=10.00,
                 output_price_per_1k=30.00,
                 context_window=128000,
-                last_updated=now
+                last_updated=now,
+                cache_write_multiplier=1.0,
+                cache_read_multiplier=0.5
             ),
             "gpt-4o": TokenPricing(
                 provider=LLMProvider.OPENAI_GPT,
@@ -141,7 +162,9 @@ class TokenCostTracker:
                 input_price_per_1k=5.00,
                 output_price_per_1k=15.00,
                 context_window=128000,
-                last_updated=now
+                last_updated=now,
+                cache_write_multiplier=1.0,
+                cache_read_multiplier=0.5
             ),
             "gpt-3.5-turbo": TokenPricing(
                 provider=LLMProvider.OPENAI_GPT,
@@ -150,7 +173,9 @@ class TokenCostTracker:
                 input_price_per_1k=0.50,
                 output_price_per_1k=1.50,
                 context_window=16384,
-                last_updated=now
+                last_updated=now,
+                cache_write_multiplier=1.0,
+                cache_read_multiplier=0.5
             ),
             
             # Google Gemini Models
@@ -161,7 +186,9 @@ class TokenCostTracker:
                 input_price_per_1k=3.50,
                 output_price_per_1k=10.50,
                 context_window=2000000,
-                last_updated=now
+                last_updated=now,
+                cache_write_multiplier=1.0,
+                cache_read_multiplier=0.25
             ),
             "gemini-1.5-flash": TokenPricing(
                 provider=LLMProvider.GOOGLE_GEMINI,
@@ -170,7 +197,9 @@ class TokenCostTracker:
                 input_price_per_1k=0.075,
                 output_price_per_1k=0.30,
                 context_window=1000000,
-                last_updated=now
+                last_updated=now,
+                cache_write_multiplier=1.0,
+                cache_read_multiplier=0.25
             )
         }
         
@@ -184,9 +213,17 @@ class TokenCostTracker:
         input_tokens: int,
         output_tokens: int,
         request_id: str,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        cache_creation_tokens: int = 0,
+        cache_read_tokens: int = 0
     ) -> TokenUsageRecord:
-        """Record token usage and calculate costs"""
+        """
+        Record token usage and calculate costs
+
+        input_tokens are the input tokens billed at the full rate; prompt
+        cache writes and reads are passed separately and priced with the
+        model's cache multipliers.
+        """
         
         try:
             provider_enum = LLMProvider(provider)
@@ -194,7 +231,7 @@ class TokenCostTracker:
             self.logger.warning(f"Unknown provider: {provider}")
             provider_enum = LLMProvider.OPENAI_GPT  # Default fallback
         
-        total_tokens = input_tokens + output_tokens
+        total_tokens = input_tokens + output_tokens + cache_creation_tokens + cache_read_tokens
         
         # Get pricing data
         pricing = self.pricing_data.get(model_name)
@@ -204,9 +241,13 @@ class TokenCostTracker:
             pricing = self._get_default_pricing(provider_enum)
         
         # Calculate costs
-        input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
+        cache_write_cost = (cache_creation_tokens / 1000) * pricing.input_price_per_1k * pricing.cache_write_multiplier
+        cache_read_cost = (cache_read_tokens / 1000) * pricing.input_price_per_1k * pricing.cache_read_multiplier
+        input_cost = (input_tokens / 1000) * pricing.input_price_per_1k + cache_write_cost + cache_read_cost
         output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
         total_cost = input_cost + output_cost
+        uncached_cost = ((cache_creation_tokens + cache_read_tokens) / 1000) * pricing.input_price_per_1k
+        cache_savings = uncached_cost - cache_write_cost - cache_read_cost
         
         # Create usage record
         usage_record = TokenUsageRecord(
@@ -221,7 +262,10 @@ class TokenCostTracker:
             output_cost=output_cost,
             total_cost=total_cost,
             request_id=request_id,
-            metadata=metadata or {}
+            metadata=metadata or {},
+            cache_creation_tokens=cache_creation_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_savings=cache_savings
         )
         
         # Store usage record
@@ -240,6 +284,8 @@ class TokenCostTracker:
                 "model": model_name,
                 "input_tokens": input_tokens,
                 "output_tokens": output_tokens,
+                "cache_creation_tokens": cache_creation_tokens,
+                "cache_read_tokens": cache_read_tokens,
                 "cost_usd": total_cost,
                 "request_id": request_id
             }
@@ -346,6 +392,12 @@ class TokenCostTracker:
         # Calculate totals
         total_cost = sum(record.total_cost for record in recent_usage)
         total_tokens = sum(record.total_tokens for record in recent_usage)
+        cache_read_tokens = sum(record.cache_read_tokens for record in recent_usage)
+        cache_creation_tokens = sum(record.cache_creation_tokens for record in recent_usage)
+        total_input_tokens = sum(
+            record.input_tokens + record.cache_creation_tokens + record.cache_read_tokens
+            for record in recent_usage
+        )
         
         # Group by different dimensions
         cost_by_provider = defaultdict(float)
@@ -384,7 +436,11 @@ class TokenCostTracker:
             tokens_by_provider=dict(tokens_by_provider),
             average_cost_per_request=average_cost_per_request,
             cost_trend=cost_trend,
-            optimization_suggestions=optimization_suggestions
+            optimization_suggestions=optimization_suggestions,
+            cache_read_tokens=cache_read_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+            cache_hit_ratio=cache_read_tokens / total_input_tokens if total_input_tokens else 0.0,
+            cache_savings=sum(record.cache_savings for record in recent_usage)
         )
     
     def _calculate_cost_trend(self, hours: int) -> str:
@@ -0,0 +1,384 @@
+"""
+Indexed, size-bounded store for audio transcription results.
+
+Full transcriptions and individual chunk transcriptions are cached by
+content hash. Instead of one JSON file per key, entries are indexed in a
+SQLite database next to the payloads, so a lookup is a primary-key read
+rather than a filesystem stat plus a full JSON parse.
+
+Storage layout:
+    STORAGE_PATH/cache/transcriptions/index.sqlite3
+    STORAGE_PATH/cache/transcriptions/blobs/<key[:2]>/<key>.bin
+
+Payloads are compact: lists of segment dicts (e.g. transcription chunks) are
+stored column-wise, and the JSON is zlib-compressed. Small payloads are kept
+inline in the index, larger ones in blob files.
+
+Eviction is LRU with total-size, entry-count and age limits. A sweep runs at
+most every sweep_interval seconds from set(), and can also be run by the
+sweep_transcription_cache Celery task.
+
+Usage:
+    from app.utils.transcription_cache import get_transcription_cache
+
+    cache = get_transcription_cache()
+    payload = cache.get(key)
+    if payload is None:
+        payload = {"text": "...", "chunks": [{"start_time": 0.0, "text": "..."}]}
+        cache.set(key, "result", payload, tag=document_id)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Payloads up to this size are stored inline in the index
+INLINE_MAX_BYTES = 32 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    tag TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    payload BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_tag ON entries (tag);
+"""
+
+
+def _pack(value: Dict[str, Any]) -> bytes:
+    """Encode a payload, storing lists of uniform dicts column-wise."""
+    packed = {}
+    for name, item in value.items():
+        if (isinstance(item, list) and item and all(isinstance(row, dict) for row in item)
+                and all(row.keys() == item[0].keys() for row in item)):
+            packed[name] = {"__columns__": {field: [row[field] for row in item] for field in item[0]}}
+        else:
+            packed[name] = item
+    return zlib.compress(json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(data: bytes) -> Dict[str, Any]:
+    value = json.loads(zlib.decompress(data).decode("utf-8"))
+    for name, item in value.items():
+        if isinstance(item, dict) and "__columns__" in item:
+            columns = item["__columns__"]
+            fields = list(columns)
+            length = len(columns[fields[0]]) if fields else 0
+            value[name] = [{field: columns[field][i] for field in fields} for i in range(length)]
+    return value
+
+
+class TranscriptionCacheStore:
+    """
+    SQLite-indexed LRU cache of transcription payloads.
+
+    Safe to share between threads (one connection per thread) and between
+    worker processes on the same host (SQLite WAL mode).
+
+    Example:
+        cache = TranscriptionCacheStore("/app/storage/cache/transcriptions",
+                                        max_bytes=512 * 1024 * 1024)
+        cache.set("ab12...", "chunk", {"text": "Goedemorgen", "confidence": 0.9})
+        assert cache.get("ab12...")["text"] == "Goedemorgen"
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_entries: int = 100000,
+                 max_age_days: float = 7, sweep_interval: float = 300):
+        """
+        Initialize the transcription cache.
+
+        Args:
+            cache_dir: Directory holding the index and blob files
+            max_bytes: Maximum total size of stored payloads
+            max_entries: Maximum number of cached entries
+            max_age_days: Entries older than this are treated as missing
+            sweep_interval: Minimum seconds between automatic sweeps
+        """
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.sqlite3"
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.sweep_interval = sweep_interval
+
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        with self._connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.index_path), timeout=30)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _blob_path(self, key: str) -> Path:
+        return self.blob_dir / key[:2] / f"{key}.bin"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached payload.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached payload, or None on a miss or for an expired entry
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT created_at, last_access, payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            created_at, last_access, payload = row
+            now = time.time()
+            if now - created_at > self.max_age_seconds:
+                self._delete([key])
+                self.stats["misses"] += 1
+                return None
+
+            if payload is None:
+                payload = self._blob_path(key).read_bytes()
+            value = _unpack(payload)
+
+            # Refresh recency at most once a minute to keep reads cheap
+            if now - last_access > 60:
+                with connection:
+                    connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+
+            self.stats["hits"] += 1
+            return value
+
+        except FileNotFoundError:
+            self._delete([key])
+        except Exception as e:
+            logger.warning(f"Transcription cache read failed for {key}: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, kind: str, value: Dict[str, Any], tag: Optional[str] = None) -> None:
+        """
+        Store a payload and sweep if the sweep interval has passed.
+
+        Args:
+            key: Cache key
+            kind: Entry type, e.g. "result" or "chunk"
+            value: JSON-serializable payload
+            tag: Optional label for bulk removal, e.g. a document ID
+        """
+        try:
+            data = _pack(value)
+            inline = len(data) <= INLINE_MAX_BYTES
+
+            if not inline:
+                # Write atomically so concurrent workers never read partial blobs
+                path = self._blob_path(key)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+
+            now = time.time()
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, kind, tag, size, created_at, last_access, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, kind, tag, len(data), now, now, data if inline else None)
+                )
+            self.stats["writes"] += 1
+        except Exception as e:
+            logger.warning(f"Transcription cache write failed for {key}: {e}")
+            return
+
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        Remove expired entries, then least recently used entries until under
+        90% of both the size and entry limits.
+
+        Returns:
+            Number of entries removed
+        """
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+
+        try:
+            self._last_sweep = time.time()
+            connection = self._connection()
+
+            expired = [row[0] for row in connection.execute(
+                "SELECT key FROM entries WHERE created_at < ?",
+                (time.time() - self.max_age_seconds,)
+            )]
+            removed = self._delete(expired)
+
+            total_bytes, entry_count = connection.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries"
+            ).fetchone()
+
+            if total_bytes > self.max_bytes or entry_count > self.max_entries:
+                target_bytes = int(self.max_bytes * 0.9)
+                target_entries = int(self.max_entries * 0.9)
+                victims = []
+
+                for key, size in connection.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                    if total_bytes <= target_bytes and entry_count <= target_entries:
+                        break
+                    victims.append(key)
+                    total_bytes -= size
+                    entry_count -= 1
+
+                removed += self._delete(victims)
+
+            self.stats["evictions"] += removed
+            if removed:
+                logger.info(
+                    f"Transcription cache removed {removed} entries "
+                    f"({entry_count} entries, {total_bytes / (1024 * 1024):.1f} MB remaining)"
+                )
+            return removed
+
+        except Exception as e:
+            logger.warning(f"Transcription cache sweep failed: {e}")
+            return 0
+        finally:
+            self._sweep_lock.release()
+
+    def _delete(self, keys: List[str]) -> int:
+        """Delete entries and their blob files."""
+        if not keys:
+            return 0
+
+        connection = self._connection()
+        removed = 0
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with connection:
+                blob_keys = [row[0] for row in connection.execute(
+                    f"SELECT key FROM entries WHERE payload IS NULL AND key IN ({placeholders})", batch
+                )]
+                removed += connection.execute(
+                    f"DELETE FROM entries WHERE key IN ({placeholders})", batch
+                ).rowcount
+
+            for key in blob_keys:
+                try:
+                    self._blob_path(key).unlink()
+                except FileNotFoundError:
+                    pass
+
+        return removed
+
+    def delete_tag(self, tag: str) -> int:
+        """
+        Remove all entries stored with a tag.
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [row[0] for row in self._connection().execute(
+            "SELECT key FROM entries WHERE tag = ?", (tag,)
+        )]
+        return self._delete(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with this process's hits, misses, writes, evictions and
+            hit_rate, plus the shared entry count and size
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        total_bytes, entry_count = self._connection().execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries"
+        ).fetchone()
+
+        return {
+            **self.stats,
+            "lookups": lookups,
+            "hit_rate": round(hit_rate, 3),
+            "entries": entry_count,
+            "size_mb": round(total_bytes / (1024 * 1024), 2)
+        }
+
+    def clear(self) -> int:
+        """
+        Remove all cached transcriptions.
+
+        Returns:
+            Number of entries removed
+        """
+        keys = [row[0] for row in self._connection().execute("SELECT key FROM entries")]
+        removed = self._delete(keys)
+        logger.info("Cleared transcription cache")
+        return removed
+
+
+# Global cache instance
+_transcription_cache: Optional[TranscriptionCacheStore] = None
+
+
+def get_transcription_cache() -> Optional[TranscriptionCacheStore]:
+    """
+    Get or create the global transcription cache instance.
+
+    Returns:
+        TranscriptionCacheStore instance, or None if the cache directory or
+        index cannot be created
+    """
+    global _transcription_cache
+    if _transcription_cache is None:
+        from app.core.config import settings
+
+        try:
+            _transcription_cache = TranscriptionCacheStore(
+                cache_dir=os.path.join(settings.STORAGE_PATH, "cache", "transcriptions"),
+                max_bytes=settings.TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024,
+                max_entries=settings.TRANSCRIPTION_CACHE_MAX_ENTRIES,
+                max_age_days=settings.TRANSCRIPTION_CACHE_MAX_AGE_DAYS,
+                sweep_interval=settings.TRANSCRIPTION_CACHE_SWEEP_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Transcription cache unavailable, running without cache: {e}")
+            return None
+
+    return _transcription_cache
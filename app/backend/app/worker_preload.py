@@ -0,0 +1,141 @@
+"""
+Warm start for Celery workers.
+
+Runs in the worker master before the pool forks its children (worker_init
+signal). The master imports the heavy libraries and app modules, builds the
+static tables (prompt templates, terminology, compiled section patterns, the
+tokenizer, the section query embeddings) and then freezes the heap with
+gc.freeze(). Forked children share all of it copy-on-write, so their first
+task does not pay for imports and table construction, also after a
+max-tasks-per-child recycle.
+
+Phases and their durations are logged and kept in PRELOAD_REPORT.
+
+Only local work and Redis reads happen here: no LLM or embedding API calls,
+because SDK clients with open gRPC channels must not be carried across fork.
+"""
+import gc
+import importlib
+import logging
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Third-party libraries the tasks import lazily
+THIRD_PARTY_MODULES = [
+    "numpy",
+    "PIL.Image",
+    "pdfplumber",
+    "docx2txt",
+    "pytesseract",
+    "pdf2image",
+    "pydub",
+    "tiktoken",
+    "anthropic",
+    "openai",
+    "google.generativeai",
+]
+
+# App modules with import-time tables (compiled regexes, templates)
+APP_MODULES = [
+    "app.utils.chunking_engine",
+    "app.utils.ocr_processor",
+    "app.utils.ad_report_template",
+    "app.utils.context_aware_prompts",
+    "app.utils.optimized_rag_pipeline",
+    "app.utils.quality_controller",
+    "app.utils.hybrid_search",
+    "app.utils.llm_provider",
+    "app.tasks.generate_report_tasks.rag_pipeline",
+    "app.tasks.process_audio_tasks.audio_stream_pipeline",
+    "app.tasks.process_audio_tasks.optimized_audio_transcriber",
+]
+
+# Result of the last preload: phase -> details, plus total_seconds
+PRELOAD_REPORT: Dict[str, Any] = {}
+
+
+def _import_all(names: List[str]) -> Dict[str, Any]:
+    missing = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            missing.append(f"{name} ({type(e).__name__})")
+    return {"modules": len(names) - len(missing), "missing": missing}
+
+
+def _build_static_tables() -> Dict[str, Any]:
+    from app.tasks.generate_report_tasks.rag_pipeline import get_section_query_catalogue
+    from app.utils.chunking_engine import get_token_counter
+    from app.utils.context_aware_prompts import ContextAwarePromptGenerator
+
+    ContextAwarePromptGenerator()
+    counter = get_token_counter()
+    return {"tokenizer": counter.name, "section_queries": len(get_section_query_catalogue())}
+
+
+def _warm_query_embeddings() -> Dict[str, Any]:
+    """Load cached embeddings of the static section queries into the L1 cache."""
+    from app.core.config import settings
+    from app.tasks.generate_report_tasks.rag_pipeline import get_section_query_catalogue
+    from app.utils.rag_cache import get_cache_manager
+
+    if not settings.WORKER_PRELOAD_QUERY_EMBEDDINGS:
+        return {"skipped": "disabled"}
+
+    cache = get_cache_manager()
+    queries = get_section_query_catalogue()
+    # Same key as the @cached("embed:query") decorator on generate_query_embedding
+    loaded = sum(
+        cache.get(cache._generate_cache_key("embed:query", query)) is not None
+        for query in queries
+    )
+    return {"queries": len(queries), "loaded": loaded}
+
+
+def _freeze_heap() -> Dict[str, Any]:
+    gc.collect()
+    gc.freeze()
+    return {"frozen_objects": gc.get_freeze_count()}
+
+
+PHASES: List[tuple] = [
+    ("third_party_imports", lambda: _import_all(THIRD_PARTY_MODULES)),
+    ("app_imports", lambda: _import_all(APP_MODULES)),
+    ("static_tables", _build_static_tables),
+    ("query_embeddings", _warm_query_embeddings),
+    ("gc_freeze", _freeze_heap),
+]
+
+
+def run_preload(phases: List[tuple] = None) -> Dict[str, Any]:
+    """
+    Run the preload phases in order and report their timings.
+
+    A failing phase is logged and skipped; the worker always starts.
+
+    Returns:
+        Dictionary with per-phase seconds and details, and total_seconds
+    """
+    report: Dict[str, Any] = {}
+    start = time.perf_counter()
+
+    for name, phase in phases or PHASES:
+        phase_start = time.perf_counter()
+        try:
+            details = phase()
+        except Exception as e:
+            details = {"error": str(e)}
+            logger.warning(f"Worker preload phase {name} failed: {e}")
+        seconds = round(time.perf_counter() - phase_start, 3)
+        report[name] = {"seconds": seconds, **details}
+        logger.info(f"Worker preload {name}: {seconds:.3f}s {details}")
+
+    report["total_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Worker preload completed in {report['total_seconds']:.3f}s")
+
+    PRELOAD_REPORT.clear()
+    PRELOAD_REPORT.update(report)
+    return report
@@ -0,0 +1,103 @@
+"""
+Celery worker profiles.
+
+Each profile consumes a set of queues with the pool type and concurrency that
+fit its workload:
+- ocr: CPU-bound Tesseract runs, prefork with one process per core
+- ingestion: parsing and chunking, prefork
+- audio: ffmpeg preprocessing plus Whisper API calls, prefork
+- embedding: I/O-bound embedding API calls, threads
+- reports: I/O-bound LLM calls, threads
+- all: every queue in one worker (development)
+
+Concurrency and pool can be overridden per profile with
+CELERY_<PROFILE>_CONCURRENCY and CELERY_<PROFILE>_POOL.
+
+Usage:
+    python -m app.worker_profiles ocr
+    python -m app.worker_profiles reports --dry-run
+"""
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+from app.core.task_queues import (
+    ALL_QUEUES, QUEUE_AUDIO, QUEUE_DEFAULT, QUEUE_EMBEDDING, QUEUE_INGESTION, QUEUE_OCR, QUEUE_REPORTS
+)
+
+
+@dataclass
+class WorkerProfile:
+    """Queues and pool settings of one kind of worker."""
+    name: str
+    queues: List[str]
+    pool: str
+    concurrency: int
+    max_tasks_per_child: int = 0  # 0 = never recycle the child process
+
+    def argv(self, loglevel: str = "info") -> List[str]:
+        """Command line that starts a Celery worker for this profile."""
+        args = [
+            "celery", "-A", "app.celery_worker.celery", "worker",
+            f"--loglevel={loglevel}",
+            f"--queues={','.join(self.queues)}",
+            f"--pool={self.pool}",
+            f"--concurrency={self.concurrency}",
+            f"--hostname={self.name}@%h",
+            "--prefetch-multiplier=1",
+        ]
+        if self.pool == "prefork":
+            args.append("--optimization=fair")
+            if self.max_tasks_per_child:
+                args.append(f"--max-tasks-per-child={self.max_tasks_per_child}")
+        return args
+
+
+def _profile(name: str, queues: List[str], pool: str, concurrency: int,
+             max_tasks_per_child: int = 0) -> WorkerProfile:
+    prefix = f"CELERY_{name.upper()}"
+    return WorkerProfile(
+        name=name,
+        queues=queues,
+        pool=os.getenv(f"{prefix}_POOL", pool),
+        concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)),
+        max_tasks_per_child=max_tasks_per_child
+    )
+
+
+def get_worker_profiles() -> Dict[str, WorkerProfile]:
+    """All worker profiles, with environment overrides applied."""
+    cpus = os.cpu_count() or 2
+    profiles = [
+        # OCR holds page images in memory; recycle children to return it to the OS
+        _profile("ocr", [QUEUE_OCR], "prefork", cpus, max_tasks_per_child=20),
+        _profile("ingestion", [QUEUE_INGESTION, QUEUE_DEFAULT], "prefork", min(cpus, 4), max_tasks_per_child=200),
+        _profile("audio", [QUEUE_AUDIO], "prefork", 2, max_tasks_per_child=50),
+        _profile("embedding", [QUEUE_EMBEDDING], "threads", 8),
+        _profile("reports", [QUEUE_REPORTS], "threads", 8),
+        _profile("all", list(ALL_QUEUES), "prefork", int(os.getenv("CELERY_WORKER_CONCURRENCY", 4)),
+                 max_tasks_per_child=1000),
+    ]
+    return {profile.name: profile for profile in profiles}
+
+
+def main(argv: List[str] = None) -> None:
+    profiles = get_worker_profiles()
+    parser = argparse.ArgumentParser(description="Start a Celery worker for a profile")
+    parser.add_argument("profile", nargs="?", choices=sorted(profiles),
+                        default=os.getenv("CELERY_WORKER_PROFILE", "all"))
+    parser.add_argument("--loglevel", default="info")
+    parser.add_argument("--dry-run", action="store_true", help="Print the command instead of running it")
+    args = parser.parse_args(argv)
+
+    command = profiles[args.profile].argv(args.loglevel)
+    if args.dry_run:
+        print(" ".join(command))
+        return
+    os.execvp(command[0], command)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
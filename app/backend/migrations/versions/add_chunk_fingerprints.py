@@ -0,0 +1,45 @@
+"""Add chunk fingerprints for incremental re-ingestion
+
+Revision ID: 20250615_chunk_fingerprints
+Revises: 20250102_structured_reports
+Create Date: 2025-06-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20250615_chunk_fingerprints'
+down_revision = '20250102_structured_reports'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Store a fingerprint (hash of normalized chunk text + chunker version) per
+    document chunk, so re-ingestion can keep unchanged chunks and their embeddings
+    """
+    op.add_column('document_chunk', sa.Column(
+        'fingerprint',
+        sa.String(64),
+        nullable=True
+    ))
+
+    op.create_index(
+        'ix_document_chunk_document_id_fingerprint',
+        'document_chunk',
+        ['document_id', 'fingerprint'],
+        unique=False
+    )
+
+    # Existing chunks keep a NULL fingerprint; they are replaced on the next
+    # re-ingestion of their document
+
+
+def downgrade():
+    """
+    Remove chunk fingerprints
+    """
+    op.drop_index('ix_document_chunk_document_id_fingerprint', table_name='document_chunk')
+    op.drop_column('document_chunk', 'fingerprint')
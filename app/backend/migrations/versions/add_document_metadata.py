@@ -0,0 +1,35 @@
+"""Add metadata column to documents
+
+Revision ID: 20250620_document_metadata
+Revises: 20250615_chunk_fingerprints
+Create Date: 2025-06-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20250620_document_metadata'
+down_revision = '20250615_chunk_fingerprints'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Store per-document processing metadata (size category, chunk counts and
+    the section index) as JSONB on the document row
+    """
+    op.add_column('document', sa.Column(
+        'metadata',
+        postgresql.JSONB(astext_type=sa.Text()),
+        nullable=True
+    ))
+
+
+def downgrade():
+    """
+    Remove document metadata
+    """
+    op.drop_column('document', 'metadata')
@@ -0,0 +1,10 @@
+"""
+Reproducible ingestion throughput benchmark.
+
+Generates a synthetic Dutch AD dossier (digital PDFs, scanned PDFs, DOCX and
+audio), runs it through the ingestion stages and emits the measurements as
+JSON so runs can be diffed between commits.
+
+Run from app/backend:
+    python -m tests.performance.ingestion_benchmark --scale 2 --output bench.json
+"""
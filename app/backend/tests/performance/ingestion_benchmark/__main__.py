@@ -0,0 +1,5 @@
+import sys
+
+from tests.performance.ingestion_benchmark.runner import main
+
+sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Generator of synthetic Dutch AD dossiers for ingestion benchmarks.
+
+A dossier contains the document types an arbeidsdeskundige receives: digital
+PDF reports, scanned PDF letters, DOCX documents and an interview recording.
+Content is fully determined by the seed and scale, so two runs on different
+commits ingest the same text, pages and audio.
+"""
+
+import json
+import random
+import textwrap
+import wave
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+NAMES = ["J. de Vries", "M. Jansen", "A. Bakker", "S. Visser", "P. Smit", "L. Meijer", "R. de Boer"]
+FUNCTIONS = ["magazijnmedewerker", "verpleegkundige", "buschauffeur", "administratief medewerker",
+             "docent", "schoonmaker", "monteur"]
+COMPLAINTS = ["lage rugklachten", "nekklachten", "schouderklachten", "knieklachten",
+              "burn-outklachten", "polsklachten"]
+LIMITATIONS = ["niet tillen boven tien kilo", "maximaal een uur aaneengesloten staan",
+               "geen werk boven schouderhoogte", "beperkt knielen en hurken",
+               "geen nachtdiensten", "regelmatig wisselen van houding", "beperkte werkdruk"]
+SECTIONS = ["ANAMNESE", "LICHAMELIJK ONDERZOEK", "DIAGNOSE", "BEPERKINGEN", "MOGELIJKHEDEN", "CONCLUSIE"]
+
+SAMPLE_RATE = 16000
+LINES_PER_PAGE = 46
+
+
+@dataclass
+class DossierFile:
+    """One generated input file."""
+    kind: str  # digital_pdf, scanned_pdf, docx or audio
+    path: str
+    size: int
+    pages: int = 0
+    duration_seconds: float = 0.0
+
+
+@dataclass
+class DossierManifest:
+    """Description of a generated dossier."""
+    seed: int
+    scale: int
+    files: List[DossierFile] = field(default_factory=list)
+
+    def of_kind(self, kind: str) -> List[DossierFile]:
+        return [item for item in self.files if item.kind == kind]
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _paragraph(rng: random.Random, section: str) -> str:
+    name = rng.choice(NAMES)
+    function = rng.choice(FUNCTIONS)
+    complaint = rng.choice(COMPLAINTS)
+    limits = ", ".join(rng.sample(LIMITATIONS, 3))
+    year = rng.randint(1998, 2023)
+    months = rng.randint(2, 18)
+    return {
+        "ANAMNESE": f"Betrokkene {name} werkt sinds {year} als {function} en is sinds {months} maanden "
+                    f"arbeidsongeschikt wegens {complaint}. De klachten zijn geleidelijk ontstaan en nemen "
+                    f"toe bij langdurige belasting. Het dagverhaal laat een wisselend energieniveau zien.",
+        "LICHAMELIJK ONDERZOEK": f"Bij onderzoek is er sprake van {complaint} met pijn bij provocatie. "
+                                 f"De mobiliteit is verminderd; kracht en sensibiliteit zijn intact. "
+                                 f"Er zijn geen aanwijzingen voor neurologische uitval.",
+        "DIAGNOSE": f"De bedrijfsarts stelt de diagnose {complaint} met functionele beperkingen. "
+                    f"Een volledig herstel binnen {months + 6} maanden wordt niet verwacht.",
+        "BEPERKINGEN": f"Volgens de Functionele Mogelijkhedenlijst gelden de volgende beperkingen: {limits}.",
+        "MOGELIJKHEDEN": f"Betrokkene kan werkzaamheden verrichten die passen binnen de beperkingen, "
+                         f"bij voorkeur in een functie met afwisseling zoals {rng.choice(FUNCTIONS)}.",
+        "CONCLUSIE": f"Het eigen werk als {function} is niet passend. Aangepast werk is mogelijk; "
+                     f"een re-integratietraject tweede spoor wordt geadviseerd.",
+    }[section]
+
+
+def generate_page_lines(rng: random.Random) -> List[str]:
+    """Lines of one dossier page, wrapped to fit an A4 page."""
+    lines: List[str] = []
+    while len(lines) < LINES_PER_PAGE - 6:
+        section = rng.choice(SECTIONS)
+        lines.append(f"{section}:")
+        lines.extend(textwrap.wrap(_paragraph(rng, section), 92))
+        lines.append("")
+    return lines[:LINES_PER_PAGE]
+
+
+def write_digital_pdf(path: Path, rng: random.Random, pages: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(str(path), pagesize=A4, invariant=1)
+    width, height = A4
+    for _ in range(pages):
+        text = pdf.beginText(50, height - 50)
+        text.setFont("Helvetica", 9)
+        for line in generate_page_lines(rng):
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def write_scanned_pdf(path: Path, rng: random.Random, pages: int, dpi: int = 150) -> None:
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.load_default()
+    size = (int(8.27 * dpi), int(11.69 * dpi))
+    images = []
+    for _ in range(pages):
+        image = Image.new("L", size, color=255)
+        draw = ImageDraw.Draw(image)
+        y = dpi // 2
+        for line in generate_page_lines(rng):
+            draw.text((dpi // 2, y), line, fill=0, font=font)
+            y += int(dpi * 0.22)
+        # Light scanner noise
+        noise = np.frombuffer(rng.randbytes(size[0] * size[1]), dtype=np.uint8).reshape(size[1], size[0])
+        pixels = np.asarray(image, dtype=np.uint8).copy()
+        pixels[noise > 250] = 180
+        images.append(Image.fromarray(pixels, mode="L"))
+
+    images[0].save(str(path), "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+
+
+def write_docx(path: Path, rng: random.Random, pages: int) -> None:
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Arbeidsdeskundig rapport", level=1)
+    for _ in range(pages):
+        paragraph_lines: List[str] = []
+        for line in generate_page_lines(rng):
+            if line.endswith(":"):
+                document.add_heading(line.rstrip(":").title(), level=2)
+            elif line:
+                paragraph_lines.append(line)
+            elif paragraph_lines:
+                document.add_paragraph(" ".join(paragraph_lines))
+                paragraph_lines = []
+        document.add_page_break()
+
+    # Pin the stored timestamps so the document properties are reproducible
+    document.core_properties.created = document.core_properties.modified = datetime(2024, 1, 1)
+    document.save(str(path))
+
+
+def write_interview_wav(path: Path, rng: random.Random, seconds: int) -> None:
+    """Speech-like audio: modulated voiced bursts separated by pauses."""
+    np_rng = np.random.default_rng(rng.randint(0, 2 ** 32 - 1))
+    total = seconds * SAMPLE_RATE
+    samples = np.zeros(total, dtype=np.float64)
+    position = 0
+    while position < total:
+        burst = int(np_rng.uniform(1.5, 6.0) * SAMPLE_RATE)
+        end = min(total, position + burst)
+        t = np.arange(end - position) / SAMPLE_RATE
+        pitch = np_rng.uniform(90, 220)
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * np_rng.uniform(3, 6) * t)
+        voiced = np.sin(2 * np.pi * pitch * t) + 0.3 * np.sin(2 * np.pi * 2 * pitch * t)
+        samples[position:end] = 6000 * envelope * voiced + np_rng.normal(0, 300, end - position)
+        position = end + int(np_rng.uniform(0.3, 3.0) * SAMPLE_RATE)
+
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(SAMPLE_RATE)
+        output.writeframes(np.clip(samples, -32768, 32767).astype(np.int16).tobytes())
+
+
+def generate_dossier(output_dir: str, scale: int = 1, seed: int = 42,
+                     digital_pdfs: int = 2, digital_pages: int = 12,
+                     scanned_pdfs: int = 1, scanned_pages: int = 3,
+                     docx_files: int = 2, docx_pages: int = 6,
+                     audio_files: int = 1, audio_seconds: int = 120) -> DossierManifest:
+    """
+    Generate a synthetic dossier.
+
+    Args:
+        output_dir: Directory for the generated files
+        scale: Multiplier for the number of files of every kind
+        seed: Random seed; identical seeds give identical files
+        digital_pdfs, scanned_pdfs, docx_files, audio_files: Files per scale unit
+        digital_pages, scanned_pages, docx_pages: Pages per file
+        audio_seconds: Length of each recording
+
+    Returns:
+        DossierManifest describing the files (also written as manifest.json)
+    """
+    rng = random.Random(seed)
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = DossierManifest(seed=seed, scale=scale)
+
+    def add(kind: str, path: Path, **kwargs) -> None:
+        manifest.files.append(DossierFile(kind=kind, path=str(path), size=path.stat().st_size, **kwargs))
+
+    for i in range(digital_pdfs * scale):
+        path = out / f"rapport_bedrijfsarts_{i:03d}.pdf"
+        write_digital_pdf(path, rng, digital_pages)
+        add("digital_pdf", path, pages=digital_pages)
+
+    for i in range(scanned_pdfs * scale):
+        path = out / f"gescande_brief_{i:03d}.pdf"
+        write_scanned_pdf(path, rng, scanned_pages)
+        add("scanned_pdf", path, pages=scanned_pages)
+
+    for i in range(docx_files * scale):
+        path = out / f"verslag_{i:03d}.docx"
+        write_docx(path, rng, docx_pages)
+        add("docx", path, pages=docx_pages)
+
+    for i in range(audio_files * scale):
+        path = out / f"interview_{i:03d}.wav"
+        write_interview_wav(path, rng, audio_seconds)
+        add("audio", path, duration_seconds=float(audio_seconds))
+
+    (out / "manifest.json").write_text(json.dumps(manifest.to_dict(), indent=2), encoding="utf-8")
+    return manifest
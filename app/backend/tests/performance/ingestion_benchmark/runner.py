@@ -0,0 +1,396 @@
+"""
+Ingestion throughput benchmark runner.
+
+Stages and their headline metric:
+    extraction   - pages/s per input type (pdfplumber, OCR, docx2txt)
+    chunking     - chunks/s and MB/s through the shared chunking engine
+    audio        - audio seconds/s through the streaming preprocessor
+    persistence  - rows/s for bulk chunk inserts and embedding writes
+    end_to_end   - seconds from upload to status "enhanced" per document
+
+The persistence and end-to-end stages need a reachable Postgres with
+pgvector (the app's POSTGRES_* settings); embeddings are served by a local
+stub server. Stages that cannot run are reported as skipped with a reason,
+so the JSON always has the same shape and runs can be diffed.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.utils.chunking_engine import TIKTOKEN_AVAILABLE, ChunkingEngine
+
+from tests.performance.ingestion_benchmark.dossier_generator import DossierManifest, generate_dossier
+from tests.performance.ingestion_benchmark.stub_embedding_server import StubEmbeddingServer, stub_vector
+
+MIMETYPES = {
+    "digital_pdf": "application/pdf",
+    "scanned_pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def _rate(count: float, seconds: float) -> Optional[float]:
+    return round(count / seconds, 2) if seconds > 0 else None
+
+
+def _skipped(reason: str) -> Dict[str, Any]:
+    return {"skipped": True, "reason": reason}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, timeout=10).stdout.strip()
+    except Exception:
+        return None
+
+
+def extract_pdf_pages(content: bytes) -> List[str]:
+    """Extract page texts the way the document processor does."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(content)) as pdf:
+        total = len(pdf.pages)
+        return [f"--- Pagina {number} van {total} ---\n{page.extract_text() or ''}"
+                for number, page in enumerate(pdf.pages, 1)]
+
+
+def bench_extraction(manifest: DossierManifest) -> Dict[str, Any]:
+    """Measure pages/s per input type and return the extracted texts."""
+    import docx2txt
+
+    from app.utils.ocr_processor import is_tesseract_available, ocr_pdf
+
+    extractors: Dict[str, Callable[[bytes], str]] = {
+        "digital_pdf": lambda content: "\n\n".join(extract_pdf_pages(content)),
+        "docx": lambda content: docx2txt.process(io.BytesIO(content)),
+    }
+    if is_tesseract_available():
+        extractors["scanned_pdf"] = lambda content: ocr_pdf(content, language="nld+eng", dpi=300)
+
+    results: Dict[str, Any] = {}
+    texts: List[str] = []
+    for kind in ("digital_pdf", "scanned_pdf", "docx"):
+        files = manifest.of_kind(kind)
+        if not files:
+            continue
+        if kind not in extractors:
+            results[kind] = _skipped("Tesseract not available")
+            continue
+
+        pages = 0
+        characters = 0
+        start = time.perf_counter()
+        for item in files:
+            with open(item.path, "rb") as f:
+                text = extractors[kind](f.read())
+            pages += item.pages
+            characters += len(text)
+            texts.append(text)
+        elapsed = time.perf_counter() - start
+
+        results[kind] = {
+            "files": len(files),
+            "pages": pages,
+            "characters": characters,
+            "seconds": round(elapsed, 4),
+            "pages_per_second": _rate(pages, elapsed)
+        }
+
+    return {"results": results, "texts": texts}
+
+
+def bench_chunking(texts: List[str]) -> Dict[str, Any]:
+    """Measure chunks/s with the production chunking settings."""
+    engine = ChunkingEngine(settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+    start = time.perf_counter()
+    chunks = [chunk for text in texts for chunk in engine.iter_chunks(text)]
+    elapsed = time.perf_counter() - start
+    megabytes = sum(len(text.encode("utf-8")) for text in texts) / (1024 * 1024)
+
+    return {
+        "max_tokens": settings.CHUNK_MAX_TOKENS,
+        "overlap_tokens": settings.CHUNK_OVERLAP_TOKENS,
+        "tokenizer": "tiktoken" if TIKTOKEN_AVAILABLE else "approximate",
+        "chunks": len(chunks),
+        "megabytes": round(megabytes, 3),
+        "seconds": round(elapsed, 4),
+        "chunks_per_second": _rate(len(chunks), elapsed),
+        "megabytes_per_second": _rate(megabytes, elapsed),
+        "chunk_texts": [chunk.text for chunk in chunks]
+    }
+
+
+def bench_audio(manifest: DossierManifest, workdir: str) -> Dict[str, Any]:
+    """Measure streaming preprocessing speed on the generated recordings."""
+    from app.tasks.process_audio_tasks.audio_stream_pipeline import (
+        NUMPY_AVAILABLE, StreamingAudioPreprocessor
+    )
+
+    files = manifest.of_kind("audio")
+    if not files:
+        return _skipped("No audio in dossier")
+    if not NUMPY_AVAILABLE:
+        return _skipped("numpy not available")
+
+    def write_wav(pcm: bytes, index: int) -> str:
+        path = os.path.join(workdir, f"bench_chunk_{index:03d}.wav")
+        with wave.open(path, "wb") as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(16000)
+            output.writeframes(pcm)
+        return path
+
+    audio_seconds = 0.0
+    chunk_count = 0
+    peak_buffer = 0
+    start = time.perf_counter()
+    for item in files:
+        # The generated WAVs are already 16 kHz mono, so they stand in for the ffmpeg decode
+        processor = StreamingAudioPreprocessor(workdir, "bench", normalize=True, shorten_silence=True,
+                                               chunk_writer=write_wav)
+        with wave.open(item.path, "rb") as source:
+            while True:
+                block = source.readframes(16000 * 10)
+                if not block:
+                    break
+                processor.feed(block)
+        result = processor.finish()
+        audio_seconds += result.duration_seconds
+        chunk_count += len(result.chunk_paths)
+        peak_buffer = max(peak_buffer, result.peak_buffer_bytes)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": len(files),
+        "audio_seconds": round(audio_seconds, 1),
+        "chunks": chunk_count,
+        "seconds": round(elapsed, 4),
+        "audio_seconds_per_second": _rate(audio_seconds, elapsed),
+        "peak_buffer_megabytes": round(peak_buffer / (1024 * 1024), 2)
+    }
+
+
+def database_available() -> Optional[str]:
+    """Return None if Postgres is reachable, otherwise the reason it is not."""
+    try:
+        from sqlalchemy import text
+
+        from app.db.database_service import db_service
+
+        with db_service.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return None
+    except Exception as e:
+        return f"Postgres not reachable: {str(e).splitlines()[0]}"
+
+
+def _create_case(user_id: str) -> Dict[str, Any]:
+    from app.db.database_service import db_service
+
+    case = db_service.create_case(user_id, f"Benchmark {datetime.now(timezone.utc).isoformat()}")
+    if not case:
+        raise RuntimeError("Could not create benchmark case")
+    return case
+
+
+def bench_persistence(chunk_texts: List[str]) -> Dict[str, Any]:
+    """Measure rows/s for bulk chunk inserts and embedding writes."""
+    from app.db.database_service import db_service
+    from app.utils.vector_store_improved import batch_add_embeddings
+
+    user_id = f"benchmark-{uuid.uuid4()}"
+    case = _create_case(user_id)
+    try:
+        document = db_service.create_document(case["id"], user_id, "benchmark.txt", "benchmark.txt",
+                                              "text/plain", sum(map(len, chunk_texts)))
+        document_id = str(document["id"])
+        rows = [{"content": text, "chunk_index": i, "metadata": {"chunk_index": i}}
+                for i, text in enumerate(chunk_texts)]
+
+        start = time.perf_counter()
+        created = db_service.create_document_chunks_bulk(document_id, rows)
+        chunk_seconds = time.perf_counter() - start
+
+        embeddings = [{
+            "document_id": document_id,
+            "chunk_id": row["id"],
+            "content": chunk_texts[row["chunk_index"]],
+            "embedding": stub_vector(chunk_texts[row["chunk_index"]], settings.EMBEDDING_DIMENSION),
+            "metadata": {}
+        } for row in created]
+
+        start = time.perf_counter()
+        embedding_result = batch_add_embeddings(embeddings)
+        embedding_seconds = time.perf_counter() - start
+
+        return {
+            "chunk_rows": len(created),
+            "chunk_seconds": round(chunk_seconds, 4),
+            "chunk_rows_per_second": _rate(len(created), chunk_seconds),
+            "embedding_rows": embedding_result["success"],
+            "embedding_errors": embedding_result["errors"],
+            "embedding_seconds": round(embedding_seconds, 4),
+            "embedding_rows_per_second": _rate(embedding_result["success"], embedding_seconds)
+        }
+    finally:
+        db_service.delete_case(str(case["id"]), user_id, hard_delete=True)
+
+
+def bench_end_to_end(manifest: DossierManifest, embedding_latency_ms: float,
+                     timeout: float = 600) -> Dict[str, Any]:
+    """Time each document from upload to status "enhanced"."""
+    from app.celery_worker import celery
+    from app.db.database_service import db_service
+    from app.tasks.process_document_tasks.document_processor_hybrid import process_document_hybrid
+
+    # Run the embedding task inline so the benchmark needs no broker or worker
+    celery.conf.task_always_eager = True
+
+    user_id = f"benchmark-{uuid.uuid4()}"
+    case = _create_case(user_id)
+    documents = []
+    try:
+        with StubEmbeddingServer(latency_ms=embedding_latency_ms,
+                                 dimension=settings.EMBEDDING_DIMENSION) as server:
+            server.configure_genai()
+
+            for item in manifest.files:
+                if item.kind not in MIMETYPES:
+                    continue
+                filename = os.path.basename(item.path)
+                with open(item.path, "rb") as f:
+                    content = f.read()
+                storage_path = db_service.get_document_storage_path(user_id, str(case["id"]), filename)
+                os.makedirs(os.path.dirname(storage_path), exist_ok=True)
+                db_service.save_document_file(content, storage_path)
+                document = db_service.create_document(str(case["id"]), user_id, filename, storage_path,
+                                                      MIMETYPES[item.kind], len(content))
+                document_id = str(document["id"])
+
+                start = time.perf_counter()
+                process_document_hybrid(document_id)
+                status = None
+                while time.perf_counter() - start < timeout:
+                    status = db_service.get_row_by_id("document", document_id).get("status")
+                    if status in ("enhanced", "failed", "error"):
+                        break
+                    time.sleep(0.05)
+                elapsed = time.perf_counter() - start
+
+                documents.append({
+                    "kind": item.kind,
+                    "pages": item.pages,
+                    "chunks": len(db_service.get_document_chunks(document_id)),
+                    "status": status,
+                    "seconds_to_enhanced": round(elapsed, 3) if status == "enhanced" else None
+                })
+
+            embedding_requests = server.requests
+    finally:
+        celery.conf.task_always_eager = False
+        db_service.delete_case(str(case["id"]), user_id, hard_delete=True)
+
+    enhanced = [doc["seconds_to_enhanced"] for doc in documents if doc["seconds_to_enhanced"] is not None]
+    return {
+        "embedding_latency_ms": embedding_latency_ms,
+        "embedding_requests": embedding_requests,
+        "documents": documents,
+        "enhanced": len(enhanced),
+        "total_seconds_to_enhanced": round(sum(enhanced), 3),
+        "max_seconds_to_enhanced": max(enhanced) if enhanced else None
+    }
+
+
+def run_benchmark(scale: int = 1, seed: int = 42, workdir: Optional[str] = None,
+                  embedding_latency_ms: float = 20.0, skip_database: bool = False) -> Dict[str, Any]:
+    """
+    Generate a dossier and run every benchmark stage.
+
+    Args:
+        scale: Dossier scale (multiplies the number of files of every kind)
+        seed: Dossier seed
+        workdir: Directory for generated files (temporary if None)
+        embedding_latency_ms: Simulated latency of the stub embedding server
+        skip_database: Skip the stages that need Postgres
+
+    Returns:
+        JSON-serializable benchmark report
+    """
+    with tempfile.TemporaryDirectory(prefix="ingestion-bench-") as tmp:
+        workdir = workdir or tmp
+        start = time.perf_counter()
+        manifest = generate_dossier(os.path.join(workdir, "dossier"), scale=scale, seed=seed)
+        generation_seconds = time.perf_counter() - start
+
+        extraction = bench_extraction(manifest)
+        chunking = bench_chunking(extraction["texts"])
+        chunk_texts = chunking.pop("chunk_texts")
+        stages: Dict[str, Any] = {
+            "extraction": extraction["results"],
+            "chunking": chunking,
+            "audio": bench_audio(manifest, workdir),
+        }
+
+        reason = "Disabled with --skip-database" if skip_database else database_available()
+        if reason:
+            stages["persistence"] = _skipped(reason)
+            stages["end_to_end"] = _skipped(reason)
+        else:
+            stages["persistence"] = bench_persistence(chunk_texts)
+            stages["end_to_end"] = bench_end_to_end(manifest, embedding_latency_ms)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "seed": seed,
+            "files": {kind: len(manifest.of_kind(kind))
+                      for kind in ("digital_pdf", "scanned_pdf", "docx", "audio")},
+            "generation_seconds": round(generation_seconds, 3)
+        },
+        "stages": stages
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ingestion throughput benchmark")
+    parser.add_argument("--scale", type=int, default=1, help="Dossier scale factor")
+    parser.add_argument("--seed", type=int, default=42, help="Dossier random seed")
+    parser.add_argument("--workdir", help="Keep generated files in this directory")
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0,
+                        help="Simulated latency of the stub embedding server")
+    parser.add_argument("--skip-database", action="store_true", help="Skip the stages that need Postgres")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(scale=args.scale, seed=args.seed, workdir=args.workdir,
+                           embedding_latency_ms=args.embedding_latency_ms,
+                           skip_database=args.skip_database)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Local stand-in for the Gemini embedding API.
+
+Serves the REST embedContent endpoint with deterministic vectors derived
+from the text hash, after a configurable delay that models network and model
+latency. Pointing the google.generativeai SDK at it exercises the real
+embedding code path without network access or API cost.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def stub_vector(text: str, dimension: int) -> list:
+    """Deterministic unit vector for a text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).normal(size=dimension)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+class StubEmbeddingServer:
+    """
+    Threaded HTTP server implementing models/*:embedContent.
+
+    Example:
+        with StubEmbeddingServer(latency_ms=20) as server:
+            server.configure_genai()
+            generate_embedding("Betrokkene werkt als monteur.")
+            print(server.requests)
+    """
+
+    def __init__(self, latency_ms: float = 0.0, dimension: int = 768):
+        self.latency = latency_ms / 1000.0
+        self.dimension = dimension
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._restore = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                text = "".join(part.get("text", "") for part in body.get("content", {}).get("parts", []))
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                payload = json.dumps({"embedding": {"values": stub_vector(text, server.dimension)}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def configure_genai(self) -> None:
+        """Route the app's Gemini embedding calls to this server until exit."""
+        import google.generativeai as genai
+        from app.core.config import settings
+        from app.utils import embeddings
+
+        previous = (settings.GOOGLE_API_KEY, embeddings.API_INITIALIZED)
+
+        def restore():
+            settings.GOOGLE_API_KEY, embeddings.API_INITIALIZED = previous
+            if settings.GOOGLE_API_KEY:
+                genai.configure(api_key=settings.GOOGLE_API_KEY)
+
+        self._restore = restore
+        genai.configure(api_key="benchmark", transport="rest", client_options={"api_endpoint": self.url})
+        settings.GOOGLE_API_KEY = "benchmark"
+        embeddings.API_INITIALIZED = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._restore:
+            self._restore()
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,107 @@
+"""
+Performance benchmarks for the shared chunking engine.
+Chunks ~1 MB of Dutch dossier text with each boundary strategy and checks
+that throughput is high and runtime scales linearly with input size.
+"""
+
+import time
+
+import pytest
+
+from app.utils.chunking_engine import (
+    ChunkingEngine, ParagraphBoundary, SectionPatternBoundary, SentenceBoundary
+)
+
+ONE_MB = 1024 * 1024
+
+SECTION_PATTERNS = {
+    "anamnese": r"anamnese",
+    "onderzoek": r"lichamelijk onderzoek",
+    "diagnose": r"diagnose",
+    "beperkingen": r"beperkingen",
+    "conclusie": r"conclusie",
+}
+
+PAGE_TEMPLATE = """--- Pagina {page} van {pages} ---
+ANAMNESE:
+De werknemer werkt sinds {year} als magazijnmedewerker en heeft klachten van de onderrug.
+De klachten zijn ontstaan tijdens het tillen van zware dozen. Hij is sinds drie maanden arbeidsongeschikt.
+
+LICHAMELIJK ONDERZOEK:
+Bij onderzoek is er een bewegingsbeperking in de lumbale wervelkolom. Buigen en draaien zijn pijnlijk.
+De kracht in beide benen is normaal. Er zijn geen neurologische uitvalsverschijnselen.
+
+DIAGNOSE:
+Aspecifieke lage rugklachten met functionele beperkingen bij tillen en langdurig staan.
+
+BEPERKINGEN:
+Niet tillen boven tien kilo. Niet langer dan een uur aaneengesloten staan. Wisselen van houding is nodig.
+
+CONCLUSIE:
+Aangepast werk is mogelijk binnen de gestelde beperkingen. Een re-integratietraject wordt geadviseerd.
+
+"""
+
+
+def make_dossier(size: int) -> str:
+    pages = size // len(PAGE_TEMPLATE) + 1
+    text = "".join(
+        PAGE_TEMPLATE.format(page=page, pages=pages, year=2000 + page % 24)
+        for page in range(1, pages + 1)
+    )
+    return text[:size]
+
+
+def time_chunking(engine: ChunkingEngine, text: str) -> float:
+    start = time.perf_counter()
+    chunks = engine.chunk(text)
+    elapsed = time.perf_counter() - start
+    assert chunks
+    return elapsed
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestChunkingPerformance:
+    """Benchmarks for ChunkingEngine on 1 MB inputs."""
+
+    @pytest.mark.parametrize("strategy", [
+        ParagraphBoundary(),
+        SentenceBoundary(),
+        SectionPatternBoundary(SECTION_PATTERNS),
+    ], ids=["paragraph", "sentence", "section_pattern"])
+    def test_one_megabyte_throughput(self, strategy):
+        """Chunking 1 MB of text should take well under a few seconds."""
+        text = make_dossier(ONE_MB)
+        engine = ChunkingEngine(max_tokens=256, overlap_tokens=48, strategy=strategy)
+
+        elapsed = time_chunking(engine, text)
+        throughput = len(text) / ONE_MB / elapsed
+
+        print(f"{strategy.name}: 1 MB in {elapsed:.3f}s ({throughput:.1f} MB/s)")
+        assert elapsed < 5.0
+
+    def test_runtime_scales_linearly(self):
+        """Doubling the input should roughly double the runtime, not quadruple it."""
+        engine = ChunkingEngine(max_tokens=256, overlap_tokens=48)
+        half = make_dossier(ONE_MB // 2)
+        full = make_dossier(ONE_MB)
+
+        time_chunking(engine, half)  # warm up
+        half_time = min(time_chunking(engine, half) for _ in range(3))
+        full_time = min(time_chunking(engine, full) for _ in range(3))
+
+        print(f"0.5 MB: {half_time:.3f}s, 1 MB: {full_time:.3f}s")
+        assert full_time < half_time * 3.0
+
+    def test_page_offsets_on_large_input(self):
+        """Every chunk of a 1 MB dossier is attributed to the right pages."""
+        text = make_dossier(ONE_MB)
+        engine = ChunkingEngine(max_tokens=256, overlap_tokens=48)
+
+        chunks = engine.chunk(text)
+
+        assert chunks[0].page_start == 1
+        pages = [chunk.page_start for chunk in chunks]
+        assert pages == sorted(pages)
+        assert all(chunk.page_start <= chunk.page_end for chunk in chunks)
@@ -0,0 +1,52 @@
+"""
+Smoke tests for the ingestion throughput benchmark.
+Runs the in-process stages on a small dossier and checks the report shape,
+so the benchmark keeps working as the ingestion code changes.
+"""
+
+import json
+
+import pytest
+
+from tests.performance.ingestion_benchmark.dossier_generator import generate_dossier
+from tests.performance.ingestion_benchmark.runner import run_benchmark
+from tests.performance.ingestion_benchmark.stub_embedding_server import StubEmbeddingServer, stub_vector
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestIngestionBenchmark:
+    """Checks for the dossier generator, stub server and runner."""
+
+    def test_dossier_is_reproducible(self, tmp_path):
+        first = generate_dossier(str(tmp_path / "a"), seed=7, digital_pages=2, scanned_pages=1,
+                                 docx_pages=1, audio_seconds=5)
+        second = generate_dossier(str(tmp_path / "b"), seed=7, digital_pages=2, scanned_pages=1,
+                                  docx_pages=1, audio_seconds=5)
+
+        assert [f.kind for f in first.files] == [f.kind for f in second.files]
+        for a, b in zip(first.of_kind("digital_pdf") + first.of_kind("audio"),
+                        second.of_kind("digital_pdf") + second.of_kind("audio")):
+            with open(a.path, "rb") as fa, open(b.path, "rb") as fb:
+                assert fa.read() == fb.read()
+
+    def test_stub_server_serves_deterministic_embeddings(self):
+        from app.utils import embeddings
+
+        with StubEmbeddingServer(dimension=768) as server:
+            server.configure_genai()
+            vector = embeddings.generate_embedding("Betrokkene werkt als monteur.")
+
+        assert server.requests == 1
+        assert vector == pytest.approx(stub_vector("Betrokkene werkt als monteur.", 768), abs=1e-6)
+
+    def test_report_is_json_with_all_stages(self):
+        report = run_benchmark(scale=1, seed=3, skip_database=True)
+
+        assert json.loads(json.dumps(report)) == report
+        stages = report["stages"]
+        assert set(stages) == {"extraction", "chunking", "audio", "persistence", "end_to_end"}
+        assert stages["extraction"]["digital_pdf"]["pages_per_second"] > 0
+        assert stages["chunking"]["chunks"] > 0
+        assert stages["persistence"]["skipped"] is True
+        assert report["meta"]["seed"] == 3
@@ -0,0 +1,50 @@
+"""
+Unit tests for bulk document chunk persistence in DatabaseService.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.db.database_service import DatabaseService
+
+
+class TestCreateDocumentChunksBulk:
+    """Test cases for DatabaseService.create_document_chunks_bulk"""
+
+    def test_inserts_all_chunks_in_one_statement(self):
+        service = DatabaseService()
+        conn = MagicMock()
+        chunks = [
+            {"content": "tweede", "chunk_index": 1, "metadata": {"chunk_index": 1}, "fingerprint": "b"},
+            {"content": "eerste", "chunk_index": 0, "metadata": {"chunk_index": 0}, "fingerprint": "a"},
+        ]
+
+        with patch("app.db.postgres.get_raw_connection", return_value=conn), \
+             patch("psycopg2.extras.execute_values", return_value=[("id-1", 1), ("id-0", 0)]) as execute_values:
+            created = service.create_document_chunks_bulk("doc-1", chunks)
+
+        assert execute_values.call_count == 1
+        rows = execute_values.call_args.args[2]
+        assert [row[2] for row in rows] == ["tweede", "eerste"]
+        assert [row[5] for row in rows] == ["b", "a"]
+        assert created == [{"id": "id-0", "chunk_index": 0}, {"id": "id-1", "chunk_index": 1}]
+        conn.commit.assert_called_once()
+
+    def test_rolls_back_and_returns_empty_list_on_error(self):
+        service = DatabaseService()
+        conn = MagicMock()
+
+        with patch("app.db.postgres.get_raw_connection", return_value=conn), \
+             patch("psycopg2.extras.execute_values", side_effect=RuntimeError("boom")):
+            created = service.create_document_chunks_bulk("doc-1", [{"content": "x", "chunk_index": 0}])
+
+        assert created == []
+        conn.rollback.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_empty_input_does_not_touch_database(self):
+        service = DatabaseService()
+
+        with patch("app.db.postgres.get_raw_connection") as get_raw_connection:
+            assert service.create_document_chunks_bulk("doc-1", []) == []
+
+        get_raw_connection.assert_not_called()
@@ -0,0 +1,133 @@
+"""
+Unit tests for the streaming audio preprocessor.
+Tests chunk emission with overlap, silence shortening, normalization and
+bounded buffering, using synthetic PCM instead of an ffmpeg decode.
+"""
+
+import numpy as np
+import pytest
+
+from app.tasks.process_audio_tasks.audio_stream_pipeline import (
+    STREAM_SAMPLE_RATE,
+    StreamingAudioPreprocessor,
+)
+
+RATE = STREAM_SAMPLE_RATE
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+def feed_blocks(processor, samples, block_seconds=1):
+    data = samples.tobytes()
+    block = RATE * 2 * block_seconds
+    for start in range(0, len(data), block):
+        processor.feed(data[start:start + block])
+    return processor.finish()
+
+
+@pytest.fixture
+def written():
+    return []
+
+
+@pytest.fixture
+def make_processor(tmp_path, written):
+    def writer(pcm, index):
+        written.append(np.frombuffer(pcm, dtype=np.int16))
+        return str(tmp_path / f"chunk_{index:03d}.pcm")
+
+    def factory(**kwargs):
+        return StreamingAudioPreprocessor(str(tmp_path), "audio", chunk_writer=writer, **kwargs)
+    return factory
+
+
+def test_chunks_overlap_and_cover_stream(make_processor, written):
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2, normalize=False, shorten_silence=False)
+    result = feed_blocks(processor, tone(25))
+
+    assert result.duration_seconds == pytest.approx(25.0)
+    assert result.chunk_starts == [0.0, 8.0, 16.0]
+    assert [len(chunk) / RATE for chunk in written] == [10.0, 10.0, 9.0]
+    # The overlap is repeated at the start of the next chunk
+    assert np.array_equal(written[0][-2 * RATE:], written[1][:2 * RATE])
+
+
+def test_no_trailing_chunk_of_only_overlap(make_processor, written):
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2, normalize=False, shorten_silence=False)
+    result = feed_blocks(processor, tone(10))
+
+    assert len(result.chunk_paths) == 1
+    assert len(written[0]) == 10 * RATE
+
+
+def test_buffer_is_bounded_by_chunk_size(make_processor):
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2)
+    result = feed_blocks(processor, tone(120), block_seconds=3)
+
+    assert result.peak_buffer_bytes < (10 + 3) * RATE * 2
+
+
+def test_long_silence_is_shortened_and_measured(make_processor, written):
+    processor = make_processor(chunk_seconds=60, overlap_seconds=2, shorten_silence=True)
+    samples = np.concatenate([tone(5), silence(6), tone(5)])
+    result = feed_blocks(processor, samples)
+
+    assert result.removed_silence_seconds == pytest.approx(5.0, abs=0.2)
+    assert len(written[0]) / RATE == pytest.approx(11.0, abs=0.2)
+    assert result.speech_ratio == pytest.approx(10 / 16, abs=0.05)
+
+
+def test_chunks_are_peak_normalized(make_processor, written):
+    processor = make_processor(chunk_seconds=60, overlap_seconds=2, normalize=True)
+    feed_blocks(processor, tone(5, amplitude=2000))
+
+    assert np.abs(written[0].astype(np.int32)).max() == pytest.approx(32767 * 10 ** (-0.1 / 20), rel=0.01)
+
+
+def test_processing_is_chosen_from_the_stream_prefix(make_processor, written, tmp_path):
+    analyses = []
+
+    def choose(analysis):
+        analyses.append(analysis)
+        return analysis.speech_ratio < 0.8, analysis.silence_seconds > 0
+
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2, analysis_seconds=12, choose_processing=choose)
+    samples = np.concatenate([tone(5, amplitude=2000), silence(6), tone(14, amplitude=2000)])
+    result = feed_blocks(processor, samples)
+
+    # Decided once, before the first chunk was written
+    assert len(analyses) == 1
+    assert analyses[0].duration_seconds == pytest.approx(10.0)
+    assert result.duration_seconds == pytest.approx(25.0)
+    assert result.chunk_starts == [0.0, 8.0, 16.0]
+    assert all(np.abs(chunk.astype(np.int32)).max() > 30000 for chunk in written)
+    assert result.removed_silence_seconds > 0
+    # Only the chunk files themselves are written
+    assert not list(tmp_path.iterdir())
+
+
+def test_chunks_are_written_before_the_stream_ends(make_processor, written):
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2, analysis_seconds=5,
+                               choose_processing=lambda analysis: (True, False))
+    data = tone(30, amplitude=2000).tobytes()
+    processor.feed(data[:12 * RATE * 2])
+
+    assert len(written) == 1
+    processor.feed(data[12 * RATE * 2:])
+    processor.finish()
+    assert len(written) == 4
+
+
+def test_clean_speech_is_left_untouched(make_processor, written):
+    processor = make_processor(chunk_seconds=10, overlap_seconds=2, choose_processing=lambda analysis: (False, False))
+    samples = tone(15, amplitude=2000)
+    feed_blocks(processor, samples)
+
+    assert np.array_equal(np.concatenate([written[0], written[1][2 * RATE:]]), samples)
@@ -0,0 +1,63 @@
+"""
+Unit tests for chunk fingerprinting and the re-ingestion diff.
+"""
+
+from app.tasks.process_document_tasks.document_chunker import (
+    chunk_fingerprint,
+    diff_chunks,
+)
+
+
+class TestChunkFingerprint:
+    """Test cases for chunk_fingerprint"""
+
+    def test_whitespace_noise_does_not_change_fingerprint(self):
+        original = chunk_fingerprint("Werknemer is  arbeidsongeschikt.\r\nSinds maart.", "v1")
+        reextracted = chunk_fingerprint(" Werknemer is arbeidsongeschikt.\nSinds maart. ", "v1")
+
+        assert original == reextracted
+
+    def test_chunker_version_changes_fingerprint(self):
+        assert chunk_fingerprint("Zelfde tekst", "v1") != chunk_fingerprint("Zelfde tekst", "v2")
+
+
+class TestDiffChunks:
+    """Test cases for diff_chunks"""
+
+    def test_first_ingestion_adds_everything(self):
+        result = diff_chunks([], ["a", "b"])
+
+        assert result == {"kept": [], "added": [0, 1], "removed": []}
+
+    def test_keeps_unchanged_and_detects_added_and_removed(self):
+        existing = [
+            {"id": "c1", "fingerprint": "a", "chunk_index": 0},
+            {"id": "c2", "fingerprint": "b", "chunk_index": 1},
+            {"id": "c3", "fingerprint": "c", "chunk_index": 2},
+        ]
+
+        result = diff_chunks(existing, ["a", "x", "c"])
+
+        assert [(index, row["id"]) for index, row in result["kept"]] == [(0, "c1"), (2, "c3")]
+        assert result["added"] == [1]
+        assert [row["id"] for row in result["removed"]] == ["c2"]
+
+    def test_duplicate_chunks_are_matched_one_to_one(self):
+        existing = [
+            {"id": "c1", "fingerprint": "footer", "chunk_index": 0},
+            {"id": "c2", "fingerprint": "footer", "chunk_index": 1},
+        ]
+
+        result = diff_chunks(existing, ["footer", "footer", "footer"])
+
+        assert len(result["kept"]) == 2
+        assert result["added"] == [2]
+        assert result["removed"] == []
+
+    def test_chunks_without_fingerprint_are_replaced(self):
+        existing = [{"id": "legacy", "fingerprint": None, "chunk_index": 0}]
+
+        result = diff_chunks(existing, ["a"])
+
+        assert result["added"] == [0]
+        assert [row["id"] for row in result["removed"]] == ["legacy"]
@@ -0,0 +1,227 @@
+"""
+Unit tests for concurrent audio chunk transcription.
+Tests ordered reassembly, per-chunk retries, progress reporting and
+resuming from the per-chunk cache.
+"""
+
+import threading
+import time
+
+import httpx
+import pytest
+from unittest.mock import MagicMock, patch
+from celery.exceptions import Retry
+from openai import APIConnectionError
+
+from app.tasks.process_audio_tasks.optimized_audio_transcriber import (
+    AudioMetadata,
+    CHUNK_OVERLAP_SECONDS,
+    CHUNK_SIZE_SECONDS,
+    RequestRateLimiter,
+    TranscriptionChunk,
+    combine_chunk_results,
+    get_audio_cache_key,
+    transcribe_audio_optimized,
+    transcribe_chunks_concurrently,
+)
+from app.utils.transcription_cache import TranscriptionCacheStore
+
+CONFIG = {"model": "whisper-1", "language": "nl", "response_format": "json"}
+
+
+@pytest.fixture
+def chunk_files(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"audio_chunk_{i:03d}.mp3"
+        path.write_bytes(f"chunk-{i}".encode())
+        paths.append(str(path))
+    return paths
+
+
+def make_client(handler):
+    client = MagicMock()
+    client.audio.transcriptions.create.side_effect = handler
+    return client
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/audio"))
+
+
+class TestConcurrentTranscription:
+    """Test cases for transcribe_chunks_concurrently"""
+
+    def test_results_are_ordered_and_run_in_parallel(self, chunk_files):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def handler(file, **kwargs):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            payload = file.read().decode()
+            # Later chunks finish first
+            time.sleep(0.05 * (4 - int(payload[-1])))
+            with lock:
+                active.pop()
+            return MagicMock(text=f"tekst {payload}")
+
+        chunks = transcribe_chunks_concurrently(
+            make_client(handler), chunk_files, CONFIG,
+            max_workers=4, rate_limiter=RequestRateLimiter(0), max_retries=0
+        )
+
+        assert [chunk.text for chunk in chunks] == [f"tekst chunk-{i}" for i in range(4)]
+        step = CHUNK_SIZE_SECONDS - CHUNK_OVERLAP_SECONDS
+        assert [chunk.start_time for chunk in chunks] == [i * step for i in range(4)]
+        assert max(peak) > 1
+
+    def test_transient_errors_are_retried_per_chunk(self, chunk_files):
+        attempts = {}
+
+        def handler(file, **kwargs):
+            payload = file.read().decode()
+            attempts[payload] = attempts.get(payload, 0) + 1
+            if payload == "chunk-1" and attempts[payload] < 3:
+                raise connection_error()
+            return MagicMock(text=payload)
+
+        with patch("app.tasks.process_audio_tasks.optimized_audio_transcriber.get_retry_delay",
+                   return_value=0):
+            chunks = transcribe_chunks_concurrently(
+                make_client(handler), chunk_files, CONFIG,
+                max_workers=2, rate_limiter=RequestRateLimiter(0), max_retries=3
+            )
+
+        assert attempts["chunk-1"] == 3
+        assert all(chunk.confidence > 0 for chunk in chunks)
+
+    def test_failing_chunk_does_not_fail_job(self, chunk_files):
+        def handler(file, **kwargs):
+            payload = file.read().decode()
+            if payload == "chunk-2":
+                raise ValueError("corrupt audio")
+            return MagicMock(text=payload)
+
+        progress = []
+        chunks = transcribe_chunks_concurrently(
+            make_client(handler), chunk_files, CONFIG,
+            max_workers=2, rate_limiter=RequestRateLimiter(0), max_retries=3,
+            progress_callback=lambda completed, total: progress.append((completed, total))
+        )
+
+        assert [chunk.confidence == 0.0 for chunk in chunks] == [False, False, True, False]
+        assert "corrupt audio" in chunks[2].text
+        assert progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+    def test_combine_reassembles_in_playback_order(self):
+        metadata = AudioMetadata(
+            duration_seconds=1200.0, sample_rate=16000, channels=1, bitrate=None,
+            format="mp3", file_size=1000, quality_score=0.8, has_silence=False, speech_ratio=0.9
+        )
+        chunks = [
+            TranscriptionChunk(start_time=598, end_time=1198, text="tweede", confidence=0.8),
+            TranscriptionChunk(start_time=0, end_time=600, text="eerste", confidence=0.8),
+        ]
+
+        result = combine_chunk_results(chunks, metadata, "whisper-1", 1.0)
+
+        assert result.text == "eerste tweede"
+
+
+class TestChunkCache:
+    """Test cases for content-hash caching and resume"""
+
+    @pytest.fixture(autouse=True)
+    def transcription_cache(self, tmp_path):
+        cache = TranscriptionCacheStore(str(tmp_path / "transcription-cache"), max_bytes=10 * 1024 * 1024)
+        with patch("app.tasks.process_audio_tasks.optimized_audio_transcriber.get_transcription_cache",
+                   return_value=cache):
+            yield cache
+
+    def test_cache_key_follows_content_not_path(self, chunk_files, tmp_path):
+        copy = tmp_path / "reupload.mp3"
+        copy.write_bytes(open(chunk_files[0], "rb").read())
+
+        assert get_audio_cache_key(chunk_files[0], CONFIG) == get_audio_cache_key(str(copy), CONFIG)
+        assert get_audio_cache_key(chunk_files[0], CONFIG) != get_audio_cache_key(chunk_files[1], CONFIG)
+        assert get_audio_cache_key(chunk_files[0], CONFIG) != get_audio_cache_key(
+            chunk_files[0], {**CONFIG, "model": "other"}
+        )
+
+    def test_retry_transcribes_only_missing_chunks(self, chunk_files):
+        requested = []
+        fail = {"chunk-2"}
+
+        def handler(file, **kwargs):
+            payload = file.read().decode()
+            requested.append(payload)
+            if payload in fail:
+                raise ValueError("server rejected chunk")
+            return MagicMock(text=payload)
+
+        def run():
+            return transcribe_chunks_concurrently(
+                make_client(handler), chunk_files, CONFIG,
+                max_workers=2, rate_limiter=RequestRateLimiter(0), max_retries=0,
+                use_chunk_cache=True
+            )
+
+        first = run()
+        assert first[2].confidence == 0.0
+
+        requested.clear()
+        fail.clear()
+        second = run()
+
+        assert requested == ["chunk-2"]
+        assert [chunk.text for chunk in second] == [f"chunk-{i}" for i in range(4)]
+        step = CHUNK_SIZE_SECONDS - CHUNK_OVERLAP_SECONDS
+        assert [chunk.start_time for chunk in second] == [i * step for i in range(4)]
+
+    def test_retried_task_transcribes_only_uncached_chunks(self, chunk_files, tmp_path):
+        source = tmp_path / "interview.m4a"
+        source.write_bytes(b"recording")
+        metadata = AudioMetadata(
+            duration_seconds=2400.0, sample_rate=16000, channels=1, bitrate=None,
+            format="m4a", file_size=9, quality_score=0.8, has_silence=False, speech_ratio=0.9
+        )
+        requested = []
+        fail = {"chunk-2"}
+
+        def handler(file, **kwargs):
+            payload = file.read().decode()
+            requested.append(payload)
+            if payload in fail:
+                raise ValueError("server rejected chunk")
+            return MagicMock(text=payload)
+
+        module = "app.tasks.process_audio_tasks.optimized_audio_transcriber"
+        with patch(f"{module}.db_service") as db_service, \
+                patch(f"{module}.current_task", None), \
+                patch(f"{module}.streaming_available", return_value=False), \
+                patch(f"{module}.prepare_audio_for_transcription", return_value=(str(source), metadata)), \
+                patch(f"{module}.chunk_audio_file", return_value=chunk_files), \
+                patch(f"{module}.OpenAI", return_value=make_client(handler)), \
+                patch(f"{module}.ProgressiveTranscriptPublisher"), \
+                patch(f"{module}.cleanup_temp_files"), \
+                patch(f"{module}.settings.OPENAI_API_KEY", "sk-test-key-123456"), \
+                patch(f"{module}.update_document_with_result",
+                      side_effect=[RuntimeError("database unavailable"), None]), \
+                patch.object(transcribe_audio_optimized, "retry", side_effect=Retry("retry", None)) as retry:
+            db_service.get_row_by_id.return_value = {"id": "doc-1", "file_path": str(source)}
+
+            with pytest.raises(Retry):
+                transcribe_audio_optimized("doc-1")
+            assert retry.called
+            assert sorted(requested) == [f"chunk-{i}" for i in range(4)]
+
+            requested.clear()
+            fail.clear()
+            result = transcribe_audio_optimized("doc-1")
+
+        assert requested == ["chunk-2"]
+        assert result["status"] != "error"
+        db_service.update_document_status.assert_not_called()
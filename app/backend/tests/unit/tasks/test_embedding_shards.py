@@ -0,0 +1,159 @@
+"""
+Tests for sharded embedding generation: the chord of embed_chunk_shard tasks
+and the finalize_document_embeddings callback.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.celery_worker import celery
+from app.tasks.process_document_tasks import document_processor_hybrid as hybrid
+
+MODULE = "app.tasks.process_document_tasks.document_processor_hybrid"
+
+
+class FakeDB:
+    """In-memory stand-in for the chunk, embedding and document tables."""
+
+    def __init__(self, chunk_count):
+        self.chunks = {f"c{i}": {"id": f"c{i}", "content": f"tekst {i}", "metadata": {}} for i in range(chunk_count)}
+        self.embedded = set()
+        self.status = "processed"
+        self.metadata = {}
+
+    def get_row_by_id(self, table, document_id):
+        return {"id": document_id, "metadata": self.metadata}
+
+    def get_document_chunk_ids(self, document_id):
+        return list(self.chunks)
+
+    def get_embedded_chunk_ids(self, document_id):
+        return set(self.embedded)
+
+    def get_document_chunks_bulk(self, document_id, chunk_ids=None):
+        return [self.chunks[chunk_id] for chunk_id in chunk_ids if chunk_id in self.chunks]
+
+    def update_row(self, table, document_id, values):
+        self.status = values["status"]
+
+    def merge_document_metadata(self, document_id, updates):
+        self.metadata.update(updates)
+        return True
+
+    def remove_document_metadata_keys(self, document_id, keys):
+        for key in keys:
+            self.metadata.pop(key, None)
+        return True
+
+
+@pytest.fixture
+def eager():
+    celery.conf.task_always_eager = True
+    celery.conf.task_eager_propagates = False
+    yield
+    celery.conf.task_always_eager = False
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB(10)
+    monkeypatch.setattr(hybrid, "db_service", db)
+    monkeypatch.setattr(hybrid.settings, "EMBEDDING_SHARD_SIZE", 4)
+    return db
+
+
+def _store(db, fail_once=()):
+    """batch_add_embeddings replacement that can fail chunks on first attempt."""
+    failed = set()
+
+    def store(embeddings_data, batch_size=10, timeout=60):
+        result = {"success": 0, "errors": 0, "failed_chunks": []}
+        for item in embeddings_data:
+            if item["chunk_id"] in fail_once and item["chunk_id"] not in failed:
+                failed.add(item["chunk_id"])
+                result["errors"] += 1
+                result["failed_chunks"].append(item["chunk_id"])
+            else:
+                db.embedded.add(item["chunk_id"])
+                result["success"] += 1
+        return result
+
+    return store
+
+
+def test_document_is_split_into_shards_and_marked_enhanced(eager, fake_db):
+    with patch(f"{MODULE}.generate_embedding", return_value=[0.1] * 768) as embed, \
+            patch("app.utils.vector_store_improved.batch_add_embeddings", side_effect=_store(fake_db)):
+        result = hybrid.generate_document_embeddings.apply(args=["doc-1"]).get()
+
+    assert result["shards"] == 3
+    assert embed.call_count == 10
+    assert fake_db.embedded == set(fake_db.chunks)
+    assert fake_db.status == "enhanced"
+
+
+def test_failed_shard_is_retried_without_redoing_embedded_chunks(eager, fake_db):
+    with patch(f"{MODULE}.generate_embedding", return_value=[0.1] * 768) as embed, \
+            patch("app.utils.vector_store_improved.batch_add_embeddings", side_effect=_store(fake_db, {"c5"})):
+        hybrid.generate_document_embeddings.apply(args=["doc-1"]).get()
+
+    # Shard c4-c7 runs twice, but only the failed chunk is embedded again
+    assert embed.call_count == 11
+    assert fake_db.embedded == set(fake_db.chunks)
+    assert fake_db.status == "enhanced"
+
+
+def test_successful_run_clears_earlier_embedding_error(eager, fake_db):
+    fake_db.metadata.update({"embedding_error": "shard 2/3 failed", "embedding_failed_at": "2024-01-01T00:00:00"})
+
+    with patch(f"{MODULE}.generate_embedding", return_value=[0.1] * 768), \
+            patch("app.utils.vector_store_improved.batch_add_embeddings", side_effect=_store(fake_db)):
+        hybrid.generate_document_embeddings.apply(args=["doc-1"]).get()
+
+    assert fake_db.status == "enhanced"
+    assert "embedding_error" not in fake_db.metadata
+    assert "embedding_failed_at" not in fake_db.metadata
+
+
+def test_partial_batches_leave_status_unchanged(eager, fake_db):
+    with patch(f"{MODULE}.generate_embedding", return_value=[0.1] * 768), \
+            patch("app.utils.vector_store_improved.batch_add_embeddings", side_effect=_store(fake_db)):
+        hybrid.generate_document_embeddings.apply(args=["doc-1", ["c0", "c1"], False]).get()
+
+    assert fake_db.embedded == {"c0", "c1"}
+    assert fake_db.status == "processed"
+
+
+def test_finalizer_sums_shard_results(fake_db):
+    result = hybrid.finalize_document_embeddings(
+        [{"chunks_processed": 3, "chunks_skipped": 1}, {"chunks_processed": 2, "chunks_skipped": 0}],
+        "doc-1"
+    )
+
+    assert result["chunks_processed"] == 5
+    assert result["chunks_skipped"] == 1
+    assert fake_db.status == "enhanced"
+
+
+def test_batches_finishing_out_of_order_mark_enhanced_once_complete(eager, fake_db):
+    fake_db.metadata["transcript_progress"] = {"partial": False}
+
+    with patch(f"{MODULE}.generate_embedding", return_value=[0.1] * 768), \
+            patch("app.utils.vector_store_improved.batch_add_embeddings", side_effect=_store(fake_db)):
+        # The last batch finishes while an earlier one is still embedding
+        hybrid.generate_document_embeddings.apply(args=["doc-1", ["c8", "c9"], True, True]).get()
+        assert fake_db.status == "processed"
+
+        hybrid.generate_document_embeddings.apply(args=["doc-1", [f"c{i}" for i in range(8)], True, True]).get()
+
+    assert fake_db.status == "enhanced"
+
+
+def test_partial_transcript_is_not_marked_enhanced(eager, fake_db):
+    fake_db.metadata["transcript_progress"] = {"partial": True}
+    fake_db.embedded = set(fake_db.chunks)
+
+    hybrid.generate_document_embeddings.apply(args=["doc-1", [], True, True]).get()
+
+    assert fake_db.status == "processed"
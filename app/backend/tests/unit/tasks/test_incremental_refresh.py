@@ -0,0 +1,163 @@
+"""
+Tests for source tracking and incremental report refresh.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.tasks.generate_report_tasks.ad_report_task import plan_incremental_refresh, record_section_result
+from app.tasks.generate_report_tasks.report_context import build_report_context
+from app.tasks.generate_report_tasks.section_sources import chunk_fingerprints, fingerprint, stale_reason
+
+SECTIONS = [
+    ("samenvatting", {"title": "Samenvatting", "order": 1}),
+    ("belastbaarheid", {"title": "Belastbaarheid", "order": 2}),
+    ("advies", {"title": "Advies", "order": 3}),
+    ("vervolg", {"title": "Vervolg", "order": 4}),
+]
+
+
+class FakeDB:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def get_chunks_for_documents(self, document_ids):
+        return [chunk for chunk in self.chunks if chunk["document_id"] in document_ids]
+
+
+def make_context(chunks, documents):
+    return build_report_context(report_id="rep-1", case_id="case-1", documents=documents, db_service=FakeDB(chunks))
+
+
+def test_stale_reason():
+    sources = {"inputs": "i1", "chunks": {"c1": "f1"}}
+    previous = {"approach": "enhanced_rag", "sources": sources}
+
+    assert stale_reason(previous, dict(sources)) is None
+    assert stale_reason(previous, {"inputs": "i2", "chunks": {"c1": "f1"}}) == "inputs_changed"
+    assert stale_reason(previous, {"inputs": "i1", "chunks": {"c1": "f1", "c9": "f9"}}) == "retrieval_changed"
+    assert stale_reason(previous, {"inputs": "i1", "chunks": {"c1": "f2"}}) == "retrieval_changed"
+    assert stale_reason(previous, None) == "sources_unavailable"
+    assert stale_reason({"approach": "failed"}, sources) == "not_generated"
+    assert stale_reason({"approach": "enhanced_rag"}, sources) == "no_sources"
+    assert stale_reason(None, sources) == "not_generated"
+
+    direct = {"approach": "enhanced_direct", "sources": {"inputs": "i1", "documents": {"doc-1": "d1"}}}
+    assert stale_reason(direct, {"inputs": "i1", "documents": {"doc-1": "d1", "doc-2": "d2"}}) == "documents_changed"
+
+
+def test_chunk_fingerprints_follow_content():
+    chunks = [{"id": "c1", "content": "Tillen beperkt"}, {"id": "c2", "content": "Staan"}]
+
+    assert chunk_fingerprints(chunks) == {"c1": fingerprint("Tillen beperkt"), "c2": fingerprint("Staan")}
+    assert fingerprint("Tillen beperkt") != fingerprint("Tillen niet beperkt")
+
+
+def test_sections_record_their_sources():
+    content, metadata = OrderedDict(), {"sections": {}}
+    sources = {"inputs": "i1", "chunks": {"c1": "f1"}}
+
+    record_section_result("samenvatting", SECTIONS[0][1], {
+        "content": "Tekst", "approach": "enhanced_rag", "title": "Samenvatting", "order": 1, "sources": sources
+    }, None, content, metadata)
+
+    assert metadata["sections"]["samenvatting"]["sources"] == sources
+
+
+@pytest.fixture
+def generator():
+    from app.tasks.generate_report_tasks.section_generator import ADReportSectionGenerator
+
+    chunks = [
+        {"id": "c1", "document_id": "doc-1", "content": "Intake", "chunk_index": 0},
+        {"id": "c2", "document_id": "doc-2", "content": "Brief werkgever", "chunk_index": 0},
+    ]
+    documents = [{"id": "doc-1", "filename": "intake.pdf"}, {"id": "doc-2", "filename": "brief.pdf"}]
+    with patch("app.tasks.generate_report_tasks.section_generator.get_database_service", return_value=MagicMock()):
+        generator = ADReportSectionGenerator(report_context=make_context(chunks, documents))
+    generator.has_rag = True
+    return generator
+
+
+def test_direct_sections_are_stale_when_a_document_is_added(generator):
+    recorded = generator._section_sources("advies", SECTIONS[2][1], {"approach": "enhanced_direct"}, ["doc-1"])
+    previous = {"approach": "enhanced_direct", "sources": recorded}
+
+    unchanged = generator.current_sources("advies", SECTIONS[2][1], ["doc-1"], "case-1", recorded)
+    with_new_letter = generator.current_sources("advies", SECTIONS[2][1], ["doc-1", "doc-2"], "case-1", recorded)
+
+    assert stale_reason(previous, unchanged) is None
+    assert stale_reason(previous, with_new_letter) == "documents_changed"
+
+
+def test_refresh_on_a_later_day_keeps_inputs_unchanged(generator):
+    ad_report = "app.tasks.generate_report_tasks.ad_report_task.datetime"
+    with patch(ad_report) as clock:
+        clock.utcnow.return_value = datetime(2024, 3, 1, 9, 0)
+        recorded = generator._section_sources("advies", SECTIONS[2][1], {"approach": "enhanced_direct"}, ["doc-1"])
+        first_prompt = generator._create_section_prompt("advies", SECTIONS[2][1])
+
+        clock.utcnow.return_value = datetime(2024, 3, 15, 9, 0)
+        current = generator.current_sources("advies", SECTIONS[2][1], ["doc-1"], "case-1", recorded)
+        later_prompt = generator._create_section_prompt("advies", SECTIONS[2][1])
+
+    # The prompt itself still carries the report date
+    assert "01-03-2024" in first_prompt[0] and "15-03-2024" in later_prompt[0]
+    assert current["inputs"] == recorded["inputs"]
+    assert stale_reason({"approach": "enhanced_direct", "sources": recorded}, current) is None
+
+
+def test_fallback_content_records_no_sources(generator):
+    section_id, section_info = SECTIONS[2]
+
+    assert generator._section_sources(section_id, section_info, {"approach": "error_fallback"}, ["doc-1"]) is None
+    assert generator._section_sources(
+        section_id, section_info, {"approach": "enhanced_rag", "chunk_fingerprints": None}, ["doc-1"]
+    ) is None
+
+
+def test_rag_sources_are_checked_by_rerunning_retrieval(generator):
+    recorded = generator._section_sources(
+        "samenvatting", SECTIONS[0][1],
+        {"approach": "enhanced_rag", "chunk_fingerprints": {"c1": fingerprint("Intake")}}, ["doc-1"]
+    )
+    packed = MagicMock(chunks=[{"id": "c1", "content": "Intake"}, {"id": "c2", "content": "Brief werkgever"}])
+
+    async def retrieve(section_id, document_ids, case_id):
+        return packed
+
+    with patch("app.tasks.generate_report_tasks.rag_pipeline.retrieve_section_context", retrieve):
+        current = generator.current_sources("samenvatting", SECTIONS[0][1], ["doc-1", "doc-2"], "case-1", recorded)
+
+    assert current["inputs"] == recorded["inputs"]
+    assert stale_reason({"approach": "enhanced_rag", "sources": recorded}, current) == "retrieval_changed"
+
+
+def test_plan_reuses_unchanged_sections():
+    sources = {name: {"inputs": name, "chunks": {"c1": "f1"}} for name, _ in SECTIONS}
+    previous_report = {
+        "content": {"samenvatting": "A", "belastbaarheid": "B", "advies": "C"},
+        "report_metadata": {"sections": {
+            "samenvatting": {"approach": "enhanced_rag", "sources": sources["samenvatting"]},
+            "belastbaarheid": {"approach": "enhanced_rag", "sources": sources["belastbaarheid"]},
+            "advies": {"approach": "failed", "error": "timeout"},
+        }},
+    }
+    generator = MagicMock()
+
+    def current_sources(section_id, section_info, document_ids, case_id, previous_sources):
+        if section_id == "belastbaarheid":
+            return {"inputs": section_id, "chunks": {"c1": "f1", "c7": "f7"}}
+        return sources[section_id]
+
+    generator.current_sources.side_effect = current_sources
+
+    stale, reused = plan_incremental_refresh(previous_report, SECTIONS, generator, ["doc-1"], "case-1")
+
+    assert reused == ["samenvatting"]
+    assert stale == {"belastbaarheid": "retrieval_changed", "advies": "not_generated", "vervolg": "not_generated"}
+    # Only sections with recorded sources are checked
+    assert sorted(call.args[0] for call in generator.current_sources.call_args_list) == ["belastbaarheid", "samenvatting"]
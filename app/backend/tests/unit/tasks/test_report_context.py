@@ -0,0 +1,86 @@
+"""
+Tests for the per-report context snapshot shared by the section workers.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.tasks.generate_report_tasks.report_context import DOCUMENT_SEPARATOR, build_report_context
+
+DOCUMENTS = [
+    {"id": "doc-1", "filename": "intake.pdf", "status": "processed"},
+    {"id": "doc-2", "filename": "leeg.pdf", "status": "processed"},
+    {"id": "doc-3", "filename": "fml.docx", "status": "enhanced"},
+]
+
+
+class FakeDB:
+    def __init__(self):
+        self.queries = 0
+
+    def get_chunks_for_documents(self, document_ids):
+        self.queries += 1
+        return [
+            {"id": "c2", "document_id": "doc-1", "content": "Tweede alinea", "chunk_index": 1},
+            {"id": "c1", "document_id": "doc-1", "content": "Eerste alinea", "chunk_index": 0},
+            {"id": "c3", "document_id": "doc-3", "content": "Tillen beperkt", "chunk_index": 0},
+        ]
+
+
+@pytest.fixture
+def context():
+    return build_report_context(
+        report_id="rep-1",
+        case_id="case-1",
+        documents=DOCUMENTS,
+        db_service=FakeDB(),
+        user_profile={"display_name": "A. de Vries"},
+        extracted_fields={"werkgever_naam": "Bouw BV"},
+        fml_context={"rubrieken": [{"naam": "Dynamische handelingen", "items": ["tillen"]}]}
+    )
+
+
+def test_combined_content_matches_legacy_format(context):
+    assert context.combined_content == DOCUMENT_SEPARATOR.join([
+        "intake.pdf:\nEerste alinea\n\nTweede alinea",
+        "fml.docx:\nTillen beperkt",
+    ])
+    assert context.document_ids == ["doc-1", "doc-3"]
+    assert context.content_for(["doc-3"]) == "fml.docx:\nTillen beperkt"
+    assert context.content_for(["doc-1", "doc-2", "doc-3"]) is context.combined_content
+
+
+def test_snapshot_is_read_only(context):
+    with pytest.raises(AttributeError):
+        context.combined_content = ""
+    with pytest.raises(TypeError):
+        context.extracted_fields["werkgever_naam"] = "Ander BV"
+    with pytest.raises(TypeError):
+        context.fml_context["rubrieken"][0]["items"] += ("dragen",)
+
+    assert context.fml_context["rubrieken"][0].get("items") == ("tillen",)
+
+
+def test_memory_is_accounted(context):
+    stats = context.stats()
+
+    assert stats["documents"] == 2
+    assert stats["chunks"] == 3
+    assert stats["content_chars"] == len(context.combined_content)
+    assert stats["memory_bytes"] > stats["content_chars"]
+
+
+def test_section_generator_reads_documents_from_snapshot(context):
+    from app.tasks.generate_report_tasks.section_generator import ADReportSectionGenerator
+
+    db = MagicMock()
+    with patch("app.tasks.generate_report_tasks.section_generator.get_database_service", return_value=db):
+        generator = ADReportSectionGenerator(report_context=context)
+        for _ in range(20):
+            content = generator._get_document_content(["doc-1", "doc-2", "doc-3"])
+
+    assert content is context.combined_content
+    assert generator.extracted_fields["werkgever_naam"] == "Bouw BV"
+    db.get_document_chunks.assert_not_called()
+    db.get_row_by_id.assert_not_called()
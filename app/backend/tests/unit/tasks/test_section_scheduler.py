@@ -0,0 +1,125 @@
+"""
+Tests for the dependency-DAG section scheduler.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.tasks.generate_report_tasks.section_scheduler import (
+    build_section_graph, critical_path_priorities, execute_section_dag
+)
+from app.utils.ad_report_template import get_enhanced_ad_template, get_section_dependencies
+
+
+def _sections(*section_ids):
+    return [(section_id, {"title": section_id}) for section_id in section_ids]
+
+
+class Recorder:
+    """run_section stand-in that sleeps per section and records the schedule."""
+
+    def __init__(self, durations=None, fail=()):
+        self.durations = durations or {}
+        self.fail = set(fail)
+        self.started = []
+        self.finished = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, section_id, section_info):
+        with self.lock:
+            self.started.append(section_id)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.durations.get(section_id, 0.01))
+        with self.lock:
+            self.active -= 1
+            self.finished.append(section_id)
+        if section_id in self.fail:
+            raise RuntimeError(f"{section_id} failed")
+        return {"content": section_id}
+
+
+def test_section_starts_when_its_own_dependencies_are_done():
+    # vervolg only needs advies, so it does not wait for the slow conclusie
+    run = Recorder({"conclusie": 0.3})
+    dependencies = {"conclusie": ["visie"], "advies": ["visie"], "vervolg": ["advies"]}
+
+    outcomes, _ = execute_section_dag(_sections("visie", "advies", "conclusie", "vervolg"),
+                                      dependencies, run, max_concurrency=4)
+
+    assert run.finished.index("vervolg") < run.finished.index("conclusie")
+    assert run.started.index("advies") > run.finished.index("visie")
+    assert all(error is None for _, error in outcomes.values())
+
+
+def test_global_concurrency_limit():
+    run = Recorder({section_id: 0.05 for section_id in "abcdef"})
+
+    execute_section_dag(_sections(*"abcdef"), {}, run, max_concurrency=2)
+
+    assert run.max_active == 2
+
+
+def test_critical_path_goes_first_when_slots_are_scarce():
+    run = Recorder()
+    # "a" heads a chain of three, so it runs before "x" and "y" despite the order
+    dependencies = {"b": ["a"], "c": ["b"]}
+
+    execute_section_dag(_sections("x", "y", "a", "b", "c"), dependencies, run, max_concurrency=1)
+
+    assert run.started[0] == "a"
+
+
+def test_failure_is_recorded_and_dependents_still_run():
+    run = Recorder(fail={"a"})
+
+    outcomes, _ = execute_section_dag(_sections("a", "b"), {"b": ["a"]}, run, max_concurrency=2)
+
+    assert outcomes["a"] == (None, "a failed")
+    assert outcomes["b"] == ({"content": "b"}, None)
+
+
+def test_timed_out_section_releases_its_dependents():
+    run = Recorder({"slow": 0.5})
+
+    start = time.monotonic()
+    outcomes, _ = execute_section_dag(_sections("slow", "next"), {"next": ["slow"]}, run,
+                                      max_concurrency=2, section_timeout=0.1)
+
+    assert outcomes["slow"] == (None, "timeout")
+    assert outcomes["next"][1] is None
+    assert time.monotonic() - start < 0.45
+
+
+def test_schedule_reports_realized_critical_path_and_idle_time():
+    run = Recorder({"a": 0.05, "b": 0.1, "c": 0.05, "d": 0.01})
+    dependencies = {"c": ["a", "b"]}
+
+    _, schedule = execute_section_dag(_sections("a", "b", "c", "d"), dependencies, run, max_concurrency=2)
+
+    assert schedule["critical_path"] == ["b", "c"]
+    assert schedule["idle_slot_seconds"] > 0
+    assert 0 < schedule["utilization"] < 1
+    assert set(schedule["sections"]) == {"a", "b", "c", "d"}
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        build_section_graph(["a", "b"], {"a": ["b"], "b": ["a"]})
+
+
+def test_ad_template_dependency_graph():
+    section_ids = list(get_enhanced_ad_template()["sections"])
+    dependencies = get_section_dependencies()
+
+    assert {dep for deps in dependencies.values() for dep in deps} | set(dependencies) <= set(section_ids)
+
+    graph = build_section_graph(section_ids, dependencies)
+    priorities = critical_path_priorities(graph)
+    # Data collection feeds the longest chain: belastbaarheid -> visie -> advies -> vervolg
+    assert priorities["gegevensverzameling_voorgeschiedenis"] == max(priorities.values())
+    assert "conclusie" not in graph["vervolg"]
@@ -0,0 +1,113 @@
+"""
+Tests for Celery queue routing, priorities and worker profiles.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.celery_worker import celery
+from app.core.task_queues import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_STEPS,
+    QUEUE_AUDIO, QUEUE_DEFAULT, QUEUE_EMBEDDING, QUEUE_INGESTION, QUEUE_OCR, QUEUE_REPORTS,
+    priority_for_pages, priority_for_size
+)
+from app.tasks.process_document_tasks.document_processor_hybrid import (
+    _hand_off_to_ocr_queue, process_document_hybrid
+)
+from app.worker_profiles import get_worker_profiles
+
+HYBRID = "app.tasks.process_document_tasks.document_processor_hybrid"
+
+
+def _queue(task_name):
+    return celery.amqp.router.route({}, task_name)["queue"].name
+
+
+@pytest.mark.parametrize("task_name, queue", [
+    ("app.tasks.process_document_tasks.document_processor_hybrid.process_document_hybrid", QUEUE_INGESTION),
+    ("app.tasks.process_document_tasks.document_processor_hybrid.generate_document_embeddings", QUEUE_EMBEDDING),
+    ("app.tasks.process_audio_tasks.optimized_audio_transcriber.transcribe_audio_optimized", QUEUE_AUDIO),
+    ("app.tasks.generate_report_tasks.ad_report_task.generate_enhanced_ad_report", QUEUE_REPORTS),
+    ("generate_optimized_ad_report", QUEUE_REPORTS),
+    ("some.unrouted.task", QUEUE_DEFAULT),
+])
+def test_tasks_are_routed_to_their_queue(task_name, queue):
+    assert _queue(task_name) == queue
+
+
+def test_redis_priority_steps_are_configured():
+    options = celery.conf.broker_transport_options
+    assert options["priority_steps"] == PRIORITY_STEPS
+    assert options["queue_order_strategy"] == "priority"
+    assert PRIORITY_HIGH < PRIORITY_NORMAL < PRIORITY_LOW
+
+
+def test_transcription_cache_sweep_is_scheduled_on_the_audio_queue():
+    entry = celery.conf.beat_schedule["sweep-transcription-cache"]
+
+    assert entry["task"] in celery.tasks
+    assert _queue(entry["task"]) == QUEUE_AUDIO
+
+
+def test_short_documents_get_higher_priority():
+    assert priority_for_pages(1) == PRIORITY_HIGH
+    assert priority_for_pages(20) == PRIORITY_NORMAL
+    assert priority_for_pages(500) == PRIORITY_LOW
+    assert priority_for_size(100 * 1024) < priority_for_size(50 * 1024 * 1024)
+
+
+def test_worker_profiles_cover_every_queue():
+    profiles = get_worker_profiles()
+    consumed = {queue for name, profile in profiles.items() if name != "all" for queue in profile.queues}
+
+    assert consumed == set(profiles["all"].queues)
+    assert profiles["ocr"].pool == "prefork"
+    assert profiles["reports"].pool == "threads"
+    assert "--queues=ocr" in profiles["ocr"].argv()
+
+
+def test_worker_profile_environment_override(monkeypatch):
+    monkeypatch.setenv("CELERY_REPORTS_CONCURRENCY", "16")
+    monkeypatch.setenv("CELERY_REPORTS_POOL", "gevent")
+
+    profile = get_worker_profiles()["reports"]
+
+    assert profile.concurrency == 16
+    assert "--pool=gevent" in profile.argv()
+
+
+class TestOcrHandoff:
+    """OCR leaves the ingestion queue but runs inline when called directly."""
+
+    def test_runs_inline_when_called_directly(self):
+        with patch.object(process_document_hybrid, "apply_async") as apply_async:
+            assert _hand_off_to_ocr_queue("doc-1", True, 3) is None
+        apply_async.assert_not_called()
+
+    def test_requeues_from_ingestion_queue(self):
+        process_document_hybrid.push_request(id="task-a", called_directly=False,
+                                             delivery_info={"routing_key": QUEUE_INGESTION})
+        dedup = MagicMock()
+        try:
+            with patch.object(process_document_hybrid, "apply_async") as apply_async, \
+                    patch(f"{HYBRID}.get_task_deduplicator", return_value=dedup):
+                result = _hand_off_to_ocr_queue("doc-1", True, 500)
+        finally:
+            process_document_hybrid.pop_request()
+
+        assert result["status"] == "ocr_queued"
+        kwargs = apply_async.call_args.kwargs
+        assert kwargs["queue"] == QUEUE_OCR
+        assert kwargs["priority"] == PRIORITY_LOW
+        # The OCR task inherits the document's dedup lease
+        assert dedup.transfer.call_args.args[2:4] == ("task-a", kwargs["task_id"])
+
+    def test_runs_on_ocr_queue(self):
+        process_document_hybrid.push_request(called_directly=False, delivery_info={"routing_key": QUEUE_OCR})
+        try:
+            with patch.object(process_document_hybrid, "apply_async") as apply_async:
+                assert _hand_off_to_ocr_queue("doc-1", True, 500) is None
+        finally:
+            process_document_hybrid.pop_request()
+        apply_async.assert_not_called()
@@ -0,0 +1,123 @@
+"""
+Unit tests for progressive transcript publishing.
+Tests prefix publishing of out-of-order chunks, incremental document chunks
+and when embeddings are queued.
+"""
+
+import pytest
+
+from app.tasks.process_audio_tasks.optimized_audio_transcriber import TranscriptionChunk
+from app.tasks.process_audio_tasks.transcript_publisher import ProgressiveTranscriptPublisher
+
+
+class FakeDB:
+    def __init__(self):
+        self.content = "oude transcriptie"
+        self.chunks = [{"id": "old-1"}]
+        self.statuses = []
+        self.metadata = {}
+
+    def get_document_chunks(self, document_id):
+        return list(self.chunks)
+
+    def delete_document_chunks(self, document_id, chunk_ids):
+        self.chunks = [row for row in self.chunks if row["id"] not in chunk_ids]
+        return len(chunk_ids)
+
+    def append_document_content(self, document_id, content, reset=False):
+        self.content = ("" if reset else self.content) + content
+        return len(self.content)
+
+    def create_document_chunks_bulk(self, document_id, rows):
+        created = []
+        for row in rows:
+            row = {**row, "id": f"chunk-{row['chunk_index']}"}
+            self.chunks.append(row)
+            created.append({"id": row["id"], "chunk_index": row["chunk_index"]})
+        return created
+
+    def update_document_status(self, document_id, status):
+        self.statuses.append(status)
+
+    def merge_document_metadata(self, document_id, updates):
+        self.metadata.update(updates)
+        return True
+
+
+def make_chunk(index, text, confidence=0.9):
+    return TranscriptionChunk(start_time=index * 598, end_time=index * 598 + 600,
+                              text=text, confidence=confidence)
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def dispatched():
+    return []
+
+
+@pytest.fixture
+def publisher(db, dispatched):
+    document = {"id": "doc-1", "filename": "gesprek.m4a", "case_id": "case-1"}
+    publisher = ProgressiveTranscriptPublisher(
+        document, total_chunks=3, text_transform=str.upper, db=db,
+        dispatch_embeddings=lambda document_id, ids: dispatched.append(ids)
+    )
+    publisher.reset()
+    return publisher
+
+
+def test_reset_clears_earlier_transcription(publisher, db):
+    assert db.content == ""
+    assert db.chunks == []
+    assert db.metadata["transcript_progress"]["partial"] is True
+
+
+def test_publishes_contiguous_prefix_only(publisher, db, dispatched):
+    publisher.add(1, make_chunk(1, "tweede deel."))
+    assert db.content == ""
+    assert dispatched == []
+
+    publisher.add(0, make_chunk(0, "eerste deel."))
+    assert db.content == "EERSTE DEEL. TWEEDE DEEL."
+    assert publisher.published_chunks == 2
+    assert db.statuses == ["processed"]
+    assert dispatched
+
+    stored = [row for row in db.chunks if row["id"].startswith("chunk-")]
+    for row in stored:
+        meta = row["metadata"]
+        assert db.content[meta["start_char"]:meta["end_char"]] == row["content"]
+        assert meta["source"] == "audio_transcript"
+
+
+def test_last_batch_is_embedded_on_finish(publisher, db, dispatched):
+    publisher.add(0, make_chunk(0, "een."))
+    publisher.add(2, make_chunk(2, "drie."))
+    publisher.add(1, make_chunk(1, "fout", confidence=0.0))
+    queued = len(dispatched)
+
+    assert db.content == "EEN. DRIE."
+    assert db.metadata["transcript_progress"]["partial"] is False
+
+    publisher.finish()
+    assert len(dispatched) == queued + 1
+    assert dispatched[-1]
+    assert [row["chunk_index"] for row in db.chunks] == list(range(len(db.chunks)))
+    # Status is left to the embedding batches
+    assert db.statuses == ["processed"]
+
+
+def test_finish_without_held_batch_still_queues_the_check(publisher, db, dispatched):
+    publisher.add(0, make_chunk(0, "een."))
+    publisher.add(1, make_chunk(1, "twee."))
+    publisher.add(2, make_chunk(2, "fout", confidence=0.0))
+    queued = len(dispatched)
+
+    publisher.finish()
+    assert len(dispatched) == queued + 1
+    assert dispatched[-1] == []
+    assert "enhanced" not in db.statuses
@@ -0,0 +1,160 @@
+"""
+Unit tests for the shared chunking engine.
+Tests token budgets, overlap, offsets, page tracking and boundary strategies.
+"""
+
+import re
+
+import pytest
+
+from app.utils.chunking_engine import (
+    ChunkingEngine, ParagraphBoundary, SectionMatcher, SectionPatternBoundary, SentenceBoundary,
+    chunk_text_by_chars, section_at, _ApproximateCounter
+)
+
+
+@pytest.fixture
+def counter():
+    return _ApproximateCounter()
+
+
+def paragraphs(count: int, words: int = 20) -> str:
+    return "\n\n".join(
+        " ".join(f"woord{i}_{j}" for j in range(words)) + "." for i in range(count)
+    )
+
+
+class TestChunkingEngine:
+    """Test cases for ChunkingEngine"""
+
+    def test_chunks_respect_token_budget_and_offsets(self, counter):
+        text = paragraphs(30)
+        engine = ChunkingEngine(max_tokens=60, token_counter=counter)
+
+        chunks = engine.chunk(text)
+
+        assert len(chunks) > 1
+        for i, chunk in enumerate(chunks):
+            assert chunk.index == i
+            assert chunk.token_count <= 60
+            assert text[chunk.start_char:chunk.end_char] == chunk.text
+            assert counter.count(chunk.text) <= chunk.token_count
+        # Without overlap the chunks cover every paragraph exactly once
+        assert "".join(c.text for c in chunks).count("woord29_0") == 1
+
+    def test_overlap_repeats_trailing_segments(self, counter):
+        text = paragraphs(12, words=8)
+        engine = ChunkingEngine(max_tokens=40, overlap_tokens=12, token_counter=counter)
+
+        chunks = engine.chunk(text)
+
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current.start_char < previous.end_char
+            assert current.start_char > previous.start_char
+
+    def test_oversized_paragraph_is_split(self, counter):
+        text = "Eerste zin is kort. " + " ".join(["lang"] * 500)
+        engine = ChunkingEngine(max_tokens=50, token_counter=counter)
+
+        chunks = engine.chunk(text)
+
+        assert len(chunks) > 5
+        assert all(chunk.token_count <= 50 for chunk in chunks)
+        assert chunks[-1].end_char == len(text)
+
+    def test_page_offsets_from_markers(self, counter):
+        text = (
+            "--- Pagina 1 van 2 ---\nEerste pagina tekst.\n\n"
+            "--- Pagina 2 van 2 (OCR) ---\nTweede pagina tekst."
+        )
+        engine = ChunkingEngine(max_tokens=12, token_counter=counter, strategy=SentenceBoundary())
+
+        chunks = engine.chunk(text)
+
+        assert chunks[0].page_start == 1
+        assert chunks[-1].page_end == 2
+        assert any(chunk.page_start == 1 and chunk.page_end == 1 for chunk in chunks)
+
+    def test_section_pattern_boundary_starts_chunks_at_headings(self, counter):
+        text = (
+            "Inleiding van het rapport.\n\n"
+            "ANAMNESE:\nKlachten sinds maart.\n"
+            "Diagnose: lumbago.\nVerdere toelichting."
+        )
+        strategy = SectionPatternBoundary({"anamnese": r"anamnese", "diagnose": r"diagnose"})
+        engine = ChunkingEngine(max_tokens=200, token_counter=counter, strategy=strategy)
+
+        chunks = engine.chunk(text)
+
+        assert [chunk.section for chunk in chunks] == [None, "anamnese", "diagnose"]
+        assert chunks[1].text.startswith("ANAMNESE:")
+        assert chunks[2].text.startswith("Diagnose:")
+
+    def test_paragraph_boundary_skips_blank_paragraphs(self):
+        text = "Een.\n\n   \n\nTwee.\n\n\n"
+        spans = [(s.start, s.end) for s in ParagraphBoundary().segments(text)]
+
+        assert [text[start:end] for start, end in spans] == ["Een.", "Twee."]
+
+    def test_char_based_wrapper(self):
+        assert chunk_text_by_chars("", 1000, 200) == []
+        assert chunk_text_by_chars("Korte tekst.", 1000, 200) == ["Korte tekst."]
+
+
+class TestSectionMatcher:
+    """Test cases for SectionMatcher"""
+
+    def test_scan_finds_all_sections_in_document_order(self):
+        matcher = SectionMatcher({"anamnese": r"anamnese", "diagnose": r"diagnose|conclusie"})
+        text = "Anamnese: rugpijn. Diagnose: lumbago. Conclusie: aangepast werk."
+
+        headers = matcher.scan(text)
+
+        assert [(h.name, text[h.start:h.end]) for h in headers] == [
+            ("anamnese", "Anamnese"), ("diagnose", "Diagnose"), ("diagnose", "Conclusie")
+        ]
+
+    def test_first_listed_pattern_wins_and_word_start_only(self):
+        matcher = SectionMatcher({"onderzoek": r"bevindingen", "diagnose": r"bevindingen|diagnose"})
+
+        headers = matcher.scan("Bevindingen en rugklachtendiagnose")
+
+        assert [h.name for h in headers] == ["onderzoek"]
+
+    def test_min_distance_skips_nearby_headers(self):
+        matcher = SectionMatcher({"a": r"alpha", "b": r"beta"}, min_distance=20)
+
+        headers = matcher.scan("alpha beta " + "x" * 30 + " beta")
+
+        assert [h.name for h in headers] == ["a", "b"]
+
+    def test_find_all_matches_each_pattern_like_finditer(self):
+        patterns = {"onderzoek": r"(onderzoek|bevinding)", "diagnose": r"(diagnose|bevinding|conclusie)",
+                    "artikelen": r"(artikel.*?\d+|wet|wetboek)"}
+        matcher = SectionMatcher(patterns, word_start=False)
+        text = "Bevindingen: het wetboek, artikel 7 en artikel 12. Conclusie na onderzoek; zie artikel 3."
+
+        found = matcher.find_all(text)
+
+        for name, pattern in patterns.items():
+            expected = [(m.start(), m.end()) for m in re.finditer(pattern, text, re.IGNORECASE)]
+            assert [(h.start, h.end) for h in found[name]] == expected
+
+    def test_build_index_spans_run_to_next_header(self):
+        matcher = SectionMatcher({"anamnese": r"anamnese", "diagnose": r"diagnose"})
+        text = "Intro. Anamnese: a. Diagnose: b. Anamnese: c."
+
+        index = matcher.build_index(text)
+
+        assert index == {
+            "anamnese": [[7, 20], [33, len(text)]],
+            "diagnose": [[20, 33]],
+        }
+
+    def test_section_at_looks_up_the_containing_span(self):
+        index = {"anamnese": [[7, 20], [33, 45]], "diagnose": [[20, 33]]}
+
+        assert section_at(index, 7) == "anamnese"
+        assert section_at(index, 25) == "diagnose"
+        assert section_at(index, 40) == "anamnese"
+        assert section_at(index, 3) is None
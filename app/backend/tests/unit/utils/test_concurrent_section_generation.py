@@ -0,0 +1,159 @@
+"""
+Tests for concurrent section generation in the structured AD generators.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.models.ad_report_structure import ADReportGenerator
+from app.utils.ad_content_generator import ADContentGenerator, gather_bounded
+from app.utils.ad_pipeline_adapter import ADPipelineAdapter
+from app.utils.optimized_ad_generator import OptimizedADGenerator
+
+LATENCY = 0.1
+
+
+class FakeLLM:
+    """Async LLM stand-in that tracks how many calls overlap."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def generate_content_async(self, messages):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(LATENCY)
+        self.active -= 1
+        prompt = messages[-1]["parts"][0]
+        if "samenvatting" in prompt:
+            return SimpleNamespace(text='{"conclusie": ["Eigen werk is passend"]}')
+        return SimpleNamespace(text="{}" if "JSON" in prompt else "tekst")
+
+
+def test_gather_bounded_limits_concurrency_and_returns_exceptions():
+    active = {"now": 0, "max": 0}
+
+    async def job(i):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        if i == 2:
+            raise ValueError("boom")
+        return i
+
+    results = asyncio.run(gather_bounded([job(i) for i in range(6)], limit=2))
+
+    assert active["max"] == 2
+    assert results[:2] == [0, 1] and isinstance(results[2], ValueError) and results[3:] == [3, 4, 5]
+
+
+class TestADContentGenerator:
+
+    def test_sections_are_generated_concurrently(self):
+        llm = FakeLLM()
+        generator = ADContentGenerator(max_concurrency=8)
+
+        start = time.monotonic()
+        with patch("app.utils.ad_content_generator.create_llm_instance", return_value=llm):
+            report = asyncio.run(generator.generate_complete_report("context", {"client_name": "J. Jansen"}))
+        elapsed = time.monotonic() - start
+
+        # The limit bounds sections; the alternatives section issues two calls
+        assert llm.max_active >= 8
+        assert elapsed < llm.calls * LATENCY / 2
+        assert report.werknemer.naam == "J. Jansen"
+        assert report.samenvatting_conclusie == ["Eigen werk is passend"]
+        assert report.geschiktheid_ander_werk_intern == "tekst"
+
+    def test_failing_section_keeps_other_results(self):
+        generator = ADContentGenerator(max_concurrency=4)
+
+        async def broken(report, context):
+            raise RuntimeError("LLM down")
+
+        generator._generate_history = broken
+        with patch("app.utils.ad_content_generator.create_llm_instance", return_value=FakeLLM()):
+            report = asyncio.run(generator.generate_complete_report("context"))
+
+        assert report.voorgeschiedenis == ""
+        assert report.samenvatting_conclusie == ["Eigen werk is passend"]
+        assert report.aanpassing_eigen_werk == "tekst"
+
+    def test_conclusions_see_merged_summary(self):
+        generator = ADContentGenerator()
+        seen = []
+
+        async def conclusions(report, context):
+            seen.append(list(report.samenvatting_conclusie))
+            return report
+
+        generator._generate_conclusions = conclusions
+        with patch("app.utils.ad_content_generator.create_llm_instance", return_value=FakeLLM()):
+            asyncio.run(generator.generate_complete_report("context"))
+
+        assert seen == [["Eigen werk is passend"]]
+
+
+def test_optimized_generator_runs_batches_concurrently_and_keeps_partial_results():
+    generator = OptimizedADGenerator(max_concurrency=5)
+    started = []
+
+    def batch(name, data):
+        def generate(context, case_data):
+            started.append(time.monotonic())
+            time.sleep(LATENCY)
+            if data is None:
+                raise RuntimeError(f"{name} failed")
+            return data
+        return generate
+
+    generator._generate_metadata_sections = batch("metadata", {"werknemer": {"naam": "J. Jansen"}})
+    generator._generate_introduction_sections = batch("intro", None)
+    generator._generate_data_sections = batch("data", {})
+    generator._generate_analysis_sections = batch("analysis", {})
+    generator._generate_conclusion_sections = batch("conclusions", {})
+
+    report = generator.generate_complete_report("context", {"client_name": "Onbekend"})
+
+    assert max(started) - min(started) < LATENCY
+    assert report.werknemer.naam == "J. Jansen"
+    assert report.samenvatting_conclusie == []
+
+
+def test_pipeline_adapter_extracts_legacy_sections_concurrently():
+    adapter = ADPipelineAdapter()
+    active = {"now": 0, "max": 0}
+
+    async def extract(report, content):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+
+    async def broken(report, content):
+        raise RuntimeError("extraction failed")
+
+    adapter._extract_werkgever_data = extract
+    adapter._extract_werknemer_data = extract
+    adapter._extract_belastbaarheid_data = broken
+    adapter._extract_functie_data = extract
+
+    report = ADReportGenerator.create_empty_report()
+    sections = {
+        "gegevensverzameling_werkgever": "Werkgever BV",
+        "gegevensverzameling_werknemer": "Werknemer",
+        "belastbaarheid": "FML",
+        "eigen_functie": "Monteur",
+        "gegevensverzameling_voorgeschiedenis": "Uitval sinds 2024",
+    }
+
+    asyncio.run(adapter._process_legacy_sections(report, sections, "context"))
+
+    assert active["max"] == 3
+    assert report.voorgeschiedenis == "Uitval sinds 2024"
@@ -0,0 +1,117 @@
+"""
+Tests for token-accurate, score-weighted context packing.
+"""
+
+from app.utils.chunking_engine import get_token_counter
+from app.utils.context_packer import deduplicate_chunks, pack_context, select_by_relevance
+from app.utils.hybrid_search import generate_context_from_results
+
+
+def make_chunk(chunk_id, words, similarity, document_id="doc-1", start=None):
+    chunk = {
+        "id": chunk_id,
+        "document_id": document_id,
+        "content": " ".join(f"{chunk_id}w{i}" for i in range(words)),
+        "similarity": similarity,
+        "metadata": {},
+    }
+    if start is not None:
+        chunk["metadata"] = {"start_char": start, "end_char": start + len(chunk["content"])}
+    return chunk
+
+
+def test_knapsack_beats_greedy_fill():
+    # Greedy by score takes the 60-token item and then nothing else fits
+    items = [(60, 0.9), (50, 0.8), (50, 0.8)]
+
+    assert select_by_relevance(items, 100) == [1, 2]
+
+
+def test_everything_fits():
+    assert select_by_relevance([(10, 0.1), (20, 0.2)], 100) == [0, 1]
+    assert select_by_relevance([(10, 0.1)], 0) == []
+
+
+def test_duplicates_are_removed():
+    first = make_chunk("a", 10, 0.9)
+    same_id = make_chunk("a", 12, 0.5)
+    same_text = {**first, "id": "b", "similarity": 0.4, "content": "  " + first["content"].replace(" ", "\n")}
+
+    kept, removed = deduplicate_chunks([same_text, first, same_id])
+
+    assert kept == [first]
+    assert removed == 2
+
+
+def test_overlapping_spans_are_trimmed_or_dropped():
+    text = "".join(chr(ord("a") + i % 26) for i in range(300))
+
+    def span_chunk(chunk_id, start, end, similarity):
+        return {"id": chunk_id, "document_id": "doc-1", "content": text[start:end], "similarity": similarity,
+                "metadata": {"start_char": start, "end_char": end}}
+
+    best = span_chunk("best", 0, 100, 0.9)
+    mostly_covered = span_chunk("covered", 20, 110, 0.8)
+    one_sided = span_chunk("tail", 60, 200, 0.7)
+
+    kept, removed = deduplicate_chunks([one_sided, mostly_covered, best])
+
+    assert removed == 1
+    assert [chunk["id"] for chunk in kept] == ["best", "tail"]
+    assert kept[1]["content"] == text[100:200]
+    assert kept[1]["metadata"]["start_char"] == 100
+
+
+def test_packed_context_stays_within_budget():
+    chunks = [make_chunk(f"c{i}", 40, 1.0 - i * 0.05, document_id=f"doc-{i % 3}") for i in range(10)]
+
+    packed = pack_context(chunks, token_budget=200, header="Context:\n")
+
+    assert packed.tokens_used <= 200
+    assert get_token_counter().count(packed.text) == packed.tokens_used
+    assert packed.text.startswith("Context:\n")
+    stats = packed.stats()
+    assert stats["chunks_packed"] + stats["chunks_dropped"] == 10
+    assert stats["chunks_dropped"] > 0
+    assert sum(stats["tokens_by_source"].values()) <= 200
+    # The most relevant chunk is always packed
+    assert chunks[0] in packed.chunks
+
+
+def test_source_quota_limits_one_document():
+    dominant = [make_chunk(f"d{i}", 40, 0.9, document_id="dominant") for i in range(5)]
+    other = [make_chunk(f"o{i}", 40, 0.3, document_id="other") for i in range(2)]
+
+    unlimited = pack_context(dominant + other, token_budget=200)
+    limited = pack_context(dominant + other, token_budget=200, source_quota=0.5)
+
+    assert all(chunk["document_id"] == "dominant" for chunk in unlimited.chunks)
+    assert limited.tokens_by_source["dominant"] <= 100
+    assert "other" in limited.tokens_by_source
+
+
+def test_chunks_are_ordered_by_source_and_position():
+    chunks = [
+        make_chunk("late", 5, 0.9, start=500),
+        make_chunk("early", 5, 0.5, start=0),
+        make_chunk("other", 5, 0.7, document_id="doc-2"),
+    ]
+
+    packed = pack_context(chunks, token_budget=1000)
+
+    assert [chunk["id"] for chunk in packed.chunks] == ["early", "late", "other"]
+
+
+def test_search_context_reports_dropped_results():
+    results = {
+        "success": True,
+        "query": "belastbaarheid",
+        "total_results": 6,
+        "results": [make_chunk(f"r{i}", 60, 0.9 - i * 0.1) for i in range(6)],
+    }
+
+    context = generate_context_from_results(results, max_tokens=250)
+
+    assert get_token_counter().count(context.split("\n[Afgekapt")[0]) <= 250
+    assert "resultaten weggelaten" in context
+    assert "r0w0" in context
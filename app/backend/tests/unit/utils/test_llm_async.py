@@ -0,0 +1,94 @@
+"""
+Tests for the pooled async LLM clients and the run_sync bridge.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils import claude_llm
+from app.utils.llm_async import get_async_anthropic_client, run_sync
+from app.utils.llm_provider import generate_content_many
+
+
+def test_run_sync_shares_one_io_loop_across_threads():
+    active = {"now": 0, "max": 0}
+
+    async def call():
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.05)
+        active["now"] -= 1
+        return threading.current_thread().name
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        names = list(pool.map(lambda _: run_sync(call()), range(8)))
+
+    assert set(names) == {"llm-io"}
+    assert active["max"] == 8
+
+
+def test_run_sync_timeout():
+    with pytest.raises(TimeoutError):
+        run_sync(asyncio.sleep(1), timeout=0.05)
+
+
+def test_clients_are_cached_per_event_loop():
+    async def get_pair():
+        return get_async_anthropic_client("key"), get_async_anthropic_client("key")
+
+    first, again = asyncio.run(get_pair())
+    other, _ = asyncio.run(get_pair())
+
+    assert first is again
+    assert first is not other
+
+
+@pytest.fixture
+def claude_client(monkeypatch):
+    monkeypatch.setattr(claude_llm, "API_INITIALIZED", True)
+    client = MagicMock()
+    with patch("app.utils.claude_llm.get_async_anthropic_client", return_value=client):
+        yield client
+
+
+def test_claude_sync_shim_uses_async_client(claude_client):
+    claude_client.messages.create = AsyncMock(return_value=SimpleNamespace(content=[SimpleNamespace(text="antwoord")]))
+
+    model = claude_llm.ClaudeModel()
+    response = model.generate_content([
+        {"role": "system", "parts": ["Je bent arbeidsdeskundige"]},
+        {"role": "user", "parts": ["Vraag"]},
+    ])
+
+    assert response.text == "antwoord"
+    params = claude_client.messages.create.call_args.kwargs
+    assert params["system"] == "Je bent arbeidsdeskundige"
+    assert params["messages"] == [{"role": "user", "content": "Vraag"}]
+
+
+def test_claude_overloaded_error_is_raised(claude_client):
+    claude_client.messages.create = AsyncMock(side_effect=Exception("Error code: 529 overloaded_error"))
+
+    with pytest.raises(Exception, match="529"):
+        claude_llm.ClaudeModel().generate_content([{"role": "user", "parts": ["Vraag"]}])
+
+
+def test_generate_content_many_runs_calls_concurrently(claude_client):
+    async def create(**params):
+        await asyncio.sleep(0.2)
+        return SimpleNamespace(content=[SimpleNamespace(text=params["messages"][0]["content"])])
+
+    claude_client.messages.create = create
+    prompts = [[{"role": "user", "parts": [f"vraag {i}"]}] for i in range(5)]
+
+    start = time.monotonic()
+    responses = generate_content_many(claude_llm.ClaudeModel(), prompts)
+
+    assert [response.text for response in responses] == [f"vraag {i}" for i in range(5)]
+    assert time.monotonic() - start < 0.6
@@ -0,0 +1,140 @@
+"""
+Tests for hedged LLM calls.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.utils.claude_llm import FallbackResponse
+from app.utils.llm_hedging import HedgedModel, HedgingPolicy, create_fallback_model
+
+
+class FakeLLM:
+    """Answers after a scripted delay per call; records cancelled calls."""
+
+    def __init__(self, model_name, delays, text="Gegenereerde sectietekst", fail=False):
+        self.model_name = model_name
+        self.generation_config = {"max_tokens": 1000}
+        self.delays = list(delays)
+        self.text = text
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+        self.streamed = []
+
+    async def generate_content_async(self, prompt_parts, on_text=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delays.pop(0))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            return FallbackResponse("overloaded")
+        if on_text:
+            on_text(self.text)
+            self.streamed.append(self.text)
+        return SimpleNamespace(text=self.text, usage={"input_tokens": 900, "output_tokens": 100})
+
+
+PROMPT = [{"role": "user", "parts": ["Schrijf de samenvatting"]}]
+
+
+@pytest.fixture
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGING", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_PERCENTILE", 95.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(settings, "LLM_HEDGE_WINDOW", 50)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_HEDGE_BUDGET_PERCENT", 50.0)
+
+
+def learned_policy(key="section:samenvatting:rag:primary", latency=0.02, samples=10, primary_tokens=10000):
+    policy = HedgingPolicy()
+    for _ in range(samples):
+        policy.record_latency(key, latency)
+    policy.record_primary(primary_tokens)
+    return policy
+
+
+def test_percentile_is_learned_per_key(hedge_settings):
+    policy = HedgingPolicy()
+    for latency in [1.0, 2.0, 3.0, 4.0]:
+        policy.record_latency("a", latency)
+    assert policy.hedge_delay("a") is None  # still learning
+
+    for latency in [5.0] + [1.0] * 15:
+        policy.record_latency("a", latency)
+    assert policy.percentile("a") == 4.0
+    assert policy.hedge_delay("b") is None
+
+
+def test_slow_primary_is_hedged_and_cancelled(hedge_settings):
+    policy = learned_policy()
+    primary = FakeLLM("primary", [5.0])
+    fallback = FakeLLM("fallback", [0.01], text="Snelle tekst")
+    model = HedgedModel(primary, "section:samenvatting:rag", fallback=fallback, policy=policy)
+    received = []
+
+    response = asyncio.run(model.generate_content_async(PROMPT, on_text=received.append))
+
+    assert response.text == "Snelle tekst"
+    assert primary.cancelled == 1
+    assert received == []  # the hedge does not stream
+    stats = policy.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    # The cancelled primary leaves a lower bound on its latency
+    assert stats["keys"]["section:samenvatting:rag:primary"]["samples"] == 11
+
+
+def test_fast_primary_is_not_hedged(hedge_settings):
+    policy = learned_policy(latency=1.0)
+    primary = FakeLLM("primary", [0.01])
+    fallback = FakeLLM("fallback", [0.01])
+    model = HedgedModel(primary, "section:samenvatting:rag", fallback=fallback, policy=policy)
+
+    response = asyncio.run(model.generate_content_async(PROMPT))
+
+    assert response.text == "Gegenereerde sectietekst"
+    assert fallback.calls == 0
+    assert policy.primary_tokens == 10000 + 1000
+
+
+def test_bad_hedge_response_waits_for_primary(hedge_settings):
+    policy = learned_policy()
+    primary = FakeLLM("primary", [0.1])
+    fallback = FakeLLM("fallback", [0.01], fail=True)
+    model = HedgedModel(primary, "section:samenvatting:rag", fallback=fallback, policy=policy)
+
+    response = asyncio.run(model.generate_content_async(PROMPT))
+
+    assert response.text == "Gegenereerde sectietekst"
+    assert primary.cancelled == 0
+    assert "hedge_wins" not in policy.stats()
+
+
+def test_budget_caps_extra_spend(hedge_settings, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_BUDGET_PERCENT", 1.0)
+    policy = learned_policy(primary_tokens=1000)
+    primary = FakeLLM("primary", [0.1])
+    fallback = FakeLLM("fallback", [0.01])
+    model = HedgedModel(primary, "section:samenvatting:rag", fallback=fallback, policy=policy)
+
+    response = asyncio.run(model.generate_content_async(PROMPT))
+
+    assert response.text == "Gegenereerde sectietekst"
+    assert fallback.calls == 0
+    assert policy.hedge_tokens == 0
+    assert policy.stats()["skipped_budget"] == 1
+
+
+def test_unknown_fallback_hedges_on_primary(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_FALLBACK", "google:gemini")
+    assert create_fallback_model(FakeLLM("primary", [])) is None
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_FALLBACK", "")
+    assert create_fallback_model(FakeLLM("primary", [])) is None
@@ -0,0 +1,225 @@
+"""
+Tests for the cluster-wide LLM rate limiter and AIMD concurrency control.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.utils import claude_llm, llm_rate_limiter
+from app.utils.llm_rate_limiter import (
+    AIMDController,
+    LLMRateLimiter,
+    bucket_key,
+    estimate_request_tokens,
+    is_overload_error,
+    parse_rate_limits,
+)
+from app.utils.rag_monitoring import MetricType
+
+
+class FakeRedis:
+    """Registers scripts as callables that replay scripted bucket answers."""
+
+    def __init__(self, waits=None):
+        self.waits = list(waits or [])
+        self.calls = []
+
+    def register_script(self, script):
+        name = "acquire" if script == llm_rate_limiter._ACQUIRE_SCRIPT else "adjust"
+
+        def run(keys, args):
+            self.calls.append((name, keys, args))
+            if name == "acquire" and self.waits:
+                return self.waits.pop(0)
+            return "0"
+
+        return run
+
+
+class OverloadedError(Exception):
+    status_code = 529
+
+
+@pytest.fixture
+def limiter_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITS", "anthropic:claude-test=100/5000")
+    monkeypatch.setattr(settings, "LLM_AIMD_INITIAL", 4)
+    monkeypatch.setattr(settings, "LLM_AIMD_MIN", 1)
+    monkeypatch.setattr(settings, "LLM_AIMD_MAX", 8)
+    monkeypatch.setattr(settings, "LLM_AIMD_DECREASE", 0.5)
+    monkeypatch.setattr(settings, "LLM_AIMD_COOLDOWN", 60.0)
+
+
+def test_parse_rate_limits():
+    limits = parse_rate_limits("anthropic:claude-3-5-haiku-20241022=4000/400000, openai:gpt-4o=500/0,broken")
+
+    assert limits == {
+        ("anthropic", "claude-3-5-haiku-20241022"): (4000, 400000),
+        ("openai", "gpt-4o"): (500, 0),
+    }
+
+
+def test_overload_errors_are_recognised():
+    assert is_overload_error(OverloadedError("overloaded"))
+    assert is_overload_error(Exception("Error code: 429 - rate_limit_error"))
+    assert not is_overload_error(ValueError("invalid request"))
+
+
+def test_estimate_counts_prompt_and_capped_output(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RATE_OUTPUT_ESTIMATE", 100)
+    params = {
+        "system": "Je bent arbeidsdeskundige.",
+        "max_tokens": 4096,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": "Casus"}, {"type": "text", "text": "Vraag"}]}],
+    }
+
+    estimate = estimate_request_tokens(params)
+
+    assert 100 < estimate < 150
+    assert estimate_request_tokens({**params, "max_tokens": 10}) == estimate - 90
+
+
+def test_aimd_backs_off_on_overload_and_ramps_up_on_success():
+    controller = AIMDController(initial=8, minimum=1, maximum=10, decrease=0.5, cooldown=60.0)
+
+    controller.on_overload()
+    controller.on_overload()  # within the cooldown: same burst
+    assert controller.limit == 4.0
+    assert controller.overloads == 2
+
+    # About one extra slot per window of `limit` successes
+    for _ in range(5):
+        controller.on_success()
+    assert int(controller.limit) == 5
+
+    for _ in range(100):
+        controller.on_success()
+    assert controller.limit == 10.0
+
+
+def test_aimd_queues_calls_over_the_limit():
+    controller = AIMDController(initial=2, minimum=1, maximum=2, decrease=0.5, cooldown=0.0)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        await controller.acquire()
+        try:
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+        finally:
+            controller.release()
+
+    async def main():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert peak == 2
+    assert controller.in_flight == 0
+    assert controller.waiting == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    controller = AIMDController(initial=1, minimum=1, maximum=1, decrease=0.5, cooldown=0.0)
+
+    async def main():
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        controller.release()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert controller.in_flight == 0
+    assert controller.waiting == 0
+
+
+def test_call_waits_for_bucket_and_records_queue_wait(limiter_settings):
+    redis_client = FakeRedis(waits=["0.01", "0.01"])
+    limiter = LLMRateLimiter(redis_client)
+
+    async def main():
+        async with limiter.limit("anthropic", "claude-test", 300) as permit:
+            permit.record({"input_tokens": 120, "output_tokens": 80, "cache_read_tokens": 1000})
+
+    with patch("app.utils.rag_monitoring.metrics_collector") as collector:
+        asyncio.run(main())
+
+    acquires = [call for call in redis_client.calls if call[0] == "acquire"]
+    assert len(acquires) == 3
+    assert acquires[0][1] == [bucket_key("anthropic", "claude-test", "rpm"), bucket_key("anthropic", "claude-test", "tpm")]
+    assert acquires[0][2] == [100, 1, 5000, 300, llm_rate_limiter.BUCKET_TTL]
+    # The estimate is corrected with the actual usage; cache reads do not count
+    assert redis_client.calls[-1] == ("adjust", [bucket_key("anthropic", "claude-test", "tpm")],
+                                      [5000, 100, llm_rate_limiter.BUCKET_TTL])
+
+    component, metric_type, wait = collector.record_metric.call_args.args
+    assert metric_type == MetricType.QUEUE_WAIT
+    assert wait >= 0.02
+    assert collector.record_metric.call_args.kwargs["tags"] == {"provider": "anthropic", "model": "claude-test"}
+    assert limiter.stats()["anthropic:claude-test"]["calls"] == 1
+
+
+def test_overload_lowers_concurrency_and_propagates(limiter_settings):
+    limiter = LLMRateLimiter(FakeRedis())
+
+    async def main():
+        async with limiter.limit("anthropic", "claude-test", 10):
+            raise OverloadedError("Error code: 529 - overloaded_error")
+
+    with patch("app.utils.rag_monitoring.metrics_collector"), pytest.raises(OverloadedError):
+        asyncio.run(main())
+
+    controller = limiter.controller("anthropic", "claude-test")
+    assert controller.limit == 2.0
+    assert controller.in_flight == 0
+
+
+def test_buckets_fail_open_when_redis_is_down(limiter_settings):
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = MagicMock(side_effect=ConnectionError("redis down"))
+    limiter = LLMRateLimiter(redis_client)
+
+    async def main():
+        async with limiter.limit("anthropic", "claude-test", 10):
+            pass
+        async with limiter.limit("anthropic", "claude-test", 10):
+            pass
+
+    with patch("app.utils.rag_monitoring.metrics_collector"):
+        asyncio.run(main())
+
+    # The second call does not try Redis again during the retry window
+    assert redis_client.register_script.return_value.call_count == 1
+
+
+def test_claude_calls_go_through_the_limiter(monkeypatch, limiter_settings):
+    monkeypatch.setattr(claude_llm, "API_INITIALIZED", True)
+    limiter = LLMRateLimiter(FakeRedis())
+    monkeypatch.setattr(llm_rate_limiter, "_llm_rate_limiter", limiter)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMITING", True)
+
+    async def create(**params):
+        return SimpleNamespace(id="msg_1", content=[SimpleNamespace(text="Advies")],
+                               usage=SimpleNamespace(input_tokens=10, output_tokens=2))
+
+    client = MagicMock()
+    client.messages.create = create
+
+    with patch("app.utils.claude_llm.get_async_anthropic_client", return_value=client), \
+            patch("app.utils.rag_monitoring.metrics_collector"):
+        response = claude_llm.ClaudeModel(model_name="claude-test").generate_content([{"role": "user", "parts": ["Vraag"]}])
+
+    assert response.text == "Advies"
+    assert limiter.stats()["anthropic:claude-test"]["calls"] == 1
@@ -0,0 +1,86 @@
+"""
+Unit tests for the OCR page cache.
+Tests key derivation, hit/miss accounting and LRU eviction.
+"""
+
+import os
+import time
+
+import pytest
+from unittest.mock import patch
+from PIL import Image
+
+from app.utils.ocr_cache import OCRCache
+
+
+@pytest.fixture
+def ocr_cache(tmp_path):
+    return OCRCache(str(tmp_path / "ocr"), max_bytes=1024 * 1024, max_entries=100)
+
+
+def make_page(color: int) -> Image.Image:
+    return Image.new("L", (64, 64), color=color)
+
+
+class TestOCRCache:
+    """Test cases for OCRCache"""
+
+    def test_key_depends_on_pixels_and_settings(self):
+        page = make_page(255)
+
+        key = OCRCache.make_key(page, "nld+eng", "--psm 1")
+
+        assert key == OCRCache.make_key(make_page(255), "nld+eng", "--psm 1")
+        assert key != OCRCache.make_key(make_page(0), "nld+eng", "--psm 1")
+        assert key != OCRCache.make_key(page, "nld", "--psm 1")
+        assert key != OCRCache.make_key(page, "nld+eng", "--psm 6")
+
+    def test_get_set_and_hit_rate(self, ocr_cache):
+        key = OCRCache.make_key(make_page(255), "nld+eng", "--psm 1")
+
+        assert ocr_cache.get(key) is None
+        ocr_cache.set(key, "Geachte heer Jansen")
+        assert ocr_cache.get(key) == "Geachte heer Jansen"
+
+        stats = ocr_cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used_entries(self, tmp_path):
+        cache = OCRCache(str(tmp_path / "ocr"), max_bytes=1024 * 1024, max_entries=3)
+        keys = [OCRCache.make_key(make_page(color), "nld", "--psm 1") for color in range(4)]
+
+        for index, key in enumerate(keys[:3]):
+            cache.set(key, f"pagina {index}")
+            # Spread mtimes so LRU order is deterministic
+            stamp = time.time() - 100 + index
+            os.utime(cache._path_for(key), (stamp, stamp))
+
+        # Touch the oldest entry so the second one becomes least recently used
+        assert cache.get(keys[0]) == "pagina 0"
+
+        cache.set(keys[3], "pagina 3")
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == "pagina 0"
+        assert cache.get(keys[3]) == "pagina 3"
+        assert cache.get_stats()["evictions"] >= 1
+
+
+class TestOCRProcessorCaching:
+    """Test that OCR calls consult the cache before running Tesseract"""
+
+    def test_second_call_skips_tesseract(self, ocr_cache):
+        from app.utils import ocr_processor
+
+        page = make_page(200)
+
+        with patch.object(ocr_processor, "get_ocr_cache", return_value=ocr_cache), \
+             patch.object(ocr_processor.pytesseract, "image_to_string", return_value="Verwijsbrief") as tesseract:
+            first, first_cached = ocr_processor._image_to_string_cached(page, "nld+eng", "--psm 1")
+            second, second_cached = ocr_processor._image_to_string_cached(page, "nld+eng", "--psm 1")
+
+        assert first == second == "Verwijsbrief"
+        assert (first_cached, second_cached) == (False, True)
+        assert tesseract.call_count == 1
@@ -0,0 +1,75 @@
+"""
+Tests for section-aware chunking in the optimized RAG pipeline.
+"""
+
+import asyncio
+import re
+from unittest.mock import MagicMock, patch
+
+from app.utils.optimized_rag_pipeline import MEDICAL_SECTION_PATTERNS, ChunkConfig, OptimizedRAGPipeline
+
+
+def make_pipeline(db_service=None):
+    with patch("app.utils.optimized_rag_pipeline.Anthropic"), \
+            patch("app.utils.optimized_rag_pipeline.HybridVectorStore"):
+        return OptimizedRAGPipeline(db_service)
+
+
+def reference_sections(content, section_patterns, min_distance, min_length, extract):
+    """The original per-pattern scan: sections in priority order, nearby headings skipped."""
+    found, processed = [], []
+    for name, info in section_patterns.items():
+        for match in re.finditer(info["pattern"], content, re.IGNORECASE):
+            start = match.start()
+            if any(abs(start - pos) < min_distance for pos in processed):
+                continue
+            if len(extract(content, start).strip()) > min_length:
+                found.append((name, start))
+                processed.append(start)
+    return found
+
+
+def test_overlapping_heading_goes_to_first_listed_section():
+    pipeline = make_pipeline()
+    config = ChunkConfig(target_size=300, max_size=500, overlap=0, importance_boost=1.0, section_aware=True)
+    filler = "Tekst over de belastbaarheid van de werknemer in het dagelijks leven. " * 3
+    content = (
+        f"Anamnese\n{filler}\n\nBevindingen\n{filler}\n\nPrognose\n{filler}\n\n"
+        f"Diagnose en conclusie\n{filler}\n\nBehandeling met medicatie\n{filler}"
+    )
+
+    chunks = asyncio.run(pipeline._chunk_medical_sections(content, config))
+
+    found = [(chunk["metadata"]["section_type"], chunk["metadata"]["section_start"]) for chunk in chunks]
+    assert ("onderzoek", content.index("Bevindingen")) in found
+    assert not any(name == "diagnose" and start == content.index("Bevindingen") for name, start in found)
+    assert found == reference_sections(
+        content, MEDICAL_SECTION_PATTERNS, 100, 50,
+        lambda text, start: pipeline._extract_section_content(text, start, config.target_size, config.max_size)
+    )
+
+
+def test_section_index_is_stored_and_used_for_retrieval():
+    db_service = MagicMock()
+    pipeline = make_pipeline(db_service)
+    filler = "Tekst over de belastbaarheid van de werknemer in het dagelijks leven. " * 20
+    content = f"Anamnese\n{filler}\n\nPrognose\n{filler}"
+
+    asyncio.run(pipeline.create_optimized_chunks("doc-1", content, "medical_report"))
+
+    document_id, updates = db_service.merge_document_metadata.call_args[0]
+    section_index = updates["section_index"]
+    assert document_id == "doc-1"
+    assert section_index["anamnese"] == [[0, content.index("Prognose")]]
+    assert section_index["prognose"] == [[content.index("Prognose"), len(content)]]
+
+    db_service.get_row_by_id.return_value = {"metadata": {"section_index": section_index}}
+    results = [
+        {"document_id": "doc-1", "metadata": {"start_char": content.index("Prognose") + 50}},
+        {"document_id": "doc-1", "metadata": {"start_char": 10, "section_type": "diagnose"}},
+    ]
+
+    resolved = pipeline._resolve_sections(results)
+
+    assert [r["metadata"]["section_type"] for r in resolved] == ["prognose", "diagnose"]
+    db_service.get_row_by_id.assert_called_once_with("document", "doc-1")
@@ -0,0 +1,102 @@
+"""
+Tests for prompt-prefix caching of the shared case context.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.tasks.generate_report_tasks.ad_report_task import create_ad_prompt_parts, create_ad_specific_prompt
+from app.utils import claude_llm
+from app.utils.openai_llm import OpenAIModel
+from app.utils.prompt_parts import build_cached_prompt
+from app.utils.rag_monitoring import ComponentType
+from app.utils.token_cost_tracker import TokenCostTracker
+
+PROMPT = build_cached_prompt("Gedeelde casus context", "Schrijf de samenvatting", system="Je bent arbeidsdeskundige")
+
+
+@pytest.fixture
+def claude_model(monkeypatch):
+    monkeypatch.setattr(claude_llm, "API_INITIALIZED", True)
+    return claude_llm.ClaudeModel(model_name="claude-3-5-haiku-20241022")
+
+
+def test_claude_marks_shared_prefix_as_cacheable(claude_model):
+    params = claude_model._build_params(PROMPT)
+
+    prefix_block, suffix_block = params["messages"][0]["content"]
+    assert prefix_block == {"type": "text", "text": "Gedeelde casus context", "cache_control": {"type": "ephemeral"}}
+    assert suffix_block == {"type": "text", "text": "Schrijf de samenvatting"}
+    assert params["system"] == "Je bent arbeidsdeskundige"
+
+
+def test_claude_prompt_caching_can_be_disabled(claude_model, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROMPT_CACHING", False)
+
+    prefix_block, _ = claude_model._build_params(PROMPT)["messages"][0]["content"]
+
+    assert "cache_control" not in prefix_block
+
+
+def test_plain_prompts_are_unchanged(claude_model):
+    params = claude_model._build_params([{"role": "user", "parts": ["Vraag"]}])
+
+    assert params["messages"] == [{"role": "user", "content": "Vraag"}]
+
+
+def test_claude_records_cached_tokens(claude_model):
+    tracker = TokenCostTracker()
+    response = SimpleNamespace(id="msg_1", content=[], usage=SimpleNamespace(
+        input_tokens=200, output_tokens=500, cache_creation_input_tokens=0, cache_read_input_tokens=10000
+    ))
+
+    with patch("app.utils.token_cost_tracker.token_cost_tracker", tracker):
+        usage = claude_model._record_usage(response)
+
+    assert usage["cache_read_tokens"] == 10000
+    record = tracker.usage_history[-1]
+    assert record.cache_read_tokens == 10000
+    assert record.input_cost == pytest.approx(0.2 * 0.80 + 10 * 0.80 * 0.1)
+    assert record.cache_savings == pytest.approx(10 * 0.80 * 0.9)
+
+
+def test_cost_analysis_reports_cache_hit_ratio():
+    tracker = TokenCostTracker()
+    tracker.record_token_usage("anthropic", "claude-3-5-haiku-20241022", ComponentType.LLM_PROVIDER,
+                               input_tokens=100, output_tokens=50, request_id="1", cache_creation_tokens=900)
+    tracker.record_token_usage("anthropic", "claude-3-5-haiku-20241022", ComponentType.LLM_PROVIDER,
+                               input_tokens=100, output_tokens=50, request_id="2", cache_read_tokens=900)
+
+    analysis = tracker.get_cost_analysis(hours=1)
+
+    assert analysis.cache_creation_tokens == 900
+    assert analysis.cache_read_tokens == 900
+    assert analysis.cache_hit_ratio == pytest.approx(0.45)
+    # One write surcharge (25%) against one discounted read (90%)
+    assert analysis.cache_savings == pytest.approx(0.9 * 0.80 * (0.9 - 0.25))
+
+
+def test_openai_sends_prefix_first():
+    model = OpenAIModel.__new__(OpenAIModel)
+    model.model_name = "gpt-4o"
+    model.generation_config = {}
+
+    messages = model._build_params(PROMPT)["messages"]
+
+    assert messages[1]["content"] == "Gedeelde casus context\n\nSchrijf de samenvatting"
+
+
+def test_ad_prompt_prefix_is_shared_by_all_sections():
+    profile = {"display_name": "A. de Vries", "company_name": "AD Advies"}
+
+    prefix_a, suffix_a = create_ad_prompt_parts("samenvatting", {"title": "Samenvatting"}, profile)
+    prefix_b, suffix_b = create_ad_prompt_parts("conclusie", {"title": "Conclusie"}, profile)
+
+    assert prefix_a == prefix_b
+    assert "A. de Vries" in prefix_a
+    assert "Samenvatting" not in prefix_a and "'Samenvatting'" in suffix_a
+    assert "'Conclusie'" in suffix_b
+    assert create_ad_specific_prompt("samenvatting", {"title": "Samenvatting"}, profile) == prefix_a + "\n" + suffix_a
@@ -0,0 +1,317 @@
+"""
+Tests for streaming report sections over Redis streams.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.utils import claude_llm
+from app.utils.openai_llm import OpenAIModel
+from app.utils.report_stream import ReportStreamPublisher, format_sse, iter_report_events, stream_key
+
+
+class FakeRedis:
+    """In-memory Redis stream with XADD/XREAD."""
+
+    def __init__(self):
+        self.entries = []
+        self.ttls = {}
+        self.last_id = 0
+
+    def xadd(self, key, fields, maxlen=None, approximate=False):
+        self.last_id += 1
+        entry_id = f"{self.last_id}-0"
+        self.entries.append((key, entry_id, dict(fields)))
+        return entry_id
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def delete(self, key):
+        self.entries = [entry for entry in self.entries if entry[0] != key]
+        self.ttls.pop(key, None)
+
+    def events(self):
+        return [(fields["event"], fields["section"], json.loads(fields["data"])) for _, _, fields in self.entries]
+
+
+@pytest.fixture
+def fast_settings(monkeypatch):
+    # The flusher thread stays idle; tests flush explicitly
+    monkeypatch.setattr(settings, "REPORT_STREAM_FLUSH_CHARS", 10 ** 6)
+    monkeypatch.setattr(settings, "REPORT_STREAM_FLUSH_INTERVAL", 60.0)
+    monkeypatch.setattr(settings, "REPORT_STREAM_PERSIST_INTERVAL", 0.0)
+
+
+def test_deltas_are_buffered_and_batched(fast_settings):
+    redis_client = FakeRedis()
+    persist = MagicMock()
+    publisher = ReportStreamPublisher("rep-1", redis_client, persist=persist)
+    section = publisher.section("samenvatting")
+
+    section.restart()
+    for piece in ["De ", "werknemer ", "is ", "fit"]:
+        section.write(piece)
+
+    # write() runs on the LLM I/O loop and does no I/O
+    assert [event for event, _, _ in redis_client.events()] == ["section_start"]
+    persist.assert_not_called()
+
+    publisher.flush()
+    assert redis_client.events()[1:] == [("delta", "samenvatting", {"text": "De werknemer is fit"})]
+    persist.assert_called_once_with({"samenvatting": "De werknemer is fit"})
+    assert redis_client.ttls[stream_key("rep-1")] == settings.REPORT_STREAM_TTL
+    publisher.close()
+
+
+def test_flusher_thread_publishes_in_the_background(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_STREAM_FLUSH_CHARS", 5)
+    monkeypatch.setattr(settings, "REPORT_STREAM_FLUSH_INTERVAL", 60.0)
+    redis_client = FakeRedis()
+    publisher = ReportStreamPublisher("rep-1", redis_client)
+    writer = threading.current_thread()
+    publishers = []
+    original_xadd = redis_client.xadd
+
+    def xadd(*args, **kwargs):
+        publishers.append(threading.current_thread())
+        return original_xadd(*args, **kwargs)
+
+    redis_client.xadd = xadd
+    publisher.write("samenvatting", "Belastbaarheid")
+
+    deadline = time.monotonic() + 5
+    while not redis_client.entries and time.monotonic() < deadline:
+        time.sleep(0.01)
+    publisher.finish("generated")
+
+    assert [event for event, _, _ in redis_client.events()] == ["delta", "report_done"]
+    assert publishers[0] is not writer
+
+
+def test_section_done_replaces_streamed_text_and_is_persisted(fast_settings):
+    redis_client = FakeRedis()
+    persisted = []
+    publisher = ReportStreamPublisher("rep-1", redis_client, persist=persisted.append)
+    section = publisher.section("samenvatting")
+
+    section.restart()
+    section.write("Eerste poging die mislukt")
+    publisher.flush()
+    section.restart()
+    section.write("Tweede")
+    publisher.finish_section("samenvatting", "Tweede poging, na kwaliteitscontrole", "enhanced_rag")
+    publisher.finish("generated")
+
+    events = redis_client.events()
+    assert [event for event, _, _ in events] == [
+        "section_start", "delta", "section_start", "section_done", "report_done"
+    ]
+    assert events[3][2] == {"content": "Tweede poging, na kwaliteitscontrole", "approach": "enhanced_rag"}
+    assert events[4][2] == {"status": "generated"}
+    assert persisted[0] == {"samenvatting": "Eerste poging die mislukt"}
+    assert persisted[-1] == {"samenvatting": "Tweede poging, na kwaliteitscontrole"}
+
+
+def test_nothing_is_published_after_finish(fast_settings):
+    redis_client = FakeRedis()
+    persist = MagicMock()
+    publisher = ReportStreamPublisher("rep-1", redis_client, persist=persist)
+    publisher.finish("generated")
+
+    # A timed-out section that finishes late
+    publisher.write("advies", "Te")
+    publisher.flush()
+    publisher.finish_section("advies", "Te laat", "enhanced_rag")
+
+    assert [event for event, _, _ in redis_client.events()] == ["report_done"]
+    persist.assert_not_called()
+
+
+def test_close_stops_partial_persistence_before_the_final_save(fast_settings):
+    redis_client = FakeRedis()
+    persisted = []
+    publisher = ReportStreamPublisher("rep-1", redis_client, persist=persisted.append)
+    publisher.write("samenvatting", "Deels")
+
+    publisher.close()
+    # A late section after close() is not persisted over the final report
+    publisher.finish_section("advies", "Te laat", "enhanced_rag")
+    publisher.flush()
+    publisher.finish("generated")
+
+    assert persisted == []
+    assert [event for event, _, _ in redis_client.events()] == ["report_done"]
+
+
+def test_publisher_fails_open(fast_settings):
+    redis_client = MagicMock()
+    redis_client.xadd.side_effect = ConnectionError("redis down")
+    persisted = []
+    publisher = ReportStreamPublisher("rep-1", redis_client, persist=persisted.append)
+
+    publisher.section("samenvatting").restart()
+    publisher.finish_section("samenvatting", "Tekst", "enhanced_direct")
+
+    assert publisher.redis is None
+    assert persisted == [{"samenvatting": "Tekst"}]
+
+
+def test_sse_format():
+    assert format_sse("5-0", "delta", {"text": "één"}) == 'id: 5-0\nevent: delta\ndata: {"text": "één"}\n\n'
+    assert format_sse(None, "report_done", {}).startswith("event: report_done\n")
+
+
+def test_reader_resumes_and_stops_at_report_done():
+    redis_client = FakeRedis()
+    publisher = ReportStreamPublisher("rep-1", redis_client)
+    publisher.section("samenvatting").restart()
+    publisher.finish_section("samenvatting", "Tekst", "enhanced_rag")
+    publisher.finish("generated")
+
+    class AsyncReader:
+        def __init__(self):
+            self.calls = 0
+
+        async def xread(self, streams, count=None, block=None):
+            self.calls += 1
+            (key, last_id), = streams.items()
+            seen = int(last_id.split("-")[0])
+            if self.calls == 1:
+                return []  # nothing new within block_ms
+            return [(key, [(entry_id, fields) for _, entry_id, fields in redis_client.entries[seen:seen + 1]])]
+
+    async def read():
+        return [entry async for entry in iter_report_events("rep-1", AsyncReader(), last_event_id="1-0")]
+
+    entries = asyncio.run(read())
+
+    assert entries[0] is None
+    assert entries[1] == ("2-0", "section_done", {"content": "Tekst", "approach": "enhanced_rag", "section": "samenvatting"})
+    assert entries[2] == ("3-0", "report_done", {"status": "generated"})
+    assert len(entries) == 3
+
+
+def test_new_run_starts_with_an_empty_stream(fast_settings):
+    redis_client = FakeRedis()
+    first = ReportStreamPublisher("rep-1", redis_client)
+    first.section("samenvatting").restart()
+    first.finish_section("samenvatting", "Oude tekst", "enhanced_rag")
+    first.finish("generated")
+
+    second = ReportStreamPublisher("rep-1", redis_client)
+    assert redis_client.events() == []
+
+    second.section("samenvatting").restart()
+    second.finish_section("samenvatting", "Nieuwe tekst", "enhanced_rag")
+    second.finish("generated")
+
+    assert redis_client.events() == [
+        ("section_start", "samenvatting", {}),
+        ("section_done", "samenvatting", {"content": "Nieuwe tekst", "approach": "enhanced_rag"}),
+        ("report_done", "", {"status": "generated"}),
+    ]
+
+
+def test_reader_skips_the_finished_run_while_a_new_one_is_queued(fast_settings):
+    redis_client = FakeRedis()
+    first = ReportStreamPublisher("rep-1", redis_client)
+    first.section("samenvatting").restart()
+    first.finish("generated")
+
+    class AsyncReader:
+        def __init__(self):
+            self.calls = 0
+
+        async def xrevrange(self, key, count=None):
+            return [(entry_id, fields) for _, entry_id, fields in redis_client.entries[::-1][:count]]
+
+        async def xread(self, streams, count=None, block=None):
+            self.calls += 1
+            if self.calls == 1:
+                # The worker picks up the new run
+                second = ReportStreamPublisher("rep-1", redis_client)
+                second.section("conclusie").restart()
+                second.finish("generated")
+            (key, last_id), = streams.items()
+            seen = int(last_id.split("-")[0])
+            return [(key, [(entry_id, fields) for _, entry_id, fields in redis_client.entries
+                           if int(entry_id.split("-")[0]) > seen])]
+
+    async def read():
+        return [entry async for entry in iter_report_events("rep-1", AsyncReader(), skip_finished_run=True)]
+
+    entries = asyncio.run(read())
+
+    assert [(event, data) for _, event, data in entries] == [
+        ("section_start", {"section": "conclusie"}),
+        ("report_done", {"status": "generated"}),
+    ]
+
+
+def test_claude_streams_text(monkeypatch):
+    monkeypatch.setattr(claude_llm, "API_INITIALIZED", True)
+    final = SimpleNamespace(id="msg_1", content=[SimpleNamespace(text="Hallo wereld")],
+                            usage=SimpleNamespace(input_tokens=10, output_tokens=2))
+
+    class Stream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        @property
+        async def text_stream(self):
+            for piece in ["Hallo", " wereld"]:
+                yield piece
+
+        async def get_final_message(self):
+            return final
+
+    client = MagicMock()
+    client.messages.stream.return_value = Stream()
+    received = []
+
+    with patch("app.utils.claude_llm.get_async_anthropic_client", return_value=client):
+        response = claude_llm.ClaudeModel().generate_content([{"role": "user", "parts": ["Vraag"]}], on_text=received.append)
+
+    assert received == ["Hallo", " wereld"]
+    assert response.text == "Hallo wereld"
+    assert response.usage["output_tokens"] == 2
+    client.messages.create.assert_not_called()
+
+
+def test_openai_streams_text():
+    def chunk(text=None, usage=None):
+        choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+        return SimpleNamespace(id="chatcmpl-1", choices=choices, usage=usage)
+
+    async def stream():
+        for item in [chunk("Hallo"), chunk(" wereld"), chunk(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2))]:
+            yield item
+
+    async def create(**params):
+        assert params["stream"] is True and params["stream_options"] == {"include_usage": True}
+        return stream()
+
+    client = MagicMock()
+    client.chat.completions.create = create
+    model = OpenAIModel.__new__(OpenAIModel)
+    model.model_name = "gpt-4o"
+    model.generation_config = {}
+    received = []
+
+    with patch("app.utils.openai_llm.get_async_openai_client", return_value=client):
+        response = model.generate_content([{"role": "user", "parts": ["Vraag"]}], on_text=received.append)
+
+    assert received == ["Hallo", " wereld"]
+    assert response.text == "Hallo wereld"
+    assert response.usage["input_tokens"] == 10
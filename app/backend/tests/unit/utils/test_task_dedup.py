@@ -0,0 +1,141 @@
+"""
+Tests for Redis lease based task deduplication.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils import task_dedup
+from app.utils.task_dedup import TaskDeduplicator, deduplicated_task, enqueue_unique_task
+
+
+class FakeRedis:
+    """In-memory Redis with Python versions of the dedup scripts."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def register_script(self, script):
+        def claim(keys, args):
+            holder = self.data.get(keys[0])
+            if holder is None or holder == args[0]:
+                self.data[keys[0]] = args[0]
+                self.ttls[keys[0]] = args[1]
+                return args[0]
+            return holder
+
+        def release(keys, args):
+            if self.data.get(keys[0]) == args[0]:
+                del self.data[keys[0]]
+                return 1
+            return 0
+
+        def transfer(keys, args):
+            holder = self.data.get(keys[0])
+            if holder is None or holder == args[0]:
+                self.data[keys[0]] = args[1]
+                self.ttls[keys[0]] = args[2]
+                return 1
+            return 0
+
+        return {
+            task_dedup._CLAIM_SCRIPT: claim,
+            task_dedup._RELEASE_SCRIPT: release,
+            task_dedup._TRANSFER_SCRIPT: transfer,
+        }[script]
+
+
+@pytest.fixture
+def dedup(monkeypatch):
+    deduplicator = TaskDeduplicator(FakeRedis())
+    monkeypatch.setattr(task_dedup, "get_task_deduplicator", lambda: deduplicator)
+    return deduplicator
+
+
+class TestTaskDeduplicator:
+
+    def test_second_claim_returns_holder(self, dedup):
+        assert dedup.claim("process", "doc-1", "task-a", ttl=60) == "task-a"
+        assert dedup.claim("process", "doc-1", "task-b", ttl=60) == "task-a"
+        assert dedup.claim("process", "doc-2", "task-b", ttl=60) == "task-b"
+
+    def test_release_only_by_holder(self, dedup):
+        dedup.claim("process", "doc-1", "task-a", ttl=60)
+
+        assert dedup.release("process", "doc-1", "task-b") is False
+        assert dedup.holder("process", "doc-1") == "task-a"
+        assert dedup.release("process", "doc-1", "task-a") is True
+        assert dedup.holder("process", "doc-1") is None
+
+    def test_transfer_hands_lease_over(self, dedup):
+        dedup.claim("process", "doc-1", "task-a", ttl=60)
+
+        assert dedup.transfer("process", "doc-1", "task-a", "task-ocr", ttl=60)
+        assert dedup.claim("process", "doc-1", "task-ocr", ttl=60) == "task-ocr"
+
+
+class TestDeduplicatedTask:
+
+    @staticmethod
+    def _run_as_task(func, task_id, *args):
+        task = MagicMock()
+        task.name = "generate_report"
+        task.request.id = task_id
+        task.soft_time_limit = 1080
+        with patch("celery.current_task", task):
+            return func(*args)
+
+    def test_duplicate_is_skipped_and_lease_released(self, dedup):
+        calls = []
+
+        @deduplicated_task("report_id")
+        def generate(report_id):
+            calls.append(report_id)
+            return {"status": "success"}
+
+        dedup.claim("generate_report", "rep-1", "task-a", ttl=1080)
+        duplicate = self._run_as_task(generate, "task-b", "rep-1")
+
+        assert duplicate == {"status": "duplicate", "report_id": "rep-1", "task_id": "task-a"}
+        assert calls == []
+
+        dedup.release("generate_report", "rep-1", "task-a")
+        assert self._run_as_task(generate, "task-b", "rep-1") == {"status": "success"}
+        assert dedup.holder("generate_report", "rep-1") is None
+
+    def test_lease_ttl_is_soft_time_limit(self, dedup):
+        @deduplicated_task("report_id")
+        def generate(report_id):
+            return dedup.redis.ttls[dedup.key("generate_report", report_id)]
+
+        assert self._run_as_task(generate, "task-a", "rep-1") == 1080
+
+
+class TestEnqueueUniqueTask:
+
+    def test_returns_in_flight_task(self, dedup):
+        from app.celery_worker import celery
+
+        name = "app.tasks.generate_report_tasks.ad_report_task.generate_enhanced_ad_report"
+        with patch.object(celery, "send_task", side_effect=lambda *a, task_id, **kw: celery.AsyncResult(task_id)) as send:
+            first, first_dup = enqueue_unique_task(name, "rep-1", args=["rep-1"])
+            second, second_dup = enqueue_unique_task(name, "rep-1", args=["rep-1"])
+
+        assert (first_dup, second_dup) == (False, True)
+        assert second.id == first.id
+        assert send.call_count == 1
+
+    def test_sends_without_redis(self, monkeypatch):
+        from app.celery_worker import celery
+
+        monkeypatch.setattr(task_dedup, "get_task_deduplicator", lambda: None)
+        with patch.object(celery, "send_task") as send:
+            _, deduplicated = enqueue_unique_task("some.task", "x", args=["x"])
+
+        assert deduplicated is False
+        send.assert_called_once()
@@ -0,0 +1,80 @@
+"""
+Unit tests for the indexed transcription cache store.
+Tests round-tripping of compact payloads, blob storage, expiry, LRU
+eviction and removal by tag.
+"""
+
+import os
+import time
+
+import pytest
+from unittest.mock import patch
+
+from app.utils.transcription_cache import TranscriptionCacheStore, _pack, _unpack
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptionCacheStore(str(tmp_path / "transcriptions"), max_bytes=1024 * 1024,
+                                   max_entries=10, sweep_interval=3600)
+
+
+def make_result(segments: int, text: str = "Goedemorgen, we bespreken de re-integratie."):
+    return {
+        "text": text * segments,
+        "chunks": [
+            {"start_time": i * 598.0, "end_time": i * 598.0 + 600, "text": text, "confidence": 0.9}
+            for i in range(segments)
+        ],
+        "model_used": "whisper-1"
+    }
+
+
+class TestTranscriptionCacheStore:
+    """Test cases for TranscriptionCacheStore"""
+
+    def test_segments_are_stored_column_wise(self):
+        result = make_result(3)
+        assert _unpack(_pack(result)) == result
+
+    def test_inline_and_blob_round_trip(self, cache):
+        small = make_result(1)
+        large = make_result(1, text=os.urandom(40 * 1024).hex())
+
+        cache.set("small", "chunk", small)
+        cache.set("large", "result", large)
+
+        assert cache.get("small") == small
+        assert cache.get("large") == large
+        assert list(cache.blob_dir.glob("*/large.bin"))
+        assert cache.get("missing") is None
+        assert cache.stats["hits"] == 2
+        assert cache.stats["misses"] == 1
+
+    def test_expired_entries_are_misses(self, cache):
+        cache.set("old", "chunk", make_result(1))
+        with patch("app.utils.transcription_cache.time.time", return_value=time.time() + 8 * 24 * 3600):
+            assert cache.get("old") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_sweep_evicts_least_recently_used(self, cache):
+        for i in range(12):
+            cache.set(f"key-{i}", "chunk", make_result(1))
+            connection = cache._connection()
+            with connection:
+                connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (1000 + i, f"key-{i}"))
+
+        removed = cache.sweep()
+
+        assert removed == 3
+        assert cache.get("key-0") is None
+        assert cache.get("key-11") is not None
+        assert cache.get_stats()["entries"] == 9
+
+    def test_delete_tag_removes_document_entries(self, cache):
+        cache.set("a", "result", make_result(1), tag="doc-1")
+        cache.set("b", "chunk", make_result(1), tag="doc-1")
+        cache.set("c", "chunk", make_result(1), tag="doc-2")
+
+        assert cache.delete_tag("doc-1") == 2
+        assert cache.get("c") is not None
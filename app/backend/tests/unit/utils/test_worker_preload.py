@@ -0,0 +1,59 @@
+"""
+Tests for the Celery worker warm start.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app import worker_preload
+from app.tasks.generate_report_tasks.rag_pipeline import get_section_query_catalogue
+from app.utils.context_aware_prompts import ContextAwarePromptGenerator
+from app.worker_preload import PRELOAD_REPORT, run_preload
+
+
+def test_phases_are_timed_and_failures_do_not_stop_preload():
+    def broken():
+        raise RuntimeError("boom")
+
+    report = run_preload([
+        ("first", lambda: {"items": 1}),
+        ("broken", broken),
+        ("last", lambda: {}),
+    ])
+
+    assert list(report) == ["first", "broken", "last", "total_seconds"]
+    assert report["first"]["items"] == 1
+    assert report["broken"]["error"] == "boom"
+    assert all(report[name]["seconds"] >= 0 for name in ("first", "broken", "last"))
+    assert PRELOAD_REPORT == report
+
+
+def test_heap_is_frozen_after_collecting():
+    with patch.object(worker_preload.gc, "collect") as collect, \
+            patch.object(worker_preload.gc, "freeze") as freeze:
+        worker_preload._freeze_heap()
+
+    collect.assert_called_once()
+    freeze.assert_called_once()
+
+
+def test_query_embeddings_are_read_from_cache_only():
+    cache = MagicMock()
+    cache._generate_cache_key.side_effect = lambda prefix, query: f"{prefix}:{query}"
+    cache.get.side_effect = lambda key: [0.1] if "belastbaarheid" in key else None
+
+    with patch("app.utils.rag_cache.get_cache_manager", return_value=cache), \
+            patch("app.utils.embeddings.generate_query_embedding") as embed:
+        details = worker_preload._warm_query_embeddings()
+
+    embed.assert_not_called()
+    assert details["queries"] == len(get_section_query_catalogue())
+    assert cache.get.call_count == details["queries"]
+    assert 0 < details["loaded"] < details["queries"]
+
+
+def test_prompt_tables_are_shared_between_instances():
+    first = ContextAwarePromptGenerator()
+    second = ContextAwarePromptGenerator()
+
+    assert first.section_templates is second.section_templates
+    assert first.terminology is second.terminology
@@ -0,0 +1,107 @@
+import { getFullApiUrl } from '@/services/api';
+import { useAuthenticatedDownload } from '@/composables/useAuthenticatedDownload';
+
+export interface ReportStreamHandlers {
+  onSectionStart?: (sectionId: string) => void;
+  onDelta?: (sectionId: string, text: string) => void;
+  onSectionDone?: (sectionId: string, content: string) => void;
+  onSectionFailed?: (sectionId: string, error: string) => void;
+  onDone: (status: string | null) => void;
+  // Live updates unavailable (streaming disabled, auth or network error); poll instead
+  onUnavailable?: () => void;
+}
+
+/**
+ * Live section output of a report generation (GET /reports/{id}/stream).
+ *
+ * EventSource cannot send an Authorization header, so the token is passed
+ * as a query parameter. EventSource reconnects by itself after a dropped
+ * connection and resumes with Last-Event-ID.
+ */
+export const useReportStream = () => {
+  const { getAuthToken } = useAuthenticatedDownload();
+  let source: EventSource | null = null;
+
+  const close = () => {
+    if (source) {
+      source.close();
+      source = null;
+    }
+  };
+
+  const open = async (reportId: string, handlers: ReportStreamHandlers): Promise<void> => {
+    close();
+
+    if (typeof EventSource === 'undefined') {
+      handlers.onUnavailable?.();
+      return;
+    }
+
+    const token = await getAuthToken();
+    const url = new URL(getFullApiUrl(`/api/v1/reports/${reportId}/stream`));
+    if (token) {
+      url.searchParams.set('token', token);
+    }
+
+    const stream = new EventSource(url.toString());
+    source = stream;
+
+    const parse = (event: MessageEvent) => {
+      try {
+        return JSON.parse(event.data);
+      } catch {
+        return {};
+      }
+    };
+
+    stream.addEventListener('section_start', (event) => {
+      handlers.onSectionStart?.(parse(event as MessageEvent).section);
+    });
+    stream.addEventListener('delta', (event) => {
+      const data = parse(event as MessageEvent);
+      handlers.onDelta?.(data.section, data.text || '');
+    });
+    stream.addEventListener('section_done', (event) => {
+      const data = parse(event as MessageEvent);
+      handlers.onSectionDone?.(data.section, data.content || '');
+    });
+    stream.addEventListener('section_failed', (event) => {
+      const data = parse(event as MessageEvent);
+      handlers.onSectionFailed?.(data.section, data.error || '');
+    });
+    stream.addEventListener('report_done', (event) => {
+      close();
+      handlers.onDone(parse(event as MessageEvent).status ?? null);
+    });
+    // Sent by the server when it can no longer read the stream
+    stream.addEventListener('error', (event) => {
+      if (event instanceof MessageEvent || stream.readyState === EventSource.CLOSED) {
+        close();
+        handlers.onUnavailable?.();
+      }
+    });
+  };
+
+  /**
+   * Resolves with the final status on report_done, or with undefined when
+   * live updates are unavailable and the caller should poll.
+   */
+  const waitForDone = (
+    reportId: string,
+    handlers: Omit<ReportStreamHandlers, 'onDone' | 'onUnavailable'> = {}
+  ): Promise<string | null | undefined> => {
+    return new Promise((resolve) => {
+      open(reportId, {
+        ...handlers,
+        onDone: (status) => resolve(status),
+        onUnavailable: () => resolve(undefined)
+      });
+    });
+  };
+
+  return {
+    open,
+    close,
+    waitForDone
+  };
+};
@@ -22,6 +22,7 @@ CREATE TABLE IF NOT EXISTS document (
     size INTEGER NOT NULL,
     status VARCHAR(50) DEFAULT 'processing',
     error TEXT,
+    metadata JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -33,6 +34,7 @@ CREATE TABLE IF NOT EXISTS document_chunk (
     content TEXT NOT NULL,
     chunk_index INTEGER NOT NULL,
     metadata JSONB,
+    fingerprint VARCHAR(64),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
@@ -58,6 +60,7 @@ CREATE INDEX IF NOT EXISTS document_case_id_idx ON document(case_id);
 CREATE INDEX IF NOT EXISTS document_user_id_idx ON document(user_id);
 CREATE INDEX IF NOT EXISTS document_status_idx ON document(status);
 CREATE INDEX IF NOT EXISTS document_chunk_document_id_idx ON document_chunk(document_id);
+CREATE INDEX IF NOT EXISTS document_chunk_fingerprint_idx ON document_chunk(document_id, fingerprint);
 CREATE INDEX IF NOT EXISTS report_case_id_idx ON report(case_id);
 CREATE INDEX IF NOT EXISTS report_user_id_idx ON report(user_id);
 CREATE INDEX IF NOT EXISTS report_status_idx ON report(status);
\ No newline at end of file